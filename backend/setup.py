@@ -32,6 +32,7 @@ requires = [
     'babel',
     'python-slugify',
     'preview-generator>=0.13',
+    'PyPDF2',
     'colour',
     'python-dateutil',
     'gitpython',
@@ -144,11 +145,15 @@ setup(
             'search index-populate = tracim_backend.command.search:SearchIndexIndexCommand',
             'search index-upgrade-experimental = tracim_backend.command.search:SearchIndexUpgradeCommand',
             'search index-drop = tracim_backend.command.search:SearchIndexDeleteCommand',
+            'search index-sync = tracim_backend.command.search:SearchIndexSyncCommand',
+            'search text-cache-cleanup = tracim_backend.command.search:SearchTextCacheCleanupCommand',
             'dev parameters list = tracim_backend.command.devtools:ParametersListCommand',
             'dev parameters value = tracim_backend.command.devtools:ParametersValueCommand',
             'dev test live-messages = tracim_backend.command.devtools:LiveMessageTesterCommand',
             'user delete = tracim_backend.command.cleanup:DeleteUserCommand',
             'user anonymize = tracim_backend.command.cleanup:AnonymizeUserCommand',
+            'messages delete = tracim_backend.command.cleanup:DeleteMessagesCommand',
+            'storage used-space-recompute = tracim_backend.command.storage:UsedSpaceRecomputeCommand',
         ]
     },
     message_extractors={'tracim_backend': [
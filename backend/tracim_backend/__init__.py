@@ -36,6 +36,7 @@ from tracim_backend.extensions import hapic
 from tracim_backend.lib.core.application import ApplicationApi
 from tracim_backend.lib.core.event import EventBuilder
 from tracim_backend.lib.core.plugins import init_plugin_manager
+from tracim_backend.lib.search.indexing import SearchIndexer
 from tracim_backend.lib.utils.authentification import BASIC_AUTH_WEBUI_REALM
 from tracim_backend.lib.utils.authentification import TRACIM_API_KEY_HEADER
 from tracim_backend.lib.utils.authentification import TRACIM_API_USER_LOGIN_HEADER
@@ -87,6 +88,7 @@ def web(global_config: OrderedDict, **local_settings) -> Router:
     # Init plugin manager
     plugin_manager = init_plugin_manager(app_config)
     plugin_manager.register(EventBuilder(app_config))
+    plugin_manager.register(SearchIndexer(app_config))
     settings["plugin_manager"] = plugin_manager
 
     configurator = Configurator(settings=settings, autocommit=True)
@@ -18,6 +18,7 @@ from tracim_backend.models.auth import Profile
 from tracim_backend.models.auth import User
 from tracim_backend.models.data import ActionDescription
 from tracim_backend.models.data import UserRoleInWorkspace
+from tracim_backend.models.event import Event
 
 
 class TracimValidator(object):
@@ -103,6 +104,20 @@ user_public_name_validator = Length(
 user_lang_validator = Length(min=User.MIN_LANG_LENGTH, max=User.MAX_LANG_LENGTH)
 user_role_validator = OneOf(UserRoleInWorkspace.get_all_role_slug())
 
+
+def event_types_validator(value: str) -> None:
+    """
+    Validate a string of event types separated by ','
+    """
+    if not value:
+        return
+    for event_type in value.split(","):
+        try:
+            Event.parse_event_type(event_type)
+        except ValueError as exc:
+            raise ValidationError('"{}" is not a valid event type'.format(event_type)) from exc
+
+
 # Dynamic validator #
 all_content_types_validator = OneOf(choices=[])
 
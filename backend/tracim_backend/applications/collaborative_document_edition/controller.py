@@ -34,6 +34,7 @@ from tracim_backend.applications.collaborative_document_edition.schema import Fi
 from tracim_backend.applications.content_file.controller import can_create_file
 from tracim_backend.config import CFG
 from tracim_backend.exceptions import ContentFilenameAlreadyUsedInFolder
+from tracim_backend.exceptions import ContentTreeTooDeep
 from tracim_backend.exceptions import EmptyLabelNotAllowed
 from tracim_backend.exceptions import FileTemplateNotAvailable
 from tracim_backend.exceptions import ParentNotFound
@@ -87,6 +88,7 @@ class CollaborativeDocumentEditionController(Controller):
     @hapic.handle_exception(UnallowedSubContent, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(ContentFilenameAlreadyUsedInFolder, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(ParentNotFound, HTTPStatus.BAD_REQUEST)
+    @hapic.handle_exception(ContentTreeTooDeep, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(FileTemplateNotAvailable, HTTPStatus.BAD_REQUEST)
     @check_right(can_create_file)
     @hapic.input_path(WorkspaceIdPathSchema())
@@ -124,7 +126,6 @@ class CollaborativeDocumentEditionController(Controller):
             collaborative_document_edition_api.update_content_from_template(
                 content=content, template_filename=hapic_data.body.template
             )
-        api.execute_created_content_actions(content)
         return api.get_content_in_context(content)
 
     def bind(self, configurator: Configurator) -> None:
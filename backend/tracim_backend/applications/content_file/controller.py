@@ -12,6 +12,7 @@ from tracim_backend.config import CFG
 from tracim_backend.exceptions import ContentFilenameAlreadyUsedInFolder
 from tracim_backend.exceptions import ContentNotFound
 from tracim_backend.exceptions import ContentStatusException
+from tracim_backend.exceptions import ContentTreeTooDeep
 from tracim_backend.exceptions import EmptyLabelNotAllowed
 from tracim_backend.exceptions import FileSizeOverMaxLimitation
 from tracim_backend.exceptions import FileSizeOverOwnerEmptySpace
@@ -81,6 +82,7 @@ class FileController(Controller):
     @hapic.handle_exception(UnallowedSubContent, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(ContentFilenameAlreadyUsedInFolder, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(ParentNotFound, HTTPStatus.BAD_REQUEST)
+    @hapic.handle_exception(ContentTreeTooDeep, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(FileSizeOverMaxLimitation, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(FileSizeOverWorkspaceEmptySpace, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(FileSizeOverOwnerEmptySpace, HTTPStatus.BAD_REQUEST)
@@ -132,7 +134,6 @@ class FileController(Controller):
                 new_mimetype=_file.type,
                 new_content=_file.file,
             )
-        api.execute_created_content_actions(content)
         return api.get_content_in_context(content)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_FILE_ENDPOINTS])
@@ -178,7 +179,6 @@ class FileController(Controller):
             )
 
         api.save(content)
-        api.execute_update_content_actions(content)
         return
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_FILE_ENDPOINTS])
@@ -655,7 +655,6 @@ class FileController(Controller):
                 new_content=hapic_data.body.raw_content,
             )
             api.save(content)
-            api.execute_update_content_actions(content)
         return api.get_content_in_context(content)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_FILE_ENDPOINTS])
@@ -679,7 +678,7 @@ class FileController(Controller):
         )
         content = api.get_one(hapic_data.path.content_id, content_type=content_type_list.Any_SLUG)
         revisions = content.revisions
-        return [api.get_revision_in_context(revision) for revision in revisions]
+        return api.get_revisions_in_context(revisions)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_FILE_ENDPOINTS])
     @hapic.handle_exception(EmptyLabelNotAllowed, HTTPStatus.BAD_REQUEST)
@@ -709,7 +708,6 @@ class FileController(Controller):
         with new_revision(session=request.dbsession, tm=transaction.manager, content=content):
             api.set_status(content, hapic_data.body.status)
             api.save(content)
-            api.execute_update_content_actions(content)
         return
 
     def bind(self, configurator: Configurator) -> None:
@@ -96,7 +96,6 @@ class HTMLDocumentController(Controller):
                 new_content=hapic_data.body.raw_content,
             )
             api.save(content)
-            api.execute_update_content_actions(content)
         return api.get_content_in_context(content)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_HTML_DOCUMENT_ENDPOINTS])
@@ -120,7 +119,7 @@ class HTMLDocumentController(Controller):
         )
         content = api.get_one(hapic_data.path.content_id, content_type=content_type_list.Any_SLUG)
         revisions = content.revisions
-        return [api.get_revision_in_context(revision) for revision in revisions]
+        return api.get_revisions_in_context(revisions)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_HTML_DOCUMENT_ENDPOINTS])
     @check_right(is_contributor)
@@ -149,7 +148,6 @@ class HTMLDocumentController(Controller):
         with new_revision(session=request.dbsession, tm=transaction.manager, content=content):
             api.set_status(content, hapic_data.body.status)
             api.save(content)
-            api.execute_update_content_actions(content)
         return
 
     def bind(self, configurator: Configurator) -> None:
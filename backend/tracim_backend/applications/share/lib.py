@@ -5,6 +5,7 @@ import typing
 from urllib.parse import quote
 import uuid
 
+from sqlalchemy import func
 from sqlalchemy.orm import Query
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.exc import NoResultFound
@@ -121,6 +122,24 @@ class ShareLib(object):
     def get_content_shares(self, content: Content) -> typing.List[ContentShare]:
         return self.base_query().filter(ContentShare.content_id == content.content_id).all()
 
+    def get_contents_shares_count(self, contents: typing.List[Content]) -> typing.Dict[int, int]:
+        """
+        Batch version of len(get_content_shares(content)) in one query.
+        :return: dict of content_id: number of shares of the content
+        """
+        shares_count = {content.content_id: 0 for content in contents}
+        if not shares_count:
+            return shares_count
+        query = (
+            self.base_query()
+            .filter(ContentShare.content_id.in_(shares_count.keys()))
+            .group_by(ContentShare.content_id)
+            .with_entities(ContentShare.content_id, func.count(ContentShare.share_id))
+        )
+        for content_id, content_shares_count in query:
+            shares_count[content_id] = content_shares_count
+        return shares_count
+
     def get_content_share_in_context(self, content_share: ContentShare) -> ContentShareInContext:
         return ContentShareInContext(content_share, self._session, self._config, self._user)
 
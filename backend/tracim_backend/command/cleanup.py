@@ -1,4 +1,6 @@
 import argparse
+from datetime import datetime
+from datetime import timedelta
 import traceback
 import typing
 
@@ -13,6 +15,7 @@ from tracim_backend.extensions import app_list
 from tracim_backend.lib.cleanup.cleanup import CleanupLib
 from tracim_backend.lib.cleanup.cleanup import UserNeedAnonymization
 from tracim_backend.lib.core.application import ApplicationApi
+from tracim_backend.lib.core.event import EventApi
 from tracim_backend.lib.core.user import UserApi
 from tracim_backend.models.auth import User
 from tracim_backend.models.tracim_session import unprotected_content_revision
@@ -367,3 +370,69 @@ class AnonymizeUserCommand(AppContextCommand):
                     )
                 )
                 print("~~~~~~~~~~")
+
+
+class DeleteMessagesCommand(AppContextCommand):
+    def get_description(self) -> str:
+        return """Remove old read messages and events without messages from the database"""
+
+    def get_parser(self, prog_name: str) -> argparse.ArgumentParser:
+        parser = super().get_parser(prog_name)
+        parser.add_argument(
+            "--dry-run",
+            help="dry-run mode, simulate action to be done but do not modify anything",
+            dest="dry_run_mode",
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "--days",
+            help="delete messages read and events created more than this number of days ago",
+            dest="days",
+            type=int,
+            default=30,
+        )
+        parser.add_argument(
+            "--batch-size",
+            help="number of rows deleted in each transaction",
+            dest="batch_size",
+            type=int,
+            default=1000,
+        )
+        return parser
+
+    def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
+        self._session = app_context["request"].dbsession
+        self._app_config = app_context["registry"].settings["CFG"]
+        transaction_manager = app_context["request"].tm
+        event_api = EventApi(current_user=None, session=self._session, config=self._app_config)
+        date_limit = datetime.utcnow() - timedelta(days=parsed_args.days)
+
+        if parsed_args.dry_run_mode:
+            print("(!) Running in dry-run mode, no changes will be applied.")
+            print(
+                "{} read messages and at least {} events would be deleted".format(
+                    event_api.get_read_messages_count(date_limit),
+                    event_api.get_orphan_events_count(date_limit),
+                )
+            )
+            return
+
+        deleted_messages_count = 0
+        deleted_count = event_api.delete_read_messages(date_limit, parsed_args.batch_size)
+        while deleted_count:
+            deleted_messages_count += deleted_count
+            # INFO - each batch is committed to bound the size of transactions
+            transaction_manager.commit()
+            transaction_manager.begin()
+            deleted_count = event_api.delete_read_messages(date_limit, parsed_args.batch_size)
+        print("{} read messages deleted".format(deleted_messages_count))
+
+        deleted_events_count = 0
+        deleted_count = event_api.delete_orphan_events(date_limit, parsed_args.batch_size)
+        while deleted_count:
+            deleted_events_count += deleted_count
+            transaction_manager.commit()
+            transaction_manager.begin()
+            deleted_count = event_api.delete_orphan_events(date_limit, parsed_args.batch_size)
+        print("{} events without messages deleted".format(deleted_events_count))
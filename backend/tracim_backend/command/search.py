@@ -1,11 +1,17 @@
 import argparse
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+import typing
 
+import dateutil.parser
 from pyramid.scripting import AppEnvironment
 
 from tracim_backend.app_models.contents import content_type_list
 from tracim_backend.command import AppContextCommand
 from tracim_backend.lib.core.content import ContentApi
 from tracim_backend.lib.search.search_factory import SearchFactory
+from tracim_backend.lib.search.text_extraction import ExtractedTextCache
 from tracim_backend.models.context_models import ContentInContext
 
 
@@ -122,6 +128,103 @@ class SearchIndexIndexCommand(IndexingCommand):
             self._index_all_contents()
 
 
+def parse_since(value: str) -> typing.Union[int, datetime]:
+    """
+    :return: the revision id or the naive UTC date given as --since argument
+    """
+    if value.isdigit():
+        return int(value)
+    try:
+        date = dateutil.parser.isoparse(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            '"{}" is neither a revision id nor an ISO 8601 date'.format(value)
+        )
+    if date.tzinfo:
+        date = date.astimezone(timezone.utc).replace(tzinfo=None)
+    return date
+
+
+class SearchIndexSyncCommand(AppContextCommand):
+    def get_description(self) -> str:
+        return "index contents changed since last synchronization and remove documents of deleted contents"
+
+    def get_parser(self, prog_name: str) -> argparse.ArgumentParser:
+        parser = super().get_parser(prog_name)
+        parser.add_argument(
+            "--since",
+            help="revision id or ISO 8601 date (UTC if no timezone) of the oldest changes to "
+            "index, if not provided: changes since last synchronization, "
+            "all contents if there was none",
+            dest="since",
+            required=False,
+            default=None,
+            type=parse_since,
+        )
+        return parser
+
+    def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
+        self._session = app_context["request"].dbsession
+        self._app_config = app_context["registry"].settings["CFG"]
+        self.search_api = SearchFactory.get_search_lib(
+            current_user=None, session=self._session, config=self._app_config
+        )
+        print("Synchronizing index")
+        results = self.search_api.sync_index(since=parsed_args.since)
+        nb_index_errors = results.get_nb_index_errors()
+        nb_contents_to_index = results.get_nb_contents_to_index()
+        print(
+            "{} documents of deleted content where removed".format(
+                results.get_nb_deleted_contents()
+            )
+        )
+        if nb_index_errors == 0:
+            print("All {} changed content where indexed".format(nb_contents_to_index))
+        else:
+            print(
+                "Warning ! {}/{} contents cannot be indexed properly, "
+                "synchronization checkpoint was not updated.".format(
+                    nb_index_errors, nb_contents_to_index
+                )
+            )
+
+
+class SearchTextCacheCleanupCommand(AppContextCommand):
+    def get_description(self) -> str:
+        return "Remove texts not used for a while from the extracted text cache"
+
+    def get_parser(self, prog_name: str) -> argparse.ArgumentParser:
+        parser = super().get_parser(prog_name)
+        parser.add_argument(
+            "--dry-run",
+            help="dry-run mode, simulate action to be done but do not modify anything",
+            dest="dry_run_mode",
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "--days",
+            help="remove texts not used by indexing for more than this number of days",
+            dest="days",
+            type=int,
+            default=30,
+        )
+        return parser
+
+    def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
+        self._app_config = app_context["registry"].settings["CFG"]
+        if not self._app_config.SEARCH__EXTRACTED_TEXT_CACHE_DIR:
+            print("Extracted text cache is disabled, nothing to remove")
+            return
+        cache = ExtractedTextCache(self._app_config.SEARCH__EXTRACTED_TEXT_CACHE_DIR)
+        date_limit = datetime.utcnow() - timedelta(days=parsed_args.days)
+        if parsed_args.dry_run_mode:
+            print("(!) Running in dry-run mode, no changes will be applied.")
+            print("{} texts would be removed".format(cache.delete_unused(date_limit, dry_run=True)))
+            return
+        print("{} texts removed".format(cache.delete_unused(date_limit)))
+
+
 class SearchIndexDeleteCommand(AppContextCommand):
     def get_description(self) -> str:
         return "Delete all index, alias and template of tracim document"
@@ -0,0 +1,21 @@
+import argparse
+
+from pyramid.scripting import AppEnvironment
+
+from tracim_backend.command import AppContextCommand
+from tracim_backend.lib.core.used_space import set_missing_file_sizes
+from tracim_backend.lib.core.used_space import update_users_used_space
+from tracim_backend.lib.core.used_space import update_workspaces_used_space
+
+
+class UsedSpaceRecomputeCommand(AppContextCommand):
+    def get_description(self) -> str:
+        return "compute again used space of all workspaces and users, setting missing file sizes"
+
+    def take_app_action(self, parsed_args: argparse.Namespace, app_context: AppEnvironment) -> None:
+        self._session = app_context["request"].dbsession
+        updated_revisions_count = set_missing_file_sizes(self._session)
+        print("File size of {} revisions set".format(updated_revisions_count))
+        update_workspaces_used_space(self._session)
+        update_users_used_space(self._session)
+        print("Used space of all workspaces and users computed again")
@@ -5,6 +5,7 @@ import typing
 
 from depot.manager import DepotManager
 from paste.deploy.converters import asbool
+from sqlalchemy.engine.url import make_url
 
 from tracim_backend.app_models.validator import update_validators
 from tracim_backend.apps import load_apps
@@ -14,6 +15,8 @@ from tracim_backend.exceptions import NotReadableDirectory
 from tracim_backend.exceptions import NotWritableDirectory
 from tracim_backend.extensions import app_list
 from tracim_backend.lib.core.application import ApplicationApi
+from tracim_backend.lib.search.text_extraction import get_text_extractor
+from tracim_backend.lib.search.text_extraction import load_text_extractor
 from tracim_backend.lib.utils.app import TracimApplication
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.translation import DEFAULT_FALLBACK_LANG
@@ -309,12 +312,12 @@ class CFG(object):
         """Parse configuration file and env variables"""
         self.log_config_header("Global config parameters:")
         self._load_global_config()
+        self.log_config_header("Jobs config parameters:")
+        self._load_jobs_config()
         self.log_config_header("Live Messages Config parameters:")
         self._load_live_messages_config()
         self.log_config_header("Limitation config parameters:")
         self._load_limitation_config()
-        self.log_config_header("Jobs config parameters:")
-        self._load_jobs_config()
         self.log_config_header("Email config parameters:")
         self._load_email_config()
         self.log_config_header("LDAP config parameters:")
@@ -428,6 +431,9 @@ class CFG(object):
             cast_func=PreviewDim.from_string,
             separator=",",
         )
+        self.PREVIEW__PREGENERATION__ENABLED = asbool(
+            self.get_raw_config("preview.pregeneration.enabled", "False")
+        )
 
         self.FRONTEND__SERVE = asbool(self.get_raw_config("frontend.serve", "True"))
         # INFO - G.M - 2018-08-06 - we pretend that frontend_dist_folder
@@ -459,9 +465,34 @@ class CFG(object):
         )
 
     def _load_live_messages_config(self) -> None:
+        self.LIVE_MESSAGES__TRANSPORT = self.get_raw_config(
+            "live_messages.transport", "grip"
+        ).lower()
         self.LIVE_MESSAGES__CONTROL_URI = self.get_raw_config(
             "live_messages.control_uri", "http://localhost:5561"
         )
+        self.LIVE_MESSAGES__MAX_STREAMS = int(
+            self.get_raw_config("live_messages.max_streams", "10")
+        )
+        self.LIVE_MESSAGES__COALESCING_WINDOW = int(
+            self.get_raw_config("live_messages.coalescing_window", "0")
+        )
+        # INFO - in sync jobs mode, each web process publishes events using its own receivers
+        # cache, which is not invalidated by the changes of other processes: caching could
+        # send events to removed members, so the cache is disabled by default.
+        default_receivers_cache_ttl = "0"
+        if self.JOBS__PROCESSING_MODE == self.CST.ASYNC:
+            default_receivers_cache_ttl = "60"
+        self.LIVE_MESSAGES__RECEIVERS_CACHE_TTL = int(
+            self.get_raw_config("live_messages.receivers_cache_ttl", default_receivers_cache_ttl)
+        )
+        self.LIVE_MESSAGES__STATSD__HOST = self.get_raw_config("live_messages.statsd.host", "")
+        self.LIVE_MESSAGES__STATSD__PORT = int(
+            self.get_raw_config("live_messages.statsd.port", "8125")
+        )
+        self.LIVE_MESSAGES__STATSD__PREFIX = self.get_raw_config(
+            "live_messages.statsd.prefix", "tracim"
+        )
 
     def _load_limitation_config(self) -> None:
         self.LIMITATION__SHAREDSPACE_PER_USER = int(
@@ -714,6 +745,30 @@ class CFG(object):
         self.SEARCH__ELASTICSEARCH__INGEST__SIZE_LIMIT = int(
             self.get_raw_config("search.elasticsearch.ingest.size_limit", "52428800")
         )
+        self.SEARCH__ELASTICSEARCH__INGEST__MODE = self.get_raw_config(
+            "search.elasticsearch.ingest.mode", "local"
+        )
+        self.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTORS = string_to_unique_item_list(
+            self.get_raw_config(
+                "search.elasticsearch.ingest.text_extractors",
+                ",".join(
+                    (
+                        "tracim_backend.lib.search.text_extraction:PlainTextExtractor",
+                        "tracim_backend.lib.search.text_extraction:PdfTextExtractor",
+                        "tracim_backend.lib.search.text_extraction:OfficeDocumentTextExtractor",
+                    )
+                ),
+            ),
+            separator=",",
+            cast_func=str,
+            do_strip=True,
+        )
+        self.SEARCH__ELASTICSEARCH__INGEST__TEXT_SIZE_LIMIT = int(
+            self.get_raw_config("search.elasticsearch.ingest.text_size_limit", "1048576")
+        )
+        self.SEARCH__EXTRACTED_TEXT_CACHE_DIR = self.get_raw_config(
+            "search.extracted_text_cache_dir", ""
+        )
         self.SEARCH__ELASTICSEARCH__HOST = self.get_raw_config(
             "search.elasticsearch.host", "localhost"
         )
@@ -723,6 +778,15 @@ class CFG(object):
         self.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT = int(
             self.get_raw_config("search.elasticsearch.request_timeout", "60")
         )
+        self.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE = int(
+            self.get_raw_config("search.elasticsearch.indexing.bulk_chunk_size", "500")
+        )
+        self.SEARCH__ELASTICSEARCH__INDEXING__BULK_THREAD_COUNT = int(
+            self.get_raw_config("search.elasticsearch.indexing.bulk_thread_count", "4")
+        )
+        self.SEARCH__ELASTICSEARCH__INDEXING__BULK_MAX_CHUNK_BYTES = int(
+            self.get_raw_config("search.elasticsearch.indexing.bulk_max_chunk_bytes", "10485760")
+        )
 
     def _load_jobs_config(self) -> None:
         self.JOBS__PROCESSING_MODE = self.get_raw_config("jobs.processing_mode", "sync").upper()
@@ -823,7 +887,47 @@ class CFG(object):
             )
 
     def _check_live_messages_config_validity(self) -> None:
-        self.check_mandatory_param("LIVE_MESSAGES__CONTROL_URI", self.LIVE_MESSAGES__CONTROL_URI)
+        transports = ("grip", "redis", "local")
+        if self.LIVE_MESSAGES__TRANSPORT not in transports:
+            raise ConfigurationError(
+                'ERROR: live_messages.transport given "{}" is invalid, valid values are {}'.format(
+                    self.LIVE_MESSAGES__TRANSPORT, ", ".join(transports)
+                )
+            )
+        if self.LIVE_MESSAGES__TRANSPORT == "grip":
+            self.check_mandatory_param(
+                "LIVE_MESSAGES__CONTROL_URI",
+                self.LIVE_MESSAGES__CONTROL_URI,
+                when_str='when live_messages.transport is "grip"',
+            )
+        # INFO - events published by the async jobs worker would not reach the
+        # in-process broker of the web server
+        if self.LIVE_MESSAGES__TRANSPORT == "local" and self.JOBS__PROCESSING_MODE != self.CST.SYNC:
+            raise ConfigurationError(
+                'ERROR: live_messages.transport "local" needs jobs.processing_mode to be "sync"'
+            )
+        if self.LIVE_MESSAGES__MAX_STREAMS < 1:
+            raise ConfigurationError(
+                "ERROR: live_messages.max_streams should be a strictly positive number"
+            )
+        if self.LIVE_MESSAGES__TRANSPORT != "grip":
+            logger.warning(
+                self,
+                'live_messages.transport "{}" serves each stream with a thread of the web '
+                "server: it is meant for development, use grip in production".format(
+                    self.LIVE_MESSAGES__TRANSPORT
+                ),
+            )
+        if self.LIVE_MESSAGES__COALESCING_WINDOW < 0:
+            raise ConfigurationError(
+                "ERROR: live_messages.coalescing_window should be a positive number of "
+                "milliseconds or 0 to disable events coalescing"
+            )
+        if self.LIVE_MESSAGES__RECEIVERS_CACHE_TTL < 0:
+            raise ConfigurationError(
+                "ERROR: live_messages.receivers_cache_ttl should be a positive number of "
+                "seconds or 0 to disable the receivers cache"
+            )
 
     def _check_email_config_validity(self) -> None:
         """
@@ -971,7 +1075,7 @@ class CFG(object):
             )
 
     def _check_search_config_validity(self):
-        search_engine_valid = ["elasticsearch", "simple"]
+        search_engine_valid = ["elasticsearch", "simple", "sql"]
         if self.SEARCH__ENGINE not in search_engine_valid:
 
             search_engine_list_str = ", ".join(
@@ -980,6 +1084,18 @@ class CFG(object):
             raise ConfigurationError(
                 "ERROR: SEARCH__ENGINE valid values are {}.".format(search_engine_list_str)
             )
+        if self.SEARCH__ENGINE == "sql":
+            # INFO - sql search uses database full-text indexes
+            sql_search_backends_valid = ["postgresql", "sqlite"]
+            database_backend = make_url(self.SQLALCHEMY__URL).get_backend_name()
+            if database_backend not in sql_search_backends_valid:
+                raise ConfigurationError(
+                    'ERROR: "sql" search engine is not available with "{}" database,'
+                    " it requires one of {}.".format(
+                        database_backend,
+                        ", ".join('"{}"'.format(backend) for backend in sql_search_backends_valid),
+                    )
+                )
         # FIXME - G.M - 2019-06-07 - hack to force index document alias check validity
         # see https://github.com/tracim/tracim/issues/1835
         if self.SEARCH__ENGINE == "elasticsearch":
@@ -988,6 +1104,45 @@ class CFG(object):
                 self.SEARCH__ELASTICSEARCH__INDEX_ALIAS,
                 when_str="if elasticsearch search feature is enabled",
             )
+            for param_name in (
+                "SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE",
+                "SEARCH__ELASTICSEARCH__INDEXING__BULK_THREAD_COUNT",
+                "SEARCH__ELASTICSEARCH__INDEXING__BULK_MAX_CHUNK_BYTES",
+            ):
+                if getattr(self, param_name) < 1:
+                    raise ConfigurationError(
+                        "ERROR: {} should be a positive integer.".format(param_name)
+                    )
+            ingest_mode_valid = [self.CST.INGEST_MODE_ATTACHMENT, self.CST.INGEST_MODE_LOCAL]
+            if self.SEARCH__ELASTICSEARCH__INGEST__MODE not in ingest_mode_valid:
+                raise ConfigurationError(
+                    "ERROR: SEARCH__ELASTICSEARCH__INGEST__MODE valid values are {}.".format(
+                        ", ".join('"{}"'.format(mode) for mode in ingest_mode_valid)
+                    )
+                )
+            if self.SEARCH__ELASTICSEARCH__INGEST__MODE == self.CST.INGEST_MODE_LOCAL:
+                if self.SEARCH__ELASTICSEARCH__INGEST__TEXT_SIZE_LIMIT < 1:
+                    raise ConfigurationError(
+                        "ERROR: SEARCH__ELASTICSEARCH__INGEST__TEXT_SIZE_LIMIT "
+                        "should be a positive integer."
+                    )
+                extractors = [
+                    load_text_extractor(extractor_path)
+                    for extractor_path in self.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTORS
+                ]
+                for mimetype in self.CST.COMMON_DOCUMENT_MIMETYPES:
+                    if not get_text_extractor(extractors, mimetype):
+                        logger.warning(
+                            self,
+                            'No text extractor supports mimetype "{}" in "local" ingest mode: '
+                            "content of these files will not be indexed".format(mimetype),
+                        )
+                if self.SEARCH__EXTRACTED_TEXT_CACHE_DIR:
+                    self.check_directory_path_param(
+                        "SEARCH__EXTRACTED_TEXT_CACHE_DIR",
+                        self.SEARCH__EXTRACTED_TEXT_CACHE_DIR,
+                        writable=True,
+                    )
 
     # INFO - G.M - 2019-04-05 - Others methods
     def _check_consistency(self):
@@ -1022,6 +1177,15 @@ class CFG(object):
         ASYNC = "ASYNC"
         SYNC = "SYNC"
 
+        INGEST_MODE_ATTACHMENT = "attachment"
+        INGEST_MODE_LOCAL = "local"
+        # INFO - mimetypes for which a missing text extractor is worth a warning in "local" mode
+        COMMON_DOCUMENT_MIMETYPES = (
+            "application/pdf",
+            "application/vnd.oasis.opendocument.text",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        )
+
     def check_mandatory_param(self, param_name: str, value: typing.Any, when_str: str = "") -> None:
         """
         Check if param value is not falsy value, if falsy, raise ConfigurationError
@@ -86,6 +86,7 @@ class ErrorCode(IntEnum):
     USER_ROLE_ALREADY_EXIST = 3008
     CONFLICTING_MOVE_IN_ITSELF = 3009
     CONFLICTING_MOVE_IN_CHILD = 3010
+    CONTENT_TREE_TOO_DEEP = 3011
 
     # Auth Error
     AUTHENTICATION_FAILED = 4001
@@ -101,3 +102,4 @@ class ErrorCode(IntEnum):
     FILE_SIZE_OVER_MAX_LIMITATION = 6002
     FILE_SIZE_OVER_WORKSPACE_EMPTY_SPACE = 6003
     FILE_SIZE_OVER_OWNER_EMPTY_SPACE = 6004
+    TOO_MANY_LIVE_MESSAGES_STREAMS = 6005
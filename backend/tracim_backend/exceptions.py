@@ -307,6 +307,10 @@ class FileSizeOverOwnerEmptySpace(TracimException):
     error_code = ErrorCode.FILE_SIZE_OVER_OWNER_EMPTY_SPACE
 
 
+class TooManyLiveMessagesStreams(TracimException):
+    error_code = ErrorCode.TOO_MANY_LIVE_MESSAGES_STREAMS
+
+
 class TracimUnavailablePreviewType(TracimException):
     error_code = ErrorCode.UNAVAILABLE_PREVIEW_TYPE
 
@@ -551,5 +555,9 @@ class ConflictingMoveInChild(TracimException):
     error_code = ErrorCode.CONFLICTING_MOVE_IN_CHILD
 
 
+class ContentTreeTooDeep(TracimException):
+    error_code = ErrorCode.CONTENT_TREE_TOO_DEEP
+
+
 class CannotDeleteUniqueRevisionWithoutDeletingContent(Exception):
     pass
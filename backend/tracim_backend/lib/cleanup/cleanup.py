@@ -16,6 +16,8 @@ from tracim_backend.lib.utils.logger import logger
 from tracim_backend.models.auth import User
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import FileBlob
+from tracim_backend.models.data import RevisionPreviewMetadata
 from tracim_backend.models.data import RevisionReadStatus
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
@@ -130,14 +132,53 @@ class CleanupLib(object):
             )
             self.safe_delete(read_status)
 
+        preview_metadata = self.session.query(RevisionPreviewMetadata).get(revision.revision_id)
+        if preview_metadata:
+            logger.info(
+                self, "delete preview metadata of revision {}".format(preview_metadata.revision_id)
+            )
+            self.safe_delete(preview_metadata)
+
         logger.info(
             self,
             "delete revision {} of content {}".format(revision.revision_id, revision.content_id),
         )
         revision_id = revision.revision_id
+        file_blob = revision.file_blob
         self.safe_delete(revision)
+        if file_blob:
+            self.delete_file_blob_if_unused(file_blob, deleted_revision_id=revision_id)
         return revision_id
 
+    def delete_file_blob_if_unused(
+        self, file_blob: FileBlob, deleted_revision_id: typing.Optional[int] = None
+    ) -> bool:
+        """
+        Delete file blob (and its stored file) if no revision references it anymore.
+        :param file_blob: file blob to delete
+        :param deleted_revision_id: id of a revision referencing the blob which is being deleted
+        :return: True if file blob is deleted
+        """
+        references_query = self.session.query(ContentRevisionRO).filter(
+            ContentRevisionRO.file_blob_id == file_blob.file_blob_id
+        )
+        if deleted_revision_id is not None:
+            references_query = references_query.filter(
+                ContentRevisionRO.revision_id != deleted_revision_id
+            )
+        references_count = references_query.count()
+        if references_count:
+            logger.info(
+                self,
+                "keep file blob {}, still used by {} revision(s)".format(
+                    file_blob.file_blob_id, references_count
+                ),
+            )
+            return False
+        logger.info(self, "delete file blob {}".format(file_blob.file_blob_id))
+        self.safe_delete(file_blob)
+        return True
+
     def delete_content(self, content: Content, recursively: bool = True) -> typing.List[str]:
         """
         Delete content and associated stuff:
@@ -162,8 +203,15 @@ class CleanupLib(object):
 
         # INFO - G.M - 2019-12-11 - delete children of content
         if recursively:
-            for children in content.get_children(recursively=recursively):
-                self.delete_content(children)
+            # INFO - get_children(recursively=True) returns all descendants, delete the deepest
+            # ones first and do not recurse again to delete each content only once.
+            descendants = sorted(
+                content.get_children(recursively=True),
+                key=lambda descendant: len(descendant.ancestor_ids),
+                reverse=True,
+            )
+            for children in descendants:
+                self.delete_content(children, recursively=False)
 
         content.cached_revision_id = None
         for revision in content.revisions:
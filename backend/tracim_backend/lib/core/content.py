@@ -5,21 +5,29 @@ import os
 import typing
 
 from depot.io.interfaces import StoredFile
-from depot.io.utils import FileIntent
 from depot.manager import DepotManager
 from preview_generator.exception import UnavailablePreviewType
 from preview_generator.exception import UnsupportedMimeType
 from preview_generator.manager import PreviewManager
 from sqlalchemy import desc
 from sqlalchemy import func
+from sqlalchemy import literal
 from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Query
+from sqlalchemy.orm import aliased
 from sqlalchemy.orm import contains_eager
+from sqlalchemy.orm import joinedload
 from sqlalchemy.orm.attributes import QueryableAttribute
 from sqlalchemy.orm.attributes import get_history
 from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.sql.elements import ColumnElement
 from sqlalchemy.sql.elements import and_
+from sqlalchemy.types import DateTime
+from sqlalchemy.types import Integer
+from sqlalchemy.types import String
 import transaction
+from zope.sqlalchemy import mark_changed
 
 from tracim_backend.app_models.contents import FOLDER_TYPE
 from tracim_backend.app_models.contents import content_status_list
@@ -31,6 +39,7 @@ from tracim_backend.exceptions import ContentFilenameAlreadyUsedInFolder
 from tracim_backend.exceptions import ContentInNotEditableState
 from tracim_backend.exceptions import ContentNamespaceDoNotMatch
 from tracim_backend.exceptions import ContentNotFound
+from tracim_backend.exceptions import ContentTreeTooDeep
 from tracim_backend.exceptions import ContentTypeNotExist
 from tracim_backend.exceptions import EmptyCommentContentNotAllowed
 from tracim_backend.exceptions import EmptyLabelNotAllowed
@@ -47,9 +56,9 @@ from tracim_backend.exceptions import UnallowedSubContent
 from tracim_backend.exceptions import UnavailablePreview
 from tracim_backend.exceptions import WorkspacesDoNotMatch
 from tracim_backend.lib.core.notifications import NotifierFactory
+from tracim_backend.lib.core.preview import get_preview_manager
+from tracim_backend.lib.core.preview import schedule_previews_generation
 from tracim_backend.lib.core.userworkspace import RoleApi
-from tracim_backend.lib.core.workspace import WorkspaceApi
-from tracim_backend.lib.search.search_factory import SearchFactory
 from tracim_backend.lib.utils.app import TracimContentType
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.sanitizer import HtmlSanitizer
@@ -57,16 +66,22 @@ from tracim_backend.lib.utils.sanitizer import HtmlSanitizerConfig
 from tracim_backend.lib.utils.translation import Translator
 from tracim_backend.lib.utils.utils import cmp_to_key
 from tracim_backend.lib.utils.utils import current_date_for_filename
+from tracim_backend.lib.utils.utils import get_file_size
 from tracim_backend.lib.utils.utils import preview_manager_page_format
 from tracim_backend.models.auth import User
 from tracim_backend.models.context_models import ContentInContext
+from tracim_backend.models.context_models import ContentInContextPrefetch
 from tracim_backend.models.context_models import PreviewAllowedDim
 from tracim_backend.models.context_models import RevisionInContext
+from tracim_backend.models.data import ANCESTORS_PATH_MAX_LENGTH
+from tracim_backend.models.data import ANCESTORS_PATH_SEPARATOR
 from tracim_backend.models.data import ActionDescription
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import ContentNamespaces
 from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import FileBlob
 from tracim_backend.models.data import NodeTreeItem
+from tracim_backend.models.data import RevisionPreviewMetadata
 from tracim_backend.models.data import RevisionReadStatus
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
@@ -144,6 +159,9 @@ class ContentApi(object):
     #     ContentType.MarkdownPage,
     # )
 
+    # INFO - number of contents checked per query by get_unread_status()
+    UNREAD_STATUS_BATCH_SIZE = 100
+
     def __init__(
         self,
         session: TracimSession,
@@ -170,13 +188,16 @@ class ContentApi(object):
         self._show_all_type_of_contents_in_treeview = all_content_in_treeview
         self._force_show_all_types = force_show_all_types
         self._disable_user_workspaces_filter = disable_user_workspaces_filter
-        self.preview_manager = PreviewManager(self._config.PREVIEW_CACHE_DIR, create_folder=True)
         default_lang = None
         if self._user:
             default_lang = self._user.lang
         self.translator = Translator(app_config=self._config, default_lang=default_lang)
         self.namespaces_filter = namespaces_filter
 
+    @property
+    def preview_manager(self) -> PreviewManager:
+        return get_preview_manager(self._config)
+
     @contextmanager
     def show(
         self, show_archived: bool = False, show_deleted: bool = False, show_temporary: bool = False
@@ -205,10 +226,117 @@ class ContentApi(object):
     def get_content_in_context(self, content: Content) -> ContentInContext:
         return ContentInContext(content, self._session, self._config, self._user)
 
+    def get_contents_in_context(
+        self, contents: typing.Iterable[Content]
+    ) -> typing.List[ContentInContext]:
+        """
+        Same as get_content_in_context() for a list of contents, data needed
+        to serialize these contents is loaded once for the whole list.
+        """
+        contents = list(contents)
+        prefetch = ContentInContextPrefetch(contents, self._session, self._config, self._user)
+        return [
+            ContentInContext(content, self._session, self._config, self._user, prefetch=prefetch)
+            for content in contents
+        ]
+
+    def get_first_revisions(
+        self, contents: typing.Iterable[Content]
+    ) -> typing.Dict[int, ContentRevisionRO]:
+        """
+        Batch version of Content.first_revision, owners of revisions are loaded too.
+        :return: dict of content_id: first revision of the content
+        """
+        return self._get_revisions_by_content(contents, func.min(ContentRevisionRO.revision_id))
+
+    def get_last_revisions(
+        self, contents: typing.Iterable[Content]
+    ) -> typing.Dict[int, ContentRevisionRO]:
+        """
+        Batch version of Content.last_revision, owners of revisions are loaded too.
+        :return: dict of content_id: last revision of the content
+        """
+        return self._get_revisions_by_content(contents, func.max(ContentRevisionRO.revision_id))
+
+    def _get_revisions_by_content(
+        self, contents: typing.Iterable[Content], revision_id_aggregate: ColumnElement
+    ) -> typing.Dict[int, ContentRevisionRO]:
+        content_ids = [content.content_id for content in contents]
+        if not content_ids:
+            return {}
+        revision_ids = (
+            self._session.query(revision_id_aggregate)
+            .filter(ContentRevisionRO.content_id.in_(content_ids))
+            .group_by(ContentRevisionRO.content_id)
+            .subquery()
+        )
+        revisions = (
+            self._session.query(ContentRevisionRO)
+            .filter(ContentRevisionRO.revision_id.in_(revision_ids))
+            .options(joinedload(ContentRevisionRO.owner))
+        )
+        return {revision.content_id: revision for revision in revisions}
+
+    def get_ancestors(self, contents: typing.Iterable[Content]) -> typing.Dict[int, Content]:
+        """
+        Load ancestors of all given contents in one query.
+        :return: dict of content_id: content for all ancestors of given contents
+        """
+        ancestor_ids = {ancestor_id for content in contents for ancestor_id in content.ancestor_ids}
+        if not ancestor_ids:
+            return {}
+        ancestors = self.get_canonical_query().filter(Content.id.in_(ancestor_ids))
+        return {ancestor.content_id: ancestor for ancestor in ancestors}
+
+    def get_comments_by_content(
+        self, contents: typing.Iterable[Content]
+    ) -> typing.Dict[int, typing.List[Content]]:
+        """
+        Batch version of Content.get_comments(), comments of all given contents are
+        loaded in one query.
+        :return: dict of content_id: comments of the content
+        """
+        comments_by_content = {
+            content.content_id: [] for content in contents
+        }  # type: typing.Dict[int, typing.List[Content]]
+        if not comments_by_content:
+            return comments_by_content
+        comments = (
+            self.get_canonical_query()
+            .filter(ContentRevisionRO.parent_id.in_(comments_by_content.keys()))
+            .filter(ContentRevisionRO.type == content_type_list.Comment.slug)
+            .filter(ContentRevisionRO.is_deleted == False)  # noqa: E712
+            .filter(ContentRevisionRO.is_archived == False)  # noqa: E712
+            .order_by(ContentRevisionRO.content_id)
+        )
+        for comment in comments:
+            comments_by_content[comment.parent_id].append(comment)
+        return comments_by_content
+
     def get_revision_in_context(self, revision: ContentRevisionRO) -> RevisionInContext:
         # TODO - G.M - 2018-06-173 - create revision in context object
         return RevisionInContext(revision, self._session, self._config, self._user)
 
+    def get_revisions_in_context(
+        self, revisions: typing.Iterable[ContentRevisionRO]
+    ) -> typing.List[RevisionInContext]:
+        """
+        Same as get_revision_in_context() for a list of revisions, preview
+        metadata of revision files are loaded once for the whole list.
+        """
+        revisions = list(revisions)
+        previews_metadata = self.get_previews_metadata(revisions)
+        return [
+            RevisionInContext(
+                revision,
+                self._session,
+                self._config,
+                self._user,
+                preview_metadata=previews_metadata.get(revision.revision_id),
+            )
+            for revision in revisions
+        ]
+
     def get_canonical_query(self) -> Query:
         """
         Return the Content/ContentRevision base query who join these table on the last revision.
@@ -543,6 +671,9 @@ class ContentApi(object):
         if self._user:
             content.owner = self._user
         content.parent = parent
+        ancestors_path = content.build_ancestors_path()
+        self._check_ancestors_path_length(len(ancestors_path))
+        content.ancestors_path = ancestors_path
 
         content.workspace = workspace
         content.type = content_type.slug
@@ -592,59 +723,6 @@ class ContentApi(object):
             self.save(item, ActionDescription.COMMENT, do_notify=do_notify)
         return item
 
-    def execute_created_content_actions(self, content: Content) -> None:
-        """
-        WARNING ! This method Will be Deprecated soon, see
-        https://github.com/tracim/tracim/issues/1589 and
-        https://github.com/tracim/tracim/issues/1487
-
-        This method do post-create user actions
-        """
-        try:
-            content_in_context = ContentInContext(
-                content, config=self._config, dbsession=self._session
-            )
-            search_api = SearchFactory.get_search_lib(
-                current_user=self._user, config=self._config, session=self._session
-            )
-            search_api.index_content(content_in_context)
-        except Exception:
-            logger.exception(self, "Something goes wrong during indexing of new content")
-
-    def execute_update_content_actions(self, content: Content) -> None:
-        """
-        WARNING ! This method Will be Deprecated soon, see
-        https://github.com/tracim/tracim/issues/1589 and
-        https://github.com/tracim/tracim/issues/1487
-
-        This method do post-create user actions
-        """
-
-        try:
-            content_in_context = ContentInContext(
-                content, config=self._config, dbsession=self._session
-            )
-            search_api = SearchFactory.get_search_lib(
-                current_user=self._user, config=self._config, session=self._session
-            )
-            search_api.index_content(content_in_context)
-            # FIXME - G.M - 2019-06-03 - reindex children to avoid trouble when deleting, archiving
-            # see https://github.com/tracim/tracim/issues/1833
-            if content.last_revision.revision_type in (
-                ActionDescription.DELETION,
-                ActionDescription.ARCHIVING,
-                ActionDescription.UNARCHIVING,
-                ActionDescription.UNDELETION,
-            ):
-                for child_content in content.get_children(recursively=True):
-                    child_in_context = ContentInContext(
-                        child_content, config=self._config, dbsession=self._session
-                    )
-                    search_api.index_content(child_in_context)
-
-        except Exception:
-            logger.exception(self, "Something goes wrong during indexing of content")
-
     def get_one_from_revision(
         self, content_id: int, content_type: str, workspace: Workspace = None, revision_id=None
     ) -> Content:
@@ -752,8 +830,11 @@ class ContentApi(object):
         :param revision_id: The revision id of the filepath we want to return
         :return: The corresponding filepath
         """
+        revision = self.get_one_revision(revision_id)
+        return self._get_revision_filepath(revision)
+
+    def _get_revision_filepath(self, revision: ContentRevisionRO) -> str:
         try:
-            revision = self.get_one_revision(revision_id)
             depot = DepotManager.get()
             depot_stored_file = depot.get(revision.depot_file)  # type: StoredFile
             depot_file_path = depot_stored_file._file_path  # type: str
@@ -988,6 +1069,41 @@ class ContentApi(object):
             ) from exc
         return pdf_preview_path
 
+    def generate_previews(self, revision_id: int) -> None:
+        """
+        Generate previews of the file of a revision: jpeg preview of first page for
+        each allowed dimension and full pdf preview. Preview endpoints will then serve
+        them from preview cache.
+        :param revision_id: id of revision
+        """
+        try:
+            revision = self.get_one_revision(revision_id)
+        except NoResultFound:
+            logger.warning(self, "Revision {} not found, no preview generated".format(revision_id))
+            return
+        if not revision.depot_file:
+            return
+        preview_metadata = self.get_preview_metadata(revision_id, revision.file_extension)
+        try:
+            if preview_metadata.has_jpeg_preview and preview_metadata.page_nb:
+                for preview_dim in self._config.PREVIEW__JPG__ALLOWED_DIMS:
+                    self.get_jpg_preview_path(
+                        content_id=revision.content_id,
+                        revision_id=revision_id,
+                        page_number=1,
+                        file_extension=revision.file_extension,
+                        width=preview_dim.width,
+                        height=preview_dim.height,
+                    )
+            if preview_metadata.has_pdf_preview:
+                self.get_full_pdf_preview_path(revision_id, revision.file_extension)
+        except (UnavailablePreview, TracimUnavailablePreviewType):
+            logger.warning(
+                self,
+                "Unable to generate previews of revision {}".format(revision_id),
+                exc_info=True,
+            )
+
     def get_jpg_preview_allowed_dim(self) -> PreviewAllowedDim:
         """
         Get jpg preview allowed dimensions and strict bool param.
@@ -1177,6 +1293,49 @@ class ContentApi(object):
             parent_ids, content_type, workspace, label, order_by_properties, complete_path_to_id
         ).all()
 
+    def get_all_by_batches(
+        self, batch_size: int, excluded_content_types: typing.Iterable[str] = ()
+    ) -> typing.Iterator[typing.List[Content]]:
+        """
+        Same as get_all() without filters, but contents are queried by batches of
+        batch_size contents sorted by id: only one batch is loaded at a time.
+        :param excluded_content_types: slugs of content types which are not returned
+        """
+        query = self._base_query()
+        if excluded_content_types:
+            query = query.filter(Content.type.notin_(excluded_content_types))
+        last_content_id = 0
+        while True:
+            # INFO - keyset pagination: unlike offsets, the cost of a batch query
+            # does not depend on its position
+            contents = (
+                query.filter(Content.id > last_content_id)
+                .order_by(Content.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not contents:
+                return
+            yield contents
+            last_content_id = contents[-1].content_id
+
+    def get_by_ids_by_batches(
+        self, content_ids: typing.Iterable[int], batch_size: int
+    ) -> typing.Iterator[typing.List[Content]]:
+        """
+        Same as get_all_by_batches() but only for the given contents: unknown content ids
+        are ignored.
+        """
+        content_ids = sorted(content_ids)
+        query = self._base_query()
+        for start in range(0, len(content_ids), batch_size):
+            end = start + batch_size
+            contents = (
+                query.filter(Content.id.in_(content_ids[start:end])).order_by(Content.id).all()
+            )
+            if contents:
+                yield contents
+
     # TODO - G.M - 2018-07-17 - [Cleanup] Drop this method if unneeded
     # def get_children(self, parent_id: int, content_types: list, workspace: Workspace=None) -> typing.List[Content]:
     #     """
@@ -1506,7 +1665,7 @@ class ContentApi(object):
         if new_parent:
             if content.content_id == new_parent.content_id:
                 raise ConflictingMoveInItself("You can't move a content into itself")
-            if new_parent in content.get_children(recursively=True):
+            if new_parent.is_descendant_of(content):
                 raise ConflictingMoveInChild("You can't move a content into one of its children")
 
     def copy(
@@ -1871,10 +2030,26 @@ class ContentApi(object):
             )
         item.file_name = new_filename
         item.file_mimetype = new_mimetype
-        item.depot_file = FileIntent(new_content, new_filename, new_mimetype)
+        # INFO - size is computed first as storing the file content reads it
+        item.file_size = get_file_size(new_content)
+        file_blob = self._get_or_create_file_blob(new_content, new_filename, new_mimetype)
+        item.file_blob = file_blob
+        item.depot_file = file_blob.revision_depot_file
         item.revision_type = ActionDescription.REVISION
+        # INFO - in sync jobs mode without pregeneration, preview metadata are computed
+        # and stored on first read: the upload request does not wait for the preview manager
+        if (
+            self._config.PREVIEW__PREGENERATION__ENABLED
+            or self._config.JOBS__PROCESSING_MODE == self._config.CST.ASYNC
+        ):
+            schedule_previews_generation(self._session, self._config, item.revision)
         return item
 
+    def _get_or_create_file_blob(
+        self, content: typing.Union[bytes, typing.BinaryIO], filename: str, mimetype: str
+    ) -> FileBlob:
+        return FileBlob.get_or_create(self._session, content, filename, mimetype)
+
     def check_upload_size(self, content_length: int, workspace: Workspace) -> None:
         self._check_size_length_limitation(content_length)
         self.check_workspace_size_limitation(content_length, workspace)
@@ -1892,7 +2067,7 @@ class ContentApi(object):
             )
 
     def check_workspace_size_limitation(self, content_length: int, workspace: Workspace) -> None:
-        workspace_size = workspace.get_size()
+        workspace_size = workspace.used_space
         # INFO - G.M - 2019-08-23 - 0 mean no size limit
         if self._config.LIMITATION__WORKSPACE_SIZE == 0:
             return
@@ -1904,12 +2079,11 @@ class ContentApi(object):
             )
 
     def check_owner_size_limitation(self, content_length: int, workspace: Workspace) -> None:
-        wapi = WorkspaceApi(current_user=None, session=self._session, config=self._config)
         owner_allowed_space = workspace.owner.allowed_space
         # INFO - G.M - 2019-10-08 - 0 mean no size limit
         if owner_allowed_space == 0:
             return
-        owner_used_space = wapi.get_user_used_space(workspace.owner)
+        owner_used_space = workspace.owner.used_space
         if owner_used_space > workspace.owner.allowed_space:
             raise FileSizeOverOwnerEmptySpace(
                 'File cannot be added (size "{}") because owner space is full: "{}/{}"'.format(
@@ -1968,50 +2142,207 @@ class ContentApi(object):
         content.revision_type = ActionDescription.UNDELETION
 
     def get_preview_page_nb(self, revision_id: int, file_extension: str) -> typing.Optional[int]:
+        return self.get_preview_metadata(revision_id, file_extension).page_nb
+
+    def has_pdf_preview(self, revision_id: int, file_extension: str) -> bool:
+        return self.get_preview_metadata(revision_id, file_extension).has_pdf_preview
+
+    def has_jpeg_preview(self, revision_id: int, file_extension: str) -> bool:
+        return self.get_preview_metadata(revision_id, file_extension).has_jpeg_preview
+
+    def get_preview_metadata(
+        self, revision_id: int, file_extension: str
+    ) -> RevisionPreviewMetadata:
+        """
+        Return preview metadata of the file of a revision: they are read from database
+        if known, else computed with the preview manager then stored as a revision file
+        never changes.
+        """
+        preview_metadata = self._session.query(RevisionPreviewMetadata).get(revision_id)
+        if preview_metadata:
+            return preview_metadata
         try:
             file_path = self.get_one_revision_filepath(revision_id)
-            nb_pages = self.preview_manager.get_page_nb(file_path, file_ext=file_extension)
-        except UnsupportedMimeType:
-            return None
         except RevisionFilePathSearchFailedDepotCorrupted:
             logger.warning(
                 self, "Unable to get revision filepath, depot is corrupted", exc_info=True
             )
-            return None
-        except Exception:
-            logger.warning(self, "Unknown Preview_Generator Exception Occured", exc_info=True)
-            return None
-        return nb_pages
-
-    def has_pdf_preview(self, revision_id: int, file_extension: str) -> bool:
+            return self._get_default_preview_metadata(revision_id)
+        preview_metadata, is_complete = self._compute_preview_metadata(
+            revision_id, file_path, file_extension
+        )
+        if is_complete:
+            self._add_preview_metadata(preview_metadata)
+        return preview_metadata
+
+    def get_previews_metadata(
+        self, revisions: typing.Iterable[ContentRevisionRO]
+    ) -> typing.Dict[int, RevisionPreviewMetadata]:
+        """
+        Batch version of get_preview_metadata(): known preview metadata are read in one query,
+        missing ones are computed then stored.
+        :return: dict of revision_id: preview metadata for all revisions having a file
+        """
+        revisions = {
+            revision.revision_id: revision for revision in revisions if revision.depot_file
+        }
+        if not revisions:
+            return {}
+        previews_metadata = {
+            preview_metadata.revision_id: preview_metadata
+            for preview_metadata in self._session.query(RevisionPreviewMetadata).filter(
+                RevisionPreviewMetadata.revision_id.in_(revisions.keys())
+            )
+        }
+        for revision_id, revision in revisions.items():
+            if revision_id in previews_metadata:
+                continue
+            try:
+                file_path = self._get_revision_filepath(revision)
+            except RevisionFilePathSearchFailedDepotCorrupted:
+                logger.warning(
+                    self, "Unable to get revision filepath, depot is corrupted", exc_info=True
+                )
+                previews_metadata[revision_id] = self._get_default_preview_metadata(revision_id)
+                continue
+            preview_metadata, is_complete = self._compute_preview_metadata(
+                revision_id, file_path, revision.file_extension
+            )
+            if is_complete:
+                self._add_preview_metadata(preview_metadata)
+            previews_metadata[revision_id] = preview_metadata
+        return previews_metadata
+
+    def store_preview_metadata(self, revision_id: int) -> None:
+        """
+        Compute preview metadata of the file of a revision then store them as a revision
+        file never changes. This is done by the preview generation job of uploaded files,
+        when there is none, metadata are stored on first read, see get_preview_metadata().
+        Metadata are not stored if the preview manager failed unexpectedly as this may be
+        a temporary failure.
+        :param revision_id: id of revision
+        """
+        if self._session.query(RevisionPreviewMetadata).get(revision_id):
+            return
         try:
-            file_path = self.get_one_revision_filepath(revision_id)
-            return self.preview_manager.has_pdf_preview(file_path, file_ext=file_extension)
-        except UnsupportedMimeType:
-            return False
-        except RevisionFilePathSearchFailedDepotCorrupted:
+            revision = self.get_one_revision(revision_id)
+        except NoResultFound:
             logger.warning(
-                self, "Unable to get revision filepath, depot is corrupted", exc_info=True
+                self, "Revision {} not found, no preview metadata stored".format(revision_id)
             )
-            return False
-        except Exception:
-            logger.warning(self, "Unknown Preview_Generator Exception Occured", exc_info=True)
-            return False
-
-    def has_jpeg_preview(self, revision_id: int, file_extension: str) -> bool:
+            return
+        if not revision.depot_file:
+            return
         try:
-            file_path = self.get_one_revision_filepath(revision_id)
-            return self.preview_manager.has_jpeg_preview(file_path, file_ext=file_extension)
-        except UnsupportedMimeType:
-            return False
+            file_path = self._get_revision_filepath(revision)
         except RevisionFilePathSearchFailedDepotCorrupted:
             logger.warning(
                 self, "Unable to get revision filepath, depot is corrupted", exc_info=True
             )
-            return False
-        except Exception:
-            logger.warning(self, "Unknown Preview_Generator Exception Occured", exc_info=True)
-            return False
+            return
+        preview_metadata, is_complete = self._compute_preview_metadata(
+            revision_id, file_path, revision.file_extension
+        )
+        if is_complete:
+            self._add_preview_metadata(preview_metadata)
+
+    def _add_preview_metadata(self, preview_metadata: RevisionPreviewMetadata) -> None:
+        try:
+            with self._session.begin_nested():
+                self._session.add(preview_metadata)
+        except IntegrityError:
+            # INFO - preview metadata were stored meanwhile by another request
+            logger.debug(
+                self,
+                "Preview metadata of revision {} already stored".format(
+                    preview_metadata.revision_id
+                ),
+            )
+
+    def _get_default_preview_metadata(self, revision_id: int) -> RevisionPreviewMetadata:
+        return RevisionPreviewMetadata(
+            revision_id=revision_id,
+            mimetype=None,
+            page_nb=None,
+            has_pdf_preview=False,
+            has_jpeg_preview=False,
+        )
+
+    def _compute_preview_metadata(
+        self, revision_id: int, file_path: str, file_extension: str
+    ) -> typing.Tuple[RevisionPreviewMetadata, bool]:
+        """
+        Compute preview metadata of a revision file with the preview manager.
+        :return: preview metadata and False if the preview manager failed unexpectedly
+        for some of them
+        """
+        preview_metadata = self._get_default_preview_metadata(revision_id)
+        is_complete = True
+        for attribute_name, preview_manager_method in (
+            ("mimetype", self.preview_manager.get_mimetype),
+            ("page_nb", self.preview_manager.get_page_nb),
+            ("has_pdf_preview", self.preview_manager.has_pdf_preview),
+            ("has_jpeg_preview", self.preview_manager.has_jpeg_preview),
+        ):
+            try:
+                value = preview_manager_method(file_path, file_ext=file_extension)
+            except UnsupportedMimeType:
+                continue
+            except Exception:
+                logger.warning(self, "Unknown Preview_Generator Exception Occured", exc_info=True)
+                is_complete = False
+                continue
+            setattr(preview_metadata, attribute_name, value)
+        return preview_metadata, is_complete
+
+    def get_unread_status(
+        self, contents: typing.Iterable[Content], user: typing.Optional[User] = None
+    ) -> typing.Dict[int, bool]:
+        """
+        Batch version of Content.has_new_information_for(): one query for the contents
+        themselves, then one query per UNREAD_STATUS_BATCH_SIZE contents having no unread
+        revision to check their children, so 1 + ceil(M / UNREAD_STATUS_BATCH_SIZE) queries
+        for M such contents.
+        :param contents: contents to check
+        :param user: user to check read statuses for, current user by default
+        :return: dict of content_id: True if content or one of its children (recursively)
+        has a current revision not read by user
+        """
+        user = user or self._user
+        contents = [content for content in contents if content.cached_revision_id]
+        unread_statuses = {content.content_id: False for content in contents}
+        if not user or not contents:
+            return unread_statuses
+
+        unread_content_ids = self._session.query(Content.id).filter(
+            Content.id.in_(unread_statuses.keys()), Content.get_unread_filter(user)
+        )
+        for (content_id,) in unread_content_ids:
+            unread_statuses[content_id] = True
+
+        # INFO - one sub-query per content with a constant LIKE prefix to make use of the
+        # ancestors_path index, sub-queries being sent by batches.
+        child = aliased(Content)
+        unread_children_queries = [
+            self._session.query(Content.id).filter(
+                Content.id == content.content_id,
+                self._session.query(child.id)
+                .filter(
+                    child.ancestors_path.like("{}%".format(content.children_ancestors_path)),
+                    child.cached_revision_id != None,  # noqa: E711
+                    Content.get_unread_filter(user, child),
+                )
+                .exists(),
+            )
+            for content in contents
+            if not unread_statuses[content.content_id] and content.ancestors_path is not None
+        ]
+        for offset in range(0, len(unread_children_queries), self.UNREAD_STATUS_BATCH_SIZE):
+            end = offset + self.UNREAD_STATUS_BATCH_SIZE
+            batch = unread_children_queries[offset:end]
+            for (content_id,) in batch[0].union_all(*batch[1:]):
+                unread_statuses[content_id] = True
+        return unread_statuses
 
     def mark_read__all(self, read_datetime: datetime = None, do_flush: bool = True) -> None:
         """
@@ -2034,28 +2365,26 @@ class ContentApi(object):
         :param recursive: mark read subcontent too
         :return: nothing
         """
+        assert self._user
+        if not read_datetime:
+            read_datetime = datetime.datetime.now()
 
         # INFO - G.M - 2020-03-27 - Get all content of workspace
-        resultset = (
+        content_ids = (
             self._get_all_query(workspace=workspace)
-            .outerjoin(
-                RevisionReadStatus,
-                and_(
-                    RevisionReadStatus.revision_id == Content.cached_revision_id,
-                    RevisionReadStatus.user_id == self._user_id,
-                ),
-            )
-            .options(
-                contains_eager(Content.current_revision).contains_eager(
-                    ContentRevisionRO.revision_read_statuses
-                )
-            )
+            .with_entities(Content.id)
+            .order_by(None)
+            .subquery()
         )
+        revision_ids = self._session.query(ContentRevisionRO.revision_id).filter(
+            ContentRevisionRO.content_id.in_(content_ids)
+        )
+        # INFO - Mark all revisions of these contents as read, already read
+        # revisions keep their read datetime.
+        self._mark_revisions_read(revision_ids, read_datetime, update_read_datetime=False)
 
-        # INFO - G.M - 2020-03-27 - Mark all content as read
-        for content in resultset:
-            if content.has_new_information_for(self._user, recursive=False):
-                self.mark_read(content, read_datetime, do_flush, recursive=False)
+        if do_flush:
+            self.flush()
 
     def mark_read(
         self,
@@ -2077,24 +2406,45 @@ class ContentApi(object):
         # The algorithm is:
         # 1. define the read datetime
         # 2. update all revisions related to current Content
-        # 3. do the same for all child revisions
-        #    (ie parent_id is content_id of current content)
+        #    and all revisions of its children if recursive
+        #    (ie content_id is content_id of a descendant of current content)
 
         if not read_datetime:
             read_datetime = datetime.datetime.now()
 
-        viewed_revisions = (
-            self._session.query(ContentRevisionRO)
-            .filter(ContentRevisionRO.content_id == content.content_id)
-            .all()
-        )
+        revision_ids = self._session.query(ContentRevisionRO.revision_id)
+        if recursive:
+            revision_ids = revision_ids.join(
+                Content, Content.id == ContentRevisionRO.content_id
+            ).filter(content.get_tree_filter())
+        else:
+            revision_ids = revision_ids.filter(ContentRevisionRO.content_id == content.content_id)
+        self._mark_revisions_read(revision_ids, read_datetime)
 
-        for revision in viewed_revisions:
-            revision.read_by[self._user] = read_datetime
+        if do_flush:
+            self.flush()
 
-        if recursive:
-            for child in content.recursive_children:
-                self.mark_read(child, read_datetime=read_datetime, do_flush=False, recursive=True)
+        return content
+
+    def mark_current_revision_read(
+        self,
+        content: Content,
+        read_datetime: typing.Optional[datetime.datetime] = None,
+        do_flush: bool = True,
+    ) -> Content:
+        """
+        Read only the current revision of content for the user, without
+        touching other revisions or children: this does a constant number of queries.
+        :param read_datetime: date of reading
+        :param do_flush: flush database
+        :return: content
+        """
+        assert self._user
+        assert content
+
+        if not read_datetime:
+            read_datetime = datetime.datetime.now()
+        content.current_revision.read_by[self._user] = read_datetime
 
         if do_flush:
             self.flush()
@@ -2105,26 +2455,83 @@ class ContentApi(object):
         assert self._user
         assert content
 
-        revisions = (
-            self._session.query(ContentRevisionRO)
-            .filter(ContentRevisionRO.content_id == content.content_id)
-            .all()
+        self._session.flush()
+        valid_children = and_(
+            ContentRevisionRO.is_deleted == False,  # noqa: E712
+            ContentRevisionRO.is_archived == False,  # noqa: E712
         )
-
-        for revision in revisions:
-            try:
-                del revision.read_by[self._user]
-            except KeyError:
-                pass
-
-        for child in content.get_valid_children():
-            self.mark_unread(child, do_flush=False)
+        content_ids = (
+            self._session.query(Content.id)
+            .join(ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id)
+            .filter(content.get_tree_filter())
+            .filter(or_(Content.id == content.content_id, valid_children))
+            .subquery()
+        )
+        revision_ids = self._session.query(ContentRevisionRO.revision_id).filter(
+            ContentRevisionRO.content_id.in_(content_ids)
+        )
+        self._session.query(RevisionReadStatus).filter(
+            RevisionReadStatus.user_id == self._user_id,
+            RevisionReadStatus.revision_id.in_(revision_ids.subquery()),
+        ).delete(synchronize_session=False)
+        self._expire_read_statuses()
 
         if do_flush:
             self.flush()
 
         return content
 
+    def _mark_revisions_read(
+        self,
+        revision_ids: Query,
+        read_datetime: datetime.datetime,
+        update_read_datetime: bool = True,
+    ) -> None:
+        """
+        Mark revisions as read by the user in a constant number of queries.
+        :param revision_ids: query of revision_id of revisions to mark as read
+        :param read_datetime: date of reading
+        :param update_read_datetime: also set read_datetime on already read revisions
+        """
+        # INFO - pending revisions must be in database for the bulk queries
+        self._session.flush()
+        if update_read_datetime:
+            self._session.query(RevisionReadStatus).filter(
+                RevisionReadStatus.user_id == self._user_id,
+                RevisionReadStatus.revision_id.in_(revision_ids.subquery()),
+            ).update({RevisionReadStatus.view_datetime: read_datetime}, synchronize_session=False)
+        already_read = (
+            self._session.query(RevisionReadStatus)
+            .filter(
+                RevisionReadStatus.revision_id == ContentRevisionRO.revision_id,
+                RevisionReadStatus.user_id == self._user_id,
+            )
+            .exists()
+        )
+        unread_revisions = revision_ids.filter(~already_read).with_entities(
+            ContentRevisionRO.revision_id,
+            literal(self._user_id, Integer),
+            literal(read_datetime, DateTime),
+        )
+        self._session.execute(
+            RevisionReadStatus.__table__.insert().from_select(
+                ["revision_id", "user_id", "view_datetime"], unread_revisions.statement
+            )
+        )
+        # INFO - raw statements are not tracked by the transaction manager
+        mark_changed(self._session)
+        self._expire_read_statuses()
+
+    def _expire_read_statuses(self) -> None:
+        """
+        Read statuses were updated with bulk queries: drop the stale ones loaded in session.
+        """
+        for instance in list(self._session.identity_map.values()):
+            if isinstance(instance, ContentRevisionRO):
+                self._session.expire(instance, ["revision_read_statuses"])
+            elif isinstance(instance, RevisionReadStatus):
+                self._session.expunge(instance)
+
     def flush(self):
         self._session.flush()
 
@@ -2151,6 +2558,8 @@ class ContentApi(object):
         if action_description:
             content.revision_type = action_description
 
+        self._update_ancestors_path(content)
+
         if do_flush:
             # INFO - 2015-09-03 - D.A.
             # There are 2 flush because of the use
@@ -2166,11 +2575,70 @@ class ContentApi(object):
             # TODO - 2015-09-03 - D.A. - Do not use triggers
             # We should create a new ContentRevisionRO object instead of Content
             # This would help managing view/not viewed status
-            self.mark_read(content, do_flush=True)
+            # INFO - only the revision written by the user is marked as read here,
+            # use mark_read() to mark all revisions and children as read.
+            if self._user:
+                self.mark_current_revision_read(content, do_flush=True)
 
         if do_notify:
             self.do_notify(content)
 
+    def _update_ancestors_path(self, content: Content) -> None:
+        """
+        Update ancestors_path of content according to its current parent,
+        and ancestors_path of all its descendants if content has been moved.
+        """
+        ancestors_path = content.build_ancestors_path()
+        if content.ancestors_path == ancestors_path:
+            return
+        previous_children_ancestors_path = None
+        if content.ancestors_path is not None and content.id is not None:
+            previous_children_ancestors_path = content.children_ancestors_path
+        self._check_ancestors_path_length(len(ancestors_path))
+        if previous_children_ancestors_path:
+            # INFO - descendants keep their path below content, the deepest one gets
+            # the longest ancestors_path once the prefix is replaced
+            descendants_max_length = (
+                self._session.query(func.max(func.length(Content.ancestors_path)))
+                .filter(Content.ancestors_path.like("{}%".format(previous_children_ancestors_path)))
+                .scalar()
+            )
+            if descendants_max_length:
+                children_ancestors_path_length = len(
+                    "{}{}{}".format(ancestors_path, content.id, ANCESTORS_PATH_SEPARATOR)
+                )
+                self._check_ancestors_path_length(
+                    descendants_max_length
+                    - len(previous_children_ancestors_path)
+                    + children_ancestors_path_length
+                )
+        content.ancestors_path = ancestors_path
+        if not previous_children_ancestors_path:
+            return
+        # INFO - all descendants share the same prefix, so replace it in one query
+        children_ancestors_path = content.children_ancestors_path
+        self._session.query(Content).filter(
+            Content.ancestors_path.like("{}%".format(previous_children_ancestors_path))
+        ).update(
+            {
+                Content.ancestors_path: literal(children_ancestors_path, String)
+                + func.substr(Content.ancestors_path, len(previous_children_ancestors_path) + 1)
+            },
+            synchronize_session="fetch",
+        )
+
+    def _check_ancestors_path_length(self, length: int) -> None:
+        """
+        Raise ContentTreeTooDeep if an ancestors_path of this length does not fit
+        in the content ancestors_path column.
+        """
+        if length > ANCESTORS_PATH_MAX_LENGTH:
+            raise ContentTreeTooDeep(
+                "Content tree is too deep: ancestors path would be {} chars long, max is {}".format(
+                    length, ANCESTORS_PATH_MAX_LENGTH
+                )
+            )
+
     def do_notify(self, content: Content):
         """
         Allow to force notification for a given content. By default, it is
@@ -2190,21 +2658,32 @@ class ContentApi(object):
 
         return content_types
 
+    def _get_nearest_ancestor_id(self, content: Content, *criterion) -> int:
+        """
+        Return id of the nearest ancestor of content matching criterion, 0 if none
+        """
+        ancestor_ids = content.ancestor_ids
+        if not ancestor_ids:
+            return 0
+        ancestor_id = (
+            self._session.query(Content.id)
+            .join(ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id)
+            .filter(Content.id.in_(ancestor_ids), *criterion)
+            .order_by(func.length(Content.ancestors_path).desc())
+            .limit(1)
+            .scalar()
+        )
+        return ancestor_id or 0
+
     def get_deleted_parent_id(self, content: Content) -> typing.Optional[int]:
-        if content.parent:
-            if content.parent.is_deleted:
-                return content.parent_id
-            if content.parent.parent:
-                return self.get_deleted_parent_id(content.parent)
-        return 0
+        return self._get_nearest_ancestor_id(
+            content, ContentRevisionRO.is_deleted == True  # noqa: E712
+        )
 
     def get_archived_parent_id(self, content: Content) -> typing.Optional[int]:
-        if content.parent:
-            if content.parent.is_archived:
-                return content.parent_id
-            if content.parent.parent:
-                return self.get_archived_parent_id(content.parent)
-        return 0
+        return self._get_nearest_ancestor_id(
+            content, ContentRevisionRO.is_archived == True  # noqa: E712
+        )
 
     # TODO - G.M - 2018-07-24 - [Cleanup] Is this method already needed ?
     def find_one_by_unique_property(
@@ -1,12 +1,21 @@
 import abc
 import contextlib
 from datetime import datetime
+from datetime import timedelta
+import threading
+import time
 import typing
 
+from sqlalchemy import and_
+from sqlalchemy import cast
 from sqlalchemy import event as sqlalchemy_event
-from sqlalchemy import inspect
 from sqlalchemy import null
+from sqlalchemy import or_
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import contains_eager
 from sqlalchemy.orm import joinedload
+from sqlalchemy.types import String
+from zope.sqlalchemy import mark_changed
 
 from tracim_backend.app_models.contents import COMMENT_TYPE
 from tracim_backend.app_models.contents import FILE_TYPE
@@ -22,16 +31,21 @@ from tracim_backend.lib.core.plugins import hookimpl
 from tracim_backend.lib.core.user import UserApi
 from tracim_backend.lib.core.userworkspace import RoleApi
 from tracim_backend.lib.core.workspace import WorkspaceApi
+from tracim_backend.lib.crud_hook.caller import get_changed_attributes
+from tracim_backend.lib.rq import enqueue_in
 from tracim_backend.lib.rq import get_redis_connection
 from tracim_backend.lib.rq import get_rq_queue
 from tracim_backend.lib.rq.worker import worker_context
 from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.metrics import get_metrics
 from tracim_backend.lib.utils.request import TracimContext
+from tracim_backend.lib.utils.utils import DEFAULT_NB_ITEMS_PAGINATION
 from tracim_backend.models.auth import Profile
 from tracim_backend.models.auth import User
+from tracim_backend.models.context_models import PaginatedObject
+from tracim_backend.models.context_models import UserInContext
 from tracim_backend.models.data import ActionDescription
 from tracim_backend.models.data import Content
-from tracim_backend.models.data import ContentRevisionRO
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
 from tracim_backend.models.event import EntityType
@@ -39,27 +53,40 @@ from tracim_backend.models.event import Event
 from tracim_backend.models.event import Message
 from tracim_backend.models.event import OperationType
 from tracim_backend.models.event import ReadStatus
+from tracim_backend.models.meta import DeclarativeBase
 from tracim_backend.models.tracim_session import TracimSession
-from tracim_backend.views.core_api.schemas import ContentSchema
 from tracim_backend.views.core_api.schemas import CommentSchema
+from tracim_backend.views.core_api.schemas import ContentSchema
 from tracim_backend.views.core_api.schemas import EventSchema
 from tracim_backend.views.core_api.schemas import FileContentSchema
 from tracim_backend.views.core_api.schemas import TextBasedContentSchema
+from tracim_backend.views.core_api.schemas import UserDigestSchema
 from tracim_backend.views.core_api.schemas import UserSchema
 from tracim_backend.views.core_api.schemas import WorkspaceMemberDigestSchema
 from tracim_backend.views.core_api.schemas import WorkspaceSchema
 
-
 _USER_FIELD = "user"
 _AUTHOR_FIELD = "author"
 _CLIENT_TOKEN_FIELD = "client_token"
 _WORKSPACE_FIELD = "workspace"
 _CONTENT_FIELD = "content"
 _MEMBER_FIELD = "member"
+# INFO - changes of these user attributes can change the receivers of events
+_RECEIVER_USER_ATTRIBUTES = frozenset(("profile", "is_active", "is_deleted"))
+_LEAN_SNAPSHOT_EXCLUDED_FIELDS = ("actives_shares", "sub_content_types", "author", "last_modifier")
 
 
 RQ_QUEUE_NAME = "event"
 
+# INFO - receivers caches of the process, by database url
+_event_receivers_caches = {}
+_event_receivers_caches_lock = threading.Lock()
+_CacheEntry = typing.Tuple[float, typing.FrozenSet[int]]
+
+
+def _get_milliseconds_since(date: datetime) -> float:
+    return (datetime.utcnow() - date).total_seconds() * 1000
+
 
 class EventApi:
     """Api to query event & messages"""
@@ -72,11 +99,121 @@ class EventApi:
         self._config = config
 
     def get_messages_for_user(self, user_id: int, read_status: ReadStatus) -> typing.List[Message]:
-        query = (
+        query = self._get_messages_query(user_id, read_status)
+        return query.options(joinedload(Message.event)).all()
+
+    def get_paginated_messages_for_user(
+        self,
+        user_id: int,
+        read_status: ReadStatus,
+        after_event_id: int = 0,
+        count: int = DEFAULT_NB_ITEMS_PAGINATION,
+        event_types: typing.Optional[typing.List[str]] = None,
+    ) -> PaginatedObject:
+        """
+        Return a page of messages of the user, sorted by event_id.
+        :param after_event_id: only return messages of events after this one
+        :param count: maximum number of returned messages
+        :param event_types: only return messages of events of these types, the subtype
+        of types is optional
+        """
+        query = self._get_messages_query(user_id, read_status, event_types)
+        total = query.count()
+        if event_types:
+            event_loader = contains_eager(Message.event)
+        else:
+            event_loader = joinedload(Message.event)
+        # INFO - messages are returned with the JSON text of the fields of their event,
+        # see LiveMessagesLib.serialize_messages_page()
+        query = query.options(event_loader.defer(Event.fields))
+        # INFO - one more message is queried to know if there is a next page
+        messages = (
+            query.filter(Message.event_id > after_event_id)
+            .order_by(Message.event_id)
+            .limit(count + 1)
+            .all()
+        )
+        return PaginatedObject(items=messages[:count], total=total, has_next=len(messages) > count)
+
+    def mark_user_messages_as_read(self, user_id: int) -> None:
+        """Mark all unread messages of the user as read, with one statement."""
+        self._session.query(Message).filter(Message.receiver_id == user_id).filter(
+            Message.read == null()
+        ).update({Message.read: datetime.utcnow()}, synchronize_session=False)
+
+    def get_read_messages_count(self, read_before: datetime) -> int:
+        return self._session.query(Message).filter(Message.read < read_before).count()
+
+    def delete_read_messages(self, read_before: datetime, batch_size: int) -> int:
+        """
+        Delete a batch of at most batch_size messages read before the given date,
+        messages of the oldest events first.
+        :return: number of deleted messages, 0 if there is no more messages to delete
+        """
+        # INFO - messages are selected before being deleted as MySQL does not support
+        # LIMIT in a subquery of a DELETE.
+        receiver_ids_by_event_id = {}  # type: typing.Dict[int, typing.List[int]]
+        for event_id, receiver_id in (
+            self._session.query(Message.event_id, Message.receiver_id)
+            .filter(Message.read < read_before)
+            .order_by(Message.event_id, Message.receiver_id)
+            .limit(batch_size)
+        ):
+            receiver_ids_by_event_id.setdefault(event_id, []).append(receiver_id)
+        if not receiver_ids_by_event_id:
+            return 0
+        return (
             self._session.query(Message)
-            .filter(Message.receiver_id == user_id)
-            .options(joinedload(Message.event))
+            .filter(
+                or_(
+                    *[
+                        and_(Message.event_id == event_id, Message.receiver_id.in_(receiver_ids))
+                        for event_id, receiver_ids in receiver_ids_by_event_id.items()
+                    ]
+                )
+            )
+            .delete(synchronize_session=False)
+        )
+
+    def get_orphan_events_count(self, created_before: datetime) -> int:
+        return self._get_orphan_events_query(created_before).count()
+
+    def delete_orphan_events(self, created_before: datetime, batch_size: int) -> int:
+        """
+        Delete a batch of at most batch_size events created before the given date
+        which have no message anymore.
+        :return: number of deleted events, 0 if there is no more events to delete
+        """
+        event_ids = [
+            event_id
+            for event_id, in self._get_orphan_events_query(created_before)
+            .with_entities(Event.event_id)
+            .order_by(Event.event_id)
+            .limit(batch_size)
+        ]
+        if not event_ids:
+            return 0
+        return (
+            self._session.query(Event)
+            .filter(Event.event_id.in_(event_ids))
+            .delete(synchronize_session=False)
+        )
+
+    def _get_orphan_events_query(self, created_before: datetime) -> Query:
+        messages = self._session.query(Message).filter(Message.event_id == Event.event_id)
+        return (
+            self._session.query(Event)
+            .filter(Event.created < created_before)
+            .filter(~messages.exists())
         )
+
+    def _get_messages_query(
+        self,
+        user_id: int,
+        read_status: ReadStatus,
+        event_types: typing.Optional[typing.List[str]] = None,
+    ) -> Query:
+        query = self._session.query(Message).filter(Message.receiver_id == user_id)
         if read_status == ReadStatus.READ:
             query = query.filter(Message.read != null())
         elif read_status == ReadStatus.UNREAD:
@@ -84,7 +221,219 @@ class EventApi:
         else:
             # ALL doesn't need any filtering an is the only other handled case
             assert read_status == ReadStatus.ALL
-        return query.all()
+        if event_types:
+            event_type_filters = []
+            for event_type in event_types:
+                entity_type, operation, entity_subtype = Event.parse_event_type(event_type)
+                event_type_filter = and_(
+                    Event.entity_type == entity_type, Event.operation == operation
+                )
+                if entity_subtype:
+                    event_type_filter = and_(
+                        event_type_filter, Event.entity_subtype == entity_subtype
+                    )
+                event_type_filters.append(event_type_filter)
+            query = query.join(Message.event).filter(or_(*event_type_filters))
+        return query
+
+
+class EventReceiversCache(object):
+    """
+    In-process cache of ids of administrators and of members of workspaces, which are
+    the receivers of events. Entries are invalidated by crud hooks of this process and
+    when events of users and workspace members are published by this process. As other
+    processes may change them, entries also expire after
+    LIVE_MESSAGES__RECEIVERS_CACHE_TTL seconds, 0 disabling the cache.
+    """
+
+    def __init__(self, ttl: int) -> None:
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        # INFO - incremented on each invalidation so that ids loaded before
+        # an invalidation are not stored.
+        self._generation = 0
+        # INFO - entries are tuples (expiration time, ids)
+        self._administrator_ids = None  # type: typing.Optional[_CacheEntry]
+        self._workspace_member_ids = {}  # type: typing.Dict[int, _CacheEntry]
+
+    def get_administrator_ids(
+        self, load: typing.Callable[[], typing.Iterable[int]]
+    ) -> typing.FrozenSet[int]:
+        """
+        :param load: function returning ids from the database, called on cache miss
+        """
+        entry = self._administrator_ids
+        if self._is_valid(entry):
+            return entry[1]
+        generation = self._generation
+        administrator_ids = frozenset(load())
+        with self._lock:
+            if self._ttl and generation == self._generation:
+                self._administrator_ids = (time.monotonic() + self._ttl, administrator_ids)
+        return administrator_ids
+
+    def get_workspace_member_ids(
+        self, workspace_id: int, load: typing.Callable[[], typing.Iterable[int]]
+    ) -> typing.FrozenSet[int]:
+        """
+        :param load: function returning ids from the database, called on cache miss
+        """
+        entry = self._workspace_member_ids.get(workspace_id)
+        if self._is_valid(entry):
+            return entry[1]
+        generation = self._generation
+        member_ids = frozenset(load())
+        with self._lock:
+            if self._ttl and generation == self._generation:
+                self._workspace_member_ids[workspace_id] = (
+                    time.monotonic() + self._ttl,
+                    member_ids,
+                )
+        return member_ids
+
+    def invalidate_administrators(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._administrator_ids = None
+
+    def invalidate_workspace(self, workspace_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._workspace_member_ids.pop(workspace_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._administrator_ids = None
+            self._workspace_member_ids.clear()
+
+    def _is_valid(self, entry: typing.Optional[_CacheEntry]) -> bool:
+        return entry is not None and entry[0] > time.monotonic()
+
+
+def get_event_receivers_cache(config: CFG) -> EventReceiversCache:
+    """
+    Return the receivers cache of the database of config. It is created
+    on first call, then shared by the whole process.
+    :param config: current app_config
+    :return: receivers cache
+    """
+    database_url = config.SQLALCHEMY__URL
+    cache = _event_receivers_caches.get(database_url)
+    if cache is None:
+        with _event_receivers_caches_lock:
+            cache = _event_receivers_caches.get(database_url)
+            if cache is None:
+                cache = EventReceiversCache(config.LIVE_MESSAGES__RECEIVERS_CACHE_TTL)
+                _event_receivers_caches[database_url] = cache
+    return cache
+
+
+class EventCoalescingMetrics(object):
+    """Counters of the coalescing of content.modified events done by this process."""
+
+    def __init__(self) -> None:
+        self.window = 0
+        self.coalescable_events_count = 0
+        self.merged_events_count = 0
+
+    def as_dict(self) -> typing.Dict[str, int]:
+        return {
+            "window": self.window,
+            "coalescable_events_count": self.coalescable_events_count,
+            "merged_events_count": self.merged_events_count,
+        }
+
+
+class EventCoalescer(object):
+    """
+    Merge content.modified events of a same content emitted within
+    LIVE_MESSAGES__COALESCING_WINDOW milliseconds: only the latest one,
+    holding the latest state of the content, is delivered to receivers.
+    """
+
+    def __init__(self, config: CFG) -> None:
+        self._window = timedelta(milliseconds=config.LIVE_MESSAGES__COALESCING_WINDOW)
+        self.metrics = EventCoalescingMetrics()
+        self.metrics.window = config.LIVE_MESSAGES__COALESCING_WINDOW
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._window)
+
+    def is_coalescable(self, event: Event) -> bool:
+        return (
+            self.enabled
+            and event.entity_type == EntityType.CONTENT
+            and event.operation == OperationType.MODIFIED
+        )
+
+    def get_publication_date(self, event: Event) -> typing.Optional[datetime]:
+        """
+        :return: date after which a newer event of the same content
+        can no longer replace the given one, None if it is not coalescable.
+        """
+        if not self.is_coalescable(event):
+            return None
+        return event.created + self._window
+
+    def coalesce(self, events: typing.List[Event]) -> typing.List[Event]:
+        """
+        :return: given events without the ones replaced by a newer event of the list.
+        """
+        coalesced_events = []
+        newer_events_by_content_id = {}  # type: typing.Dict[int, Event]
+        for event in reversed(events):
+            if not self.is_coalescable(event):
+                coalesced_events.append(event)
+                continue
+            self.metrics.coalescable_events_count += 1
+            content_id = event.content["content_id"]
+            newer_event = newer_events_by_content_id.get(content_id)
+            if newer_event and newer_event.created - event.created <= self._window:
+                self._merged(event, newer_event.event_id)
+                continue
+            newer_events_by_content_id[content_id] = event
+            coalesced_events.append(event)
+        coalesced_events.reverse()
+        return coalesced_events
+
+    def is_superseded(self, event: Event, session: TracimSession) -> bool:
+        """
+        Check if a newer event of the same content was emitted within the window,
+        in which case the given event must not be delivered.
+        """
+        if not self.is_coalescable(event):
+            return False
+        # INFO - the JSON value is compared as text: JSON values cannot be compared
+        # with the same operators on all supported databases.
+        newer_event_id = (
+            session.query(Event.event_id)
+            .filter(Event.event_id > event.event_id)
+            .filter(Event.entity_type == EntityType.CONTENT)
+            .filter(Event.operation == OperationType.MODIFIED)
+            .filter(Event.created <= event.created + self._window)
+            .filter(
+                cast(Event.fields[(_CONTENT_FIELD, "content_id")], String)
+                == str(event.content["content_id"])
+            )
+            .order_by(Event.event_id.desc())
+            .limit(1)
+            .scalar()
+        )
+        if newer_event_id is None:
+            return False
+        self._merged(event, newer_event_id)
+        return True
+
+    def _merged(self, event: Event, newer_event_id: int) -> None:
+        self.metrics.merged_events_count += 1
+        logger.debug(
+            self,
+            "event(id={}) merged into newer event(id={}), coalescing metrics: {}".format(
+                event.event_id, newer_event_id, self.metrics.as_dict()
+            ),
+        )
 
 
 class EventBuilder:
@@ -92,13 +441,23 @@ class EventBuilder:
 
     _user_schema = UserSchema()
     _workspace_schema = WorkspaceSchema()
+    # INFO - content snapshots of events are lean, they leave out data which would need
+    # queries or reading files for each event: shares count, allowed sub-content types
+    # except for folders, preview data of files and authors found from the revisions list.
+    # Clients merge a snapshot into the content they display and get the missing data
+    # from the API when they need it.
     _content_schemas = {
-        COMMENT_TYPE: CommentSchema(),
-        HTML_DOCUMENTS_TYPE: TextBasedContentSchema(),
-        FILE_TYPE: FileContentSchema(),
-        FOLDER_TYPE: TextBasedContentSchema(),
-        THREAD_TYPE: TextBasedContentSchema(),
+        COMMENT_TYPE: CommentSchema(exclude=("author",)),
+        HTML_DOCUMENTS_TYPE: TextBasedContentSchema(exclude=_LEAN_SNAPSHOT_EXCLUDED_FIELDS),
+        FILE_TYPE: FileContentSchema(
+            exclude=_LEAN_SNAPSHOT_EXCLUDED_FIELDS
+            + ("page_nb", "has_pdf_preview", "has_jpeg_preview")
+        ),
+        FOLDER_TYPE: TextBasedContentSchema(exclude=("actives_shares", "author", "last_modifier")),
+        THREAD_TYPE: TextBasedContentSchema(exclude=_LEAN_SNAPSHOT_EXCLUDED_FIELDS),
     }
+    _default_content_schema = ContentSchema(exclude=_LEAN_SNAPSHOT_EXCLUDED_FIELDS)
+    _user_digest_schema = UserDigestSchema()
     _event_schema = EventSchema()
     _workspace_user_role_schema = WorkspaceMemberDigestSchema()
 
@@ -142,16 +501,20 @@ class EventBuilder:
     # User events
     @hookimpl
     def on_user_created(self, user: User, context: TracimContext) -> None:
+        get_event_receivers_cache(self._config).invalidate_administrators()
         self._create_user_event(OperationType.CREATED, user, context)
 
     @hookimpl
     def on_user_modified(self, user: User, context: TracimContext) -> None:
-        if self._has_just_been_deleted(user):
-            self._create_user_event(OperationType.DELETED, user, context)
-        elif self._has_just_been_undeleted(user):
-            self._create_user_event(OperationType.UNDELETED, user, context)
-        else:
-            self._create_user_event(OperationType.MODIFIED, user, context)
+        self._on_user_modified(user, get_changed_attributes(user), context)
+
+    def _on_user_modified(
+        self, user: User, changed_attributes: typing.FrozenSet[str], context: TracimContext
+    ) -> None:
+        if changed_attributes & _RECEIVER_USER_ATTRIBUTES:
+            get_event_receivers_cache(self._config).clear()
+        operation = self._get_modification_operation(user, changed_attributes)
+        self._create_user_event(operation, user, context)
 
     def _create_user_event(
         self, operation: OperationType, user: User, context: TracimContext
@@ -180,12 +543,8 @@ class EventBuilder:
 
     @hookimpl
     def on_workspace_modified(self, workspace: Workspace, context: TracimContext) -> None:
-        if self._has_just_been_deleted(workspace):
-            self._create_workspace_event(OperationType.DELETED, workspace, context)
-        elif self._has_just_been_undeleted(workspace):
-            self._create_workspace_event(OperationType.UNDELETED, workspace, context)
-        else:
-            self._create_workspace_event(OperationType.MODIFIED, workspace, context)
+        operation = self._get_modification_operation(workspace, get_changed_attributes(workspace))
+        self._create_workspace_event(operation, workspace, context)
 
     def _create_workspace_event(
         self, operation: OperationType, workspace: Workspace, context: TracimContext,
@@ -234,9 +593,9 @@ class EventBuilder:
         content_api = ContentApi(context.dbsession, current_user, self._config)
         content_in_context = content_api.get_content_in_context(content)
         try:
-            content_schema = content_dict = self._content_schemas[content.type]
+            content_schema = self._content_schemas[content.type]
         except KeyError:
-            content_schema = ContentSchema()
+            content_schema = self._default_content_schema
             logger.error(
                 self,
                 (
@@ -245,6 +604,18 @@ class EventBuilder:
                 ).format(content.type),
             )
         content_dict = content_schema.dump(content_in_context).data
+        # INFO - the owner of the current revision made the change the event is about,
+        # it is also the author of a created content
+        revision_owner = content.current_revision.owner
+        revision_owner_dict = None
+        if revision_owner:
+            revision_owner_dict = self._user_digest_schema.dump(
+                UserInContext(revision_owner, context.dbsession, self._config)
+            ).data
+        if content.type != COMMENT_TYPE:
+            content_dict["last_modifier"] = revision_owner_dict
+        if operation == OperationType.CREATED:
+            content_dict["author"] = revision_owner_dict
 
         workspace_api = WorkspaceApi(
             context.dbsession, self._get_current_user(context), self._config
@@ -274,18 +645,21 @@ class EventBuilder:
     def on_user_role_in_workspace_created(
         self, role: UserRoleInWorkspace, context: TracimContext
     ) -> None:
+        get_event_receivers_cache(self._config).invalidate_workspace(role.workspace_id)
         self._create_role_event(OperationType.CREATED, role, context)
 
     @hookimpl
     def on_user_role_in_workspace_modified(
         self, role: UserRoleInWorkspace, context: TracimContext
     ) -> None:
+        get_event_receivers_cache(self._config).invalidate_workspace(role.workspace_id)
         self._create_role_event(OperationType.MODIFIED, role, context)
 
     @hookimpl
     def on_user_role_in_workspace_deleted(
         self, role: UserRoleInWorkspace, context: TracimContext
     ) -> None:
+        get_event_receivers_cache(self._config).invalidate_workspace(role.workspace_id)
         self._create_role_event(OperationType.DELETED, role, context)
 
     def _create_role_event(
@@ -326,6 +700,40 @@ class EventBuilder:
         event = Event(entity_type=EntityType.WORKSPACE_MEMBER, operation=operation, fields=fields)
         self._add_event(event, context)
 
+    @hookimpl
+    def on_bulk_crud_operation(
+        self,
+        created: typing.List[DeclarativeBase],
+        modified: typing.List[DeclarativeBase],
+        deleted: typing.List[DeclarativeBase],
+        changed_attributes: typing.Dict[DeclarativeBase, typing.FrozenSet[str]],
+        context: TracimContext,
+    ) -> None:
+        # INFO - events are the ones of the per-object hooks, an object flushed several
+        # times during the operation has only one event
+        for obj in created:
+            if isinstance(obj, User):
+                self.on_user_created(obj, context)
+            elif isinstance(obj, Workspace):
+                self.on_workspace_created(obj, context)
+            elif isinstance(obj, Content):
+                self.on_content_created(obj, context)
+            elif isinstance(obj, UserRoleInWorkspace):
+                self.on_user_role_in_workspace_created(obj, context)
+        for obj in modified:
+            if isinstance(obj, User):
+                self._on_user_modified(obj, changed_attributes[obj], context)
+            elif isinstance(obj, Workspace):
+                operation = self._get_modification_operation(obj, changed_attributes[obj])
+                self._create_workspace_event(operation, obj, context)
+            elif isinstance(obj, Content):
+                self.on_content_modified(obj, context)
+            elif isinstance(obj, UserRoleInWorkspace):
+                self.on_user_role_in_workspace_modified(obj, context)
+        for obj in deleted:
+            if isinstance(obj, UserRoleInWorkspace):
+                self.on_user_role_in_workspace_deleted(obj, context)
+
     def _add_event(self, event: Event, context: TracimContext) -> None:
         context.dbsession.add(event)
         context.pending_events.append(event)
@@ -342,40 +750,45 @@ class EventBuilder:
         # we can have `new` events here as we add events in the session
         # in a `after_flush` sqlalchemy event and `_publish_events` is also
         # called during the same `after_flush` event (when PROCESSING_MODE is `sync`).
+        events = []
         new_events = []
         for event in context.pending_events:
             if event.event_id:
-                message_builder.publish_messages_for_event(event.event_id)
+                events.append(event)
             else:
                 new_events.append(event)
         context.pending_events = new_events
 
-    def _has_just_been_deleted(self, obj: typing.Union[User, Workspace, ContentRevisionRO]) -> bool:
-        """Check that an object has been deleted since it has been queried from database."""
-        if obj.is_deleted:
-            history = inspect(obj).attrs.is_deleted.history
-            was_changed = not history.unchanged and (history.deleted or history.added)
-            return was_changed
-        return False
-
-    def _has_just_been_undeleted(
-        self, obj: typing.Union[User, Workspace, ContentRevisionRO]
-    ) -> bool:
-        """Check whether an object has been undeleted since queried from database."""
-        if not obj.is_deleted:
-            history = inspect(obj).attrs.is_deleted.history
-            was_changed = not history.unchanged and (history.deleted or history.added)
-            return was_changed
-        return False
+        if events:
+            get_metrics(self._config).value("events.per_flush", len(events))
+        coalescer = EventCoalescer(self._config)
+        for event in coalescer.coalesce(events):
+            message_builder.publish_messages_for_event(
+                event.event_id, coalescer.get_publication_date(event)
+            )
+
+    @staticmethod
+    def _get_modification_operation(
+        obj: typing.Union[User, Workspace], changed_attributes: typing.FrozenSet[str]
+    ) -> OperationType:
+        """Return the operation of a modified object given its changed attributes."""
+        if "is_deleted" not in changed_attributes:
+            return OperationType.MODIFIED
+        return OperationType.DELETED if obj.is_deleted else OperationType.UNDELETED
 
 
 class BaseLiveMessageBuilder(abc.ABC):
     """"Base class for message building with most implementation."""
 
     _event_schema = EventSchema()
+    # INFO - receivers cache of this process is not invalidated by crud hooks of other processes
+    _publishes_events_of_other_processes = False
 
     def __init__(self, config: CFG) -> None:
         self._config = config
+        self._coalescer = EventCoalescer(config)
+        self._receivers_cache = get_event_receivers_cache(config)
+        self._metrics = get_metrics(config)
 
     @contextlib.contextmanager
     @abc.abstractmethod
@@ -383,13 +796,32 @@ class BaseLiveMessageBuilder(abc.ABC):
         pass
 
     @abc.abstractmethod
-    def publish_messages_for_event(self, event_id: int) -> None:
+    def publish_messages_for_event(
+        self, event_id: int, publication_date: typing.Optional[datetime] = None
+    ) -> None:
+        """
+        :param event_id: id of the event to publish
+        :param publication_date: if given, messages should not be published before this date
+        so that newer events of the same entity can replace this one.
+        """
         pass
 
-    def _publish_messages_for_event(self, event_id: int) -> None:
+    def _publish_messages_for_event(
+        self, event_id: int, publication_date: typing.Optional[datetime] = None
+    ) -> None:
         with self.context() as context:
             session = context.dbsession
             event = session.query(Event).filter(Event.event_id == event_id).one()
+            # INFO - newer events can only exist when the publication was delayed
+            if publication_date and self._coalescer.is_superseded(event, session):
+                return
+            # INFO - time between the creation of the event (or its planned publication)
+            # and the start of its processing
+            self._metrics.timing(
+                "events.queue_lag", _get_milliseconds_since(publication_date or event.created),
+            )
+            if self._publishes_events_of_other_processes:
+                self._invalidate_receivers_cache(event)
             if event.entity_type == EntityType.USER:
                 receiver_ids = self._get_user_event_receiver_ids(event, session)
             elif event.entity_type == EntityType.WORKSPACE:
@@ -399,23 +831,35 @@ class BaseLiveMessageBuilder(abc.ABC):
             elif event.entity_type == EntityType.WORKSPACE_MEMBER:
                 receiver_ids = self._get_workspace_event_receiver_ids(event, session)
 
-            messages = [
-                Message(
-                    receiver_id=receiver_id,
-                    event=event,
-                    event_id=event.event_id,
-                    sent=datetime.utcnow(),
-                )
-                for receiver_id in receiver_ids
-            ]
-            session.add_all(messages)
-            live_message_lib = LiveMessagesLib(self._config)
-            for message in messages:
-                live_message_lib.publish_message_to_user(message)
+            self._metrics.value("events.receivers", len(receiver_ids))
+            if not receiver_ids:
+                return
+            sent = datetime.utcnow()
+            # INFO - messages of all receivers are inserted with one statement
+            session.execute(
+                Message.__table__.insert(),
+                [
+                    {"receiver_id": receiver_id, "event_id": event.event_id, "sent": sent}
+                    for receiver_id in receiver_ids
+                ],
+            )
+            # INFO - raw statements are not tracked by the transaction manager
+            mark_changed(session)
+            # INFO - messages only differ by their receiver, so they are published together
+            message = Message(event=event, event_id=event.event_id, sent=sent)
+            with self._metrics.timer("live_messages.publish"):
+                LiveMessagesLib(self._config).publish_message_to_users(message, receiver_ids)
+            self._metrics.timing("events.latency", _get_milliseconds_since(event.created))
+
+    def _invalidate_receivers_cache(self, event: Event) -> None:
+        """Invalidate receivers changed by the event."""
+        if event.entity_type == EntityType.USER:
+            self._receivers_cache.clear()
+        elif event.entity_type == EntityType.WORKSPACE_MEMBER:
+            self._receivers_cache.invalidate_workspace(event.workspace["workspace_id"])
 
     def _get_user_event_receiver_ids(self, event: Event, session: TracimSession) -> typing.Set[int]:
-        user_api = UserApi(current_user=None, session=session, config=self._config)
-        receiver_ids = set(user_api.get_user_ids_from_profile(Profile.ADMIN))
+        receiver_ids = set(self._get_administrator_ids(session))
         if event.user:
             receiver_ids.add(event.user["user_id"])
         return receiver_ids
@@ -423,32 +867,63 @@ class BaseLiveMessageBuilder(abc.ABC):
     def _get_workspace_event_receiver_ids(
         self, event: Event, session: TracimSession,
     ) -> typing.Set[int]:
-        user_api = UserApi(current_user=None, session=session, config=self._config)
-        administrators = user_api.get_user_ids_from_profile(Profile.ADMIN)
+        workspace_id = event.workspace["workspace_id"]
         role_api = RoleApi(current_user=None, session=session, config=self._config)
-        workspace_members = role_api.get_workspace_member_ids(event.workspace["workspace_id"])
-        return set(administrators + workspace_members)
+        workspace_member_ids = self._receivers_cache.get_workspace_member_ids(
+            workspace_id, lambda: role_api.get_workspace_member_ids(workspace_id)
+        )
+        return set(self._get_administrator_ids(session) | workspace_member_ids)
+
+    def _get_administrator_ids(self, session: TracimSession) -> typing.FrozenSet[int]:
+        user_api = UserApi(current_user=None, session=session, config=self._config)
+        return self._receivers_cache.get_administrator_ids(
+            lambda: user_api.get_user_ids_from_profile(Profile.ADMIN)
+        )
 
 
 class AsyncLiveMessageBuilder(BaseLiveMessageBuilder):
     """"Live message building + sending executed in a RQ job."""
 
+    _publishes_events_of_other_processes = True
+
     def __init__(self, context: TracimContext) -> None:
         super().__init__(context.app_config)
 
+    # INFO - the builder is pickled by RQ with the job, caches and metrics of the process
+    # running the job are used instead of those of the enqueuing process
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        return {"config": self._config}
+
+    def __setstate__(self, state: typing.Dict[str, typing.Any]) -> None:
+        BaseLiveMessageBuilder.__init__(self, state["config"])
+
     @contextlib.contextmanager
     def context(self) -> typing.Generator[TracimContext, None, None]:
         with worker_context() as context:
             yield context
 
-    def publish_messages_for_event(self, event_id: int) -> None:
+    def publish_messages_for_event(
+        self, event_id: int, publication_date: typing.Optional[datetime] = None
+    ) -> None:
         redis_connection = get_redis_connection(self._config)
         queue = get_rq_queue(redis_connection, RQ_QUEUE_NAME)
+        delay = publication_date - datetime.utcnow() if publication_date else None
+        if delay and delay > timedelta(0):
+            # INFO - the job is delayed instead of waiting in the worker, which would
+            # stall all queued jobs during the coalescing window.
+            logger.debug(
+                self,
+                "publish event(id={}) asynchronously to RQ queue {} in {}".format(
+                    event_id, RQ_QUEUE_NAME, delay
+                ),
+            )
+            enqueue_in(queue, delay, self._publish_messages_for_event, event_id, publication_date)
+            return
         logger.debug(
             self,
             "publish event(id={}) asynchronously to RQ queue {}".format(event_id, RQ_QUEUE_NAME),
         )
-        queue.enqueue(self._publish_messages_for_event, event_id)
+        queue.enqueue(self._publish_messages_for_event, event_id, publication_date)
 
 
 class SyncLiveMessageBuilder(BaseLiveMessageBuilder):
@@ -462,6 +937,10 @@ class SyncLiveMessageBuilder(BaseLiveMessageBuilder):
     def context(self) -> typing.Generator[TracimContext, None, None]:
         yield self._context
 
-    def publish_messages_for_event(self, event_id: int) -> None:
+    def publish_messages_for_event(
+        self, event_id: int, publication_date: typing.Optional[datetime] = None
+    ) -> None:
+        # INFO - publication is not delayed as it is done during the request:
+        # only events of a same flush are coalesced.
         logger.debug(self, "publish event(id={}) synchronously".format(event_id))
         self._publish_messages_for_event(event_id)
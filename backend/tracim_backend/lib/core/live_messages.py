@@ -1,22 +1,54 @@
+import abc
 import json
+import queue
+import threading
+import time
 import typing
 
 from gripcontrol import GripPubControl
+from gripcontrol import HttpStreamFormat
+from pubcontrol import Item
+from pyramid.response import Response
 
 # TODO - G.M - 2020-05-14 - Use default event "message" for TLM to be usable with
 # "onmessage" EventSource Object in javascript.
 from tracim_backend import CFG
+from tracim_backend.exceptions import TooManyLiveMessagesStreams
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.models.context_models import PaginatedObject
 from tracim_backend.models.event import Message
 from tracim_backend.views.core_api.schemas import LiveMessageSchema
+from tracim_backend.views.core_api.schemas import LiveMessagesPageSchema
 
 TLM_EVENT_NAME = "message"
+# INFO - maximum number of items sent in one request to the GRIP publish endpoint
+PUBLISH_BATCH_SIZE = 500
+# INFO - streams served by tracim send a comment after this number of seconds without
+# event so that closed connections are detected
+STREAM_KEEPALIVE_INTERVAL = 15
+# INFO - events published to a subscriber of the local broker which does not read them
+# are dropped over this number of pending events
+LOCAL_SUBSCRIPTION_MAX_PENDING_EVENTS = 1000
+REDIS_CHANNEL_PREFIX = "tracim_live_messages:"
+
+SSE_HEADERS = [
+    # content type for SSE
+    ("Content-Type", "text/event-stream"),
+    # do not cache the events
+    ("Cache-Control", "no-cache"),
+]
 
 
 class JsonServerSideEvent(object):
-    """Create a ServerSideEvent with single-line json as data"""
+    """
+    Create a ServerSideEvent with single-line json as data, data can be given
+    already serialized as JSON text.
+    """
 
     def __init__(
-        self, data: typing.Dict[str, typing.Any], event: typing.Optional[str] = None,
+        self,
+        data: typing.Union[typing.Dict[str, typing.Any], str],
+        event: typing.Optional[str] = None,
     ):
         self.data = data
         self.event = event
@@ -25,23 +57,398 @@ class JsonServerSideEvent(object):
         buffer = ""
         if self.event:
             buffer += "event: {}\n".format(self.event)
-        buffer += "data: {}\n".format(json.dumps(self.data))
+        data = self.data if isinstance(self.data, str) else json.dumps(self.data)
+        buffer += "data: {}\n".format(data)
         buffer += "\n"
         return buffer
 
 
-class LiveMessagesLib(object):
-    def __init__(self, config: CFG,) -> None:
+class LiveMessagesTransport(abc.ABC):
+    """
+    Deliver server-sent events published by tracim to the clients listening to
+    a channel.
+    """
+
+    @abc.abstractmethod
+    def publish(self, channel_names: typing.Iterable[str], server_side_event: str) -> None:
+        """
+        Publish an already formatted server-sent event to the given channels.
+        """
+        pass
+
+    @abc.abstractmethod
+    def get_stream_response(self, channel_name: str) -> Response:
+        """
+        :return: response streaming the events of the given channel
+        """
+        pass
+
+
+class GripTransport(LiveMessagesTransport):
+    """
+    Publish events to a GRIP reverse-proxy (PushPin) which holds the client connections.
+    """
+
+    def __init__(self, config: CFG) -> None:
         self.control_uri = config.LIVE_MESSAGES__CONTROL_URI
         self.grip_pub_control = GripPubControl({"control_uri": self.control_uri})
 
+    def publish(self, channel_names: typing.Iterable[str], server_side_event: str) -> None:
+        exported_item = Item(HttpStreamFormat(server_side_event)).export()
+        items = [dict(exported_item, channel=channel_name) for channel_name in channel_names]
+        for offset in range(0, len(items), PUBLISH_BATCH_SIZE):
+            end = offset + PUBLISH_BATCH_SIZE
+            self._publish_items(items[offset:end])
+
+    def _publish_items(self, items: typing.List[typing.Dict[str, typing.Any]]) -> None:
+        results = self.grip_pub_control.http_call(
+            "/publish/",
+            json.dumps({"items": items}).encode("utf-8"),
+            {"Content-Type": "application/json"},
+        )
+        for result in results.values():
+            if isinstance(result[0], Exception):
+                logger.warning(
+                    self, "Failed to publish {} live messages: {}".format(len(items), result[0])
+                )
+            elif not 200 <= result[0] < 300:
+                logger.warning(
+                    self,
+                    "Failed to publish {} live messages: status code {}, {}".format(
+                        len(items), result[0], result[2]
+                    ),
+                )
+
+    def get_stream_response(self, channel_name: str) -> Response:
+        headers = [
+            # Here we ask push pin to keep the connection open
+            ("Grip-Hold", "stream"),
+            # and register this connection on the given channel
+            # multiple channels subscription is possible
+            ("Grip-Channel", channel_name),
+        ] + SSE_HEADERS
+        return Response(headerlist=headers, charset="utf-8", status_code=200)
+
+
+# INFO - return the next event of a subscription, waiting at most the given number
+# of seconds, or None if no event was published
+GetEvent = typing.Callable[[float], typing.Optional[str]]
+
+
+class EventStream(object):
+    """
+    WSGI iterable streaming server-sent events until the client disconnects.
+    close() is called by the WSGI server when the connection ends, even if the
+    stream was never iterated.
+    """
+
+    def __init__(
+        self,
+        get_event: GetEvent,
+        close: typing.Callable[[], None],
+        keepalive_interval: float = STREAM_KEEPALIVE_INTERVAL,
+    ) -> None:
+        """
+        :param close: called once when the stream ends
+        """
+        self._get_event = get_event
+        self._close = close
+        self._keepalive_interval = keepalive_interval
+        self._started = False
+        self._closed = False
+
+    def __iter__(self) -> "EventStream":
+        return self
+
+    def __next__(self) -> bytes:
+        if self._closed:
+            raise StopIteration
+        if not self._started:
+            # INFO - headers are sent with the first chunk of the body
+            self._started = True
+            return b":\n\n"
+        server_side_event = self._get_event(self._keepalive_interval)
+        if server_side_event is None:
+            return b":\n\n"
+        return server_side_event.encode("utf-8")
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._close()
+
+
+class StreamsCounter(object):
+    """
+    Count the streams served by the current process: each of them holds a thread of
+    the WSGI server while the client is connected.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def acquire(self, max_streams: int) -> None:
+        """
+        :raise TooManyLiveMessagesStreams: if max_streams streams are already served
+        """
+        with self._lock:
+            if self.count >= max_streams:
+                raise TooManyLiveMessagesStreams(
+                    "Cannot serve more than {} live messages streams".format(max_streams)
+                )
+            self.count += 1
+
+    def release(self) -> None:
+        with self._lock:
+            self.count -= 1
+
+
+_streams_counter = StreamsCounter()
+
+
+def get_streams_counter() -> StreamsCounter:
+    return _streams_counter
+
+
+def _stream_response(
+    max_streams: int,
+    subscribe: typing.Callable[[], typing.Tuple[GetEvent, typing.Callable[[], None]]],
+) -> Response:
+    """
+    :param subscribe: subscribe to a channel, return the get_event and close functions
+    of the subscription
+    :raise TooManyLiveMessagesStreams: if max_streams streams are already served
+    """
+    streams_counter = get_streams_counter()
+    streams_counter.acquire(max_streams)
+    try:
+        get_event, close_subscription = subscribe()
+    except Exception:
+        streams_counter.release()
+        raise
+
+    def close() -> None:
+        try:
+            close_subscription()
+        finally:
+            streams_counter.release()
+
+    return Response(
+        headerlist=list(SSE_HEADERS), app_iter=EventStream(get_event, close), status_code=200
+    )
+
+
+class LocalSubscription(object):
+    def __init__(self, broker: "LocalBroker", channel_name: str) -> None:
+        self.broker = broker
+        self.channel_name = channel_name
+        self.events = queue.Queue(
+            maxsize=LOCAL_SUBSCRIPTION_MAX_PENDING_EVENTS
+        )  # type: queue.Queue
+
+    def get_event(self, timeout: float) -> typing.Optional[str]:
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker(object):
+    """
+    Thread-safe broker delivering events published by the current process to the
+    streams it serves.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions = {}  # type: typing.Dict[str, typing.Set[LocalSubscription]]
+
+    def subscribe(self, channel_name: str) -> LocalSubscription:
+        subscription = LocalSubscription(self, channel_name)
+        with self._lock:
+            self._subscriptions.setdefault(channel_name, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: LocalSubscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel_name, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.channel_name, None)
+
+    def publish(self, channel_names: typing.Iterable[str], server_side_event: str) -> None:
+        with self._lock:
+            subscriptions = [
+                subscription
+                for channel_name in channel_names
+                for subscription in self._subscriptions.get(channel_name, ())
+            ]
+        for subscription in subscriptions:
+            try:
+                subscription.events.put_nowait(server_side_event)
+            except queue.Full:
+                logger.warning(
+                    self,
+                    "Live message dropped for channel {}: too many pending events".format(
+                        subscription.channel_name
+                    ),
+                )
+
+
+_local_broker = LocalBroker()
+
+
+def get_local_broker() -> LocalBroker:
+    return _local_broker
+
+
+class LocalTransport(LiveMessagesTransport):
+    """
+    Serve streams from tracim itself with an in-process broker: events published by
+    other processes are not received, this transport is meant for development and tests.
+    Each stream holds a thread of the WSGI server, their number is limited by
+    LIVE_MESSAGES__MAX_STREAMS.
+    """
+
+    def __init__(self, config: CFG) -> None:
+        self.broker = get_local_broker()
+        self.max_streams = config.LIVE_MESSAGES__MAX_STREAMS
+
+    def publish(self, channel_names: typing.Iterable[str], server_side_event: str) -> None:
+        self.broker.publish(channel_names, server_side_event)
+
+    def get_stream_response(self, channel_name: str) -> Response:
+        def subscribe():
+            subscription = self.broker.subscribe(channel_name)
+            return subscription.get_event, subscription.close
+
+        return _stream_response(self.max_streams, subscribe)
+
+
+class RedisTransport(LiveMessagesTransport):
+    """
+    Publish events on Redis pub/sub channels, streams are served from tracim
+    by any process subscribing to these channels. As with LocalTransport, each stream
+    holds a thread of the WSGI server: this transport is meant for development.
+    """
+
+    def __init__(self, config: CFG) -> None:
+        # INFO - imported here as redis is only needed by this transport
+        from tracim_backend.lib.rq import get_redis_connection
+
+        self.redis_connection = get_redis_connection(config)
+        self.max_streams = config.LIVE_MESSAGES__MAX_STREAMS
+
+    def publish(self, channel_names: typing.Iterable[str], server_side_event: str) -> None:
+        pipeline = self.redis_connection.pipeline(transaction=False)
+        for channel_name in channel_names:
+            pipeline.publish(REDIS_CHANNEL_PREFIX + channel_name, server_side_event)
+        pipeline.execute()
+
+    def get_stream_response(self, channel_name: str) -> Response:
+        def subscribe():
+            pubsub = self.redis_connection.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(REDIS_CHANNEL_PREFIX + channel_name)
+
+            def get_event(timeout: float) -> typing.Optional[str]:
+                deadline = time.monotonic() + timeout
+                while True:
+                    message = pubsub.get_message(timeout=max(deadline - time.monotonic(), 0))
+                    if message and message["type"] == "message":
+                        return message["data"].decode("utf-8")
+                    if time.monotonic() >= deadline:
+                        return None
+
+            return get_event, pubsub.close
+
+        return _stream_response(self.max_streams, subscribe)
+
+
+LIVE_MESSAGES_TRANSPORTS = {
+    "grip": GripTransport,
+    "redis": RedisTransport,
+    "local": LocalTransport,
+}  # type: typing.Dict[str, typing.Type[LiveMessagesTransport]]
+
+
+class LiveMessagesLib(object):
+    # INFO - fields of events and messages of pages are added as JSON text,
+    # see serialize_message() and serialize_messages_page()
+    _message_schema = LiveMessageSchema(exclude=("fields",))
+    _messages_page_schema = LiveMessagesPageSchema(exclude=("items",))
+
+    def __init__(self, config: CFG,) -> None:
+        self.transport = LIVE_MESSAGES_TRANSPORTS[config.LIVE_MESSAGES__TRANSPORT](config)
+
+    @staticmethod
+    def user_channel_name(user_id: int) -> str:
+        return "user_{}".format(user_id)
+
+    @staticmethod
+    def _dumps_object(
+        serialized_members: typing.Dict[str, str], members: typing.Dict[str, typing.Any]
+    ) -> str:
+        """
+        Return the JSON text of an object made of members given as JSON text
+        and of members to serialize.
+        """
+        serialized_members = dict(serialized_members)
+        serialized_members.update((name, json.dumps(value)) for name, value in members.items())
+        return "{{{}}}".format(
+            ", ".join(
+                "{}: {}".format(json.dumps(name), value)
+                for name, value in serialized_members.items()
+            )
+        )
+
+    @classmethod
+    def serialize_message(cls, message: Message) -> str:
+        """
+        Serialize a message as JSON text. Fields of its event are the JSON text
+        stored with the event: they are not serialized again for each message.
+        """
+        return cls._dumps_object(
+            {"fields": message.event.serialized_fields}, cls._message_schema.dump(message).data
+        )
+
+    @classmethod
+    def serialize_messages_page(cls, page: PaginatedObject) -> str:
+        """
+        Serialize a page of messages as JSON text matching LiveMessagesPageSchema,
+        see serialize_message().
+        """
+        items = "[{}]".format(", ".join(cls.serialize_message(message) for message in page.items))
+        return cls._dumps_object({"items": items}, cls._messages_page_schema.dump(page).data)
+
     def publish_message_to_user(self, message: Message):
-        channel_name = "user_{}".format(message.receiver_id)
-        message_schema = LiveMessageSchema()
-        message_as_dict = message_schema.dump(message).data
-        self.publish_dict(channel_name, message_as_dict=message_as_dict)
+        self.transport.publish(
+            [self.user_channel_name(message.receiver_id)],
+            str(JsonServerSideEvent(data=self.serialize_message(message), event=TLM_EVENT_NAME)),
+        )
+
+    def publish_message_to_users(self, message: Message, receiver_ids: typing.Iterable[int]):
+        """
+        Publish the same message to the channels of several users: the message is serialized
+        once and published to all channels at once.
+        :param message: message to publish, its receiver is not used
+        :param receiver_ids: ids of users to publish the message to
+        """
+        self.transport.publish(
+            [self.user_channel_name(receiver_id) for receiver_id in receiver_ids],
+            str(JsonServerSideEvent(data=self.serialize_message(message), event=TLM_EVENT_NAME)),
+        )
 
     def publish_dict(self, channel_name: str, message_as_dict: typing.Dict[str, typing.Any]):
-        self.grip_pub_control.publish_http_stream(
-            channel_name, str(JsonServerSideEvent(data=message_as_dict, event=TLM_EVENT_NAME))
+        self.transport.publish(
+            [channel_name], str(JsonServerSideEvent(data=message_as_dict, event=TLM_EVENT_NAME))
         )
+
+    def get_user_stream_response(self, user_id: int) -> Response:
+        """
+        :return: response streaming the live messages of the given user
+        """
+        return self.transport.get_stream_response(self.user_channel_name(user_id))
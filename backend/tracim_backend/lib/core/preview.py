@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import threading
+import typing
+
+from preview_generator.manager import PreviewManager
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import SessionTransaction
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.rq import get_redis_connection
+from tracim_backend.lib.rq import get_rq_queue
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.models.data import ContentRevisionRO
+
+RQ_QUEUE_NAME = "preview"
+# INFO - key of session.info storing revisions waiting for preview generation
+_PENDING_REVISIONS_INFO_KEY = "preview_pending_revisions"
+
+# INFO - preview managers of the process, by preview cache dir
+_preview_managers = {}
+_preview_managers_lock = threading.Lock()
+
+
+def get_preview_manager(config: CFG) -> PreviewManager:
+    """
+    Return the preview manager using the preview cache dir of config. It is created
+    on first call, then shared by the whole process.
+    :param config: current app_config
+    :return: preview manager
+    """
+    cache_dir = config.PREVIEW_CACHE_DIR
+    preview_manager = _preview_managers.get(cache_dir)
+    if preview_manager is None:
+        with _preview_managers_lock:
+            preview_manager = _preview_managers.get(cache_dir)
+            if preview_manager is None:
+                preview_manager = PreviewManager(cache_dir, create_folder=True)
+                _preview_managers[cache_dir] = preview_manager
+    return preview_manager
+
+
+def schedule_previews_generation(
+    session: Session, config: CFG, revision: ContentRevisionRO
+) -> None:
+    """
+    Store preview metadata of the file of a revision, and generate its previews if
+    preview pregeneration is enabled, once the current transaction of session is committed:
+    - in a RQ job of the "preview" queue if jobs processing mode is async,
+    - in session, just before commit, if jobs processing mode is sync.
+    :param session: session the revision is added to
+    :param config: current app_config
+    :param revision: revision whose file previews should be generated
+    """
+    if _PENDING_REVISIONS_INFO_KEY not in session.info:
+        session.info[_PENDING_REVISIONS_INFO_KEY] = []
+        _listen_session_transaction(session, config)
+    session.info[_PENDING_REVISIONS_INFO_KEY].append(revision)
+
+
+def _pop_pending_revision_ids(session: Session) -> typing.List[int]:
+    revisions = session.info[_PENDING_REVISIONS_INFO_KEY]
+    session.info[_PENDING_REVISIONS_INFO_KEY] = []
+    if revisions:
+        # INFO - revision ids are given by the database
+        session.flush()
+    revision_ids = []
+    for revision in revisions:
+        if revision.revision_id not in revision_ids:
+            revision_ids.append(revision.revision_id)
+    return revision_ids
+
+
+def _listen_session_transaction(session: Session, config: CFG) -> None:
+    revision_ids_to_enqueue = []  # type: typing.List[int]
+
+    if config.JOBS__PROCESSING_MODE == config.CST.ASYNC:
+        # INFO - jobs are enqueued after commit so that the revisions are visible
+        # to the RQ worker when it queries the database.
+
+        def collect_pending_revision_ids(session: Session) -> None:
+            if session.transaction.nested:
+                return
+            revision_ids_to_enqueue.extend(_pop_pending_revision_ids(session))
+
+        def enqueue_previews_generation_jobs(session: Session) -> None:
+            if session.transaction.nested or not revision_ids_to_enqueue:
+                return
+            redis_connection = get_redis_connection(config)
+            queue = get_rq_queue(redis_connection, RQ_QUEUE_NAME)
+            for revision_id in revision_ids_to_enqueue:
+                logger.debug(
+                    schedule_previews_generation,
+                    "generate previews of revision {} asynchronously to RQ queue {}".format(
+                        revision_id, RQ_QUEUE_NAME
+                    ),
+                )
+                queue.enqueue(generate_previews_job, revision_id)
+            revision_ids_to_enqueue.clear()
+
+        event.listen(session, "before_commit", collect_pending_revision_ids)
+        event.listen(session, "after_commit", enqueue_previews_generation_jobs)
+    else:
+
+        def generate_pending_previews(session: Session) -> None:
+            if session.transaction.nested:
+                return
+            for revision_id in _pop_pending_revision_ids(session):
+                logger.debug(
+                    schedule_previews_generation,
+                    "generate previews of revision {} synchronously".format(revision_id),
+                )
+                generate_previews(session, config, revision_id)
+
+        event.listen(session, "before_commit", generate_pending_previews)
+
+    def clear_pending_revisions(session: Session, transaction: SessionTransaction) -> None:
+        # INFO - revisions of a rollbacked transaction should not be generated
+        if transaction.parent is None:
+            session.info[_PENDING_REVISIONS_INFO_KEY] = []
+            revision_ids_to_enqueue.clear()
+
+    event.listen(session, "after_transaction_end", clear_pending_revisions)
+
+
+def generate_previews(session: Session, config: CFG, revision_id: int) -> None:
+    """
+    Store preview metadata of the file of a revision, see ContentApi.store_preview_metadata(),
+    then generate its previews if enabled, see ContentApi.generate_previews()
+    """
+    # INFO - imported here to avoid circular import as ContentApi uses this module
+    from tracim_backend.lib.core.content import ContentApi
+
+    content_api = ContentApi(
+        current_user=None,
+        session=session,
+        config=config,
+        show_deleted=True,
+        show_archived=True,
+        show_active=True,
+        show_temporary=True,
+    )
+    content_api.store_preview_metadata(revision_id)
+    if config.PREVIEW__PREGENERATION__ENABLED:
+        content_api.generate_previews(revision_id)
+
+
+def generate_previews_job(revision_id: int) -> None:
+    """
+    RQ job generating previews of the file of a revision, it must be executed
+    by a DatabaseWorker, see tracim_backend.lib.rq.worker
+    """
+    # INFO - imported here to avoid circular import as the worker context uses ContentApi
+    from tracim_backend.lib.rq.worker import worker_context
+
+    with worker_context() as context:
+        generate_previews(context.dbsession, context.app_config, revision_id)
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+from collections import Counter
+from collections import namedtuple
+import typing
+
+from sqlalchemy import event
+from sqlalchemy import func
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.session import SessionTransaction
+from sqlalchemy.orm.unitofwork import UOWTransaction
+
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.models.auth import User
+from tracim_backend.models.data import Content
+from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import Workspace
+from tracim_backend.models.meta import DeclarativeBase
+
+# INFO - key of session.info storing changes of the current transaction impacting used space
+_USED_SPACE_CHANGES_INFO_KEY = "used_space_changes"
+FILE_SIZE_UPDATE_BATCH_SIZE = 1000
+# INFO - maximum number of ids given to an IN clause
+CONTENT_IDS_BATCH_SIZE = 500
+
+WorkspaceUsedSpace = namedtuple("WorkspaceUsedSpace", ["owner_id", "is_deleted", "used_space"])
+
+
+class UsedSpaceChanges(object):
+    """
+    Changes of a transaction impacting the used space of workspaces and users.
+    """
+
+    def __init__(self) -> None:
+        # INFO - contents whose files may be counted differently: they got new revisions
+        # (new file, deletion, archiving, move...) or lost some.
+        self.content_ids = set()  # type: typing.Set[int]
+        # INFO - contents created by the transaction, their files were not counted before it
+        self.contents = set()  # type: typing.Set[Content]
+        # INFO - new revisions, their content may be new too and its id not known yet
+        self.revisions = set()  # type: typing.Set[ContentRevisionRO]
+        # INFO - used space changes by workspace id: files of the changed contents counted
+        # before the transaction are subtracted, files counted at commit are added
+        self.workspace_deltas = Counter()  # type: typing.Counter[int]
+        # INFO - state before the transaction of workspaces whose owner or deletion
+        # state changed
+        self.workspaces = {}  # type: typing.Dict[int, WorkspaceUsedSpace]
+
+    def __bool__(self) -> bool:
+        return bool(self.content_ids or self.contents or self.revisions or self.workspaces)
+
+    def clear(self) -> None:
+        self.content_ids.clear()
+        self.contents.clear()
+        self.revisions.clear()
+        self.workspace_deltas.clear()
+        self.workspaces.clear()
+
+
+def listen_used_space_changes(session: Session) -> None:
+    """
+    Keep Workspace.used_space and User.used_space up to date: the used space of changed
+    contents is subtracted on flush, before they change, then their new used space is added
+    just before commit. Only the revisions of these contents are summed.
+    """
+    session.info[_USED_SPACE_CHANGES_INFO_KEY] = UsedSpaceChanges()
+    event.listen(session, "before_flush", collect_used_space_changes)
+    event.listen(session, "before_commit", update_changed_used_space)
+    event.listen(session, "after_transaction_end", clear_used_space_changes)
+
+
+def collect_used_space_changes(
+    session: Session, flush_context: UOWTransaction, instances: typing.List[DeclarativeBase]
+) -> None:
+    changes = session.info[_USED_SPACE_CHANGES_INFO_KEY]
+    content_ids = set()
+    workspace_ids = set()
+    with session.no_autoflush:
+        for obj in session.new:
+            if isinstance(obj, Content):
+                changes.contents.add(obj)
+            elif isinstance(obj, ContentRevisionRO):
+                if obj.depot_file and obj.file_size is None:
+                    obj.file_size = obj.depot_file.file.content_length
+                changes.revisions.add(obj)
+                # INFO - the content id is not set before flush if the node was set
+                content_id = obj.node.id if obj.node else obj.content_id
+                if content_id is not None:
+                    content_ids.add(content_id)
+
+        for obj in session.dirty:
+            if isinstance(obj, Content) and obj.id is not None:
+                content_ids.add(obj.id)
+            elif isinstance(obj, Workspace) and _has_owner_or_deletion_changes(obj):
+                workspace_ids.add(obj.workspace_id)
+
+        for obj in session.deleted:
+            if isinstance(obj, ContentRevisionRO):
+                content_ids.add(obj.content_id)
+            elif isinstance(obj, Content):
+                content_ids.add(obj.id)
+            elif isinstance(obj, Workspace):
+                workspace_ids.add(obj.workspace_id)
+
+        # INFO - the database still holds the state of the transaction start for contents
+        # and workspaces seen for the first time
+        content_ids -= changes.content_ids
+        content_ids -= {content.id for content in changes.contents}
+        if content_ids:
+            changes.workspace_deltas.subtract(get_contents_used_space(session, content_ids))
+            changes.content_ids.update(content_ids)
+        workspace_ids -= changes.workspaces.keys()
+        if workspace_ids:
+            changes.workspaces.update(_get_workspaces_used_space(session, workspace_ids))
+
+
+def _has_owner_or_deletion_changes(workspace: Workspace) -> bool:
+    state = inspect(workspace)
+    return (
+        state.attrs.owner.history.has_changes()
+        or state.attrs.owner_id.history.has_changes()
+        or state.attrs.is_deleted.history.has_changes()
+    )
+
+
+def get_contents_used_space(
+    session: Session, content_ids: typing.Iterable[int]
+) -> typing.Dict[int, int]:
+    """
+    :return: size of the files of all revisions of the given contents, by workspace id,
+    for contents being neither deleted nor archived.
+    """
+    content_ids = sorted(content_ids)
+    current_revision = aliased(ContentRevisionRO)
+    used_space = Counter()  # type: typing.Counter[int]
+    for start in range(0, len(content_ids), CONTENT_IDS_BATCH_SIZE):
+        end = start + CONTENT_IDS_BATCH_SIZE
+        rows = (
+            session.query(ContentRevisionRO.workspace_id, func.sum(ContentRevisionRO.file_size))
+            .join(Content, Content.id == ContentRevisionRO.content_id)
+            .join(current_revision, current_revision.revision_id == Content.cached_revision_id)
+            .filter(Content.id.in_(content_ids[start:end]))
+            .filter(ContentRevisionRO.file_size != None)  # noqa: E711
+            .filter(current_revision.is_deleted == False)  # noqa: E712
+            .filter(current_revision.is_archived == False)  # noqa: E712
+            .group_by(ContentRevisionRO.workspace_id)
+        )
+        for workspace_id, size in rows:
+            used_space[workspace_id] += size
+    return used_space
+
+
+def _get_workspaces_used_space(
+    session: Session, workspace_ids: typing.Iterable[int]
+) -> typing.Dict[int, WorkspaceUsedSpace]:
+    return {
+        workspace_id: WorkspaceUsedSpace(owner_id, is_deleted, used_space)
+        for workspace_id, owner_id, is_deleted, used_space in session.query(
+            Workspace.workspace_id, Workspace.owner_id, Workspace.is_deleted, Workspace.used_space
+        ).filter(Workspace.workspace_id.in_(workspace_ids))
+    }
+
+
+def update_changed_used_space(session: Session) -> None:
+    if session.transaction.nested:
+        return
+    changes = session.info[_USED_SPACE_CHANGES_INFO_KEY]
+    if not changes:
+        return
+    # INFO - revisions and content ids are given by the database
+    session.flush()
+    content_ids = set(changes.content_ids)
+    content_ids.update(content.id for content in changes.contents)
+    content_ids.update(revision.content_id for revision in changes.revisions)
+    workspace_deltas = changes.workspace_deltas
+    workspace_deltas.update(get_contents_used_space(session, content_ids))
+    workspace_deltas = {
+        workspace_id: delta for workspace_id, delta in workspace_deltas.items() if delta
+    }
+    previous_workspaces = dict(changes.workspaces)
+    changes.clear()
+
+    for workspace_id, delta in workspace_deltas.items():
+        session.query(Workspace).filter(Workspace.workspace_id == workspace_id).update(
+            {Workspace.used_space: Workspace.used_space + delta}, synchronize_session=False
+        )
+
+    # INFO - the used space of a user is the sum of the used space of the not deleted
+    # workspaces they own: remove the previous contribution of changed workspaces to it,
+    # then add the current one.
+    workspaces = _get_workspaces_used_space(
+        session, set(workspace_deltas) | set(previous_workspaces)
+    )
+    user_deltas = Counter()  # type: typing.Counter[int]
+    for workspace_id in set(workspaces) | set(previous_workspaces):
+        workspace = workspaces.get(workspace_id)
+        previous_workspace = previous_workspaces.get(workspace_id)
+        if workspace is None and previous_workspace is None:
+            continue
+        if previous_workspace is None:
+            previous_workspace = workspace._replace(
+                used_space=workspace.used_space - workspace_deltas.get(workspace_id, 0)
+            )
+        if not previous_workspace.is_deleted:
+            user_deltas[previous_workspace.owner_id] -= previous_workspace.used_space
+        if workspace and not workspace.is_deleted:
+            user_deltas[workspace.owner_id] += workspace.used_space
+
+    for user_id, delta in user_deltas.items():
+        if delta and user_id is not None:
+            session.query(User).filter(User.user_id == user_id).update(
+                {User.used_space: User.used_space + delta}, synchronize_session=False
+            )
+
+    for workspace in _get_loaded_instances(session, Workspace):
+        if workspace.workspace_id in workspace_deltas:
+            session.expire(workspace, ["used_space"])
+    for user in _get_loaded_instances(session, User):
+        if user.user_id in user_deltas:
+            session.expire(user, ["used_space"])
+
+
+def clear_used_space_changes(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info[_USED_SPACE_CHANGES_INFO_KEY].clear()
+
+
+def update_workspaces_used_space(
+    session: Session, workspace_ids: typing.Optional[typing.Iterable[int]] = None
+) -> typing.Set[int]:
+    """
+    Compute again the used space of workspaces, in database, to repair it: it is the size of the files
+    of all revisions of the workspace whose content is neither deleted nor archived.
+    :param session: current session
+    :param workspace_ids: ids of workspaces to update, all workspaces if None
+    :return: ids of owners of the updated workspaces
+    """
+    if workspace_ids is not None:
+        workspace_ids = set(workspace_ids)
+    current_revision = aliased(ContentRevisionRO)
+    used_space = (
+        session.query(func.coalesce(func.sum(ContentRevisionRO.file_size), 0))
+        .select_from(ContentRevisionRO)
+        .join(Content, Content.id == ContentRevisionRO.content_id)
+        .join(current_revision, current_revision.revision_id == Content.cached_revision_id)
+        .filter(ContentRevisionRO.workspace_id == Workspace.workspace_id)
+        .filter(current_revision.is_deleted == False)  # noqa: E712
+        .filter(current_revision.is_archived == False)  # noqa: E712
+        .as_scalar()
+    )
+    workspaces = session.query(Workspace)
+    if workspace_ids is not None:
+        workspaces = workspaces.filter(Workspace.workspace_id.in_(workspace_ids))
+    workspaces.update({Workspace.used_space: used_space}, synchronize_session=False)
+    for workspace in _get_loaded_instances(session, Workspace):
+        if workspace_ids is None or workspace.workspace_id in workspace_ids:
+            session.expire(workspace, ["used_space"])
+    return {owner_id for owner_id, in workspaces.with_entities(Workspace.owner_id).distinct()}
+
+
+def update_users_used_space(
+    session: Session, user_ids: typing.Optional[typing.Iterable[int]] = None
+) -> None:
+    """
+    Compute again the used space of users, in database, to repair it: it is the sum of the used space
+    of the not deleted workspaces they own.
+    :param session: current session
+    :param user_ids: ids of users to update, all users if None
+    """
+    if user_ids is not None:
+        user_ids = set(user_ids)
+    used_space = (
+        session.query(func.coalesce(func.sum(Workspace.used_space), 0))
+        .select_from(Workspace)
+        .filter(Workspace.owner_id == User.user_id)
+        .filter(Workspace.is_deleted == False)  # noqa: E712
+        .as_scalar()
+    )
+    users = session.query(User)
+    if user_ids is not None:
+        users = users.filter(User.user_id.in_(user_ids))
+    users.update({User.used_space: used_space}, synchronize_session=False)
+    for user in _get_loaded_instances(session, User):
+        if user_ids is None or user.user_id in user_ids:
+            session.expire(user, ["used_space"])
+
+
+def _get_loaded_instances(
+    session: Session, class_: typing.Type[DeclarativeBase]
+) -> typing.List[DeclarativeBase]:
+    return [instance for instance in session.identity_map.values() if isinstance(instance, class_)]
+
+
+def set_missing_file_sizes(session: Session) -> int:
+    """
+    Set the file size of revisions whose file was stored before sizes were stored,
+    by reading their depot file.
+    :return: number of updated revisions
+    """
+    updated_revisions_count = 0
+    last_revision_id = 0
+    while True:
+        revisions = (
+            session.query(ContentRevisionRO.revision_id, ContentRevisionRO.depot_file)
+            .filter(ContentRevisionRO.file_size == None)  # noqa: E711
+            .filter(ContentRevisionRO.depot_file != None)  # noqa: E711
+            .filter(ContentRevisionRO.revision_id > last_revision_id)
+            .order_by(ContentRevisionRO.revision_id)
+            .limit(FILE_SIZE_UPDATE_BATCH_SIZE)
+            .all()
+        )
+        if not revisions:
+            return updated_revisions_count
+        for revision_id, depot_file in revisions:
+            last_revision_id = revision_id
+            try:
+                file_size = depot_file.file.content_length
+            except IOError:
+                logger.warning(
+                    set_missing_file_sizes,
+                    "file of revision {} is not available, its size is unknown".format(revision_id),
+                    exc_info=True,
+                )
+                continue
+            # INFO - revisions are not updatable through the ORM
+            session.query(ContentRevisionRO).filter(
+                ContentRevisionRO.revision_id == revision_id
+            ).update({ContentRevisionRO.file_size: file_size}, synchronize_session=False)
+            updated_revisions_count += 1
@@ -1,13 +1,146 @@
+from collections import namedtuple
+import contextlib
+import typing
+
 from pluggy import PluginManager
 from sqlalchemy import event
+from sqlalchemy import inspect
 from sqlalchemy.orm.session import UOWTransaction
 
+from tracim_backend.lib.utils.metrics import get_metrics
 from tracim_backend.models.auth import User
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
+from tracim_backend.models.meta import DeclarativeBase
 from tracim_backend.models.tracim_session import TracimSession
 
+# INFO - hooks called for objects of a class, argument is the name of the object parameter
+# in the hook specifications, watched_attributes are the attributes whose changes
+# are notified through the modified hook.
+CrudHooks = namedtuple(
+    "CrudHooks", ["argument", "created", "modified", "deleted", "watched_attributes"]
+)
+
+# INFO - watched attributes are the ones read by the hook implementations (events and
+# search index): changes of other attributes, like the used space updated by each
+# upload or the authentication tokens, are not notified.
+_CRUD_HOOKS = {
+    User: CrudHooks(
+        "user",
+        "on_user_created",
+        "on_user_modified",
+        "on_user_deleted",
+        frozenset(
+            (
+                "email",
+                "username",
+                "display_name",
+                "is_active",
+                "is_deleted",
+                "timezone",
+                "lang",
+                "auth_type",
+                "profile",
+                "allowed_space",
+            )
+        ),
+    ),
+    Workspace: CrudHooks(
+        "workspace",
+        "on_workspace_created",
+        "on_workspace_modified",
+        "on_workspace_deleted",
+        frozenset(
+            (
+                "label",
+                "description",
+                "is_deleted",
+                "agenda_enabled",
+                "public_upload_enabled",
+                "public_download_enabled",
+                "owner_id",
+                "owner",
+            )
+        ),
+    ),
+    UserRoleInWorkspace: CrudHooks(
+        "role",
+        "on_user_role_in_workspace_created",
+        "on_user_role_in_workspace_modified",
+        "on_user_role_in_workspace_deleted",
+        frozenset(("role", "do_notify", "user_id", "workspace_id", "user", "workspace")),
+    ),
+    # INFO - content data are stored in its revisions: a content is modified
+    # when its current revision changes
+    Content: CrudHooks(
+        "content",
+        "on_content_created",
+        "on_content_modified",
+        "on_content_deleted",
+        frozenset(("cached_revision_id", "current_revision")),
+    ),
+}  # type: typing.Dict[type, CrudHooks]
+
+# INFO - dispatch table by concrete class of flushed objects, None for classes without hooks
+_crud_hooks_by_class = {}  # type: typing.Dict[type, typing.Optional[CrudHooks]]
+
+
+def get_crud_hooks(class_: type) -> typing.Optional[CrudHooks]:
+    """
+    :return: the crud hooks of the given class of objects, None if it has none
+    """
+    try:
+        return _crud_hooks_by_class[class_]
+    except KeyError:
+        pass
+    crud_hooks = next(
+        (_CRUD_HOOKS[base_class] for base_class in class_.__mro__ if base_class in _CRUD_HOOKS),
+        None,
+    )
+    _crud_hooks_by_class[class_] = crud_hooks
+    return crud_hooks
+
+
+def get_changed_attributes(obj: DeclarativeBase) -> typing.FrozenSet[str]:
+    """
+    Return the attributes of an object which changed since it was loaded or flushed:
+    unlike session.is_modified(), only attributes which were set are compared.
+    """
+    state = inspect(obj)
+    return frozenset(key for key in state.committed_state if state.attrs[key].history.has_changes())
+
+
+class BulkCrudOperation(object):
+    """Objects created, modified and deleted while crud hooks are suspended."""
+
+    def __init__(self) -> None:
+        self.created = []  # type: typing.List[DeclarativeBase]
+        self.modified = []  # type: typing.List[DeclarativeBase]
+        self.deleted = []  # type: typing.List[DeclarativeBase]
+        # INFO - watched attributes changed during the operation, by modified object
+        self.changed_attributes = {}  # type: typing.Dict[DeclarativeBase, typing.FrozenSet[str]]
+        # INFO - objects can be flushed several times during the operation
+        self._known_object_ids = set()  # type: typing.Set[int]
+
+    def __bool__(self) -> bool:
+        return bool(self.created or self.modified or self.deleted)
+
+    def add_created(self, obj: DeclarativeBase) -> None:
+        self._known_object_ids.add(id(obj))
+        self.created.append(obj)
+
+    def add_modified(self, obj: DeclarativeBase, changed_attributes: typing.FrozenSet[str]) -> None:
+        if obj in self.changed_attributes:
+            self.changed_attributes[obj] |= changed_attributes
+        elif id(obj) not in self._known_object_ids:
+            self._known_object_ids.add(id(obj))
+            self.modified.append(obj)
+            self.changed_attributes[obj] = changed_attributes
+
+    def add_deleted(self, obj: DeclarativeBase) -> None:
+        self.deleted.append(obj)
+
 
 class DatabaseCrudHookCaller:
     """Listen for sqlalchemy session events and call the pluggy hooks
@@ -16,56 +149,85 @@ class DatabaseCrudHookCaller:
     def __init__(self, session: TracimSession, plugin_manager: PluginManager) -> None:
         assert session.context
         self._plugin_manager = plugin_manager
+        self._bulk_operation = None  # type: typing.Optional[BulkCrudOperation]
         # calling hooks after flush allows to get database-generated
         # values (primary key...) in the objects
         event.listen(session, "after_flush", self._call_hooks)
 
+    @contextlib.contextmanager
+    def suspended(self, session: TracimSession) -> typing.Generator[BulkCrudOperation, None, None]:
+        """
+        Suspend the per-object crud hooks during a bulk operation: objects flushed in this
+        context are given at its end to one on_bulk_crud_operation hook call.
+        Nested calls are part of the outermost bulk operation.
+        """
+        if self._bulk_operation is not None:
+            yield self._bulk_operation
+            return
+        bulk_operation = self._bulk_operation = BulkCrudOperation()
+        try:
+            yield bulk_operation
+            session.flush()
+        finally:
+            self._bulk_operation = None
+        if bulk_operation:
+            self._plugin_manager.hook.on_bulk_crud_operation(
+                created=bulk_operation.created,
+                modified=bulk_operation.modified,
+                deleted=bulk_operation.deleted,
+                changed_attributes=bulk_operation.changed_attributes,
+                context=session.context,
+            )
+
     def _call_hooks(self, session: TracimSession, flush_context: UOWTransaction,) -> None:
         assert session.context, "session must have a context"
         assert session.context.dbsession
+        with get_metrics(session.context.app_config).timer("crud_hooks.dispatch"):
+            self._call_hooks_of_flushed_objects(session)
+
+    def _call_hooks_of_flushed_objects(self, session: TracimSession) -> None:
+        bulk_operation = self._bulk_operation
+        hook = self._plugin_manager.hook
+        context = session.context
         for obj in session.new:
-            if isinstance(obj, User):
-                self._plugin_manager.hook.on_user_created(user=obj, context=session.context)
-            elif isinstance(obj, Workspace):
-                self._plugin_manager.hook.on_workspace_created(
-                    workspace=obj, context=session.context
-                )
-            elif isinstance(obj, UserRoleInWorkspace):
-                self._plugin_manager.hook.on_user_role_in_workspace_created(
-                    role=obj, context=session.context
-                )
-            elif isinstance(obj, Content):
-                self._plugin_manager.hook.on_content_created(content=obj, context=session.context)
+            crud_hooks = get_crud_hooks(type(obj))
+            if crud_hooks is None:
+                continue
+            if bulk_operation is not None:
+                bulk_operation.add_created(obj)
+            else:
+                getattr(hook, crud_hooks.created)(**{crud_hooks.argument: obj, "context": context})
 
         for obj in session.dirty:
+            crud_hooks = get_crud_hooks(type(obj))
             # NOTE S.G 2020-05-08: session.dirty contains objects that do not have to be
             # updated, don't consider them
             # see https://docs.sqlalchemy.org/en/13/orm/session_api.html#sqlalchemy.orm.session.Session.dirty
-            if not session.is_modified(obj):
+            if crud_hooks is None:
+                continue
+            changed_attributes = get_changed_attributes(obj) & crud_hooks.watched_attributes
+            if not changed_attributes:
                 continue
-            if isinstance(obj, User):
-                self._plugin_manager.hook.on_user_modified(user=obj, context=session.context)
-            elif isinstance(obj, Workspace):
-                self._plugin_manager.hook.on_workspace_modified(
-                    workspace=obj, context=session.context
-                )
-            elif isinstance(obj, UserRoleInWorkspace):
-                self._plugin_manager.hook.on_user_role_in_workspace_modified(
-                    role=obj, context=session.context
-                )
-            elif isinstance(obj, Content):
-                self._plugin_manager.hook.on_content_modified(content=obj, context=session.context)
+            if bulk_operation is not None:
+                bulk_operation.add_modified(obj, changed_attributes)
+            else:
+                getattr(hook, crud_hooks.modified)(**{crud_hooks.argument: obj, "context": context})
 
         for obj in session.deleted:
-            if isinstance(obj, User):
-                self._plugin_manager.hook.on_user_deleted(user=obj, context=session.context)
-            elif isinstance(obj, Workspace):
-                self._plugin_manager.hook.on_workspace_deleted(
-                    workspace=obj, context=session.context
-                )
-            elif isinstance(obj, UserRoleInWorkspace):
-                self._plugin_manager.hook.on_user_role_in_workspace_deleted(
-                    role=obj, context=session.context
-                )
-            elif isinstance(obj, Content):
-                self._plugin_manager.hook.on_content_deleted(content=obj, context=session.context)
+            crud_hooks = get_crud_hooks(type(obj))
+            if crud_hooks is None:
+                continue
+            if bulk_operation is not None:
+                bulk_operation.add_deleted(obj)
+            else:
+                getattr(hook, crud_hooks.deleted)(**{crud_hooks.argument: obj, "context": context})
+
+
+@contextlib.contextmanager
+def bulk_crud_operation(session: TracimSession) -> typing.Generator[BulkCrudOperation, None, None]:
+    """
+    Suspend the per-object crud hooks of the session during a bulk operation,
+    see DatabaseCrudHookCaller.suspended().
+    """
+    with session.info["crud_hook_caller"].suspended(session) as bulk_operation:
+        yield bulk_operation
@@ -1,9 +1,12 @@
+import typing
+
 from tracim_backend.lib.core.plugins import hookspec
 from tracim_backend.lib.utils.request import TracimContext
 from tracim_backend.models.auth import User
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
+from tracim_backend.models.meta import DeclarativeBase
 
 
 class DatabaseCrudHookSpec:
@@ -71,3 +74,20 @@ class DatabaseCrudHookSpec:
     @hookspec
     def on_content_revision_created(self, content: Content, context: TracimContext) -> None:
         ...
+
+    @hookspec
+    def on_bulk_crud_operation(
+        self,
+        created: typing.List[DeclarativeBase],
+        modified: typing.List[DeclarativeBase],
+        deleted: typing.List[DeclarativeBase],
+        changed_attributes: typing.Dict[DeclarativeBase, typing.FrozenSet[str]],
+        context: TracimContext,
+    ) -> None:
+        """
+        Called once at the end of a bulk operation instead of the hooks of each
+        created, modified or deleted entity, see crud_hook.caller.bulk_crud_operation().
+        Attributes history is reset by the flushes of the operation: changed_attributes
+        gives the watched attributes changed of each modified entity.
+        """
+        ...
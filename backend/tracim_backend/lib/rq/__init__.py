@@ -1,9 +1,18 @@
 # -*- coding: utf-8 -*-
+from datetime import timedelta
+import time
+import typing
+
 import redis
 import rq
+from rq.exceptions import NoSuchJobError
+from rq.job import JobStatus
 
 from tracim_backend.config import CFG
 
+# INFO - redis sorted set of the ids of the delayed jobs of a queue, scored by due timestamp
+DELAYED_JOBS_KEY_TEMPLATE = "tracim:rq:delayed:{}"
+
 
 def get_redis_connection(config: CFG) -> redis.Redis:
     """
@@ -26,3 +35,43 @@ def get_rq_queue(
     """
 
     return rq.Queue(name=queue_name, connection=redis_connection, is_async=is_async)
+
+
+def enqueue_in(
+    queue: rq.Queue, delay: timedelta, func: typing.Callable, *args: typing.Any
+) -> rq.job.Job:
+    """
+    Enqueue a job once delay is elapsed. The RQ version used has no scheduler: delayed
+    jobs are moved to their queue by the DatabaseWorker processing it,
+    see tracim_backend.lib.rq.worker.
+    :param queue: queue of the job
+    :param delay: delay before the job is enqueued
+    :param func: function of the job, args are given to it
+    :return: delayed job
+    """
+    job = queue.job_class.create(
+        func, args=args, connection=queue.connection, origin=queue.name, status=JobStatus.DEFERRED
+    )
+    job.save()
+    # INFO - redis-py < 3.0 takes members as name=score keyword arguments
+    queue.connection.zadd(
+        DELAYED_JOBS_KEY_TEMPLATE.format(queue.name),
+        **{job.id: time.time() + delay.total_seconds()}
+    )
+    return job
+
+
+def enqueue_due_jobs(queue: rq.Queue) -> None:
+    """
+    Enqueue the delayed jobs of queue whose delay is elapsed.
+    """
+    key = DELAYED_JOBS_KEY_TEMPLATE.format(queue.name)
+    for job_id in queue.connection.zrangebyscore(key, 0, time.time()):
+        # INFO - only the worker removing the job id enqueues it
+        if not queue.connection.zrem(key, job_id):
+            continue
+        try:
+            job = queue.job_class.fetch(job_id.decode("utf-8"), connection=queue.connection)
+        except NoSuchJobError:
+            continue
+        queue.enqueue_job(job)
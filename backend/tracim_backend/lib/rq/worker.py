@@ -2,12 +2,16 @@ import contextlib
 import typing
 
 import pluggy
+from rq import Queue
 from rq import SimpleWorker
+from rq.exceptions import DequeueTimeout
+from rq.job import Job
 from rq.local import LocalStack
 import transaction
 
 from tracim_backend.config import CFG
 from tracim_backend.lib.core.plugins import create_plugin_manager
+from tracim_backend.lib.rq import enqueue_due_jobs
 from tracim_backend.lib.utils.request import TracimContext
 from tracim_backend.lib.utils.daemon import initialize_config_from_environment
 from tracim_backend.models.setup_models import create_dbsession_for_context
@@ -15,6 +19,9 @@ from tracim_backend.models.setup_models import get_engine
 from tracim_backend.models.setup_models import get_session_factory
 from tracim_backend.models.tracim_session import TracimSession
 
+# INFO - maximum duration in seconds between checks of due delayed jobs
+DELAYED_JOBS_POLL_INTERVAL = 1
+
 _engines = LocalStack()
 _configs = LocalStack()
 
@@ -91,3 +98,35 @@ class DatabaseWorker(SimpleWorker):
         finally:
             _engines.pop()
             _configs.pop()
+
+    def dequeue_job_and_maintain_ttl(
+        self, timeout: typing.Optional[int]
+    ) -> typing.Optional[typing.Tuple[Job, Queue]]:
+        """
+        Same as Worker.dequeue_job_and_maintain_ttl() but due delayed jobs are enqueued
+        while waiting, see tracim_backend.lib.rq.enqueue_in().
+        """
+        if timeout is None:
+            # INFO - burst mode, queues are not waited for
+            self._enqueue_due_jobs()
+            return super().dequeue_job_and_maintain_ttl(timeout)
+        self.procline("Listening on " + ",".join(self.queue_names()))
+        while True:
+            self.heartbeat()
+            self._enqueue_due_jobs()
+            try:
+                # INFO - queues are waited for shortly so that due jobs are enqueued on time
+                result = self.queue_class.dequeue_any(
+                    self.queues,
+                    min(timeout, DELAYED_JOBS_POLL_INTERVAL),
+                    connection=self.connection,
+                    job_class=self.job_class,
+                )
+            except DequeueTimeout:
+                continue
+            self.heartbeat()
+            return result
+
+    def _enqueue_due_jobs(self) -> None:
+        for queue in self.queues:
+            enqueue_due_jobs(queue)
@@ -3,22 +3,42 @@ import typing
 
 from elasticsearch import Elasticsearch
 from elasticsearch.client import IngestClient
+from elasticsearch.helpers import parallel_bulk
+from elasticsearch.helpers import scan
+from elasticsearch.helpers import streaming_bulk
 from elasticsearch_dsl import Index
 from elasticsearch_dsl import Search
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from tracim_backend import CFG
 from tracim_backend.app_models.contents import content_type_list
+from tracim_backend.lib.core.content import ContentApi
 from tracim_backend.lib.search.elasticsearch_search.models import ESContentSearchResponse
+from tracim_backend.lib.search.indexing import CHILDREN_REINDEXING_REVISION_TYPES
 from tracim_backend.lib.search.models import ContentSearchResponse
 from tracim_backend.lib.search.models import EmptyContentSearchResponse
+from tracim_backend.lib.search.search import IndexedContentsResults
 from tracim_backend.lib.search.search import SearchApi
 from tracim_backend.lib.search.search_factory import ELASTICSEARCH__SEARCH_ENGINE_SLUG
+from tracim_backend.lib.search.text_extraction import TextExtractor
+from tracim_backend.lib.search.text_extraction import get_revision_text
+from tracim_backend.lib.search.text_extraction import get_text_extractor
+from tracim_backend.lib.search.text_extraction import load_text_extractor
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.models.auth import User
 from tracim_backend.models.context_models import ContentInContext
+from tracim_backend.models.context_models import ContentInContextPrefetch
+from tracim_backend.models.data import Content
+from tracim_backend.models.data import ContentRevisionRO
 from tracim_backend.models.data import UserRoleInWorkspace
 
+# INFO - key of the index mapping metadata storing the last revision id indexed by
+# the last successful synchronization
+SYNC_CHECKPOINT_META_KEY = "tracim_sync_checkpoint"
+# INFO - number of ranges of content ids returned by each request counting documents
+DOCUMENTS_COUNT_RANGES_PAGE_SIZE = 1000
+
 
 class ESSearchApi(SearchApi):
     """
@@ -50,6 +70,12 @@ class ESSearchApi(SearchApi):
         )
         self.index_document_pattern_template = config.SEARCH__ELASTICSEARCH__INDEX_PATTERN_TEMPLATE
         self.index_document_alias = config.SEARCH__ELASTICSEARCH__INDEX_ALIAS
+        self._text_extractors = []  # type: typing.List[TextExtractor]
+        if self._is_local_ingest_mode():
+            self._text_extractors = [
+                load_text_extractor(extractor_path)
+                for extractor_path in config.SEARCH__ELASTICSEARCH__INGEST__TEXT_EXTRACTORS
+            ]
 
     def create_index(self) -> None:
         """
@@ -64,7 +90,7 @@ class ESSearchApi(SearchApi):
         # from https://github.com/elastic/elasticsearch-dsl-py/blob/master/examples/alias_migration.py
         # Configure index with our indexing preferences
         logger.info(self, "Create index settings ...")
-        if self._config.SEARCH__ELASTICSEARCH__USE_INGEST:
+        if self._config.SEARCH__ELASTICSEARCH__USE_INGEST and not self._is_local_ingest_mode():
             self._create_ingest_pipeline()
         # create an index template
         index_template = IndexedContent._index.as_template(
@@ -160,6 +186,331 @@ class ESSearchApi(SearchApi):
         """
         Index/update a content into elastic_search engine
         """
+        indexed_content, pipeline = self._get_indexed_content(content)
+        save_kwargs = {"pipeline": pipeline} if pipeline else {}
+        indexed_content.save(
+            using=self.es,
+            index=self.index_document_alias,
+            request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+            **save_kwargs
+        )
+
+    def index_all_content(self) -> IndexedContentsResults:
+        """
+        Index/update all content in current index of ElasticSearch: contents are read from
+        database by batches, their documents are sent with bulk requests, several
+        requests being sent in parallel.
+        """
+        chunk_size = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE
+        thread_count = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_THREAD_COUNT
+        # INFO - documents are built in this thread as they are read from the database
+        # session, one chunk per sending thread, then sent in parallel.
+        # Comments are indexed in the document of their parent.
+        batches = self._get_indexing_content_api().get_all_by_batches(
+            chunk_size * thread_count, excluded_content_types=[content_type_list.Comment.slug]
+        )
+        return self._index_contents_by_batches(batches)
+
+    def sync_index(self, since: typing.Union[int, datetime, None] = None) -> IndexedContentsResults:
+        """
+        Synchronize the index with the database: index contents changed since the given
+        revision id or date, and remove documents of contents which no longer exist.
+        Once all contents are indexed, the last revision id is saved in the index as
+        checkpoint of the next synchronization: running it again is safe.
+        :param since: revision id or date (UTC) of the oldest changes to index, checkpoint
+        of the last synchronization if None, all contents are indexed if there is none
+        """
+        if since is None:
+            since = self.get_sync_checkpoint()
+        # INFO - taken before querying changes: contents changed while synchronizing
+        # are indexed again by the next synchronization
+        checkpoint = self._session.query(func.max(ContentRevisionRO.revision_id)).scalar() or 0
+        content_ids = self._get_changed_content_ids(since)
+        chunk_size = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE
+        thread_count = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_THREAD_COUNT
+        batches = self._get_indexing_content_api().get_by_ids_by_batches(
+            content_ids, chunk_size * thread_count
+        )
+        results = self._index_contents_by_batches(batches)
+        results.deleted_content_ids = self._delete_removed_contents_documents()
+        if not results.get_nb_index_errors():
+            self._set_sync_checkpoint(checkpoint)
+        return results
+
+    def get_sync_checkpoint(self) -> typing.Optional[int]:
+        """
+        :return: last revision id indexed by the last successful synchronization, None
+        if the index was never synchronized
+        """
+        mappings = self.es.indices.get_mapping(index=self.index_document_alias)
+        for index_mapping in mappings.values():
+            meta = index_mapping["mappings"].get("_meta", {})
+            if SYNC_CHECKPOINT_META_KEY in meta:
+                return int(meta[SYNC_CHECKPOINT_META_KEY])
+        return None
+
+    def _set_sync_checkpoint(self, revision_id: int) -> None:
+        self.es.indices.put_mapping(
+            index=self.index_document_alias,
+            body={"_meta": {SYNC_CHECKPOINT_META_KEY: revision_id}},
+        )
+
+    def _get_indexing_content_api(self) -> ContentApi:
+        return ContentApi(
+            session=self._session,
+            config=self._config,
+            current_user=self._user,
+            show_archived=True,
+            show_active=True,
+            show_deleted=True,
+        )
+
+    def _get_changed_content_ids(self, since: typing.Union[int, datetime, None]) -> typing.Set[int]:
+        """
+        :return: ids of the contents whose document changed since the given revision id
+        or date, all contents if since is None
+        """
+        query = self._session.query(
+            Content.id, ContentRevisionRO.type, ContentRevisionRO.parent_id
+        ).join(ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id)
+        if isinstance(since, datetime):
+            query = query.filter(ContentRevisionRO.updated >= since)
+        elif since is not None:
+            query = query.filter(Content.cached_revision_id > since)
+        content_ids = set()  # type: typing.Set[int]
+        for content_id, content_type, parent_id in query:
+            # INFO - comments are indexed in the document of their parent
+            if content_type == content_type_list.Comment.slug:
+                if parent_id:
+                    content_ids.add(parent_id)
+                continue
+            content_ids.add(content_id)
+        if since is None:
+            return content_ids
+        # INFO - any revision since the checkpoint, not only the current one: a content
+        # moved then edited still has children to index again
+        tree_query = (
+            self._session.query(ContentRevisionRO.content_id)
+            .filter(ContentRevisionRO.revision_type.in_(CHILDREN_REINDEXING_REVISION_TYPES))
+            .distinct()
+        )
+        if isinstance(since, datetime):
+            tree_query = tree_query.filter(ContentRevisionRO.updated >= since)
+        else:
+            tree_query = tree_query.filter(ContentRevisionRO.revision_id > since)
+        tree_content_ids = {content_id for content_id, in tree_query}
+        chunk_size = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE
+        for contents in self._get_indexing_content_api().get_by_ids_by_batches(
+            tree_content_ids, chunk_size
+        ):
+            for content in contents:
+                content_ids.update(
+                    child_id for child_id, in content.recursive_children.with_entities(Content.id)
+                )
+        return content_ids
+
+    def _delete_removed_contents_documents(self) -> typing.List[int]:
+        """
+        Delete documents of contents which no longer exist in database. Documents and
+        contents are counted by ranges of ids: only ids of ranges having more documents
+        than contents are read from the index.
+        :return: ids of deleted contents
+        """
+        chunk_size = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE
+        documents_counts = self._get_documents_count_by_id_range(chunk_size)
+        # INFO - comments are indexed in the document of their parent
+        range_start = Content.id - Content.id % chunk_size
+        contents_counts = dict(
+            self._session.query(range_start, func.count(Content.id))
+            .join(ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id)
+            .filter(ContentRevisionRO.type != content_type_list.Comment.slug)
+            .group_by(range_start)
+        )
+        deleted_content_ids = []  # type: typing.List[int]
+        for start, documents_count in sorted(documents_counts.items()):
+            if documents_count <= contents_counts.get(start, 0):
+                continue
+            hits = scan(
+                self.es,
+                index=self.index_document_alias,
+                query={
+                    "_source": False,
+                    "query": {"range": {"content_id": {"gte": start, "lt": start + chunk_size}}},
+                },
+                size=chunk_size,
+                request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+            )
+            document_ids = [int(hit["_id"]) for hit in hits]
+            existing_content_ids = {
+                content_id
+                for content_id, in self._session.query(Content.id).filter(
+                    Content.id.in_(document_ids)
+                )
+            }
+            deleted_content_ids.extend(
+                content_id for content_id in document_ids if content_id not in existing_content_ids
+            )
+        actions = [
+            {"_op_type": "delete", "_index": self.index_document_alias, "_id": content_id}
+            for content_id in deleted_content_ids
+        ]
+        for ok, item in self._bulk(actions, chunk_size, thread_count=1):
+            _, result = item.popitem()
+            # INFO - document already deleted by a previous synchronization
+            if not ok and result.get("status") != 404:
+                logger.error(
+                    self,
+                    "failed to delete document of content {}: {}".format(
+                        result["_id"], result.get("error")
+                    ),
+                )
+        return deleted_content_ids
+
+    def _get_documents_count_by_id_range(self, range_size: int) -> typing.Dict[int, int]:
+        """
+        :return: number of documents of the index by range of content ids, ranges being
+        identified by their first id, a multiple of range_size
+        """
+        documents_counts = {}  # type: typing.Dict[int, int]
+        composite = {
+            "size": DOCUMENTS_COUNT_RANGES_PAGE_SIZE,
+            "sources": [
+                {"range_start": {"histogram": {"field": "content_id", "interval": range_size}}}
+            ],
+        }  # type: typing.Dict[str, typing.Any]
+        while True:
+            response = self.es.search(
+                index=self.index_document_alias,
+                body={"size": 0, "aggs": {"ranges": {"composite": composite}}},
+                request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+            )
+            aggregation = response["aggregations"]["ranges"]
+            for bucket in aggregation["buckets"]:
+                documents_counts[int(bucket["key"]["range_start"])] = bucket["doc_count"]
+            if not aggregation["buckets"] or "after_key" not in aggregation:
+                return documents_counts
+            composite["after"] = aggregation["after_key"]
+
+    def _index_contents_by_batches(
+        self, batches: typing.Iterable[typing.List[Content]]
+    ) -> IndexedContentsResults:
+        """
+        Index the given batches of contents, each batch being sent with bulk requests.
+        """
+        chunk_size = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE
+        thread_count = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_THREAD_COUNT
+        max_chunk_bytes = self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_MAX_CHUNK_BYTES
+        content_ids_to_index = []  # type: typing.List[int]
+        errored_indexed_contents_ids = []  # type: typing.List[int]
+        for contents in batches:
+            content_ids_to_index.extend(content.content_id for content in contents)
+            actions = self._get_index_actions(contents, errored_indexed_contents_ids)
+            # INFO - parallel_bulk() reads actions from a thread of its pool whereas the
+            # database session must be used from this thread: actions are read here, by
+            # groups of at most one request per sending thread.
+            for actions_group in self._group_actions(
+                actions, chunk_size * thread_count, max_chunk_bytes * thread_count
+            ):
+                for ok, item in self._bulk(actions_group, chunk_size, thread_count):
+                    if ok:
+                        continue
+                    _, result = item.popitem()
+                    logger.error(
+                        self,
+                        "failed to index content {}: {}".format(result["_id"], result.get("error")),
+                    )
+                    errored_indexed_contents_ids.append(int(result["_id"]))
+        return IndexedContentsResults(content_ids_to_index, errored_indexed_contents_ids)
+
+    def _get_index_actions(
+        self, contents: typing.List[Content], errored_indexed_contents_ids: typing.List[int]
+    ) -> typing.Iterator[dict]:
+        """
+        :return: lazy iterator of the bulk actions indexing the given contents: files
+        are loaded as their action is read
+        """
+        prefetch = ContentInContextPrefetch(contents, self._session, self._config, self._user)
+        for content in contents:
+            content_in_context = ContentInContext(
+                content, self._session, self._config, self._user, prefetch=prefetch
+            )
+            try:
+                action = self._get_index_action(content_in_context)
+            except Exception as exc:
+                logger.error(
+                    self,
+                    "something goes wrong during indexing of content {}".format(content.content_id),
+                )
+                logger.exception(self, exc)
+                errored_indexed_contents_ids.append(content.content_id)
+                continue
+            yield action
+
+    @staticmethod
+    def _group_actions(
+        actions: typing.Iterable[dict], max_count: int, max_bytes: int
+    ) -> typing.Iterator[typing.List[dict]]:
+        """
+        Group actions by lists of at most max_count actions and about max_bytes bytes.
+        """
+        group = []  # type: typing.List[dict]
+        group_bytes = 0
+        for action in actions:
+            group.append(action)
+            # INFO - files and texts make most of the size of documents
+            source = action["_source"]
+            group_bytes += (
+                len(source.get("b64_file") or "")
+                + len((source.get("file_data") or {}).get("content") or "")
+                + len(source.get("raw_content") or "")
+            )
+            if len(group) >= max_count or group_bytes >= max_bytes:
+                yield group
+                group = []
+                group_bytes = 0
+        if group:
+            yield group
+
+    def _bulk(
+        self, actions: typing.List[dict], chunk_size: int, thread_count: int
+    ) -> typing.Iterator[typing.Tuple[bool, dict]]:
+        """
+        Send actions with bulk requests of at most chunk_size actions and
+        SEARCH__ELASTICSEARCH__INDEXING__BULK_MAX_CHUNK_BYTES bytes.
+        :return: iterator of (success, result) of each action
+        """
+        bulk_kwargs = {
+            "chunk_size": chunk_size,
+            "max_chunk_bytes": self._config.SEARCH__ELASTICSEARCH__INDEXING__BULK_MAX_CHUNK_BYTES,
+            # INFO - errors are reported per content
+            "raise_on_error": False,
+            "raise_on_exception": False,
+            "request_timeout": self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+        }
+        if thread_count > 1 and len(actions) > 1:
+            return parallel_bulk(self.es, actions, thread_count=thread_count, **bulk_kwargs)
+        return streaming_bulk(self.es, actions, **bulk_kwargs)
+
+    def _get_index_action(self, content: ContentInContext) -> dict:
+        """
+        :return: bulk action indexing the given content
+        """
+        indexed_content, pipeline = self._get_indexed_content(content)
+        # INFO - done by IndexedContent.save()
+        indexed_content.full_clean()
+        action = indexed_content.to_dict(include_meta=True)
+        action["_index"] = self.index_document_alias
+        if pipeline:
+            action["pipeline"] = pipeline
+        return action
+
+    def _get_indexed_content(
+        self, content: ContentInContext
+    ) -> typing.Tuple["IndexedContent", typing.Optional[str]]:  # noqa: F821
+        """
+        Build the document of a content.
+        :return: the document and the ingest pipeline to index it with, if any
+        """
         # FIXME BS 2019-06-10: Load ES model only when ES search (see #1892)
         from tracim_backend.lib.search.elasticsearch_search.es_models import DigestComments
         from tracim_backend.lib.search.elasticsearch_search.es_models import DigestContent
@@ -238,26 +589,32 @@ class ESSearchApi(SearchApi):
         )
         indexed_content.meta.id = content.content_id
         if self._can_index_content(content):
+            if self._is_local_ingest_mode():
+                # INFO - stored in the same field as the output of the attachment pipeline
+                indexed_content.file_data = {
+                    "content": get_revision_text(
+                        content.content.current_revision,
+                        self._text_extractors,
+                        self._config.SEARCH__ELASTICSEARCH__INGEST__TEXT_SIZE_LIMIT,
+                        self._config.SEARCH__EXTRACTED_TEXT_CACHE_DIR,
+                    )
+                }
+                return indexed_content, None
             file_ = content.get_b64_file()
             if file_:
                 indexed_content.b64_file = file_
-                indexed_content.save(
-                    using=self.es,
-                    pipeline="attachment",
-                    index=self.index_document_alias,
-                    request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
-                )
-                return
+                return indexed_content, "attachment"
             logger.debug(
                 self,
                 'Skip binary content file of content "{}": no binary content'.format(
                     content.content_id
                 ),
             )
-        indexed_content.save(
-            using=self.es,
-            index=self.index_document_alias,
-            request_timeout=self._config.SEARCH__ELASTICSEARCH__REQUEST_TIMEOUT,
+        return indexed_content, None
+
+    def _is_local_ingest_mode(self) -> bool:
+        return (
+            self._config.SEARCH__ELASTICSEARCH__INGEST__MODE == self._config.CST.INGEST_MODE_LOCAL
         )
 
     def _can_index_content(self, content: ContentInContext) -> bool:
@@ -313,6 +670,18 @@ class ESSearchApi(SearchApi):
             )
             return False
 
+        if self._is_local_ingest_mode():
+            # INFO - extracted text is truncated: files of any size can be indexed
+            if get_text_extractor(self._text_extractors, content.mimetype):
+                return True
+            logger.debug(
+                self,
+                'Skip binary indexation of content "{}": no text extractor for mimetype "{}"'.format(
+                    content.content_id, content.mimetype
+                ),
+            )
+            return False
+
         # INFO - G.M - 2019-06-24 - check content size
         if content.size > self._config.SEARCH__ELASTICSEARCH__INGEST__SIZE_LIMIT:
             logger.debug(
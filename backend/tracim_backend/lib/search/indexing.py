@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+import itertools
+import typing
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.session import SessionTransaction
+
+from tracim_backend.app_models.contents import content_type_list
+from tracim_backend.config import CFG
+from tracim_backend.exceptions import ContentNotFound
+from tracim_backend.lib.core.plugins import hookimpl
+from tracim_backend.lib.rq import get_redis_connection
+from tracim_backend.lib.rq import get_rq_queue
+from tracim_backend.lib.search.search_factory import ELASTICSEARCH__SEARCH_ENGINE_SLUG
+from tracim_backend.lib.search.search_factory import SQL__SEARCH_ENGINE_SLUG
+from tracim_backend.lib.search.search_factory import SearchFactory
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.lib.utils.request import TracimContext
+from tracim_backend.models.context_models import ContentInContext
+from tracim_backend.models.data import ActionDescription
+from tracim_backend.models.data import Content
+from tracim_backend.models.meta import DeclarativeBase
+from tracim_backend.models.tracim_session import TracimSession
+
+RQ_QUEUE_NAME = "search_index"
+# INFO - key of session.info storing contents waiting for indexing: a content id is
+# associated to True if its children should also be indexed
+_PENDING_CONTENTS_INFO_KEY = "search_index_pending_contents"
+# INFO - redis key set while an indexing job of a content is queued, the job deletes it
+# when it starts
+_QUEUED_JOB_KEY_TEMPLATE = "tracim_search_index:queued:{content_id}:{scope}"
+# INFO - expiration in seconds of queued job keys, in case a job is lost
+QUEUED_JOB_KEY_TTL = 24 * 3600
+# INFO - these revisions change indexed data of children: their state (deleted/archived
+# through parent) or their parents
+CHILDREN_REINDEXING_REVISION_TYPES = (
+    ActionDescription.MOVE,
+    ActionDescription.DELETION,
+    ActionDescription.ARCHIVING,
+    ActionDescription.UNARCHIVING,
+    ActionDescription.UNDELETION,
+)
+
+
+class SearchIndexer:
+    """
+    Maintain the search index from the database crud hooks: contents created or modified
+    in a transaction are indexed once it is committed:
+    - in a RQ job of the "search_index" queue if jobs processing mode is async,
+    - in session, just before commit, if jobs processing mode is sync.
+    With sql search engine, documents are stored in database: contents are always
+    indexed in session, documents being committed with the contents.
+    """
+
+    # pluggy uses this attribute to name the plugin
+    __name__ = "SearchIndexer"
+
+    def __init__(self, config: CFG) -> None:
+        self._config = config
+
+    def _is_enabled(self) -> bool:
+        # INFO - simple search queries the database, it has no index to maintain
+        return self._config.SEARCH__ENGINE in (
+            ELASTICSEARCH__SEARCH_ENGINE_SLUG,
+            SQL__SEARCH_ENGINE_SLUG,
+        )
+
+    @hookimpl
+    def on_context_session_created(self, db_session: TracimSession, context: TracimContext) -> None:
+        if self._is_enabled():
+            db_session.info[_PENDING_CONTENTS_INFO_KEY] = {}
+            _listen_session_transaction(db_session, self._config)
+
+    @hookimpl
+    def on_content_created(self, content: Content, context: TracimContext) -> None:
+        self._schedule_content_indexing(content, context)
+
+    @hookimpl
+    def on_content_modified(self, content: Content, context: TracimContext) -> None:
+        self._schedule_content_indexing(content, context)
+
+    @hookimpl
+    def on_bulk_crud_operation(
+        self,
+        created: typing.List[DeclarativeBase],
+        modified: typing.List[DeclarativeBase],
+        deleted: typing.List[DeclarativeBase],
+        changed_attributes: typing.Dict[DeclarativeBase, typing.FrozenSet[str]],
+        context: TracimContext,
+    ) -> None:
+        for obj in itertools.chain(created, modified):
+            if isinstance(obj, Content):
+                self._schedule_content_indexing(obj, context)
+
+    def _schedule_content_indexing(self, content: Content, context: TracimContext) -> None:
+        if not self._is_enabled():
+            return
+        pending_contents = context.dbsession.info[_PENDING_CONTENTS_INFO_KEY]
+        # INFO - comments are indexed with their parent
+        if content.type == content_type_list.Comment.slug:
+            pending_contents.setdefault(content.parent_id, False)
+            return
+        # INFO - sql search documents do not contain data of parents
+        with_children = (
+            self._config.SEARCH__ENGINE == ELASTICSEARCH__SEARCH_ENGINE_SLUG
+            and content.current_revision.revision_type in CHILDREN_REINDEXING_REVISION_TYPES
+        )
+        pending_contents[content.content_id] = (
+            pending_contents.get(content.content_id, False) or with_children
+        )
+
+
+def _pop_pending_contents(session: Session) -> typing.Dict[int, bool]:
+    pending_contents = session.info[_PENDING_CONTENTS_INFO_KEY]
+    session.info[_PENDING_CONTENTS_INFO_KEY] = {}
+    return pending_contents
+
+
+def _listen_session_transaction(session: Session, config: CFG) -> None:
+    contents_to_enqueue = {}  # type: typing.Dict[int, bool]
+
+    if (
+        config.JOBS__PROCESSING_MODE == config.CST.ASYNC
+        and config.SEARCH__ENGINE == ELASTICSEARCH__SEARCH_ENGINE_SLUG
+    ):
+        # INFO - jobs are enqueued after commit so that the contents are visible
+        # to the RQ worker when it queries the database.
+
+        def collect_pending_contents(session: Session) -> None:
+            if session.transaction.nested:
+                return
+            # INFO - modifications flushed by the commit are notified by crud hooks
+            session.flush()
+            contents_to_enqueue.update(_pop_pending_contents(session))
+
+        def enqueue_indexing_jobs(session: Session) -> None:
+            if session.transaction.nested or not contents_to_enqueue:
+                return
+            enqueue_contents_indexing(config, contents_to_enqueue)
+            contents_to_enqueue.clear()
+
+        event.listen(session, "before_commit", collect_pending_contents)
+        event.listen(session, "after_commit", enqueue_indexing_jobs)
+    else:
+
+        def index_pending_contents(session: Session) -> None:
+            if session.transaction.nested:
+                return
+            session.flush()
+            pending_contents = _pop_pending_contents(session)
+            # INFO - indexing can flush changes of contents, they are indexed in the next pass
+            while pending_contents:
+                for content_id, with_children in pending_contents.items():
+                    logger.debug(
+                        SearchIndexer, "index content {} synchronously".format(content_id),
+                    )
+                    try:
+                        index_content(session, config, content_id, with_children)
+                    except Exception:
+                        # INFO - indexing failures must not prevent the commit
+                        logger.exception(
+                            SearchIndexer,
+                            "Something goes wrong during indexing of content {}".format(content_id),
+                        )
+                session.flush()
+                pending_contents = _pop_pending_contents(session)
+
+        event.listen(session, "before_commit", index_pending_contents)
+
+    def clear_pending_contents(session: Session, transaction: SessionTransaction) -> None:
+        # INFO - contents of a rollbacked transaction should not be indexed
+        if transaction.parent is None:
+            session.info[_PENDING_CONTENTS_INFO_KEY] = {}
+            contents_to_enqueue.clear()
+
+    event.listen(session, "after_transaction_end", clear_pending_contents)
+
+
+def _get_queued_job_key(content_id: int, with_children: bool) -> str:
+    return _QUEUED_JOB_KEY_TEMPLATE.format(
+        content_id=content_id, scope="tree" if with_children else "content"
+    )
+
+
+def enqueue_contents_indexing(config: CFG, contents: typing.Dict[int, bool]) -> None:
+    """
+    Enqueue indexing jobs of contents to the "search_index" queue. A job indexes a content
+    as it is when the job runs: no job is enqueued for a content which already has one queued.
+    :param contents: ids of contents to index, associated to True if their children
+    should also be indexed
+    """
+    redis_connection = get_redis_connection(config)
+    queue = get_rq_queue(redis_connection, RQ_QUEUE_NAME)
+    for content_id, with_children in contents.items():
+        # INFO - a queued job indexing children of a content also indexes the content
+        if not with_children and redis_connection.exists(_get_queued_job_key(content_id, True)):
+            continue
+        # INFO - the key is set before enqueuing the job as the job deletes it when it starts
+        queued_job_key = _get_queued_job_key(content_id, with_children)
+        if not redis_connection.set(queued_job_key, 1, ex=QUEUED_JOB_KEY_TTL, nx=True):
+            logger.debug(
+                SearchIndexer,
+                "indexing of content {} is already queued in RQ queue {}".format(
+                    content_id, RQ_QUEUE_NAME
+                ),
+            )
+            continue
+        logger.debug(
+            SearchIndexer,
+            "index content {} asynchronously to RQ queue {}".format(content_id, RQ_QUEUE_NAME),
+        )
+        try:
+            queue.enqueue(index_content_job, content_id, with_children)
+        except Exception:
+            # INFO - next changes of the content must enqueue a new job
+            redis_connection.delete(queued_job_key)
+            raise
+
+
+def index_content(session: Session, config: CFG, content_id: int, with_children: bool) -> None:
+    """
+    Index a content as it is in database, with its children if with_children is True.
+    """
+    # INFO - imported here to avoid circular import as ContentApi is used by search libs
+    from tracim_backend.lib.core.content import ContentApi
+
+    content_api = ContentApi(
+        current_user=None,
+        session=session,
+        config=config,
+        show_deleted=True,
+        show_archived=True,
+        show_active=True,
+        show_temporary=True,
+    )
+    try:
+        content = content_api.get_one(
+            content_id, content_type_list.Any_SLUG, ignore_content_state_filter=True
+        )
+    except ContentNotFound:
+        # INFO - content created then rollbacked
+        logger.warning(SearchIndexer, "Cannot index content {}: not found".format(content_id))
+        return
+    search_api = SearchFactory.get_search_lib(current_user=None, config=config, session=session)
+    contents = [content]
+    if with_children:
+        contents.extend(content.get_children(recursively=True))
+    for content_ in contents:
+        search_api.index_content(ContentInContext(content_, config=config, dbsession=session))
+
+
+def index_content_job(content_id: int, with_children: bool) -> None:
+    """
+    RQ job indexing a content, it must be executed by a DatabaseWorker,
+    see tracim_backend.lib.rq.worker
+    """
+    # INFO - imported here to avoid circular import as the worker context uses ContentApi
+    from tracim_backend.lib.rq.worker import worker_context
+
+    with worker_context() as context:
+        # INFO - changes committed from now must be indexed by another job
+        get_redis_connection(context.app_config).delete(
+            _get_queued_job_key(content_id, with_children)
+        )
+        index_content(context.dbsession, context.app_config, content_id, with_children)
@@ -1,5 +1,6 @@
 from abc import ABC
 from abc import abstractmethod
+from datetime import datetime
 import typing
 
 from sqlalchemy.orm import Session
@@ -14,10 +15,14 @@ from tracim_backend.models.context_models import ContentInContext
 
 class IndexedContentsResults(object):
     def __init__(
-        self, content_ids_to_index: typing.List[int], errored_indexed_content_ids: typing.List[int]
+        self,
+        content_ids_to_index: typing.List[int],
+        errored_indexed_content_ids: typing.List[int],
+        deleted_content_ids: typing.Optional[typing.List[int]] = None,
     ) -> None:
         self.content_ids_to_index = content_ids_to_index
         self.errored_indexed_contents_ids = errored_indexed_content_ids
+        self.deleted_content_ids = deleted_content_ids or []
 
     def get_nb_index_errors(self) -> int:
         """
@@ -37,6 +42,12 @@ class IndexedContentsResults(object):
         """
         return len(self.content_ids_to_index)
 
+    def get_nb_deleted_contents(self) -> int:
+        """
+        nb of contents removed from index as they no longer exist
+        """
+        return len(self.deleted_content_ids)
+
 
 class SearchApi(ABC):
     def __init__(self, session: Session, current_user: typing.Optional[User], config: CFG) -> None:
@@ -60,6 +71,10 @@ class SearchApi(ABC):
     def index_content(self, content: ContentInContext):
         pass
 
+    @abstractmethod
+    def sync_index(self, since: typing.Union[int, datetime, None] = None) -> IndexedContentsResults:
+        pass
+
     def index_all_content(self) -> IndexedContentsResults:
         """
         Index/update all content in current index of ElasticSearch
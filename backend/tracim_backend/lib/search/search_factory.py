@@ -8,6 +8,7 @@ from tracim_backend.models.auth import User
 
 ELASTICSEARCH__SEARCH_ENGINE_SLUG = "elasticsearch"
 SIMPLE__SEARCH_ENGINE_SLUG = "simple"
+SQL__SEARCH_ENGINE_SLUG = "sql"
 
 
 class SearchFactory(object):
@@ -29,6 +30,11 @@ class SearchFactory(object):
             )
 
             return SimpleSearchController()
+        elif config.SEARCH__ENGINE == SQL__SEARCH_ENGINE_SLUG:
+            # TODO - G.M - 2019-05-22 - fix circular import
+            from tracim_backend.views.search_api.sql_search_controller import SQLSearchController
+
+            return SQLSearchController()
         else:
             raise NoValidSearchEngine(
                 "Can't provide search controller "
@@ -50,6 +56,11 @@ class SearchFactory(object):
             from tracim_backend.lib.search.simple_search.simple_search_api import SimpleSearchApi
 
             return SimpleSearchApi(session=session, current_user=current_user, config=config)
+        elif config.SEARCH__ENGINE == SQL__SEARCH_ENGINE_SLUG:
+            # TODO - G.M - 2019-05-22 - fix circular import
+            from tracim_backend.lib.search.sql_search.sql_search_api import SQLSearchApi
+
+            return SQLSearchApi(session=session, current_user=current_user, config=config)
         else:
             raise NoValidSearchEngine(
                 "Can't provide search lib"
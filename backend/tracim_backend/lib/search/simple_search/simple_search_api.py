@@ -1,3 +1,4 @@
+from datetime import datetime
 import re
 import typing
 
@@ -10,6 +11,7 @@ from tracim_backend.app_models.contents import content_type_list
 from tracim_backend.lib.core.content import ContentApi
 from tracim_backend.lib.search.models import ContentSearchResponse
 from tracim_backend.lib.search.models import EmptyContentSearchResponse
+from tracim_backend.lib.search.search import IndexedContentsResults
 from tracim_backend.lib.search.search import SearchApi
 from tracim_backend.lib.search.simple_search.models import SimpleContentSearchResponse
 from tracim_backend.models.context_models import ContentInContext
@@ -39,6 +41,9 @@ class SimpleSearchApi(SearchApi):
     def index_content(self, content: ContentInContext):
         pass
 
+    def sync_index(self, since: typing.Union[int, datetime, None] = None) -> IndexedContentsResults:
+        return IndexedContentsResults([], [])
+
     def get_keywords(self, search_string, search_string_separators=None) -> typing.List[str]:
         """
         :param search_string: a list of coma-separated keywords
@@ -93,11 +98,8 @@ class SimpleSearchApi(SearchApi):
             parsed_content_ids.append(content.content_id)
             current_offset += 1
 
-        content_in_context_list = []
-        for content in results:
-            content_in_context_list.append(content_api.get_content_in_context(content))
         return SimpleContentSearchResponse(
-            content_list=content_in_context_list, total_hits=current_offset
+            content_list=content_api.get_contents_in_context(results), total_hits=current_offset
         )
 
     def _search_query(
@@ -0,0 +1,22 @@
+import typing
+
+from tracim_backend.lib.search.simple_search.models import SimpleContentSearchResponse
+from tracim_backend.models.context_models import ContentInContext
+
+
+class SQLContentSearchResponse(SimpleContentSearchResponse):
+    """
+    Search results of the sql search engine: contents are ranked by the database,
+    total hits are counted by it too.
+    """
+
+    def __init__(
+        self,
+        content_list: typing.List[ContentInContext],
+        total_hits: int,
+        scores: typing.List[float],
+    ):
+        super().__init__(content_list=content_list, total_hits=total_hits)
+        for content, score in zip(self.contents, scores):
+            content.score = score
+        self.is_total_hits_accurate = True
@@ -0,0 +1,365 @@
+from datetime import datetime
+import re
+import typing
+
+from bs4 import BeautifulSoup
+from sqlalchemy import String
+from sqlalchemy import cast
+from sqlalchemy import column
+from sqlalchemy import desc
+from sqlalchemy import func
+from sqlalchemy import literal
+from sqlalchemy import literal_column
+from sqlalchemy import table
+from sqlalchemy import text
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql.selectable import Exists
+
+from tracim_backend.app_models.contents import content_type_list
+from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.lib.search.models import ContentSearchResponse
+from tracim_backend.lib.search.models import EmptyContentSearchResponse
+from tracim_backend.lib.search.search import IndexedContentsResults
+from tracim_backend.lib.search.search import SearchApi
+from tracim_backend.lib.search.sql_search.models import SQLContentSearchResponse
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.models.context_models import ContentInContext
+from tracim_backend.models.context_models import ContentInContextPrefetch
+from tracim_backend.models.data import ANCESTORS_PATH_SEPARATOR
+from tracim_backend.models.data import Content
+from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.search import SQLITE_FTS_TABLE_NAME
+from tracim_backend.models.search import ContentSearchDocument
+from tracim_backend.models.search import get_postgresql_document_vector
+
+SEARCH_DEFAULT_RESULT_NB = 10
+# INFO - number of contents read from database at once when indexing all contents
+INDEXING_BATCH_SIZE = 100
+# INFO - weights of label, filename, raw_content and comments columns for SQLite ranking
+SQLITE_BM25_WEIGHTS = (10.0, 10.0, 2.0, 1.0)
+# INFO - words are sequences of letters and digits: other characters separate them
+_WORD_SEPARATORS_PATTERN = re.compile(r"[\W_]+")
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+class SQLSearchApi(SearchApi):
+    """
+    Search using full-text indexes of the database:
+    - searched texts of contents are stored in the content_search_documents table,
+    in the transaction modifying the contents (see SearchIndexer)
+    - PostgreSQL indexes them with a GIN index of a weighted tsvector, SQLite with a FTS5 table
+    - allow ranking, pagination and filtering by content_type, deleted, archived
+    - each searched word matches words starting with it
+    """
+
+    def create_index(self) -> None:
+        # INFO - the documents table is created by database migrations
+        pass
+
+    def migrate_index(self, move_data=True, update_alias=True) -> None:
+        pass
+
+    def delete_index(self) -> None:
+        self._session.query(ContentSearchDocument).delete(synchronize_session=False)
+
+    def index_content(self, content: ContentInContext) -> None:
+        """
+        Store the searched texts of a content, it is searchable once the transaction
+        is committed.
+        Comments are searched in the document of their parent: the searched text of each
+        comment is stored in its own document, the parent document gathers these texts
+        without parsing again the html of all comments.
+        """
+        comment_texts = {}  # type: typing.Dict[int, str]
+        if content.content_type == content_type_list.Comment.slug:
+            comment_texts[content.content_id] = self._get_searched_text(
+                content.raw_content, is_html=True
+            )
+            self._session.merge(
+                ContentSearchDocument(
+                    content_id=content.content_id, raw_content=comment_texts[content.content_id]
+                )
+            )
+            content = content.parent
+            assert content
+        logger.debug(self, "Indexing content {}".format(content.content_id))
+        self._session.merge(
+            ContentSearchDocument(
+                content_id=content.content_id,
+                label=self._get_searched_text(content.label),
+                filename=self._get_searched_text(content.filename),
+                raw_content=self._get_searched_text(content.raw_content, is_html=True),
+                comments=self._get_comments_searched_text(content, comment_texts),
+            )
+        )
+
+    def _get_comments_searched_text(
+        self, content: ContentInContext, comment_texts: typing.Dict[int, str]
+    ) -> str:
+        """
+        :param comment_texts: searched texts of comments already known by comment id
+        :return: searched texts of the comments of the content, taken from their
+        document, comments without document (indexed before they were stored) are indexed.
+        """
+        comments = content.comments
+        comment_ids = [
+            comment.content_id for comment in comments if comment.content_id not in comment_texts
+        ]
+        if comment_ids:
+            stored_texts_query = self._session.query(
+                ContentSearchDocument.content_id, ContentSearchDocument.raw_content
+            ).filter(ContentSearchDocument.content_id.in_(comment_ids))
+            comment_texts.update(stored_texts_query)
+        for comment in comments:
+            if comment.content_id not in comment_texts:
+                comment_texts[comment.content_id] = self._get_searched_text(
+                    comment.raw_content, is_html=True
+                )
+                self._session.merge(
+                    ContentSearchDocument(
+                        content_id=comment.content_id,
+                        raw_content=comment_texts[comment.content_id],
+                    )
+                )
+        return " ".join(comment_texts[comment.content_id] for comment in comments)
+
+    def index_all_content(self) -> IndexedContentsResults:
+        """
+        Store the searched texts of all contents, contents being read from database
+        by batches, and delete documents of contents which no longer exist.
+        """
+        content_api = ContentApi(
+            session=self._session,
+            config=self._config,
+            current_user=self._user,
+            show_archived=True,
+            show_active=True,
+            show_deleted=True,
+        )
+        results = self._index_contents_by_batches(
+            content_api.get_all_by_batches(
+                INDEXING_BATCH_SIZE, excluded_content_types=[content_type_list.Comment.slug]
+            )
+        )
+        results.deleted_content_ids = self._delete_removed_contents_documents()
+        return results
+
+    def _index_contents_by_batches(
+        self, batches: typing.Iterable[typing.List[Content]]
+    ) -> IndexedContentsResults:
+        content_ids_to_index = []  # type: typing.List[int]
+        errored_indexed_contents_ids = []  # type: typing.List[int]
+        for contents in batches:
+            prefetch = ContentInContextPrefetch(contents, self._session, self._config, self._user)
+            for content in contents:
+                content_ids_to_index.append(content.content_id)
+                try:
+                    self.index_content(
+                        ContentInContext(
+                            content, self._session, self._config, self._user, prefetch=prefetch
+                        )
+                    )
+                except Exception as exc:
+                    logger.error(
+                        self,
+                        "something goes wrong during indexing of content {}".format(
+                            content.content_id
+                        ),
+                    )
+                    logger.exception(self, exc)
+                    errored_indexed_contents_ids.append(content.content_id)
+            self._session.flush()
+        return IndexedContentsResults(content_ids_to_index, errored_indexed_contents_ids)
+
+    def sync_index(self, since: typing.Union[int, datetime, None] = None) -> IndexedContentsResults:
+        """
+        Index contents changed since the given revision id or date, and remove documents
+        of contents which no longer exist.
+        Documents are stored in the transaction modifying their contents: there is no
+        synchronization checkpoint, all contents are indexed if since is None.
+        :param since: revision id or date (UTC) of the oldest changes to index
+        """
+        if since is None:
+            return self.index_all_content()
+        query = self._session.query(
+            Content.id, ContentRevisionRO.type, ContentRevisionRO.parent_id
+        ).join(ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id)
+        if isinstance(since, datetime):
+            query = query.filter(ContentRevisionRO.updated >= since)
+        else:
+            query = query.filter(Content.cached_revision_id > since)
+        content_ids = set()  # type: typing.Set[int]
+        for content_id, content_type, parent_id in query:
+            if content_type == content_type_list.Comment.slug:
+                # INFO - the parent document holds the text of its comments
+                content_id = parent_id
+            if content_id:
+                content_ids.add(content_id)
+        content_api = ContentApi(
+            session=self._session,
+            config=self._config,
+            current_user=self._user,
+            show_archived=True,
+            show_active=True,
+            show_deleted=True,
+        )
+        results = self._index_contents_by_batches(
+            content_api.get_by_ids_by_batches(content_ids, INDEXING_BATCH_SIZE)
+        )
+        results.deleted_content_ids = self._delete_removed_contents_documents()
+        return results
+
+    def _delete_removed_contents_documents(self) -> typing.List[int]:
+        """
+        Delete documents of contents which no longer exist in database.
+        :return: ids of deleted contents
+        """
+        removed_content_query = self._session.query(ContentSearchDocument.content_id).filter(
+            ~self._session.query(Content.id)
+            .filter(Content.id == ContentSearchDocument.content_id)
+            .exists()
+        )
+        deleted_content_ids = [content_id for content_id, in removed_content_query]
+        if deleted_content_ids:
+            self._session.query(ContentSearchDocument).filter(
+                ContentSearchDocument.content_id.in_(deleted_content_ids)
+            ).delete(synchronize_session=False)
+        return deleted_content_ids
+
+    @classmethod
+    def _get_searched_text(cls, text_: typing.Optional[str], is_html: bool = False) -> str:
+        """
+        :return: words of the text separated by spaces: both databases split
+        texts in the same words.
+        """
+        if not text_:
+            return ""
+        if is_html:
+            text_ = BeautifulSoup(text_, "html.parser").get_text(" ")
+        return _WORD_SEPARATORS_PATTERN.sub(" ", text_).strip()
+
+    @classmethod
+    def get_keywords(cls, search_string: str) -> typing.List[str]:
+        """
+        :return: words of the search string, lowercased
+        """
+        return _WORD_PATTERN.findall(search_string.lower())
+
+    def _get_dialect_name(self) -> str:
+        return self._session.get_bind().dialect.name
+
+    def _search_query(
+        self,
+        keywords: typing.List[str],
+        content_api: ContentApi,
+        content_types: typing.Optional[typing.List[str]] = None,
+    ) -> Query:
+        """
+        :return: query of (Content, score) matching all keywords, best scores first
+        """
+        query = content_api.get_base_query(None)
+        if self._get_dialect_name() == "postgresql":
+            document_vector = literal_column(
+                get_postgresql_document_vector(
+                    prefix="{}.".format(ContentSearchDocument.__tablename__)
+                )
+            )
+            ts_query = func.to_tsquery(
+                literal_column("'simple'"),
+                " & ".join("{}:*".format(keyword) for keyword in keywords),
+            )
+            score = func.ts_rank(document_vector, ts_query)
+            query = (
+                query.join(ContentSearchDocument, ContentSearchDocument.content_id == Content.id)
+                .filter(document_vector.op("@@")(ts_query))
+                .add_columns(score)
+                .order_by(desc(score))
+            )
+        else:
+            fts_table = table(SQLITE_FTS_TABLE_NAME, column("rowid"))
+            # INFO - bm25() is negative, best matches have the lowest values
+            score = -func.bm25(literal_column(SQLITE_FTS_TABLE_NAME), *SQLITE_BM25_WEIGHTS)
+            query = (
+                query.join(fts_table, fts_table.c.rowid == Content.id)
+                .filter(
+                    text("{} MATCH :fts_query".format(SQLITE_FTS_TABLE_NAME)).bindparams(
+                        fts_query=" ".join('"{}"*'.format(keyword) for keyword in keywords)
+                    )
+                )
+                .add_columns(score)
+                .order_by(desc(score))
+            )
+        query = query.order_by(
+            desc(Content.updated), desc(Content.cached_revision_id), desc(Content.content_id)
+        )
+        # INFO - documents of comments only store their text for the document of their parent
+        query = query.filter(Content.type != content_type_list.Comment.slug)
+        if content_types:
+            query = query.filter(Content.type.in_(content_types))
+        if not content_api._show_deleted:
+            query = query.filter(~self._get_ancestor_exists_clause("is_deleted"))
+        if not content_api._show_archived:
+            query = query.filter(~self._get_ancestor_exists_clause("is_archived"))
+        return query
+
+    def _get_ancestor_exists_clause(self, state_column_name: str) -> Exists:
+        """
+        :param state_column_name: name of a boolean column of ContentRevisionRO
+        :return: EXISTS clause true if an ancestor of the searched content has this column set
+        """
+        ancestor = aliased(Content)
+        ancestor_revision = aliased(ContentRevisionRO)
+        ancestor_path_part = (
+            literal(ANCESTORS_PATH_SEPARATOR)
+            + cast(ancestor.id, String)
+            + literal(ANCESTORS_PATH_SEPARATOR)
+        )
+        return (
+            self._session.query(ancestor.id)
+            .join(ancestor_revision, ancestor.cached_revision_id == ancestor_revision.revision_id)
+            .filter(
+                ancestor_revision.workspace_id == ContentRevisionRO.workspace_id,
+                getattr(ancestor_revision, state_column_name) == True,  # noqa: E712
+                Content.ancestors_path.contains(ancestor_path_part),
+            )
+            .exists()
+        )
+
+    def search_content(
+        self,
+        search_string: str,
+        size: typing.Optional[int] = SEARCH_DEFAULT_RESULT_NB,
+        page_nb: typing.Optional[int] = 1,
+        content_types: typing.Optional[typing.List[str]] = None,
+        show_deleted: bool = False,
+        show_archived: bool = False,
+        show_active: bool = True,
+    ) -> ContentSearchResponse:
+        """
+        Search content with database full-text indexes
+        - do no show archived/deleted content by default
+        - filter content found according to workspace of current_user
+        - rank, count and paginate results in database
+        """
+        keywords = self.get_keywords(search_string or "")
+        if not keywords:
+            return EmptyContentSearchResponse()
+        content_api = ContentApi(
+            session=self._session,
+            current_user=self._user,
+            config=self._config,
+            show_deleted=show_deleted,
+            show_archived=show_archived,
+            show_active=show_active,
+        )
+        query = self._search_query(
+            keywords=keywords, content_api=content_api, content_types=content_types
+        )
+        total_hits = query.count()
+        results = query.offset(self.offset_from_pagination(size, page_nb)).limit(size).all()
+        return SQLContentSearchResponse(
+            content_list=content_api.get_contents_in_context([content for content, _ in results]),
+            total_hits=total_hits,
+            scores=[score for _, score in results],
+        )
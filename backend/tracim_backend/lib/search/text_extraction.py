@@ -0,0 +1,293 @@
+from abc import ABC
+from abc import abstractmethod
+import codecs
+from datetime import datetime
+import hashlib
+import importlib
+import os
+import tempfile
+import typing
+from xml.etree import ElementTree
+import zipfile
+
+from tracim_backend.exceptions import ConfigurationError
+from tracim_backend.lib.utils.logger import logger
+from tracim_backend.models.data import ContentRevisionRO
+
+# INFO - size in bytes of the file parts read at once by extractors
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class TextExtractor(ABC):
+    """
+    Extract the text of files to index it. Extractors read files as streams: the memory
+    they use is bounded by the size limit of the extracted text, whatever the file size.
+    Extractors are configured with their path "module:Class" in
+    search.elasticsearch.ingest.text_extractors setting.
+    """
+
+    # INFO - to increase when the text extracted from a same file changes: texts
+    # extracted by previous versions are then not used from the cache anymore
+    VERSION = 1
+
+    @classmethod
+    def get_identity(cls) -> str:
+        return "{}:{}:{}".format(cls.__module__, cls.__qualname__, cls.VERSION)
+
+    @abstractmethod
+    def can_extract(self, mimetype: str) -> bool:
+        pass
+
+    @abstractmethod
+    def extract(self, file_: typing.BinaryIO, size_limit: int) -> str:
+        """
+        :param file_: binary file to extract text from
+        :param size_limit: maximum number of characters to extract
+        :return: text of the file, truncated to size_limit characters
+        """
+        pass
+
+
+class PlainTextExtractor(TextExtractor):
+    """
+    Extract text of plain text files (text/*, json, xml...) decoded as utf-8.
+    """
+
+    MIMETYPES = ("application/json", "application/xml", "application/javascript")
+
+    def can_extract(self, mimetype: str) -> bool:
+        return mimetype.startswith("text/") or mimetype in self.MIMETYPES
+
+    def extract(self, file_: typing.BinaryIO, size_limit: int) -> str:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        parts = []  # type: typing.List[str]
+        length = 0
+        while length < size_limit:
+            chunk = file_.read(READ_CHUNK_SIZE)
+            if not chunk:
+                parts.append(decoder.decode(b"", final=True))
+                break
+            part = decoder.decode(chunk)
+            parts.append(part)
+            length += len(part)
+        return "".join(parts)[:size_limit]
+
+
+class PdfTextExtractor(TextExtractor):
+    """
+    Extract text of PDF files page by page, until the size limit is reached.
+    """
+
+    def can_extract(self, mimetype: str) -> bool:
+        return mimetype == "application/pdf"
+
+    def extract(self, file_: typing.BinaryIO, size_limit: int) -> str:
+        # INFO - imported here as PyPDF2 is only needed by this extractor
+        from PyPDF2 import PdfFileReader
+
+        reader = PdfFileReader(file_, strict=False)
+        parts = []  # type: typing.List[str]
+        length = 0
+        for page_number in range(reader.getNumPages()):
+            if length >= size_limit:
+                break
+            part = reader.getPage(page_number).extractText()
+            parts.append(part)
+            length += len(part)
+        return "\n".join(parts)[:size_limit]
+
+
+class OfficeDocumentTextExtractor(TextExtractor):
+    """
+    Extract text of OpenDocument (odt, ods, odp...) and Office Open XML (docx, xlsx,
+    pptx...) files: XML parts of the archive holding the text are parsed as streams,
+    paragraph by paragraph, until the size limit is reached.
+    """
+
+    MIMETYPE_PREFIXES = (
+        "application/vnd.oasis.opendocument.",
+        "application/vnd.openxmlformats-officedocument.",
+    )
+    # INFO - prefixes of the archive parts holding the text of documents
+    TEXT_PART_PREFIXES = (
+        "content.xml",
+        "word/document.xml",
+        "xl/sharedStrings.xml",
+        "ppt/slides/slide",
+    )
+    # INFO - local names of the XML elements of paragraphs (and spreadsheet strings)
+    PARAGRAPH_TAGS = ("p", "h", "si")
+
+    def can_extract(self, mimetype: str) -> bool:
+        return mimetype.startswith(self.MIMETYPE_PREFIXES)
+
+    def extract(self, file_: typing.BinaryIO, size_limit: int) -> str:
+        parts = []  # type: typing.List[str]
+        length = 0
+        with zipfile.ZipFile(file_) as archive:
+            part_names = [
+                name
+                for name in archive.namelist()
+                if name.startswith(self.TEXT_PART_PREFIXES) and name.endswith(".xml")
+            ]
+            for part_name in part_names:
+                with archive.open(part_name) as part:
+                    for _, element in ElementTree.iterparse(part):
+                        if length >= size_limit:
+                            break
+                        if element.tag.rpartition("}")[2] not in self.PARAGRAPH_TAGS:
+                            continue
+                        text = "".join(element.itertext())
+                        parts.append(text)
+                        length += len(text) + 1
+                        # INFO - only the current paragraph is kept in memory
+                        tail = element.tail
+                        element.clear()
+                        element.tail = tail
+        return "\n".join(parts)[:size_limit]
+
+
+def load_text_extractor(path: str) -> TextExtractor:
+    """
+    :param path: path "module:Class" of a TextExtractor class
+    :return: an instance of this class
+    """
+    module_path, _, class_name = path.partition(":")
+    try:
+        extractor_class = getattr(importlib.import_module(module_path), class_name)
+    except (ImportError, AttributeError, ValueError) as exc:
+        raise ConfigurationError(
+            'ERROR: text extractor "{}" cannot be loaded: {}'.format(path, exc)
+        ) from exc
+    if not isinstance(extractor_class, type) or not issubclass(extractor_class, TextExtractor):
+        raise ConfigurationError('ERROR: "{}" is not a TextExtractor class'.format(path))
+    return extractor_class()
+
+
+def get_text_extractor(
+    extractors: typing.Iterable[TextExtractor], mimetype: str
+) -> typing.Optional[TextExtractor]:
+    """
+    :return: the first extractor supporting the given mimetype, None if there is none
+    """
+    for extractor in extractors:
+        if extractor.can_extract(mimetype):
+            return extractor
+    return None
+
+
+class ExtractedTextCache(object):
+    """
+    Texts extracted from revision files, stored in a directory: as revisions never change,
+    the text of a file is extracted once. Texts of revisions sharing a file blob are
+    keyed by its hash, so they are extracted once for all these revisions, others
+    are keyed by revision id.
+    Reading a text marks it as used: texts not used anymore (deleted revisions,
+    previous extractor versions or size limits) are removed with delete_unused().
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+
+    def get_key(
+        self, revision: ContentRevisionRO, extractor: TextExtractor, size_limit: int
+    ) -> str:
+        if revision.file_blob:
+            source = "blob:{}:{}".format(revision.file_blob.file_hash, revision.file_blob.mimetype)
+        else:
+            source = "revision:{}".format(revision.revision_id)
+        # INFO - texts are truncated: a text is valid for its extractor and size limit only
+        return hashlib.sha256(
+            "{}:{}:{}".format(source, extractor.get_identity(), size_limit).encode("utf-8")
+        ).hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], "{}.txt".format(key))
+
+    def get(self, key: str) -> typing.Optional[str]:
+        path = self._get_path(key)
+        try:
+            with open(path, encoding="utf-8") as file_:
+                text = file_.read()
+        except FileNotFoundError:
+            return None
+        # INFO - modification date of texts is their last use date
+        os.utime(path)
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # INFO - written in a temporary file then renamed: concurrent workers
+        # never read a partially written text
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with open(fd, "w", encoding="utf-8") as file_:
+                file_.write(text)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def delete_unused(self, date_limit: datetime, dry_run: bool = False) -> int:
+        """
+        Delete texts not used since the given date, and temporary files left by
+        interrupted writes.
+        :param date_limit: naive UTC date
+        :param dry_run: only count the texts to delete
+        :return: number of deleted texts
+        """
+        timestamp_limit = (date_limit - datetime(1970, 1, 1)).total_seconds()
+        deleted_count = 0
+        for dir_path, _, file_names in os.walk(self.cache_dir):
+            for file_name in file_names:
+                path = os.path.join(dir_path, file_name)
+                try:
+                    if os.stat(path).st_mtime >= timestamp_limit:
+                        continue
+                    if not dry_run:
+                        os.unlink(path)
+                except FileNotFoundError:
+                    # INFO - deleted or replaced concurrently
+                    continue
+                if file_name.endswith(".txt"):
+                    deleted_count += 1
+        return deleted_count
+
+
+def get_revision_text(
+    revision: ContentRevisionRO,
+    extractors: typing.Iterable[TextExtractor],
+    size_limit: int,
+    cache_dir: str = "",
+) -> typing.Optional[str]:
+    """
+    Extract the text of the file of a revision, or get it from the cache if it was
+    already extracted.
+    :param cache_dir: directory of the extracted text cache, no cache if empty
+    :return: text of the file truncated to size_limit characters, None if no extractor
+    supports its mimetype
+    """
+    extractor = get_text_extractor(extractors, revision.file_mimetype)
+    if not extractor:
+        return None
+    cache = key = None
+    if cache_dir:
+        cache = ExtractedTextCache(cache_dir)
+        key = cache.get_key(revision, extractor, size_limit)
+        try:
+            text = cache.get(key)
+        except OSError as exc:
+            logger.warning(get_revision_text, "Cannot read extracted text cache: {}".format(exc))
+            text = None
+        if text is not None:
+            return text
+    with revision.depot_file.file as file_:
+        text = extractor.extract(file_, size_limit)
+    if cache:
+        try:
+            cache.set(key, text)
+        except OSError as exc:
+            # INFO - the text is extracted again next time
+            logger.warning(get_revision_text, "Cannot write extracted text cache: {}".format(exc))
+    return text
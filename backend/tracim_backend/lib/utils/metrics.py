@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import socket
+import threading
+import time
+import typing
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.utils.logger import logger
+
+
+class MetricSummary(object):
+    """
+    Aggregated values of a metric measured by the current process.
+    """
+
+    def __init__(self, name: str, unit: str) -> None:
+        self.name = name
+        self.unit = unit
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+
+class Metrics(object):
+    """
+    Collect timings and values measured by the current process: they are
+    aggregated in memory and, if a statsd server is configured, sent to it.
+    """
+
+    TIMING_UNIT = "ms"
+    VALUE_UNIT = "count"
+
+    def __init__(
+        self, statsd_address: typing.Optional[typing.Tuple[str, int]] = None, prefix: str = ""
+    ) -> None:
+        self.statsd_address = statsd_address
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._summaries = {}  # type: typing.Dict[str, MetricSummary]
+        self._socket = None  # type: typing.Optional[socket.socket]
+
+    def timing(self, name: str, duration_ms: float) -> None:
+        self._add(name, self.TIMING_UNIT, duration_ms, "ms")
+
+    def value(self, name: str, value: float) -> None:
+        self._add(name, self.VALUE_UNIT, value, "h")
+
+    @contextlib.contextmanager
+    def timer(self, name: str) -> typing.Generator[None, None, None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timing(name, (time.perf_counter() - start) * 1000)
+
+    def get_summaries(self) -> typing.List[MetricSummary]:
+        with self._lock:
+            return sorted(self._summaries.values(), key=lambda summary: summary.name)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._summaries.clear()
+
+    def _add(self, name: str, unit: str, value: float, statsd_type: str) -> None:
+        with self._lock:
+            summary = self._summaries.get(name)
+            if summary is None:
+                summary = self._summaries[name] = MetricSummary(name, unit)
+            summary.add(value)
+        if self.statsd_address:
+            self._send_to_statsd("{}{}:{}|{}".format(self.prefix, name, value, statsd_type))
+
+    def _send_to_statsd(self, packet: str) -> None:
+        try:
+            if self._socket is None:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._socket.sendto(packet.encode("utf-8"), self.statsd_address)
+        except OSError as exc:
+            # INFO - metrics must never break the measured operation
+            logger.debug(self, "Failed to send metric to statsd: {}".format(exc))
+
+
+_metrics = {}  # type: typing.Dict[typing.Tuple[typing.Optional[str], int, str], Metrics]
+_metrics_lock = threading.Lock()
+
+
+def get_metrics(config: CFG) -> Metrics:
+    """
+    :return: metrics of the current process, shared by all users of the same configuration
+    """
+    key = (
+        config.LIVE_MESSAGES__STATSD__HOST,
+        config.LIVE_MESSAGES__STATSD__PORT,
+        config.LIVE_MESSAGES__STATSD__PREFIX,
+    )
+    with _metrics_lock:
+        metrics = _metrics.get(key)
+        if metrics is None:
+            statsd_address = None
+            if config.LIVE_MESSAGES__STATSD__HOST:
+                statsd_address = (
+                    config.LIVE_MESSAGES__STATSD__HOST,
+                    config.LIVE_MESSAGES__STATSD__PORT,
+                )
+            prefix = config.LIVE_MESSAGES__STATSD__PREFIX
+            metrics = _metrics[key] = Metrics(statsd_address, prefix + "." if prefix else "")
+        return metrics
@@ -2,6 +2,7 @@
 from collections import OrderedDict
 import datetime
 import email
+import hashlib
 import importlib
 import os
 from os.path import normpath as base_normpath
@@ -35,6 +36,7 @@ FRONTEND_UI_SUBPATH = "ui"
 LOGIN_SUBPATH = "login"
 RESET_PASSWORD_SUBPATH = "reset-password"
 UNKNOWN_BUILD_VERSION = "unknown"
+DEFAULT_NB_ITEMS_PAGINATION = 25
 
 
 def generate_documentation_swagger_tag(*sections: str) -> str:
@@ -492,3 +494,39 @@ def get_build_version(path: str) -> str:
     except StopIteration:
         # INFO - G.M - 2020-01-13 - return the 10 first letter of current commit hash
         return repo.head.object.hexsha[:10]
+
+
+FILE_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def get_file_hash(file_content: typing.Union[bytes, typing.BinaryIO]) -> str:
+    """
+    Return sha256 hexdigest of a file content. A file object is read by chunks
+    then set back to its initial position.
+    :param file_content: file content as bytes or seekable binary file object
+    :return: hexdigest of file content
+    """
+    file_hash = hashlib.sha256()
+    if isinstance(file_content, bytes):
+        file_hash.update(file_content)
+        return file_hash.hexdigest()
+    initial_position = file_content.tell()
+    for chunk in iter(lambda: file_content.read(FILE_HASH_CHUNK_SIZE), b""):
+        file_hash.update(chunk)
+    file_content.seek(initial_position)
+    return file_hash.hexdigest()
+
+
+def get_file_size(file_content: typing.Union[bytes, typing.BinaryIO]) -> int:
+    """
+    Return size in bytes of a file content, a file object is set back to its initial position.
+    :param file_content: file content as bytes or seekable binary file object
+    :return: size of file content from the current position of file object
+    """
+    if isinstance(file_content, bytes):
+        return len(file_content)
+    initial_position = file_content.tell()
+    file_content.seek(0, os.SEEK_END)
+    file_size = file_content.tell() - initial_position
+    file_content.seek(initial_position)
+    return file_size
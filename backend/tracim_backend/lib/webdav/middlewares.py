@@ -20,6 +20,7 @@ import yaml
 from tracim_backend.config import CFG
 from tracim_backend.lib.core.event import EventBuilder
 from tracim_backend.lib.core.plugins import create_plugin_manager
+from tracim_backend.lib.search.indexing import SearchIndexer
 from tracim_backend.lib.webdav.dav_provider import WebdavTracimContext
 from tracim_backend.models.auth import AuthType
 from tracim_backend.models.setup_models import get_engine
@@ -262,6 +263,7 @@ class TracimEnv(BaseMiddleware):
         self.app_config.configure_filedepot()
         self.plugin_manager = create_plugin_manager()
         self.plugin_manager.register(EventBuilder(self.app_config))
+        self.plugin_manager.register(SearchIndexer(self.app_config))
         self.engine = get_engine(self.app_config)
         self.session_factory = get_scoped_session_factory(self.engine)
 
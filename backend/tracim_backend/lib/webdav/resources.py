@@ -95,7 +95,6 @@ class ManageActions(object):
         try:
             with new_revision(session=self.session, tm=transaction.manager, content=self.content):
                 self._actions[self._type](self.content)
-                self.content_api.execute_update_content_actions(self.content)
                 self.content_api.save(self.content, self._type)
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
@@ -379,7 +378,6 @@ class WorkspaceResource(DAVCollection):
                 label=folder_label,
                 parent=self.content,
             )
-            self.content_api.execute_created_content_actions(folder)
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
 
@@ -643,7 +641,6 @@ class FolderResource(WorkspaceResource):
                         new_workspace=destination_workspace,
                         must_stay_in_same_workspace=False,
                     )
-                self.content_api.execute_update_content_actions(self.content)
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
 
@@ -733,6 +730,8 @@ class FileResource(DAVNonCollection):
 
     @webdav_check_right(is_reader)
     def getContentLength(self) -> int:
+        if self.content.file_size is not None:
+            return self.content.file_size
         return self.content.depot_file.file.content_length
 
     @webdav_check_right(is_reader)
@@ -913,7 +912,6 @@ class FileResource(DAVNonCollection):
                         must_stay_in_same_workspace=False,
                         new_workspace=destination_workspace,
                     )
-                self.content_api.execute_update_content_actions(self.content)
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
 
@@ -964,14 +962,13 @@ class FileResource(DAVNonCollection):
         except ContentNotFound:
             destination_parent = None
         try:
-            new_content = self.content_api.copy(
+            self.content_api.copy(
                 item=self.content,
                 new_label=new_label,
                 new_file_extension=new_file_extension,
                 new_parent=destination_parent,
                 new_workspace=destination_workspace,
             )
-            self.content_api.execute_created_content_actions(new_content)
         except TracimException as exc:
             raise DAVError(HTTP_FORBIDDEN, contextinfo=str(exc)) from exc
         transaction.commit()
@@ -0,0 +1,39 @@
+"""add file_size to revisions and used_space to workspaces and users
+
+Sizes of files stored before this migration are not known yet: run
+"tracimcli storage used-space-recompute" once after upgrading to set them
+and to compute the used space of workspaces and users.
+
+Revision ID: 3d7a6c0e9b15
+Revises: 8e1c4a92d7f0
+Create Date: 2020-06-10 15:02:37.412860
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3d7a6c0e9b15"
+down_revision = "8e1c4a92d7f0"
+
+
+def upgrade():
+    with op.batch_alter_table("content_revisions") as batch_op:
+        batch_op.add_column(sa.Column("file_size", sa.BigInteger(), nullable=True))
+    with op.batch_alter_table("workspaces") as batch_op:
+        batch_op.add_column(
+            sa.Column("used_space", sa.BigInteger(), nullable=False, server_default="0")
+        )
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(
+            sa.Column("used_space", sa.BigInteger(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("used_space")
+    with op.batch_alter_table("workspaces") as batch_op:
+        batch_op.drop_column("used_space")
+    with op.batch_alter_table("content_revisions") as batch_op:
+        batch_op.drop_column("file_size")
@@ -0,0 +1,47 @@
+"""add content_search_documents table used by sql search engine
+
+Revision ID: 3f2b8d1c6e4a
+Revises: 581ea6f9519d
+Create Date: 2020-06-22 10:12:45.327510
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from tracim_backend.models.search import get_full_text_index_ddl
+
+# revision identifiers, used by Alembic.
+revision = "3f2b8d1c6e4a"
+down_revision = "581ea6f9519d"
+
+
+def upgrade():
+    op.create_table(
+        "content_search_documents",
+        sa.Column("content_id", sa.Integer(), nullable=False),
+        sa.Column("label", sa.Text(), nullable=False),
+        sa.Column("filename", sa.Text(), nullable=False),
+        sa.Column("raw_content", sa.Text(), nullable=False),
+        sa.Column("comments", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["content_id"],
+            ["content.id"],
+            name=op.f("fk_content_search_documents_content_id_content"),
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("content_id", name=op.f("pk_content_search_documents")),
+    )
+    # INFO - full-text index statements are the ones used when creating the database from
+    # models: changes of the full-text index must be done by a new migration
+    create_statements, _ = get_full_text_index_ddl(op.get_context().dialect.name)
+    for statement in create_statements:
+        op.execute(statement)
+
+
+def downgrade():
+    _, drop_statements = get_full_text_index_ddl(op.get_context().dialect.name)
+    for statement in drop_statements:
+        op.execute(statement)
+    # INFO - triggers are dropped with the table
+    op.drop_table("content_search_documents")
@@ -0,0 +1,25 @@
+"""add event_id index on messages
+
+Revision ID: 581ea6f9519d
+Revises: 9f703261beeb
+Create Date: 2020-06-15 14:37:02.916504
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "581ea6f9519d"
+down_revision = "9f703261beeb"
+
+
+def upgrade():
+    dialect = op.get_context().dialect
+    # INFO - mysql creates automatically an index on foreign keys
+    if dialect.name != "mysql":
+        op.create_index("idx__messages__event_id", "messages", ["event_id"], unique=False)
+
+
+def downgrade():
+    dialect = op.get_context().dialect
+    if dialect.name != "mysql":
+        op.drop_index("idx__messages__event_id", table_name="messages")
@@ -0,0 +1,36 @@
+"""add revision_preview_metadata
+
+Revision ID: 5b2f9e7c1d3a
+Revises: c4f3a8d1b2e7
+Create Date: 2020-06-05 14:32:08.527310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "5b2f9e7c1d3a"
+down_revision = "c4f3a8d1b2e7"
+
+
+def upgrade():
+    op.create_table(
+        "revision_preview_metadata",
+        sa.Column("revision_id", sa.Integer(), nullable=False),
+        sa.Column("mimetype", sa.Unicode(length=255), nullable=True),
+        sa.Column("page_nb", sa.Integer(), nullable=True),
+        sa.Column("has_pdf_preview", sa.Boolean(), nullable=False),
+        sa.Column("has_jpeg_preview", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["revision_id"],
+            ["content_revisions.revision_id"],
+            name=op.f("fk_revision_preview_metadata_revision_id_content_revisions"),
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("revision_id", name=op.f("pk_revision_preview_metadata")),
+    )
+
+
+def downgrade():
+    op.drop_table("revision_preview_metadata")
@@ -0,0 +1,45 @@
+"""add file_blobs
+
+Revision ID: 8e1c4a92d7f0
+Revises: 5b2f9e7c1d3a
+Create Date: 2020-06-08 10:21:43.118245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8e1c4a92d7f0"
+down_revision = "5b2f9e7c1d3a"
+
+
+def upgrade():
+    op.create_table(
+        "file_blobs",
+        sa.Column("file_blob_id", sa.Integer(), nullable=False),
+        sa.Column("file_hash", sa.Unicode(length=64), nullable=False),
+        sa.Column("mimetype", sa.Unicode(length=255), nullable=False),
+        sa.Column("depot_file", sa.Unicode(length=4000), nullable=False),
+        sa.PrimaryKeyConstraint("file_blob_id", name=op.f("pk_file_blobs")),
+    )
+    op.create_index("idx__file_blobs__file_hash", "file_blobs", ["file_hash"], unique=False)
+    with op.batch_alter_table("content_revisions") as batch_op:
+        batch_op.add_column(sa.Column("file_blob_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            constraint_name="fk_content_revisions_file_blob_id_file_blobs",
+            referent_table="file_blobs",
+            local_cols=["file_blob_id"],
+            remote_cols=["file_blob_id"],
+        )
+    op.create_index(
+        "idx__content_revisions__file_blob_id", "content_revisions", ["file_blob_id"], unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("idx__content_revisions__file_blob_id", table_name="content_revisions")
+    with op.batch_alter_table("content_revisions") as batch_op:
+        batch_op.drop_constraint("fk_content_revisions_file_blob_id_file_blobs", type_="foreignkey")
+        batch_op.drop_column("file_blob_id")
+    op.drop_index("idx__file_blobs__file_hash", table_name="file_blobs")
+    op.drop_table("file_blobs")
@@ -0,0 +1,25 @@
+"""add (receiver_id, read, event_id) index on messages
+
+Revision ID: 9f703261beeb
+Revises: 3d7a6c0e9b15
+Create Date: 2020-06-12 10:24:51.083412
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9f703261beeb"
+down_revision = "3d7a6c0e9b15"
+
+
+def upgrade():
+    op.create_index(
+        "idx__messages__receiver_id__read__event_id",
+        "messages",
+        ["receiver_id", "read", "event_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("idx__messages__receiver_id__read__event_id", table_name="messages")
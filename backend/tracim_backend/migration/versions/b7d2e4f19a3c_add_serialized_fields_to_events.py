@@ -0,0 +1,25 @@
+"""add serialized_fields to events
+
+Fields of events created before this migration are serialized when they are read.
+
+Revision ID: b7d2e4f19a3c
+Revises: 3f2b8d1c6e4a
+Create Date: 2020-06-24 11:20:51.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b7d2e4f19a3c"
+down_revision = "3f2b8d1c6e4a"
+
+
+def upgrade():
+    with op.batch_alter_table("events") as batch_op:
+        batch_op.add_column(sa.Column("serialized_fields", sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("events") as batch_op:
+        batch_op.drop_column("serialized_fields")
@@ -0,0 +1,82 @@
+"""add ancestors_path to content
+
+Revision ID: c4f3a8d1b2e7
+Revises: 9d4621f59614
+Create Date: 2020-06-02 10:12:41.217438
+
+"""
+import typing
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "c4f3a8d1b2e7"
+down_revision = "9d4621f59614"
+
+ANCESTORS_PATH_SEPARATOR = "/"
+
+content_parent_query = """
+select content.id, content_revisions.parent_id
+from content join content_revisions on content.cached_revision_id = content_revisions.revision_id
+"""
+
+update_ancestors_path_query = sa.text(
+    "update content set ancestors_path = :ancestors_path where id = :content_id"
+)
+
+
+def compute_ancestors_paths(
+    parent_ids: typing.Dict[int, typing.Optional[int]]
+) -> typing.Dict[int, str]:
+    ancestors_paths = {}  # type: typing.Dict[int, str]
+    for content_id in parent_ids:
+        # INFO - walk up to the first content with a known path, then fill paths downward
+        branch = []
+        current_id = content_id
+        while current_id is not None and current_id not in ancestors_paths:
+            branch.append(current_id)
+            current_id = parent_ids.get(current_id)
+        if current_id is None:
+            path = ANCESTORS_PATH_SEPARATOR
+        else:
+            path = "{}{}{}".format(
+                ancestors_paths[current_id], current_id, ANCESTORS_PATH_SEPARATOR
+            )
+        for branch_content_id in reversed(branch):
+            ancestors_paths[branch_content_id] = path
+            path = "{}{}{}".format(path, branch_content_id, ANCESTORS_PATH_SEPARATOR)
+    return ancestors_paths
+
+
+def upgrade():
+    with op.batch_alter_table("content") as batch_op:
+        batch_op.add_column(sa.Column("ancestors_path", sa.String(length=768), nullable=True))
+    op.create_index(
+        "idx__content__ancestors_path",
+        "content",
+        ["ancestors_path"],
+        unique=False,
+        postgresql_ops={"ancestors_path": "varchar_pattern_ops"},
+    )
+
+    connection = op.get_bind()
+    parent_ids = {
+        content_id: parent_id
+        for content_id, parent_id in connection.execute(content_parent_query).fetchall()
+    }
+    ancestors_paths = compute_ancestors_paths(parent_ids)
+    if ancestors_paths:
+        connection.execute(
+            update_ancestors_path_query,
+            [
+                {"content_id": content_id, "ancestors_path": ancestors_path}
+                for content_id, ancestors_path in ancestors_paths.items()
+            ],
+        )
+
+
+def downgrade():
+    op.drop_index("idx__content__ancestors_path", table_name="content")
+    with op.batch_alter_table("content") as batch_op:
+        batch_op.drop_column("ancestors_path")
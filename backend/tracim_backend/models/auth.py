@@ -150,6 +150,9 @@ class User(DeclarativeBase):
     )
     reset_password_token_created = Column(DateTime, nullable=True, default=None)
     allowed_space = Column(BigInteger, nullable=False, server_default=str(DEFAULT_ALLOWED_SPACE))
+    # INFO - sum of the used space of the not deleted workspaces owned by the user, kept up to
+    # date on commit by tracim_backend.lib.core.used_space
+    used_space = Column(BigInteger, nullable=False, default=0, server_default="0")
     profile = Column(Enum(Profile), nullable=False, server_default=Profile.NOBODY.name)
 
     @hybrid_property
@@ -2,6 +2,9 @@
 import base64
 import cgi
 from datetime import datetime
+from typing import Any
+from typing import Callable
+from typing import Dict
 from typing import List
 from typing import Optional
 
@@ -20,6 +23,7 @@ from tracim_backend.extensions import app_list
 from tracim_backend.lib.core.application import ApplicationApi
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.utils import CONTENT_FRONTEND_URL_SCHEMA
+from tracim_backend.lib.utils.utils import DEFAULT_NB_ITEMS_PAGINATION
 from tracim_backend.lib.utils.utils import WORKSPACE_FRONTEND_URL_SCHEMA
 from tracim_backend.lib.utils.utils import core_convert_file_name_to_display
 from tracim_backend.lib.utils.utils import get_frontend_ui_base_url
@@ -29,8 +33,10 @@ from tracim_backend.models.auth import User
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import ContentNamespaces
 from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import RevisionPreviewMetadata
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
+from tracim_backend.models.event import ReadStatus
 from tracim_backend.models.roles import WorkspaceRoles
 
 
@@ -422,6 +428,35 @@ class FileQuery(object):
         self.force_download = force_download
 
 
+class LiveMessageQuery(object):
+    """
+    Live messages query model
+    """
+
+    def __init__(
+        self,
+        read_status: str,
+        after_event_id: int = 0,
+        count: int = DEFAULT_NB_ITEMS_PAGINATION,
+        event_types: str = "",
+    ) -> None:
+        self.read_status = ReadStatus(read_status)
+        self.after_event_id = after_event_id
+        self.count = count
+        self.event_types = string_to_list(event_types, ",", str) or None
+
+
+class PaginatedObject(object):
+    """
+    Page of a list of items
+    """
+
+    def __init__(self, items: List[Any], total: int, has_next: bool) -> None:
+        self.items = items
+        self.total = total
+        self.has_next = has_next
+
+
 class PageQuery(object):
     """
     Page query model
@@ -682,10 +717,7 @@ class UserInContext(object):
 
     @property
     def used_space(self) -> int:
-        from tracim_backend.lib.core.workspace import WorkspaceApi
-
-        wapi = WorkspaceApi(current_user=None, session=self.dbsession, config=self.config)
-        return wapi.get_user_used_space(self.user)
+        return self.user.used_space
 
 
 class WorkspaceInContext(object):
@@ -799,7 +831,7 @@ class WorkspaceInContext(object):
 
     @property
     def used_space(self) -> int:
-        return self.workspace.get_size()
+        return self.workspace.used_space
 
     @property
     def allowed_space(self) -> int:
@@ -893,18 +925,152 @@ class UserRoleWorkspaceInContext(object):
         return WorkspaceInContext(self.user_role.workspace, self.dbsession, self.config)
 
 
+class ContentInContextPrefetch(object):
+    """
+    Data shared by the ContentInContext of a list of contents: each kind of data
+    is loaded for the whole list the first time one of these ContentInContext needs it,
+    instead of being queried again for each content.
+    """
+
+    def __init__(
+        self, contents: List[Content], dbsession: Session, config: CFG, user: User = None
+    ) -> None:
+        self.contents = contents
+        self.dbsession = dbsession
+        self.config = config
+        self._user = user
+        self._data = {}  # type: Dict[str, Dict[int, Any]]
+
+    def _get_data(self, data_name: str, loader: Callable[[], Dict[int, Any]]) -> Dict[int, Any]:
+        if data_name not in self._data:
+            self._data[data_name] = loader()
+        return self._data[data_name]
+
+    def _content_api(self) -> "ContentApi":  # noqa: F821
+        from tracim_backend.lib.core.content import ContentApi
+
+        return ContentApi(
+            current_user=self._user,
+            session=self.dbsession,
+            config=self.config,
+            show_deleted=True,
+            show_archived=True,
+            show_active=True,
+            show_temporary=True,
+        )
+
+    @property
+    def unread_statuses(self) -> Dict[int, bool]:
+        return self._get_data(
+            "unread_statuses", lambda: self._content_api().get_unread_status(self.contents)
+        )
+
+    @property
+    def first_revisions(self) -> Dict[int, ContentRevisionRO]:
+        return self._get_data(
+            "first_revisions", lambda: self._content_api().get_first_revisions(self.contents)
+        )
+
+    @property
+    def last_revisions(self) -> Dict[int, ContentRevisionRO]:
+        return self._get_data(
+            "last_revisions", lambda: self._content_api().get_last_revisions(self.contents)
+        )
+
+    @property
+    def ancestors(self) -> Dict[int, Content]:
+        return self._get_data("ancestors", lambda: self._content_api().get_ancestors(self.contents))
+
+    @property
+    def comments(self) -> Dict[int, List[Content]]:
+        return self._get_data(
+            "comments", lambda: self._content_api().get_comments_by_content(self.contents)
+        )
+
+    @property
+    def previews_metadata(self) -> Dict[int, RevisionPreviewMetadata]:
+        def load() -> Dict[int, RevisionPreviewMetadata]:
+            previews_metadata = self._content_api().get_previews_metadata(
+                content.revision for content in self.contents
+            )
+            return {
+                content.content_id: previews_metadata[content.cached_revision_id]
+                for content in self.contents
+                if content.cached_revision_id in previews_metadata
+            }
+
+        return self._get_data("previews_metadata", load)
+
+    @property
+    def shares_count(self) -> Dict[int, int]:
+        # TODO - G.M - 2019-08-12 - handle case where share app is not enabled, by
+        # not starting it there. see #2189
+        from tracim_backend.applications.share.lib import ShareLib
+
+        return self._get_data(
+            "shares_count",
+            lambda: ShareLib(
+                config=self.config, session=self.dbsession, current_user=self._user
+            ).get_contents_shares_count(self.contents),
+        )
+
+
 class ContentInContext(object):
     """
     Interface to get Content data and Content data related to context.
     """
 
     def __init__(
-        self, content: Content, dbsession: Session, config: CFG, user: User = None
+        self,
+        content: Content,
+        dbsession: Session,
+        config: CFG,
+        user: User = None,
+        prefetch: Optional[ContentInContextPrefetch] = None,
     ) -> None:
+        """
+        :param prefetch: data prefetched for a list of contents including this one
+        or its children, data missing from it is loaded on demand.
+        """
         self.content = content
         self.dbsession = dbsession
         self.config = config
         self._user = user
+        self._prefetch = prefetch
+        self._preview_metadata = None  # type: Optional[RevisionPreviewMetadata]
+
+    def _get_prefetched(self, data_name: str) -> Any:
+        """
+        :return: prefetched data of this content, raise KeyError if there is none
+        """
+        if not self._prefetch:
+            raise KeyError(data_name)
+        return getattr(self._prefetch, data_name)[self.content_id]
+
+    def _get_prefetched_ancestors(self) -> Optional[List["ContentInContext"]]:
+        """
+        :return: prefetched ancestors of this content, from the direct parent
+        to the root, None if they are not all prefetched
+        """
+        if not self._prefetch:
+            return None
+        ancestor_ids = self.content.ancestor_ids
+        if ancestor_ids[-1:] != ([self.content.parent_id] if self.content.parent_id else []):
+            return None
+        ancestors = self._prefetch.ancestors
+        try:
+            return [
+                ContentInContext(
+                    ancestors[ancestor_id],
+                    self.dbsession,
+                    self.config,
+                    self._user,
+                    prefetch=self._prefetch,
+                )
+                for ancestor_id in reversed(ancestor_ids)
+            ]
+        except KeyError:
+            return None
 
     # Default
     @property
@@ -932,6 +1098,9 @@ class ContentInContext(object):
 
     @property
     def parent(self) -> Optional["ContentInContext"]:
+        ancestors = self._get_prefetched_ancestors()
+        if ancestors is not None:
+            return ancestors[0] if ancestors else None
         if self.content.parent:
             from tracim_backend.lib.core.content import ContentApi
 
@@ -949,6 +1118,9 @@ class ContentInContext(object):
 
     @property
     def parents(self) -> List["ContentInContext"]:
+        ancestors = self._get_prefetched_ancestors()
+        if ancestors is not None:
+            return ancestors
         parents = []
         if self.parent:
             parents.append(self.parent)
@@ -960,6 +1132,15 @@ class ContentInContext(object):
 
     @property
     def comments(self) -> List["ContentInContext"]:
+        try:
+            comments = self._get_prefetched("comments")
+        except KeyError:
+            pass
+        else:
+            return [
+                ContentInContext(comment, self.dbsession, self.config, self._user)
+                for comment in comments
+            ]
         comments_in_context = []
         for comment in self.content.get_comments():
             from tracim_backend.lib.core.content import ContentApi
@@ -1000,6 +1181,9 @@ class ContentInContext(object):
 
     @property
     def archived_through_parent_id(self) -> Optional[int]:
+        ancestors = self._get_prefetched_ancestors()
+        if ancestors is not None:
+            return next((ancestor.content_id for ancestor in ancestors if ancestor.is_archived), 0)
         from tracim_backend.lib.core.content import ContentApi
 
         content_api = ContentApi(
@@ -1019,6 +1203,9 @@ class ContentInContext(object):
 
     @property
     def deleted_through_parent_id(self) -> Optional[int]:
+        ancestors = self._get_prefetched_ancestors()
+        if ancestors is not None:
+            return next((ancestor.content_id for ancestor in ancestors if ancestor.is_deleted), 0)
         from tracim_backend.lib.core.content import ContentApi
 
         content_api = ContentApi(
@@ -1057,8 +1244,12 @@ class ContentInContext(object):
 
     @property
     def author(self) -> UserInContext:
+        try:
+            first_revision = self._get_prefetched("first_revisions")
+        except KeyError:
+            first_revision = self.content.first_revision
         return UserInContext(
-            dbsession=self.dbsession, config=self.config, user=self.content.first_revision.owner
+            dbsession=self.dbsession, config=self.config, user=first_revision.owner
         )
 
     @property
@@ -1083,9 +1274,11 @@ class ContentInContext(object):
 
     @property
     def last_modifier(self) -> UserInContext:
-        return UserInContext(
-            dbsession=self.dbsession, config=self.config, user=self.content.last_revision.owner
-        )
+        try:
+            last_revision = self._get_prefetched("last_revisions")
+        except KeyError:
+            last_revision = self.content.last_revision
+        return UserInContext(dbsession=self.dbsession, config=self.config, user=last_revision.owner)
 
     # Context-related
     @property
@@ -1104,7 +1297,10 @@ class ContentInContext(object):
     @property
     def read_by_user(self) -> bool:
         assert self._user
-        return not self.content.has_new_information_for(self._user)
+        try:
+            return not self._get_prefetched("unread_statuses")
+        except KeyError:
+            return not self.content.has_new_information_for(self._user)
 
     @property
     def frontend_url(self) -> str:
@@ -1117,26 +1313,37 @@ class ContentInContext(object):
         return root_frontend_url + content_frontend_url
 
     # file specific
+    def _get_preview_metadata(self) -> RevisionPreviewMetadata:
+        """
+        :return: preview metadata of the file of the content, loaded once
+        """
+        if self._preview_metadata is None:
+            try:
+                self._preview_metadata = self._get_prefetched("previews_metadata")
+            except KeyError:
+                from tracim_backend.lib.core.content import ContentApi
+
+                content_api = ContentApi(
+                    current_user=self._user,
+                    session=self.dbsession,
+                    config=self.config,
+                    show_deleted=True,
+                    show_archived=True,
+                    show_active=True,
+                    show_temporary=True,
+                )
+                self._preview_metadata = content_api.get_preview_metadata(
+                    self.content.cached_revision_id, file_extension=self.content.file_extension
+                )
+        return self._preview_metadata
+
     @property
     def page_nb(self) -> Optional[int]:
         """
         :return: page_nb of content if available, None if unavailable
         """
         if self.content.depot_file:
-            from tracim_backend.lib.core.content import ContentApi
-
-            content_api = ContentApi(
-                current_user=self._user,
-                session=self.dbsession,
-                config=self.config,
-                show_deleted=True,
-                show_archived=True,
-                show_active=True,
-                show_temporary=True,
-            )
-            return content_api.get_preview_page_nb(
-                self.content.cached_revision_id, file_extension=self.content.file_extension
-            )
+            return self._get_preview_metadata().page_nb
         else:
             return None
 
@@ -1154,6 +1361,8 @@ class ContentInContext(object):
         """
         if not self.content.depot_file:
             return None
+        if self.content.file_size is not None:
+            return self.content.file_size
         try:
             return self.content.depot_file.file.content_length
         except IOError:
@@ -1173,21 +1382,7 @@ class ContentInContext(object):
         """
         if not self.content.depot_file:
             return False
-
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
-        return content_api.has_pdf_preview(
-            self.content.cached_revision_id, file_extension=self.content.file_extension
-        )
+        return self._get_preview_metadata().has_pdf_preview
 
     @property
     def has_jpeg_preview(self) -> bool:
@@ -1196,21 +1391,7 @@ class ContentInContext(object):
         """
         if not self.content.depot_file:
             return False
-
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
-        return content_api.has_jpeg_preview(
-            self.content.cached_revision_id, file_extension=self.content.file_extension
-        )
+        return self._get_preview_metadata().has_jpeg_preview
 
     @property
     def file_extension(self) -> str:
@@ -1233,6 +1414,10 @@ class ContentInContext(object):
 
     @property
     def actives_shares(self) -> int:
+        try:
+            return self._get_prefetched("shares_count")
+        except KeyError:
+            pass
         # TODO - G.M - 2019-08-12 - handle case where share app is not enabled, by
         # not starting it there. see #2189
         from tracim_backend.applications.share.lib import ShareLib
@@ -1252,12 +1437,14 @@ class RevisionInContext(object):
         dbsession: Session,
         config: CFG,
         user: User = None,
+        preview_metadata: Optional[RevisionPreviewMetadata] = None,
     ) -> None:
         assert content_revision is not None
         self.revision = content_revision
         self.dbsession = dbsession
         self.config = config
         self._user = user
+        self._preview_metadata = preview_metadata
 
     # Default
     @property
@@ -1417,12 +1604,11 @@ class RevisionInContext(object):
         return slugify(self.revision.label)
 
     # file specific
-    @property
-    def page_nb(self) -> Optional[int]:
+    def _get_preview_metadata(self) -> RevisionPreviewMetadata:
         """
-        :return: page_nb of content if available, None if unavailable
+        :return: preview metadata of the file of the revision, loaded once
         """
-        if self.revision.depot_file:
+        if self._preview_metadata is None:
             # TODO - G.M - 2018-09-05 - Fix circular import better
             from tracim_backend.lib.core.content import ContentApi
 
@@ -1435,9 +1621,18 @@ class RevisionInContext(object):
                 show_active=True,
                 show_temporary=True,
             )
-            return content_api.get_preview_page_nb(
+            self._preview_metadata = content_api.get_preview_metadata(
                 self.revision.revision_id, file_extension=self.revision.file_extension
             )
+        return self._preview_metadata
+
+    @property
+    def page_nb(self) -> Optional[int]:
+        """
+        :return: page_nb of content if available, None if unavailable
+        """
+        if self.revision.depot_file:
+            return self._get_preview_metadata().page_nb
         else:
             return None
 
@@ -1455,6 +1650,8 @@ class RevisionInContext(object):
         """
         if not self.revision.depot_file:
             return None
+        if self.revision.file_size is not None:
+            return self.revision.file_size
         try:
             return self.revision.depot_file.file.content_length
         except IOError:
@@ -1474,21 +1671,7 @@ class RevisionInContext(object):
         """
         if not self.revision.depot_file:
             return False
-
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
-        return content_api.has_pdf_preview(
-            self.revision.revision_id, file_extension=self.revision.file_extension
-        )
+        return self._get_preview_metadata().has_pdf_preview
 
     @property
     def has_jpeg_preview(self) -> bool:
@@ -1497,21 +1680,7 @@ class RevisionInContext(object):
         """
         if not self.revision.depot_file:
             return False
-
-        from tracim_backend.lib.core.content import ContentApi
-
-        content_api = ContentApi(
-            current_user=self._user,
-            session=self.dbsession,
-            config=self.config,
-            show_deleted=True,
-            show_archived=True,
-            show_active=True,
-            show_temporary=True,
-        )
-        return content_api.has_jpeg_preview(
-            self.revision.revision_id, file_extension=self.revision.file_extension
-        )
+        return self._get_preview_metadata().has_jpeg_preview
 
     @property
     def file_extension(self) -> str:
@@ -5,6 +5,8 @@ from datetime import timedelta
 import enum
 import json
 import os
+import shutil
+import tempfile
 import typing
 
 from babel.dates import format_timedelta
@@ -18,18 +20,25 @@ from sqlalchemy import Enum
 from sqlalchemy import ForeignKey
 from sqlalchemy import Index
 from sqlalchemy import Sequence
+from sqlalchemy import and_
+from sqlalchemy import exists
 from sqlalchemy import inspect
-from sqlalchemy import text
+from sqlalchemy import or_
 from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Query
+from sqlalchemy.orm import Session
 from sqlalchemy.orm import backref
 from sqlalchemy.orm import object_session
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm.attributes import InstrumentedAttribute
 from sqlalchemy.orm.collections import attribute_mapped_collection
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.types import BigInteger
 from sqlalchemy.types import Boolean
 from sqlalchemy.types import DateTime
 from sqlalchemy.types import Integer
+from sqlalchemy.types import String
 from sqlalchemy.types import Text
 from sqlalchemy.types import Unicode
 
@@ -44,10 +53,18 @@ from tracim_backend.exceptions import NewRevisionAbortedDepotCorrupted
 from tracim_backend.lib.utils.app import TracimContentType
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.translation import get_locale
+from tracim_backend.lib.utils.utils import get_file_hash
 from tracim_backend.models.auth import User
 from tracim_backend.models.meta import DeclarativeBase
 from tracim_backend.models.roles import WorkspaceRoles
 
+ANCESTORS_PATH_SEPARATOR = "/"
+# 768 chars keep the index size under mysql limit (3072 bytes with utf8mb4)
+ANCESTORS_PATH_MAX_LENGTH = 768
+# files of revisions stored before file blobs existed are spooled in memory up to this size
+# when converted to a file blob
+FILE_BLOB_SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
 
 class Workspace(DeclarativeBase):
 
@@ -91,6 +108,9 @@ class Workspace(DeclarativeBase):
     )
     owner_id = Column(Integer, ForeignKey("users.user_id"), nullable=False)
     owner = relationship("User", remote_side=[User.user_id])
+    # INFO - size of the files of the workspace, as computed by get_size(), kept up to date
+    # on commit by tracim_backend.lib.core.used_space
+    used_space = Column(BigInteger, nullable=False, default=0, server_default="0")
 
     @hybrid_property
     def contents(self) -> ["Content"]:
@@ -613,6 +633,65 @@ class ContentNamespaces(enum.Enum):
     UPLOAD = "upload"
 
 
+class FileBlob(DeclarativeBase):
+    """
+    File stored once in the depot for all revisions having the same file content and
+    mimetype, these revisions reference it (see ContentRevisionRO.file_blob).
+    The stored file is deleted with the blob, once no revision references it anymore.
+    """
+
+    __tablename__ = "file_blobs"
+
+    file_blob_id = Column(Integer, primary_key=True)
+    # INFO - sha256 hexdigest of the file content
+    file_hash = Column(Unicode(64), unique=False, nullable=False)
+    mimetype = Column(Unicode(255), unique=False, nullable=False, default="")
+    depot_file = Column(UploadedFileField, unique=False, nullable=False)
+
+    @property
+    def revision_depot_file(self) -> UploadedFile:
+        """
+        Depot file of the blob to set as depot file of a revision: its list of files is
+        empty, so that filedepot never deletes the blob file when a revision is deleted
+        or when the transaction adding a revision is rollbacked.
+        """
+        revision_depot_file = dict(self.depot_file)
+        revision_depot_file["files"] = []
+        return UploadedFile(revision_depot_file)
+
+    @classmethod
+    def get_or_create(
+        cls,
+        session: Session,
+        content: typing.Union[bytes, typing.BinaryIO],
+        filename: str,
+        mimetype: str,
+    ) -> "FileBlob":
+        """
+        Return the file blob of given file content and mimetype, the file content is stored
+        in the depot only if no such blob exists yet.
+        """
+        file_hash = get_file_hash(content)
+        # INFO - no autoflush as the revision the blob is for may not be ready to be flushed
+        with session.no_autoflush:
+            file_blob = (
+                session.query(cls)
+                .filter(cls.file_hash == file_hash)
+                .filter(cls.mimetype == (mimetype or ""))
+                .order_by(cls.file_blob_id)
+                .first()
+            )
+        if file_blob:
+            return file_blob
+        file_blob = cls(file_hash=file_hash, mimetype=mimetype or "")
+        file_blob.depot_file = FileIntent(content, filename, mimetype)
+        session.add(file_blob)
+        return file_blob
+
+
+Index("idx__file_blobs__file_hash", FileBlob.file_hash)
+
+
 class ContentRevisionRO(DeclarativeBase):
     """
     Revision of Content. It's immutable, update or delete an existing ContentRevisionRO will throw
@@ -636,6 +715,16 @@ class ContentRevisionRO(DeclarativeBase):
     #  http://depot.readthedocs.io/en/latest/#attaching-files-to-models
     # http://depot.readthedocs.io/en/latest/api.html#module-depot.fields
     depot_file = Column(UploadedFileField, unique=False, nullable=True)
+    # INFO - revisions with a file blob share its stored file, revisions added
+    # before file blobs existed own their stored file.
+    file_blob_id = Column(
+        Integer, ForeignKey("file_blobs.file_blob_id"), unique=False, nullable=True
+    )
+    file_blob = relationship("FileBlob")
+    # INFO - size of the file in bytes, set when the file is stored. It is null for
+    # revisions without file and for files stored before it existed,
+    # see "tracimcli storage used-space-recompute".
+    file_size = Column(BigInteger, unique=False, nullable=True)
     properties = Column("properties", Text(), unique=False, nullable=False, default="")
 
     type = Column(Unicode(32), unique=False, nullable=False)
@@ -674,6 +763,9 @@ class ContentRevisionRO(DeclarativeBase):
         "description",
         "file_mimetype",
         "file_extension",
+        "file_blob",
+        "file_blob_id",
+        "file_size",
         "is_archived",
         "is_deleted",
         "label",
@@ -736,9 +828,7 @@ class ContentRevisionRO(DeclarativeBase):
         new_rev.updated = datetime.utcnow()
         if revision.depot_file:
             try:
-                new_rev.depot_file = FileIntent(
-                    revision.depot_file.file, revision.file_name, revision.file_mimetype
-                )
+                new_rev._share_file_of(revision)
             except IOError as exc:
                 raise NewRevisionAbortedDepotCorrupted(
                     "IOError. Can't create new revision by copying another one "
@@ -769,6 +859,8 @@ class ContentRevisionRO(DeclarativeBase):
                 column_value = copy.copy(parent)
             elif column_name == "content_namespace":
                 column_value = new_content_namespace
+            elif column_name == "file_blob":
+                column_value = revision.file_blob
             else:
                 column_value = copy.copy(getattr(revision, column_name))
             setattr(copy_rev, column_name, column_value)
@@ -776,9 +868,7 @@ class ContentRevisionRO(DeclarativeBase):
         # copy attached_file
         if revision.depot_file:
             try:
-                copy_rev.depot_file = FileIntent(
-                    revision.depot_file.file, revision.file_name, revision.file_mimetype
-                )
+                copy_rev._share_file_of(revision)
             except IOError as exc:
                 raise CopyRevisionAbortedDepotCorrupted(
                     "IOError. Can't create new revision by copying another one"
@@ -788,6 +878,24 @@ class ContentRevisionRO(DeclarativeBase):
                 ) from exc
         return copy_rev
 
+    def _share_file_of(self, revision: "ContentRevisionRO") -> None:
+        """
+        Set the stored file of given revision as the one of this revision, without copying it.
+        A revision stored before file blobs existed owns its file: the file blob of its
+        content is created or reused first, then shared by both revisions.
+        """
+        file_blob = revision.file_blob
+        if not file_blob:
+            # INFO - the depot file is spooled as hashing the content needs a seekable file
+            with tempfile.SpooledTemporaryFile(max_size=FILE_BLOB_SPOOL_MAX_SIZE) as content:
+                shutil.copyfileobj(revision.depot_file.file, content)
+                content.seek(0)
+                file_blob = FileBlob.get_or_create(
+                    object_session(revision), content, revision.file_name, revision.file_mimetype
+                )
+        self.file_blob = file_blob
+        self.depot_file = file_blob.revision_depot_file
+
     def __setattr__(self, key: str, value: typing.Any):
         """
         ContentRevisionUpdateError is raised if tried to update column and revision own identity
@@ -858,6 +966,7 @@ Index("idx__content_revisions__parent_id", ContentRevisionRO.parent_id)
 # on foreign key.
 Index("idx__content_revisions__content_id", ContentRevisionRO.content_id)
 Index("idx__content_revisions__workspace_id", ContentRevisionRO.workspace_id)
+Index("idx__content_revisions__file_blob_id", ContentRevisionRO.file_blob_id)
 
 
 class Content(DeclarativeBase):
@@ -904,6 +1013,12 @@ class Content(DeclarativeBase):
     current_revision = relationship(
         "ContentRevisionRO", uselist=False, foreign_keys=[cached_revision_id], post_update=True,
     )
+    # Materialized path of the content tree: ids of all ancestors of the content
+    # from the root, like "/4/12/" for a content in folder 12 which is itself in folder 4
+    # and "/" for a content at workspace root.
+    # This is denormalized data from current_revision.parent_id, kept up to date
+    # by ContentApi.save().
+    ancestors_path = Column(String(ANCESTORS_PATH_MAX_LENGTH), nullable=True, default=None)
 
     # TODO - A.P - 2017-09-05 - revisions default sorting
     # The only sorting that makes sens is ordering by "updated" field. But:
@@ -951,7 +1066,8 @@ class Content(DeclarativeBase):
 
     @property
     def revision(self) -> ContentRevisionRO:
-        if not self.revisions:
+        # INFO - check current_revision first to avoid loading all revisions of the content
+        if self.current_revision is None and not self.revisions:
             self.current_revision = ContentRevisionRO()
             self.current_revision.node = self
         return self.current_revision
@@ -1242,35 +1358,54 @@ class Content(DeclarativeBase):
         :return: list of children Content
         :rtype Content
         """
-        statement = text(
-            """
-    with RECURSIVE children_id as (
-    select content.id as id from content join content_revisions cr on content.cached_revision_id = cr.revision_id
-    where cr.parent_id = :content_id
-    union all
-    select content.id as id
-    from content join content_revisions cr on content.cached_revision_id = cr.revision_id
-        join children_id c on c.id = cr.parent_id
-    )
-    select content.id from content join content_revisions on content.cached_revision_id = content_revisions.revision_id
-        join children_id c on c.id = content.id;
-            """
+        if self.id is None or self.ancestors_path is None:
+            return []
+        return (
+            object_session(self)
+            .query(Content)
+            .join(ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id)
+            .filter(Content.ancestors_path.like("{}%".format(self.children_ancestors_path)))
+            .order_by(ContentRevisionRO.content_id)
         )
-        children_ids = [
-            elem[0]
-            for elem in object_session(self).execute(statement, {"content_id": self.id}).fetchall()
+
+    @property
+    def children_ancestors_path(self) -> str:
+        """
+        :return: ancestors_path of direct children of this content, all descendants
+        ancestors_path do start with it.
+        """
+        return "{}{}{}".format(self.ancestors_path, self.id, ANCESTORS_PATH_SEPARATOR)
+
+    @property
+    def ancestor_ids(self) -> typing.List[int]:
+        """
+        :return: ids of all ancestors of the content, from the root to the direct parent
+        """
+        if not self.ancestors_path:
+            return []
+        return [
+            int(content_id)
+            for content_id in self.ancestors_path.split(ANCESTORS_PATH_SEPARATOR)
+            if content_id
         ]
-        if children_ids:
-            return (
-                object_session(self)
-                .query(Content)
-                .join(
-                    ContentRevisionRO, Content.cached_revision_id == ContentRevisionRO.revision_id
-                )
-                .filter(Content.id.in_(children_ids))
-                .order_by(ContentRevisionRO.content_id)
-            )
-        return []
+
+    def build_ancestors_path(self) -> str:
+        """
+        Compute ancestors_path according to the current parent of the content.
+        """
+        parent = self.parent
+        if not parent:
+            return ANCESTORS_PATH_SEPARATOR
+        parent_ancestors_path = parent.ancestors_path or parent.build_ancestors_path()
+        return "{}{}{}".format(parent_ancestors_path, parent.id, ANCESTORS_PATH_SEPARATOR)
+
+    def is_descendant_of(self, content: "Content") -> bool:
+        """
+        :return: True if this content is a child (direct or not) of given content
+        """
+        if not self.ancestors_path or content.id is None:
+            return False
+        return content.id in self.ancestor_ids
 
     def get_children(self, recursively: bool = False) -> ["Content"]:
         """
@@ -1305,6 +1440,22 @@ class Content(DeclarativeBase):
     def depot_file(self, value):
         self.revision.depot_file = value
 
+    @property
+    def file_blob(self) -> typing.Optional[FileBlob]:
+        return self.revision.file_blob
+
+    @file_blob.setter
+    def file_blob(self, value: typing.Optional[FileBlob]) -> None:
+        self.revision.file_blob = value
+
+    @property
+    def file_size(self) -> typing.Optional[int]:
+        return self.revision.file_size
+
+    @file_size.setter
+    def file_size(self, value: typing.Optional[int]) -> None:
+        self.revision.file_size = value
+
     def new_revision(self) -> ContentRevisionRO:
         """
         Return and assign to this content a new revision.
@@ -1316,7 +1467,11 @@ class Content(DeclarativeBase):
             new_rev = ContentRevisionRO()
         else:
             new_rev = ContentRevisionRO.new_from(self.current_revision)
-        new_rev.node = self
+        # INFO - append to the revisions collection rather than setting new_rev.node: this
+        # loads the collection before the new revision is added to it. Loading it later, during
+        # the flush of the new revision (by an event hook for example), would build a second
+        # instance of it.
+        self.revisions.append(new_rev)
         self.current_revision = new_rev
         return new_rev
 
@@ -1387,14 +1542,36 @@ class Content(DeclarativeBase):
             # The user did not read this item, so yes!
             return True
 
-        if recursive:
-            for child in self.recursive_children:
-                if child.has_new_information_for(user, recursive=False):
-                    # The user did not read this item, so yes!
-                    return True
+        if recursive and self.ancestors_path is not None:
+            # INFO - one query looking for an unread child instead of checking children one by one
+            unread_children = (
+                object_session(self)
+                .query(Content.id)
+                .filter(
+                    Content.ancestors_path.like("{}%".format(self.children_ancestors_path)),
+                    Content.cached_revision_id != None,  # noqa: E711
+                    Content.get_unread_filter(user),
+                )
+                .exists()
+            )
+            return object_session(self).query(unread_children).scalar()
 
         return False
 
+    @staticmethod
+    def get_unread_filter(user: User, content_entity: typing.Any = None) -> ColumnElement:
+        """
+        :param content_entity: Content or an alias of it, Content by default
+        :return: filter matching contents whose current revision has not been read by user
+        """
+        content_entity = content_entity or Content
+        return ~exists().where(
+            and_(
+                RevisionReadStatus.revision_id == content_entity.cached_revision_id,
+                RevisionReadStatus.user_id == user.user_id,
+            )
+        )
+
     def get_comments(self) -> typing.List["Content"]:
         return self.get_valid_children(content_types=[content_type_list.Comment.slug])
 
@@ -1482,34 +1659,52 @@ class Content(DeclarativeBase):
         cid = content.content_id
         return url_template.format(wid=wid, fid=fid, ctype=ctype, cid=cid)
 
+    def get_tree_filter(self) -> ColumnElement:
+        """
+        :return: filter matching this content and all his children recursively
+        """
+        tree_filter = Content.id == self.id
+        if self.ancestors_path is not None:
+            tree_filter = or_(
+                tree_filter,
+                Content.ancestors_path.like("{}%".format(self.children_ancestors_path)),
+            )
+        return tree_filter
+
+    def _get_tree_revisions_query(self) -> Query:
+        """
+        Query all revisions of content and all his children recursively, with
+        the cached_revision_id of their content.
+        """
+        return (
+            object_session(self)
+            .query(ContentRevisionRO, Content.cached_revision_id)
+            .join(Content, Content.id == ContentRevisionRO.content_id)
+            .filter(self.get_tree_filter())
+            .order_by(ContentRevisionRO.revision_id)
+        )
+
     def get_tree_revisions(self) -> typing.List[ContentRevisionRO]:
         """Get all revision sorted by id of content and all his children recursively"""
-        revisions = []  # type: typing.List[ContentRevisionRO]
-        for revision in self.revisions:
-            revisions.append(revision)
-        for child in self.get_children(recursively=True):
-            revisions.extend(child.revisions)
-        revisions = sorted(revisions, key=lambda revision: revision.revision_id)
-        return revisions
+        return [revision for revision, _ in self._get_tree_revisions_query()]
 
     def get_tree_revisions_advanced(self) -> typing.List[ContentRevisionRO]:
         """Get all revision sorted by id of content and all his children recursively"""
         RevisionsData = namedtuple("revision_data", ["revision", "is_current_rev"])
-        revisions_data = []
-        for revision in self.revisions:
-            is_current_rev = bool(revision == self.current_revision)
-            revisions_data.append(RevisionsData(revision, is_current_rev))
-        for child in self.get_children(recursively=True):
-            for revision in child.revisions:
-                is_current_rev = bool(revision == child.current_revision)
-                revisions_data.append(RevisionsData(revision, is_current_rev))
-        revisions_data = sorted(
-            revisions_data, key=lambda revision_data: revision_data.revision.revision_id
-        )
-        return revisions_data
+        return [
+            RevisionsData(revision, revision.revision_id == cached_revision_id)
+            for revision, cached_revision_id in self._get_tree_revisions_query()
+        ]
 
 
 Index("idx__content__cached_revision_id", Content.cached_revision_id)
+# varchar_pattern_ops allow postgresql to use the index for "LIKE 'prefix%'" queries
+# whatever the database collation is.
+Index(
+    "idx__content__ancestors_path",
+    Content.ancestors_path,
+    postgresql_ops={"ancestors_path": "varchar_pattern_ops"},
+)
 
 
 class RevisionReadStatus(DeclarativeBase):
@@ -1541,6 +1736,26 @@ class RevisionReadStatus(DeclarativeBase):
     user = relationship("User")
 
 
+class RevisionPreviewMetadata(DeclarativeBase):
+    """
+    Preview information about the file of a revision, as given by the preview manager.
+    A revision file never changes, so these are computed only once, by the preview
+    generation job of the uploaded file or on first access.
+    """
+
+    __tablename__ = "revision_preview_metadata"
+
+    revision_id = Column(
+        Integer,
+        ForeignKey("content_revisions.revision_id", ondelete="CASCADE", onupdate="CASCADE"),
+        primary_key=True,
+    )
+    mimetype = Column(Unicode(255), unique=False, nullable=True, default=None)
+    page_nb = Column(Integer, unique=False, nullable=True, default=None)
+    has_pdf_preview = Column(Boolean, unique=False, nullable=False, default=False)
+    has_jpeg_preview = Column(Boolean, unique=False, nullable=False, default=False)
+
+
 class NodeTreeItem(object):
     """
         This class implements a model that allow to simply represents
@@ -3,17 +3,21 @@
 
 from datetime import datetime
 import enum
+import json
 import typing
 
 from sqlalchemy import Column
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
 from sqlalchemy.ext.indexable import index_property
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm import validates
 from sqlalchemy.types import JSON
 from sqlalchemy.types import DateTime
 from sqlalchemy.types import Enum
 from sqlalchemy.types import Integer
 from sqlalchemy.types import String
+from sqlalchemy.types import Text
 
 from tracim_backend.models.auth import User
 from tracim_backend.models.meta import DeclarativeBase
@@ -74,6 +78,9 @@ class Event(DeclarativeBase):
     entity_subtype = Column(String(length=ENTITY_SUBTYPE_LENGTH), nullable=True, default=None)
     created = Column(DateTime, nullable=False, default=datetime.utcnow)
     fields = Column(JSON, nullable=False)
+    # INFO - JSON text of fields, serialized once when they are set: live messages and
+    # messages history include it as is. It is null for events created before it existed.
+    _serialized_fields = Column("serialized_fields", Text, nullable=True)
 
     # easier access to values stored in fields
     author = index_property("fields", "author")
@@ -90,6 +97,33 @@ class Event(DeclarativeBase):
             type_ = "{}.{}".format(type_, self.entity_subtype)
         return type_
 
+    @validates("fields")
+    def _serialize_fields(self, key: str, fields: typing.Dict[str, typing.Any]) -> typing.Dict:
+        # INFO - fields are not mutable: only setting them changes the stored JSON text
+        self._serialized_fields = json.dumps(fields)
+        return fields
+
+    @property
+    def serialized_fields(self) -> str:
+        """Fields as JSON text."""
+        if self._serialized_fields is None:
+            return json.dumps(self.fields)
+        return self._serialized_fields
+
+    @staticmethod
+    def parse_event_type(
+        event_type: str,
+    ) -> typing.Tuple[EntityType, OperationType, typing.Optional[str]]:
+        """
+        Split an event type "<entity_type>.<operation>[.<entity_subtype>]".
+        :raise ValueError: if the event type is not valid
+        """
+        parts = event_type.split(".", 2)
+        if len(parts) < 2:
+            raise ValueError("{} is not a valid event type".format(event_type))
+        entity_subtype = parts[2] if len(parts) == 3 else None
+        return EntityType(parts[0]), OperationType(parts[1]), entity_subtype
+
     def __repr__(self):
         return "<Event(event_id=%s, type=%s, created_date=%s, fields=%s)>" % (
             repr(self.event_id),
@@ -125,3 +159,14 @@ class Message(DeclarativeBase):
     @property
     def created(self) -> datetime:
         return self.event.created
+
+
+# INFO - messages of a user are paginated on event_id, filtered or not on their read date
+Index(
+    "idx__messages__receiver_id__read__event_id",
+    Message.receiver_id,
+    Message.read,
+    Message.event_id,
+)
+# INFO - used to find events without messages
+Index("idx__messages__event_id", Message.event_id)
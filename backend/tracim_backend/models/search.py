@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Full-text search related models."""
+import typing
+
+from sqlalchemy import DDL
+from sqlalchemy import Column
+from sqlalchemy import ForeignKey
+from sqlalchemy import event
+from sqlalchemy.types import Integer
+from sqlalchemy.types import Text
+
+from tracim_backend.models.meta import DeclarativeBase
+
+# INFO - weighted text search vector of documents in PostgreSQL, {prefix} is the table
+# name prefix of the columns: the GIN index is on this expression without prefix,
+# queries must use it with the prefix to avoid ambiguity with other tables columns.
+_POSTGRESQL_DOCUMENT_VECTOR_TEMPLATE = (
+    "setweight(to_tsvector('simple', {prefix}label), 'A')"
+    " || setweight(to_tsvector('simple', {prefix}filename), 'A')"
+    " || setweight(to_tsvector('simple', {prefix}raw_content), 'B')"
+    " || setweight(to_tsvector('simple', {prefix}comments), 'C')"
+)
+# INFO - FTS5 virtual table indexing the documents in SQLite, its rowid is the content id
+SQLITE_FTS_TABLE_NAME = "content_search_fts"
+
+
+class ContentSearchDocument(DeclarativeBase):
+    """
+    Searchable texts of a content for the "sql" search engine, they are full-text indexed
+    by the database: GIN index in PostgreSQL, FTS5 table in SQLite.
+    Texts are normalized: words separated by spaces, see SQLSearchApi.
+    Comments are searched in the document of their parent.
+    """
+
+    __tablename__ = "content_search_documents"
+
+    content_id = Column(
+        Integer, ForeignKey("content.id", ondelete="CASCADE", onupdate="CASCADE"), primary_key=True,
+    )
+    label = Column(Text, nullable=False, default="")
+    filename = Column(Text, nullable=False, default="")
+    raw_content = Column(Text, nullable=False, default="")
+    comments = Column(Text, nullable=False, default="")
+
+
+def get_postgresql_document_vector(prefix: str = "") -> str:
+    """
+    :param prefix: prefix of the columns, like "content_search_documents."
+    :return: SQL expression of the text search vector of documents
+    """
+    return _POSTGRESQL_DOCUMENT_VECTOR_TEMPLATE.format(prefix=prefix)
+
+
+def get_full_text_index_ddl(dialect_name: str) -> typing.Tuple[typing.List[str], typing.List[str]]:
+    """
+    :return: statements creating and dropping the full-text index of the
+    content_search_documents table in the given database dialect, no statements
+    if it has no full-text index support.
+    """
+    if dialect_name == "postgresql":
+        return (
+            [
+                "CREATE INDEX idx__content_search_documents__document "
+                "ON content_search_documents USING gin (({}))".format(
+                    get_postgresql_document_vector()
+                )
+            ],
+            ["DROP INDEX IF EXISTS idx__content_search_documents__document"],
+        )
+    if dialect_name == "sqlite":
+        columns = "label, filename, raw_content, comments"
+        new_values = "new.label, new.filename, new.raw_content, new.comments"
+        old_values = "old.label, old.filename, old.raw_content, old.comments"
+        # INFO - external content table kept up to date with triggers,
+        # see https://www.sqlite.org/fts5.html#external_content_tables
+        insert_new = "INSERT INTO {table}(rowid, {columns}) VALUES (new.content_id, {values});".format(
+            table=SQLITE_FTS_TABLE_NAME, columns=columns, values=new_values
+        )
+        delete_old = (
+            "INSERT INTO {table}({table}, rowid, {columns}) "
+            "VALUES ('delete', old.content_id, {values});".format(
+                table=SQLITE_FTS_TABLE_NAME, columns=columns, values=old_values
+            )
+        )
+        return (
+            [
+                "CREATE VIRTUAL TABLE {table} USING fts5({columns}, "
+                "content='content_search_documents', content_rowid='content_id', "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')".format(
+                    table=SQLITE_FTS_TABLE_NAME, columns=columns
+                ),
+                "CREATE TRIGGER content_search_documents_ai AFTER INSERT "
+                "ON content_search_documents BEGIN {} END".format(insert_new),
+                "CREATE TRIGGER content_search_documents_ad AFTER DELETE "
+                "ON content_search_documents BEGIN {} END".format(delete_old),
+                "CREATE TRIGGER content_search_documents_au AFTER UPDATE "
+                "ON content_search_documents BEGIN {} {} END".format(delete_old, insert_new),
+            ],
+            ["DROP TABLE IF EXISTS {}".format(SQLITE_FTS_TABLE_NAME)],
+        )
+    return [], []
+
+
+for _dialect_name in ("postgresql", "sqlite"):
+    _create_statements, _drop_statements = get_full_text_index_ddl(_dialect_name)
+    for _statement in _create_statements:
+        event.listen(
+            ContentSearchDocument.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect_name),
+        )
+    for _statement in _drop_statements:
+        event.listen(
+            ContentSearchDocument.__table__,
+            "after_drop",
+            DDL(_statement).execute_if(dialect=_dialect_name),
+        )
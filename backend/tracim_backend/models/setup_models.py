@@ -14,12 +14,14 @@ import zope.sqlalchemy
 
 from tracim_backend.applications.share.models import ContentShare  # noqa: F401
 from tracim_backend.applications.upload_permissions.models import UploadPermission  # noqa: F401
+from tracim_backend.lib.core.used_space import listen_used_space_changes
 from tracim_backend.lib.crud_hook.caller import DatabaseCrudHookCaller
 from tracim_backend.lib.utils.utils import sliced_dict
 from tracim_backend.models.auth import User  # noqa: F401
 from tracim_backend.models.data import Content  # noqa: F401
 from tracim_backend.models.data import ContentRevisionRO  # noqa: F401
 from tracim_backend.models.meta import DeclarativeBase  # noqa: F401
+from tracim_backend.models.search import ContentSearchDocument  # noqa: F401
 from tracim_backend.models.tracim_session import TracimSession
 
 if typing.TYPE_CHECKING:
@@ -95,6 +97,7 @@ def get_tm_session(session_factory, transaction_manager) -> Session:
     from tracim_backend.models.revision_protection import prevent_content_revision_delete
 
     listen(dbsession, "before_flush", prevent_content_revision_delete)
+    listen_used_space_changes(dbsession)
     return dbsession
 
 
@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of the application, enabled with TEST_BENCHMARK_SIZE env var."""
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import typing
+
+import pytest
+import redis
+from sqlalchemy import func
+import transaction
+from zope.sqlalchemy import mark_changed
+
+from tracim_backend.config import CFG
+from tracim_backend.lib.core.event import get_event_receivers_cache
+from tracim_backend.lib.rq import get_redis_connection
+from tracim_backend.lib.utils.metrics import get_metrics
+from tracim_backend.models.auth import Profile
+from tracim_backend.models.auth import User
+from tracim_backend.models.data import UserRoleInWorkspace
+from tracim_backend.models.data import Workspace
+from tracim_backend.models.event import Message
+from tracim_backend.models.tracim_session import TracimSession
+from tracim_backend.tests.fixtures import *  # noqa: F403,F401
+from tracim_backend.tests.utils import TEST_BENCHMARK_SIZE
+
+pytestmark = pytest.mark.skipif(
+    not TEST_BENCHMARK_SIZE, reason="TEST_BENCHMARK_SIZE environment variable is not set"
+)
+
+# INFO - every user is a member of every workspace: each workspace event is received
+# by all these users and the administrator.
+# for example: TEST_BENCHMARK_SIZE=1000 TEST_BENCHMARK_USERS=500 pytest \
+#   tracim_backend/tests/benchmark/test_event_publishing.py -s
+USERS_COUNT = int(os.environ.get("TEST_BENCHMARK_USERS", 100))
+WORKSPACES_COUNT = int(os.environ.get("TEST_BENCHMARK_WORKSPACES", 10))
+# INFO - maximum duration in seconds to wait for the RQ worker in async mode
+ASYNC_PUBLICATION_TIMEOUT = 600
+# INFO - maximum mean duration in seconds of the publication of one event to all its receivers
+MAX_EVENT_PUBLICATION_DURATION = float(
+    os.environ.get("TEST_BENCHMARK_MAX_EVENT_PUBLICATION_DURATION", 1)
+)
+
+
+def create_members(session: TracimSession, workspaces: typing.List[Workspace], count: int) -> None:
+    """
+    Insert count users being readers of all given workspaces, bypassing UserApi and
+    RoleApi to generate big data sets quickly.
+    """
+    first_id = (session.query(func.max(User.user_id)).scalar() or 0) + 1
+    session.execute(
+        User.__table__.insert(),
+        [
+            {
+                "user_id": first_id + num,
+                "email": "benchmark.user.{}@tracim.fr".format(num),
+                "display_name": "user {}".format(num),
+                "profile": Profile.USER,
+            }
+            for num in range(count)
+        ],
+    )
+    session.execute(
+        UserRoleInWorkspace.__table__.insert(),
+        [
+            {
+                "user_id": first_id + num,
+                "workspace_id": workspace.workspace_id,
+                "role": UserRoleInWorkspace.READER,
+                "do_notify": False,
+            }
+            for num in range(count)
+            for workspace in workspaces
+        ],
+    )
+    mark_changed(session)
+
+
+def wait_for_messages(session: TracimSession, count: int) -> None:
+    deadline = time.monotonic() + ASYNC_PUBLICATION_TIMEOUT
+    while session.query(Message).count() < count:
+        assert time.monotonic() < deadline, "messages were not published in time"
+        time.sleep(0.1)
+        # INFO - see messages inserted by the RQ worker
+        transaction.abort()
+
+
+@pytest.mark.parametrize("session", [{"mock_event_builder": False}], indirect=True)
+class TestEventPublishingBenchmark(object):
+    @pytest.mark.parametrize(
+        "config_section",
+        [{"name": "base_test_local_live_messages"}, {"name": "functional_async_live_test"}],
+        indirect=True,
+    )
+    def test_benchmark__workspace_events__publication(
+        self, request, session, app_config: CFG
+    ) -> None:
+        if app_config.JOBS__PROCESSING_MODE == app_config.CST.ASYNC:
+            try:
+                get_redis_connection(app_config).ping()
+            except redis.exceptions.ConnectionError:
+                pytest.skip("async jobs processing mode needs a redis server")
+            # INFO - the worker publishes to the GRIP proxy, failing fast if none is running
+            request.getfixturevalue("rq_database_worker")
+        # INFO - loading fixtures publishes events, redis must be checked before
+        request.getfixturevalue("base_fixture")
+
+        wapi = request.getfixturevalue("workspace_api_factory").get()
+        workspaces = [
+            wapi.create_workspace("workspace {}".format(num), save_now=True)
+            for num in range(WORKSPACES_COUNT)
+        ]
+        create_members(session, workspaces, USERS_COUNT)
+        transaction.commit()
+        get_event_receivers_cache(app_config).clear()
+        workspace_ids = [workspace.workspace_id for workspace in workspaces]
+        messages_count = session.query(Message).count()
+        # INFO - receivers are the members and the administrator, owner of the workspaces
+        expected_messages_count = messages_count + TEST_BENCHMARK_SIZE * (USERS_COUNT + 1)
+        metrics = get_metrics(app_config)
+        metrics.reset()
+
+        start = time.perf_counter()
+        for num in range(TEST_BENCHMARK_SIZE):
+            workspace = wapi.get_one(workspace_ids[num % WORKSPACES_COUNT])
+            wapi.update_workspace(
+                workspace, label="workspace {}".format(num), description="", save_now=True
+            )
+            transaction.commit()
+        wait_for_messages(session, expected_messages_count)
+        duration = time.perf_counter() - start
+
+        print(
+            "{} mode: {} events published to {} users in {:.3f}s, {:.1f} events/s, "
+            "{:.1f} messages/s".format(
+                app_config.JOBS__PROCESSING_MODE,
+                TEST_BENCHMARK_SIZE,
+                USERS_COUNT + 1,
+                duration,
+                TEST_BENCHMARK_SIZE / duration,
+                TEST_BENCHMARK_SIZE * (USERS_COUNT + 1) / duration,
+            )
+        )
+        # INFO - in async mode, metrics of the publication are measured by the worker process
+        summaries = {summary.name: summary for summary in metrics.get_summaries()}
+        for summary in summaries.values():
+            print(
+                "  {}: count {}, mean {:.3f} {unit}, max {:.3f} {unit}".format(
+                    summary.name, summary.count, summary.mean, summary.max, unit=summary.unit
+                )
+            )
+        if app_config.JOBS__PROCESSING_MODE == app_config.CST.SYNC:
+            # INFO - each event is published once for all its receivers
+            assert summaries["live_messages.publish"].count == TEST_BENCHMARK_SIZE
+        assert duration / TEST_BENCHMARK_SIZE < MAX_EVENT_PUBLICATION_DURATION
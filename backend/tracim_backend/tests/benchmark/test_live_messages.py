@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import os
+import statistics
+import time
+
+import pytest
+import transaction
+
+from tracim_backend.lib.core.live_messages import LiveMessagesLib
+from tracim_backend.tests.fixtures import *  # noqa: F403,F401
+from tracim_backend.tests.utils import TEST_BENCHMARK_SIZE
+
+pytestmark = pytest.mark.skipif(
+    not TEST_BENCHMARK_SIZE, reason="TEST_BENCHMARK_SIZE environment variable is not set"
+)
+
+# INFO - maximum median duration in seconds between a commit and the reception of its
+# live message
+MAX_MEDIAN_LATENCY = float(os.environ.get("TEST_BENCHMARK_MAX_MEDIAN_LATENCY", 0.5))
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "base_test_local_live_messages"}], indirect=True
+)
+@pytest.mark.parametrize("session", [{"mock_event_builder": False}], indirect=True)
+class TestLiveMessagesBenchmark(object):
+    def test_benchmark__local_transport__event_latency(
+        self, session, app_config, admin_user, user_api_factory
+    ) -> None:
+        # INFO - the in-process transport allows to measure the latency between the commit
+        # of a change and the reception of its live message without GRIP proxy nor redis.
+        response = LiveMessagesLib(app_config).get_user_stream_response(admin_user.user_id)
+        stream = iter(response.app_iter)
+        next(stream)
+        uapi = user_api_factory.get()
+        latencies = []
+        for num in range(TEST_BENCHMARK_SIZE):
+            start = time.perf_counter()
+            uapi.update(admin_user, name="user {}".format(num), do_save=True)
+            transaction.commit()
+            assert "user {}".format(num).encode("utf-8") in next(stream)
+            latencies.append(time.perf_counter() - start)
+        response.app_iter.close()
+
+        latencies.sort()
+        median_latency = statistics.median(latencies)
+        print(
+            "{} live messages received, latency: median {:.2f}ms, "
+            "95th percentile {:.2f}ms, max {:.2f}ms".format(
+                TEST_BENCHMARK_SIZE,
+                median_latency * 1000,
+                latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000,
+                latencies[-1] * 1000,
+            )
+        )
+        assert median_latency < MAX_MEDIAN_LATENCY
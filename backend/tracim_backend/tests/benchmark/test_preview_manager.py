@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import time
+
+from preview_generator.manager import PreviewManager
+import pytest
+
+from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.tests.fixtures import *  # noqa: F403,F401
+from tracim_backend.tests.utils import TEST_BENCHMARK_SIZE
+
+pytestmark = pytest.mark.skipif(
+    not TEST_BENCHMARK_SIZE, reason="TEST_BENCHMARK_SIZE environment variable is not set"
+)
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestPreviewManagerBenchmark(object):
+    def test_benchmark__content_api__preview_manager(self, session, app_config, admin_user) -> None:
+        # INFO - ContentApi used to build its own preview manager, as ContentInContext
+        # builds a ContentApi in most of its properties, this happened for each
+        # serialized field of each content of a listing.
+        start = time.perf_counter()
+        for _ in range(TEST_BENCHMARK_SIZE):
+            api = ContentApi(current_user=admin_user, session=session, config=app_config)
+            PreviewManager(app_config.PREVIEW_CACHE_DIR, create_folder=True)
+        legacy_duration = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(TEST_BENCHMARK_SIZE):
+            api = ContentApi(current_user=admin_user, session=session, config=app_config)
+            assert api.preview_manager
+        duration = time.perf_counter() - start
+
+        print(
+            "{} ContentApi using their preview manager: {:.3f}s "
+            "(with one preview manager per ContentApi: {:.3f}s)".format(
+                TEST_BENCHMARK_SIZE, duration, legacy_duration
+            )
+        )
+        assert duration < legacy_duration
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import datetime
+import time
+
+import pytest
+from sqlalchemy import func
+import transaction
+
+from tracim_backend.app_models.contents import HTML_DOCUMENTS_TYPE
+from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.models.auth import User
+from tracim_backend.models.data import ActionDescription
+from tracim_backend.models.data import Content
+from tracim_backend.models.data import ContentNamespaces
+from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import RevisionReadStatus
+from tracim_backend.models.data import Workspace
+from tracim_backend.models.tracim_session import TracimSession
+from tracim_backend.tests.fixtures import *  # noqa: F403,F401
+from tracim_backend.tests.utils import TEST_BENCHMARK_SIZE
+
+pytestmark = pytest.mark.skipif(
+    not TEST_BENCHMARK_SIZE, reason="TEST_BENCHMARK_SIZE environment variable is not set"
+)
+
+# INFO - the legacy per revision algorithm is too slow to be run on the whole data set,
+# its duration is extrapolated from this number of contents.
+LEGACY_SAMPLE_SIZE = 500
+
+
+def create_pages(session: TracimSession, workspace: Workspace, owner: User, count: int) -> None:
+    """
+    Insert count pages with one revision each in workspace, bypassing ContentApi to
+    generate big data sets quickly.
+    """
+    first_id = (session.query(func.max(Content.id)).scalar() or 0) + 1
+    first_revision_id = (session.query(func.max(ContentRevisionRO.revision_id)).scalar() or 0) + 1
+    now = datetime.datetime.utcnow()
+    session.execute(
+        Content.__table__.insert(),
+        [{"id": first_id + num, "ancestors_path": "/"} for num in range(count)],
+    )
+    session.execute(
+        ContentRevisionRO.__table__.insert(),
+        [
+            {
+                "revision_id": first_revision_id + num,
+                "content_id": first_id + num,
+                "owner_id": owner.user_id,
+                "label": "page {}".format(num),
+                "file_extension": ".document.html",
+                "type": HTML_DOCUMENTS_TYPE,
+                "revision_type": ActionDescription.CREATION,
+                "workspace_id": workspace.workspace_id,
+                "content_namespace": ContentNamespaces.CONTENT,
+                "created": now,
+                "updated": now,
+            }
+            for num in range(count)
+        ],
+    )
+    session.execute(
+        Content.__table__.update()
+        .where(Content.id >= first_id)
+        .values(cached_revision_id=Content.id - first_id + first_revision_id)
+    )
+    transaction.commit()
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestReadStatusBenchmark(object):
+    def test_benchmark__mark_read__workspace(
+        self, session, app_config, admin_user, workspace_api_factory
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("benchmark", save_now=True)
+        create_pages(session, workspace, admin_user, TEST_BENCHMARK_SIZE)
+        api = ContentApi(current_user=admin_user, session=session, config=app_config)
+
+        start = time.perf_counter()
+        for content in api.get_all(workspace=workspace)[:LEGACY_SAMPLE_SIZE]:
+            for revision in content.revisions:
+                revision.read_by[admin_user] = datetime.datetime.now()
+        session.flush()
+        legacy_duration = time.perf_counter() - start
+        transaction.abort()
+
+        start = time.perf_counter()
+        api.mark_read__workspace(workspace)
+        duration = time.perf_counter() - start
+
+        read_count = (
+            session.query(RevisionReadStatus)
+            .filter(RevisionReadStatus.user_id == admin_user.user_id)
+            .count()
+        )
+        assert read_count >= TEST_BENCHMARK_SIZE
+        estimated_legacy_duration = legacy_duration * TEST_BENCHMARK_SIZE / LEGACY_SAMPLE_SIZE
+        print(
+            "mark_read__workspace on {} contents: {:.3f}s "
+            "(per revision algorithm: {:.3f}s estimated)".format(
+                TEST_BENCHMARK_SIZE, duration, estimated_legacy_duration
+            )
+        )
+        assert duration < estimated_legacy_duration
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import datetime
 import os
 import subprocess
 
@@ -22,6 +23,10 @@ from tracim_backend.models.data import ContentRevisionRO
 from tracim_backend.models.data import User
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
+from tracim_backend.models.event import EntityType
+from tracim_backend.models.event import Event
+from tracim_backend.models.event import Message
+from tracim_backend.models.event import OperationType
 from tracim_backend.tests.fixtures import *  # noqa: F403,F401
 from tracim_backend.tests.utils import TEST_CONFIG_FILE_PATH
 
@@ -52,8 +57,12 @@ class TestCommandsList(object):
         assert output.find("search index-populate") > 0
         assert output.find("search index-upgrade-experimental") > 0
         assert output.find("search index-drop") > 0
+        assert output.find("search index-sync") > 0
+        assert output.find("search text-cache-cleanup") > 0
         assert output.find("dev parameters list") > 0
         assert output.find("dev parameters value") > 0
+        assert output.find("storage used-space-recompute") > 0
+        assert output.find("messages delete") > 0
 
 
 @pytest.mark.usefixtures("base_fixture")
@@ -544,6 +553,51 @@ class TestCommands(object):
         with pytest.raises(NoResultFound):
             session.query(User).filter(User.user_id == user_id).one()
 
+    def test_func__storage_used_space_recompute__ok__nominal_case(
+        self, session, hapic, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        content_api = content_api_factory.get()
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        with session.no_autoflush:
+            file_ = content_api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                parent=None,
+                label="file",
+                do_save=False,
+            )
+            content_api.update_file_data(file_, "file.txt", "text/plain", b"content")
+        content_api.save(file_)
+        transaction.commit()
+        workspace_id = workspace.workspace_id
+        session.query(ContentRevisionRO).update(
+            {ContentRevisionRO.file_size: None}, synchronize_session=False
+        )
+        session.query(Workspace).update({Workspace.used_space: 0}, synchronize_session=False)
+        session.query(User).update({User.used_space: 0}, synchronize_session=False)
+        transaction.commit()
+        session.close()
+        # NOTE GM 2019-07-21: Unset Depot configuration. Done here and not in fixture because
+        # TracimCLI need reseted context when ran.
+        DepotManager._clear()
+        app = TracimCLI()
+        result = app.run(
+            [
+                "storage",
+                "used-space-recompute",
+                "-c",
+                "{}#command_test".format(TEST_CONFIG_FILE_PATH),
+                "-d",
+            ]
+        )
+        assert result == 0
+        workspace = session.query(Workspace).filter(Workspace.workspace_id == workspace_id).one()
+        assert workspace.used_space == 7
+        assert workspace.owner.used_space == 7
+        assert session.query(ContentRevisionRO.file_size).filter(
+            ContentRevisionRO.workspace_id == workspace_id
+        ).all() == [(7,)]
+
     def test_func__delete_user__ok__with_deleting_owned_workspaces(
         self,
         session,
@@ -1156,3 +1210,54 @@ class TestCommands(object):
         test_user_retrieve = session.query(User).filter(User.user_id == user_id).one()
         assert test_user_retrieve.display_name == "Custom Name"
         assert test_user_retrieve.email.endswith("@anonymous.local")
+
+    def test_func__messages_delete__ok__nominal_case(self, session, hapic) -> None:
+        old_date = datetime.datetime.utcnow() - datetime.timedelta(days=31)
+        session.query(Message).delete()
+        events = [
+            Event(
+                entity_type=EntityType.USER,
+                operation=OperationType.MODIFIED,
+                fields={},
+                created=old_date,
+            )
+            for _ in range(3)
+        ]
+        session.add_all(events)
+        session.flush()
+        session.add_all(
+            [
+                Message(event_id=events[0].event_id, receiver_id=1, read=old_date),
+                Message(event_id=events[1].event_id, receiver_id=1, read=None),
+                Message(
+                    event_id=events[2].event_id, receiver_id=1, read=datetime.datetime.utcnow()
+                ),
+            ]
+        )
+        session.flush()
+        event_ids = [event.event_id for event in events]
+        transaction.commit()
+        session.close()
+        # NOTE GM 2019-07-21: Unset Depot configuration. Done here and not in fixture because
+        # TracimCLI need reseted context when ran.
+        DepotManager._clear()
+        app = TracimCLI()
+        result = app.run(
+            [
+                "messages",
+                "delete",
+                "-c",
+                "{}#command_test".format(TEST_CONFIG_FILE_PATH),
+                "--days",
+                "30",
+                "--batch-size",
+                "1",
+            ]
+        )
+        assert result == 0
+        # INFO - the read message is deleted, then its event which has no message anymore
+        assert {message.event_id for message in session.query(Message)} == set(event_ids[1:])
+        assert {
+            event_id
+            for event_id, in session.query(Event.event_id).filter(Event.event_id.in_(event_ids))
+        } == set(event_ids[1:])
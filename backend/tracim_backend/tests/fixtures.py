@@ -29,7 +29,9 @@ from tracim_backend.fixtures.content import Content as ContentFixture
 from tracim_backend.fixtures.users import Base as BaseFixture
 from tracim_backend.fixtures.users import Test as FixtureTest
 from tracim_backend.lib.core.event import EventBuilder
+from tracim_backend.lib.core.event import get_event_receivers_cache
 from tracim_backend.lib.core.plugins import create_plugin_manager
+from tracim_backend.lib.search.indexing import SearchIndexer
 from tracim_backend.lib.utils.logger import logger
 from tracim_backend.lib.utils.request import TracimContext
 from tracim_backend.lib.webdav import Provider
@@ -213,6 +215,7 @@ def session(request, engine, session_factory, app_config, test_logger):
             else:
                 event_builder = EventBuilder(app_config)
             self._plugin_manager.register(event_builder)
+            self._plugin_manager.register(SearchIndexer(app_config))
             self._dbsession = create_dbsession_for_context(
                 session_factory, transaction.manager, self
             )
@@ -245,6 +248,8 @@ def session(request, engine, session_factory, app_config, test_logger):
         except Exception as e:
             transaction.abort()
             raise e
+    # INFO - cached receivers of events are the ones of the previous test database
+    get_event_receivers_cache(app_config).clear()
     yield context.dbsession
     from tracim_backend.models.meta import DeclarativeBase
 
@@ -1152,7 +1152,7 @@ class TestHtmlDocuments(object):
         assert modified_event.content["show_in_ui"] == content["show_in_ui"]
         assert modified_event.content["slug"] == content["slug"]
         assert modified_event.content["status"] == content["status"]
-        assert modified_event.content["sub_content_types"] == content["sub_content_types"]
+        assert "sub_content_types" not in modified_event.content
         assert modified_event.content["workspace_id"] == content["workspace_id"]
         workspace = web_testapp.get("/api/workspaces/2", status=200).json_body
         assert modified_event.workspace == workspace
@@ -2342,7 +2342,7 @@ class TestFiles(object):
         assert modified_event.content["show_in_ui"] == res["show_in_ui"]
         assert modified_event.content["slug"] == res["slug"]
         assert modified_event.content["status"] == res["status"]
-        assert modified_event.content["sub_content_types"] == res["sub_content_types"]
+        assert "sub_content_types" not in modified_event.content
         assert modified_event.content["workspace_id"] == res["workspace_id"]
 
         assert modified_event.workspace == workspace
@@ -2582,7 +2582,7 @@ class TestFiles(object):
         res = web_testapp.get("/api/workspaces/1/files/{}".format(content_id), status=200).json_body
         last_event = event_helper.last_event
         assert last_event.event_type == "content.modified.file"
-        assert last_event.content["actives_shares"] == res["actives_shares"]
+        assert "actives_shares" not in last_event.content
         assert last_event.content["content_id"] == content_id
         assert last_event.content["content_namespace"] == res["content_namespace"]
         assert last_event.content["content_type"] == res["content_type"]
@@ -2604,7 +2604,7 @@ class TestFiles(object):
         assert last_event.content["show_in_ui"] == res["show_in_ui"]
         assert last_event.content["slug"] == res["slug"]
         assert last_event.content["status"] == res["status"]
-        assert last_event.content["sub_content_types"] == res["sub_content_types"]
+        assert "sub_content_types" not in last_event.content
         assert last_event.content["workspace_id"] == res["workspace_id"]
         author = web_testapp.get("/api/users/1", status=200).json_body
         assert last_event.author == author
@@ -4050,7 +4050,7 @@ class TestThreads(object):
         assert modified_event.content["show_in_ui"] == content["show_in_ui"]
         assert modified_event.content["slug"] == content["slug"]
         assert modified_event.content["status"] == content["status"]
-        assert modified_event.content["sub_content_types"] == content["sub_content_types"]
+        assert "sub_content_types" not in modified_event.content
         assert modified_event.content["workspace_id"] == content["workspace_id"]
         workspace = web_testapp.get("/api/workspaces/2", status=200).json_body
         assert modified_event.workspace == workspace
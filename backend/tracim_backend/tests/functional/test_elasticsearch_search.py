@@ -60,25 +60,22 @@ class TestElasticSearchSearch(object):
         rapi = role_api_factory.get()
         rapi.create_one(user, workspace, UserRoleInWorkspace.WORKSPACE_MANAGER, False)
         api = content_api_factory.get(current_user=user)
-        content1 = api.create(
+        api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label=created_content_name,
             do_save=True,
         )
-        api.execute_created_content_actions(content1)
-        content2 = api.create(
+        api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label="another content",
             do_save=True,
         )
-        api.execute_created_content_actions(content2)
 
-        content3 = api.create(
+        api.create(
             content_type_slug="html-document", workspace=workspace, label="test", do_save=True
         )
-        api.execute_created_content_actions(content3)
         transaction.commit()
         elasticsearch.refresh_elasticsearch()
 
@@ -133,21 +130,18 @@ class TestElasticSearchSearch(object):
         rapi = role_api_factory.get()
         rapi.create_one(user, workspace, UserRoleInWorkspace.WORKSPACE_MANAGER, False)
         api = content_api_factory.get(current_user=user)
-        content1 = api.create(
+        api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label=created_content_name,
             do_save=True,
         )
-        api.execute_created_content_actions(content1)
-        content2 = api.create(
+        api.create(
             content_type_slug="html-document", workspace=workspace, label="report", do_save=True
         )
-        api.execute_created_content_actions(content2)
-        content3 = api.create(
+        api.create(
             content_type_slug="thread", workspace=workspace, label="discussion", do_save=True
         )
-        api.execute_created_content_actions(content3)
         transaction.commit()
         elasticsearch.refresh_elasticsearch()
 
@@ -224,15 +218,12 @@ class TestElasticSearchSearch(object):
                 content, new_label=created_content_name, new_content=created_content_body
             )
             api.save(content)
-        api.execute_created_content_actions(content)
-        report = api.create(
+        api.create(
             content_type_slug="html-document", workspace=workspace, label="report", do_save=True
         )
-        api.execute_created_content_actions(report)
-        thread = api.create(
+        api.create(
             content_type_slug="thread", workspace=workspace, label="discussion", do_save=True
         )
-        api.execute_created_content_actions(thread)
         transaction.commit()
         elasticsearch.refresh_elasticsearch()
 
@@ -306,26 +297,21 @@ class TestElasticSearchSearch(object):
             label=created_content_name,
             do_save=True,
         )
-        api.execute_created_content_actions(content)
-        comment = api.create_comment(
+        api.create_comment(
             workspace=workspace, parent=content, content=first_created_comment_content, do_save=True
         )
-        api.execute_created_content_actions(comment)
-        comment2 = api.create_comment(
+        api.create_comment(
             workspace=workspace,
             parent=content,
             content=second_created_comment_content,
             do_save=True,
         )
-        api.execute_created_content_actions(comment2)
-        report = api.create(
+        api.create(
             content_type_slug="html-document", workspace=workspace, label="report", do_save=True
         )
-        api.execute_created_content_actions(report)
-        thread = api.create(
+        api.create(
             content_type_slug="thread", workspace=workspace, label="discussion", do_save=True
         )
-        api.execute_created_content_actions(thread)
         transaction.commit()
         elasticsearch.refresh_elasticsearch()
 
@@ -402,34 +388,30 @@ class TestElasticSearchSearch(object):
         rapi = role_api_factory.get()
         rapi.create_one(user, workspace, UserRoleInWorkspace.WORKSPACE_MANAGER, False)
         api = content_api_factory.get(current_user=user)
-        doc = api.create(
+        api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label="stringtosearch doc",
             do_save=True,
         )
-        api.execute_created_content_actions(doc)
-        doc2 = api.create(
+        api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label="stringtosearch doc 2",
             do_save=True,
         )
-        api.execute_created_content_actions(doc2)
-        thread = api.create(
+        api.create(
             content_type_slug="thread",
             workspace=workspace,
             label="stringtosearch thread",
             do_save=True,
         )
-        api.execute_created_content_actions(thread)
-        folder = api.create(
+        api.create(
             content_type_slug="folder",
             workspace=workspace,
             label="stringtosearch folder",
             do_save=True,
         )
-        api.execute_created_content_actions(folder)
         transaction.commit()
         elasticsearch.refresh_elasticsearch()
         # get all
@@ -504,42 +486,36 @@ class TestElasticSearchSearch(object):
         rapi = role_api_factory.get()
         rapi.create_one(user, workspace, UserRoleInWorkspace.WORKSPACE_MANAGER, False)
         api = content_api_factory.get(current_user=user)
-        active_content = api.create(
+        api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label="stringtosearch active",
             do_save=True,
         )
-        api.execute_created_content_actions(active_content)
-        active_content2 = api.create(
+        api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label="stringtosearch active 2",
             do_save=True,
         )
-        api.execute_created_content_actions(active_content2)
         deleted_content = api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label="stringtosearch deleted",
             do_save=True,
         )
-        api.execute_created_content_actions(deleted_content)
         with new_revision(session=session, tm=transaction.manager, content=deleted_content):
             api.delete(deleted_content)
         api.save(deleted_content)
-        api.execute_update_content_actions(deleted_content)
         archived_content = api.create(
             content_type_slug="html-document",
             workspace=workspace,
             label="stringtosearch archived",
             do_save=True,
         )
-        api.execute_created_content_actions(archived_content)
         with new_revision(session=session, tm=transaction.manager, content=archived_content):
             api.archive(archived_content)
         api.save(archived_content)
-        api.execute_update_content_actions(archived_content)
         transaction.commit()
         elasticsearch.refresh_elasticsearch()
         # get all
@@ -658,7 +634,6 @@ class TestElasticSearchSearchWithIngest(object):
                 text_file, "test_file", "text/plain", b"we need to find stringtosearch here !"
             )
             api.save(text_file)
-            api.execute_created_content_actions(text_file)
         content_id = text_file.content_id
         transaction.commit()
         elasticsearch.refresh_elasticsearch()
@@ -672,3 +647,62 @@ class TestElasticSearchSearchWithIngest(object):
         assert search_result["is_total_hits_accurate"] is True
         assert len(search_result["contents"]) == 1
         assert search_result["contents"][0]["content_id"] == content_id
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "functional_test_elasticsearch_local_ingest_search"}], indirect=True
+)
+class TestElasticSearchSearchWithLocalIngest(object):
+    def test_api__elasticsearch_search__ok__in_file_local_ingest_search(
+        self,
+        user_api_factory,
+        role_api_factory,
+        workspace_api_factory,
+        content_api_factory,
+        web_testapp,
+        elasticsearch,
+        session,
+        content_type_list,
+    ):
+        uapi = user_api_factory.get()
+        user = uapi.create_user(
+            "test@test.test",
+            password="test@test.test",
+            do_save=True,
+            do_notify=False,
+            profile=Profile.TRUSTED_USER,
+        )
+        workspace_api = workspace_api_factory.get(show_deleted=True)
+        workspace = workspace_api.create_workspace("test", save_now=True)
+        rapi = role_api_factory.get()
+        rapi.create_one(user, workspace, UserRoleInWorkspace.WORKSPACE_MANAGER, False)
+        api = content_api_factory.get(current_user=user)
+        with session.no_autoflush:
+            text_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                label="important",
+                do_save=False,
+            )
+            api.update_file_data(
+                text_file,
+                "test_file",
+                "text/plain",
+                b"we need to find stringtosearch but not truncatedstring",
+            )
+            api.save(text_file)
+        content_id = text_file.content_id
+        transaction.commit()
+        elasticsearch.refresh_elasticsearch()
+
+        web_testapp.authorization = ("Basic", ("test@test.test", "test@test.test"))
+        params = {"search_string": "stringtosearch"}
+        res = web_testapp.get("/api/search/content", status=200, params=params)
+        search_result = res.json_body
+        assert search_result["total_hits"] == 1
+        assert search_result["contents"][0]["content_id"] == content_id
+        # INFO - text extracted from files is truncated to text_size_limit characters
+        params = {"search_string": "truncatedstring"}
+        res = web_testapp.get("/api/search/content", status=200, params=params)
+        assert res.json_body["total_hits"] == 0
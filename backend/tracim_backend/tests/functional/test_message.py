@@ -59,9 +59,12 @@ class TestMessages(object):
             messages = [m for m in messages if not m.read]
 
         web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
-        message_dicts = web_testapp.get(
+        result = web_testapp.get(
             "/api/users/1/messages?read_status={}".format(read_status), status=200,
         ).json_body
+        assert result["total"] == len(messages)
+        assert result["has_next"] is False
+        message_dicts = result["items"]
         assert len(messages) == len(message_dicts)
         for message, message_dict in zip(messages, message_dicts):
             assert {
@@ -71,3 +74,74 @@ class TestMessages(object):
                 "created": message.created.strftime(DATETIME_FORMAT),
                 "read": message.read.strftime(DATETIME_FORMAT) if message.read else None,
             } == message_dict
+
+    def test_api__get_messages__ok_200__paginated(self, session, web_testapp) -> None:
+        messages = create_events_and_messages(session)
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+
+        result = web_testapp.get("/api/users/1/messages?count=1", status=200).json_body
+        assert result["total"] == 2
+        assert result["has_next"] is True
+        assert [m["event_id"] for m in result["items"]] == [messages[0].event_id]
+
+        result = web_testapp.get(
+            "/api/users/1/messages?count=1&after_event_id={}".format(messages[0].event_id),
+            status=200,
+        ).json_body
+        assert result["total"] == 2
+        assert result["has_next"] is False
+        assert [m["event_id"] for m in result["items"]] == [messages[1].event_id]
+
+    @pytest.mark.parametrize(
+        "event_types,expected_indexes",
+        [
+            ("user.modified", [1]),
+            ("user.created,user.modified", [0, 1]),
+            ("user.created.subtype", []),
+            ("workspace.created", []),
+        ],
+    )
+    def test_api__get_messages__ok_200__event_types_filter(
+        self, session, web_testapp, event_types: str, expected_indexes
+    ) -> None:
+        messages = create_events_and_messages(session)
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+
+        result = web_testapp.get(
+            "/api/users/1/messages?event_types={}".format(event_types), status=200
+        ).json_body
+        assert result["total"] == len(expected_indexes)
+        assert [m["event_id"] for m in result["items"]] == [
+            messages[index].event_id for index in expected_indexes
+        ]
+        for message_dict in result["items"]:
+            assert message_dict["fields"]
+
+    @pytest.mark.parametrize("query", ["event_types=user", "event_types=foo.created", "count=0"])
+    def test_api__get_messages__err_400__invalid_query(self, web_testapp, query: str) -> None:
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        web_testapp.get("/api/users/1/messages?{}".format(query), status=400)
+
+    def test_api__set_messages_as_read__ok_204__nominal_case(self, session, web_testapp) -> None:
+        messages = create_events_and_messages(session)
+        read_date = messages[0].read
+        with transaction.manager:
+            session.add(tracim_event.Message(event_id=messages[1].event_id, receiver_id=2))
+        transaction.commit()
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+
+        web_testapp.put("/api/users/1/messages/read", status=204)
+
+        result = web_testapp.get("/api/users/1/messages?read_status=unread", status=200).json_body
+        assert result["total"] == 0
+        result = web_testapp.get("/api/users/1/messages?read_status=read", status=200).json_body
+        assert result["total"] == 2
+        # INFO - already read messages keep their read date
+        assert result["items"][0]["read"] == read_date.strftime(DATETIME_FORMAT)
+        assert (
+            session.query(tracim_event.Message)
+            .filter(tracim_event.Message.receiver_id == 2)
+            .one()
+            .read
+            is None
+        )
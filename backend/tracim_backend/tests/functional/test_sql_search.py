@@ -0,0 +1,366 @@
+from datetime import datetime
+from datetime import timedelta
+import os
+from unittest import mock
+
+from bs4 import BeautifulSoup
+import pytest
+from sqlalchemy import func
+from sqlalchemy import text
+from sqlalchemy.engine.url import make_url
+import transaction
+
+from tracim_backend.lib.search.sql_search.sql_search_api import SQLSearchApi
+from tracim_backend.models.auth import Profile
+from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import UserRoleInWorkspace
+from tracim_backend.models.revision_protection import new_revision
+from tracim_backend.models.search import ContentSearchDocument
+from tracim_backend.models.search import get_postgresql_document_vector
+from tracim_backend.tests.fixtures import *  # noqa: F403,F40
+
+# INFO - sql search engine is only available with PostgreSQL and SQLite databases
+DATABASE_BACKEND = make_url(
+    os.environ.get("TRACIM_SQLALCHEMY__URL", "sqlite://")
+).get_backend_name()
+
+
+@pytest.fixture
+def search_user(user_api_factory):
+    return user_api_factory.get().create_user(
+        "test@test.test",
+        password="test@test.test",
+        do_save=True,
+        do_notify=False,
+        profile=Profile.TRUSTED_USER,
+    )
+
+
+@pytest.fixture
+def search_workspace(search_user, workspace_api_factory, role_api_factory):
+    workspace = workspace_api_factory.get(show_deleted=True).create_workspace("test", save_now=True)
+    role_api_factory.get().create_one(
+        search_user, workspace, UserRoleInWorkspace.WORKSPACE_MANAGER, False
+    )
+    return workspace
+
+
+def search(web_testapp, **params) -> dict:
+    web_testapp.authorization = ("Basic", ("test@test.test", "test@test.test"))
+    return web_testapp.get("/api/search/content", status=200, params=params).json_body
+
+
+@pytest.mark.skipif(
+    DATABASE_BACKEND not in ("postgresql", "sqlite"), reason="sql search engine not available"
+)
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize("config_section", [{"name": "functional_test_sql_search"}], indirect=True)
+class TestSQLSearch(object):
+    @pytest.mark.parametrize(
+        "search_string, labels",
+        [
+            # exact syntax
+            ("testdocument", ["testdocument"]),
+            # autocomplete
+            ("testdoc", ["testdocument"]),
+            # words are matched separately, all of them must match
+            ("CONT anoth", ["another content"]),
+            ("content", ["another content", "content-2020"]),
+            ("2020 content", ["content-2020"]),
+            ("ument", []),
+        ],
+    )
+    def test_api___sql_search_ok__by_label(
+        self, search_user, search_workspace, content_api_factory, web_testapp, search_string, labels
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        for label in ("testdocument", "another content", "content-2020"):
+            api.create(
+                content_type_slug="html-document",
+                workspace=search_workspace,
+                label=label,
+                do_save=True,
+            )
+        transaction.commit()
+
+        search_result = search(web_testapp, search_string=search_string)
+        assert search_result["total_hits"] == len(labels)
+        assert search_result["is_total_hits_accurate"] is True
+        assert sorted(content["label"] for content in search_result["contents"]) == labels
+
+    def test_api___sql_search_ok__by_content_and_comment_ranked(
+        self, search_user, search_workspace, content_api_factory, web_testapp, session
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        by_comment = api.create(
+            content_type_slug="thread", workspace=search_workspace, label="thread", do_save=True
+        )
+        api.create_comment(
+            search_workspace, by_comment, "<p>a <b>stringtosearch</b> comment</p>", do_save=True
+        )
+        by_content = api.create(
+            content_type_slug="html-document",
+            workspace=search_workspace,
+            label="document",
+            do_save=True,
+        )
+        with new_revision(session=session, tm=transaction.manager, content=by_content):
+            api.update_content(
+                by_content, new_label="document", new_content="<p>stringtosearch</p>"
+            )
+        api.save(by_content)
+        api.create(
+            content_type_slug="html-document",
+            workspace=search_workspace,
+            label="stringtosearch",
+            do_save=True,
+        )
+        transaction.commit()
+
+        search_result = search(web_testapp, search_string="stringtosearch")
+        assert search_result["total_hits"] == 3
+        # INFO - label matches first, then content, then comments
+        assert [content["label"] for content in search_result["contents"]] == [
+            "stringtosearch",
+            "document",
+            "thread",
+        ]
+        scores = [content["score"] for content in search_result["contents"]]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_api___sql_search_ok__pagination(
+        self, search_user, search_workspace, content_api_factory, web_testapp
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        for num in range(5):
+            api.create(
+                content_type_slug="html-document",
+                workspace=search_workspace,
+                label="stringtosearch {}".format(num),
+                do_save=True,
+            )
+        transaction.commit()
+
+        labels = []
+        for page_nb in (1, 2, 3):
+            search_result = search(
+                web_testapp, search_string="stringtosearch", size=2, page_nb=page_nb
+            )
+            assert search_result["total_hits"] == 5
+            assert search_result["is_total_hits_accurate"] is True
+            labels.extend(content["label"] for content in search_result["contents"])
+        # INFO - same score: last updated first
+        assert labels == ["stringtosearch {}".format(num) for num in (4, 3, 2, 1, 0)]
+
+    def test_api___sql_search_ok__filter_by_content_type(
+        self, search_user, search_workspace, content_api_factory, web_testapp
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        api.create(
+            content_type_slug="html-document",
+            workspace=search_workspace,
+            label="stringtosearch doc",
+            do_save=True,
+        )
+        api.create(
+            content_type_slug="thread",
+            workspace=search_workspace,
+            label="stringtosearch thread",
+            do_save=True,
+        )
+        transaction.commit()
+
+        search_result = search(
+            web_testapp, search_string="stringtosearch", content_types="html-document"
+        )
+        assert [content["label"] for content in search_result["contents"]] == ["stringtosearch doc"]
+        search_result = search(
+            web_testapp, search_string="stringtosearch", content_types="html-document,thread"
+        )
+        assert search_result["total_hits"] == 2
+        search_result = search(web_testapp, search_string="stringtosearch", content_types="folder")
+        assert search_result["total_hits"] == 0
+
+    def test_api___sql_search_ok__filter_by_deleted_archived_parent(
+        self, search_user, search_workspace, content_api_factory, web_testapp, session
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        api.create(
+            content_type_slug="html-document",
+            workspace=search_workspace,
+            label="stringtosearch active",
+            do_save=True,
+        )
+        contents_by_state = {}
+        for state in ("deleted", "archived"):
+            folder = api.create(
+                content_type_slug="folder",
+                workspace=search_workspace,
+                label="{} folder".format(state),
+                do_save=True,
+            )
+            sub_folder = api.create(
+                content_type_slug="folder",
+                workspace=search_workspace,
+                parent=folder,
+                label="sub folder",
+                do_save=True,
+            )
+            api.create(
+                content_type_slug="html-document",
+                workspace=search_workspace,
+                parent=sub_folder,
+                label="stringtosearch in {} folder".format(state),
+                do_save=True,
+            )
+            contents_by_state[state] = folder
+        with new_revision(
+            session=session, tm=transaction.manager, content=contents_by_state["deleted"]
+        ):
+            api.delete(contents_by_state["deleted"])
+        api.save(contents_by_state["deleted"])
+        with new_revision(
+            session=session, tm=transaction.manager, content=contents_by_state["archived"]
+        ):
+            api.archive(contents_by_state["archived"])
+        api.save(contents_by_state["archived"])
+        transaction.commit()
+
+        search_result = search(web_testapp, search_string="stringtosearch")
+        assert [content["label"] for content in search_result["contents"]] == [
+            "stringtosearch active"
+        ]
+        search_result = search(
+            web_testapp,
+            search_string="stringtosearch",
+            show_deleted=1,
+            show_archived=1,
+            show_active=1,
+        )
+        assert search_result["total_hits"] == 3
+
+    def test_api___sql_search_ok__document_maintained_by_crud_hooks(
+        self, search_user, search_workspace, content_api_factory, web_testapp, session
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        document = api.create(
+            content_type_slug="html-document",
+            workspace=search_workspace,
+            label="old label",
+            do_save=True,
+        )
+        transaction.commit()
+        assert search(web_testapp, search_string="old")["total_hits"] == 1
+
+        document = api.get_one(document.content_id, content_type="html-document")
+        with new_revision(session=session, tm=transaction.manager, content=document):
+            api.update_content(document, new_label="new label", new_content="<p>text</p>")
+        api.save(document)
+        transaction.commit()
+
+        assert search(web_testapp, search_string="old")["total_hits"] == 0
+        assert search(web_testapp, search_string="new")["total_hits"] == 1
+        search_document = session.query(ContentSearchDocument).one()
+        assert search_document.label == "new label"
+        assert search_document.raw_content == "text"
+
+    def test_unit__sql_search_sync_index__ok__only_contents_changed_since(
+        self, search_user, search_workspace, content_api_factory, session, app_config
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        api.create(
+            content_type_slug="html-document", workspace=search_workspace, label="old", do_save=True
+        )
+        thread = api.create(
+            content_type_slug="thread", workspace=search_workspace, label="thread", do_save=True
+        )
+        transaction.commit()
+        since = session.query(func.max(ContentRevisionRO.revision_id)).scalar()
+        thread = api.get_one(thread.content_id, content_type="thread")
+        new = api.create(
+            content_type_slug="html-document", workspace=search_workspace, label="new", do_save=True
+        )
+        comment = api.create_comment(search_workspace, thread, "<p>comment</p>", do_save=True)
+        changed_content_ids = [new.content_id, thread.content_id]
+        comment_id = comment.content_id
+        transaction.commit()
+        session.query(ContentSearchDocument).delete()
+
+        search_api = SQLSearchApi(session=session, current_user=None, config=app_config)
+        results = search_api.sync_index(since=since)
+        # INFO - the parent of a changed comment is indexed with it
+        assert sorted(results.content_ids_to_index) == sorted(changed_content_ids)
+        assert sorted(
+            content_id for content_id, in session.query(ContentSearchDocument.content_id)
+        ) == sorted(changed_content_ids + [comment_id])
+        results = search_api.sync_index(since=datetime.utcnow() + timedelta(days=1))
+        assert results.content_ids_to_index == []
+
+    def test_unit__sql_search_index_content__ok__comments_html_parsed_once(
+        self, search_user, search_workspace, content_api_factory, session
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        thread = api.create(
+            content_type_slug="thread", workspace=search_workspace, label="thread", do_save=True
+        )
+        api.create_comment(search_workspace, thread, "<p>first</p>", do_save=True)
+        transaction.commit()
+        parse_counts = []
+        for comment_text in ("second", "third"):
+            thread = api.get_one(thread.content_id, content_type="thread")
+            with mock.patch(
+                "tracim_backend.lib.search.sql_search.sql_search_api.BeautifulSoup",
+                wraps=BeautifulSoup,
+            ) as parse:
+                api.create_comment(
+                    search_workspace, thread, "<p>{}</p>".format(comment_text), do_save=True
+                )
+                transaction.commit()
+            parse_counts.append(parse.call_count)
+
+        # INFO - texts of existing comments are not parsed again
+        assert parse_counts[0] == parse_counts[1]
+        thread_document = session.query(ContentSearchDocument).get(thread.content_id)
+        assert thread_document.comments == "first second third"
+
+
+@pytest.mark.skipif(DATABASE_BACKEND != "postgresql", reason="PostgreSQL database only")
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize("config_section", [{"name": "functional_test_sql_search"}], indirect=True)
+class TestSQLSearchPostgresql(object):
+    """
+    PostgreSQL specific checks, the search itself is tested by TestSQLSearch
+    with each database.
+    """
+
+    def test_unit__sql_search_query__ok__full_text_index_used(
+        self, search_user, search_workspace, content_api_factory, session, app_config
+    ) -> None:
+        api = content_api_factory.get(current_user=search_user)
+        api.create(
+            content_type_slug="html-document",
+            workspace=search_workspace,
+            label="stringtosearch",
+            do_save=True,
+        )
+        transaction.commit()
+
+        # INFO - the vector expression of queries must match the one of the GIN index
+        session.execute("SET enable_seqscan = off")
+        plan = session.execute(
+            text(
+                "EXPLAIN SELECT content_id FROM content_search_documents "
+                "WHERE {} @@ to_tsquery('simple', :query)".format(
+                    get_postgresql_document_vector(prefix="content_search_documents.")
+                )
+            ),
+            {"query": "stringtos:*"},
+        )
+        assert "idx__content_search_documents__document" in "\n".join(row for row, in plan)
+        search_api = SQLSearchApi(session=session, current_user=search_user, config=app_config)
+        assert [
+            content.label
+            for content, _ in search_api._search_query(
+                ["stringtos"], api, content_types=["html-document"]
+            )
+        ] == ["stringtosearch"]
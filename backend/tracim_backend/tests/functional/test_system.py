@@ -1,9 +1,11 @@
 # coding=utf-8
 from mock import patch
 import pytest
+import transaction
 
 from tracim_backend.error import ErrorCode
 from tracim_backend.lib.utils.utils import get_timezones_list
+from tracim_backend.models.auth import Profile
 from tracim_backend.tests.fixtures import *  # noqa: F403,F40
 
 
@@ -168,6 +170,45 @@ class TestAboutEndpoint(object):
         assert "details" in res.json.keys()
 
 
+@pytest.mark.usefixtures("base_fixture")
+class TestMetricsEndpoint(object):
+    """
+    Tests for /api/system/metrics
+    """
+
+    def test_api__get_metrics__ok_200__nominal_case(self, web_testapp):
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        web_testapp.put_json(
+            "/api/users/1", params={"public_name": "updated", "timezone": "", "lang": "en"}
+        )
+        res = web_testapp.get("/api/system/metrics", status=200)
+        metrics = {metric["name"]: metric for metric in res.json_body}
+        assert metrics["crud_hooks.dispatch"]["unit"] == "ms"
+        assert metrics["crud_hooks.dispatch"]["count"] >= 1
+        assert set(metrics["crud_hooks.dispatch"]) == {
+            "name",
+            "unit",
+            "count",
+            "total",
+            "mean",
+            "max",
+        }
+
+    def test_api__get_metrics__err_403__not_administrator(self, web_testapp, user_api_factory):
+        uapi = user_api_factory.get()
+        uapi.create_user(
+            email="this.is@user",
+            password="password",
+            profile=Profile.TRUSTED_USER,
+            do_save=True,
+            do_notify=False,
+        )
+        transaction.commit()
+        web_testapp.authorization = ("Basic", ("this.is@user", "password"))
+        res = web_testapp.get("/api/system/metrics", status=403)
+        assert res.json_body["code"] == ErrorCode.INSUFFICIENT_USER_PROFILE
+
+
 @pytest.mark.usefixtures("test_fixture")
 class TestUsernameAvailabilitiesEndpoint(object):
     """
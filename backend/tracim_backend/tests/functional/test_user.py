@@ -13,6 +13,7 @@ from tracim_backend.models.auth import Profile
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa: F403,F40
+from tracim_backend.tests.utils import SqlQueryCounter
 from tracim_backend.tests.utils import UserApiFactory
 from tracim_backend.tests.utils import create_1000px_png_test_image
 
@@ -731,6 +732,45 @@ class TestUserRecentlyActiveContentEndpoint(object):
         assert "code" in res.json.keys()
         assert res.json_body["code"] == ErrorCode.CONTENT_NOT_FOUND
 
+    def test_api__get_recently_active_content__ok__200__query_count_does_not_depend_on_content_count(
+        self, workspace_api_factory, content_type_list, content_api_factory, web_testapp, session,
+    ):
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        api = content_api_factory.get()
+        folder = api.create(content_type_list.Folder.slug, workspace, None, "folder", "", True)
+        sub_folder = api.create(
+            content_type_list.Folder.slug, workspace, folder, "sub folder", "", True
+        )
+        transaction.commit()
+
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        query_counts = []
+        page_total_count = 0
+        for page_count in (2, 10):
+            for page_number in range(page_count):
+                page = api.create(
+                    content_type_list.Page.slug,
+                    workspace,
+                    sub_folder,
+                    "page {} {}".format(page_count, page_number),
+                    "",
+                    True,
+                )
+                api.create_comment(workspace, page, "a comment", True)
+            transaction.commit()
+            with SqlQueryCounter() as counter:
+                res = web_testapp.get(
+                    "/api/users/1/workspaces/{}/contents/recently_active".format(
+                        workspace.workspace_id
+                    ),
+                    status=200,
+                )
+            page_total_count += page_count
+            # INFO - both folders are returned too
+            assert len(res.json_body) == page_total_count + 2
+            query_counts.append(counter.count)
+        assert query_counts[0] == query_counts[1]
+
 
 @pytest.mark.usefixtures("base_fixture")
 @pytest.mark.parametrize("config_section", [{"name": "functional_test"}], indirect=True)
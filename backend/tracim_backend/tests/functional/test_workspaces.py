@@ -11,6 +11,7 @@ from tracim_backend.models.auth import Profile
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa: F403,F40
+from tracim_backend.tests.utils import SqlQueryCounter
 from tracim_backend.tests.utils import create_1000px_png_test_image
 from tracim_backend.tests.utils import set_html_document_slug_to_legacy
 
@@ -2526,6 +2527,43 @@ class TestWorkspaceContents(object):
         assert content["modified"]
         assert content["created"]
 
+    def test_api__get_workspace_content__ok_200__query_count_does_not_depend_on_content_count(
+        self, workspace_api_factory, content_api_factory, content_type_list, web_testapp
+    ):
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        api = content_api_factory.get()
+        folder = api.create(content_type_list.Folder.slug, workspace, None, "folder", "", True)
+        sub_folder = api.create(
+            content_type_list.Folder.slug, workspace, folder, "sub folder", "", True
+        )
+        transaction.commit()
+
+        web_testapp.authorization = ("Basic", ("admin@admin.admin", "admin@admin.admin"))
+        query_counts = []
+        page_total_count = 0
+        for page_count in (2, 10):
+            for page_number in range(page_count):
+                page = api.create(
+                    content_type_list.Page.slug,
+                    workspace,
+                    sub_folder,
+                    "page {} {}".format(page_count, page_number),
+                    "",
+                    True,
+                )
+                api.create_comment(workspace, page, "a comment", True)
+            transaction.commit()
+            page_total_count += page_count
+            with SqlQueryCounter() as counter:
+                res = web_testapp.get(
+                    "/api/workspaces/{}/contents".format(workspace.workspace_id),
+                    status=200,
+                    params={"parent_ids": sub_folder.content_id},
+                )
+            assert len(res.json_body) == page_total_count
+            query_counts.append(counter.count)
+        assert query_counts[0] == query_counts[1]
+
     def test_api__get_workspace_content__ok_200__get_default_html_documents(self, web_testapp):
         """
         Check obtain workspace contents with defaults filters + content_filter
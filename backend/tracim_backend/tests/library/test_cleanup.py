@@ -1,6 +1,7 @@
 from pathlib import Path
 import tempfile
 
+from depot.manager import DepotManager
 import pytest
 from sqlalchemy.orm.exc import NoResultFound
 import transaction
@@ -11,6 +12,7 @@ from tracim_backend.applications.upload_permissions.models import UploadPermissi
 from tracim_backend.lib.cleanup.cleanup import CleanupLib
 from tracim_backend.lib.core.user import UserApi
 from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import FileBlob
 from tracim_backend.models.data import RevisionReadStatus
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
@@ -131,6 +133,47 @@ class TestCleanupLib(object):
         with pytest.raises(NoResultFound):
             session.query(ContentShare).filter(ContentShare.share_id == share_id).one()
 
+    def test_unit__delete_content__ok__shared_file_deleted_with_last_content(
+        self, session, app_config, content_type_list, content_api_factory, workspace_api_factory
+    ) -> None:
+        content_api = content_api_factory.get(
+            show_deleted=True, show_active=True, show_archived=True
+        )
+        test_workspace = workspace_api_factory.get().create_workspace("test_workspace")
+        file_ = content_api.create(
+            content_type_slug=content_type_list.File.slug,
+            workspace=test_workspace,
+            label="Test file",
+            do_save=True,
+            do_notify=False,
+        )
+        with new_revision(session=session, tm=transaction.manager, content=file_):
+            content_api.update_file_data(file_, "Test file.txt", "text/plain", b"content")
+        content_api.save(file_)
+        copy = content_api.copy(file_, new_label="Test copy")
+        session.flush()
+        transaction.commit()
+        file_blob = session.query(FileBlob).one()
+        stored_file_id = file_blob.depot_file.file_id
+        depot = DepotManager.get()
+
+        with unprotected_content_revision(session) as unprotected_session:
+            cleanup_lib = CleanupLib(app_config=app_config, session=unprotected_session)
+            cleanup_lib.delete_content(file_)
+            session.flush()
+        transaction.commit()
+        assert session.query(FileBlob).one() == file_blob
+        assert depot.get(stored_file_id).read() == b"content"
+
+        with unprotected_content_revision(session) as unprotected_session:
+            cleanup_lib = CleanupLib(app_config=app_config, session=unprotected_session)
+            cleanup_lib.delete_content(copy)
+            session.flush()
+        transaction.commit()
+        assert session.query(FileBlob).count() == 0
+        with pytest.raises(IOError):
+            depot.get(stored_file_id)
+
     def test_unit__delete_workspace__ok__nominal_case(
         self,
         session,
@@ -1,12 +1,16 @@
 # -*- coding: utf-8 -*-
 import typing
+from unittest.mock import patch
 
+from depot.io.utils import FileIntent
 import pytest
 import transaction
 
 from tracim_backend.app_models.contents import ContentTypeInContext
+from tracim_backend.exceptions import ConflictingMoveInChild
 from tracim_backend.exceptions import ContentFilenameAlreadyUsedInFolder
 from tracim_backend.exceptions import ContentInNotEditableState
+from tracim_backend.exceptions import ContentTreeTooDeep
 from tracim_backend.exceptions import EmptyLabelNotAllowed
 from tracim_backend.exceptions import SameValueError
 from tracim_backend.exceptions import UnallowedSubContent
@@ -14,9 +18,12 @@ from tracim_backend.lib.core.content import ContentApi
 from tracim_backend.lib.core.content import compare_content_for_sorting_by_type_and_name
 from tracim_backend.models.auth import Profile
 from tracim_backend.models.auth import User
+from tracim_backend.models.context_models import ContentInContext
 from tracim_backend.models.data import ActionDescription
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import ContentNamespaces
+from tracim_backend.models.data import FileBlob
+from tracim_backend.models.data import RevisionPreviewMetadata
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa F403,F401
@@ -1214,6 +1221,99 @@ class TestContentApi(object):
         assert text_file_after_move.children[0].workspace_id != comment_before_move_workspace_id
         assert text_file_after_move.children[0].workspace_id != comment_before_move_workspace_id
 
+    def test_unit__move__ok__update_ancestors_path_of_descendants(
+        self, workspace_api_factory, session, app_config, content_type_list, admin_user
+    ):
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        api = ContentApi(current_user=admin_user, session=session, config=app_config)
+        foldera = api.create(content_type_list.Folder.slug, workspace, None, "folder a", "", True)
+        folderb = api.create(
+            content_type_list.Folder.slug, workspace, foldera, "folder b", "", True
+        )
+        folderc = api.create(content_type_list.Folder.slug, workspace, None, "folder c", "", True)
+        page = api.create(
+            content_type_list.Page.slug, workspace, folderb, "page", do_save=True, do_notify=False
+        )
+        comment = api.create_comment(
+            workspace, parent=page, content="just a comment", do_save=True, do_notify=False
+        )
+        assert foldera.ancestors_path == "/"
+        assert folderb.ancestors_path == "/{}/".format(foldera.content_id)
+        assert page.ancestors_path == "/{}/{}/".format(foldera.content_id, folderb.content_id)
+        assert comment.ancestor_ids == [foldera.content_id, folderb.content_id, page.content_id]
+        assert [content.content_id for content in foldera.recursive_children] == [
+            folderb.content_id,
+            page.content_id,
+            comment.content_id,
+        ]
+        assert comment.is_descendant_of(foldera)
+        assert not comment.is_descendant_of(folderc)
+
+        with pytest.raises(ConflictingMoveInChild):
+            api.move(item=foldera, new_parent=page, new_workspace=workspace)
+        with new_revision(content=folderb, tm=transaction.manager, session=session):
+            api.move(item=folderb, new_parent=folderc, new_workspace=workspace)
+            api.save(folderb)
+        transaction.commit()
+
+        assert folderb.ancestors_path == "/{}/".format(folderc.content_id)
+        assert page.ancestors_path == "/{}/{}/".format(folderc.content_id, folderb.content_id)
+        assert comment.ancestor_ids == [folderc.content_id, folderb.content_id, page.content_id]
+        assert list(foldera.recursive_children) == []
+        assert comment.is_descendant_of(folderc)
+        assert not comment.is_descendant_of(foldera)
+
+    def test_unit__create_and_move__err__ancestors_path_too_long(
+        self, workspace_api_factory, session, app_config, content_type_list, admin_user
+    ):
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        api = ContentApi(current_user=admin_user, session=session, config=app_config)
+        foldera = api.create(content_type_list.Folder.slug, workspace, None, "folder a", "", True)
+        folderb = api.create(
+            content_type_list.Folder.slug, workspace, foldera, "folder b", "", True
+        )
+        page = api.create(
+            content_type_list.Page.slug, workspace, folderb, "page", do_save=True, do_notify=False
+        )
+        folderc = api.create(
+            content_type_list.Folder.slug, workspace, foldera, "folder c", "", True
+        )
+        transaction.commit()
+        with patch(
+            "tracim_backend.lib.core.content.ANCESTORS_PATH_MAX_LENGTH", len(page.ancestors_path)
+        ):
+            with pytest.raises(ContentTreeTooDeep):
+                api.create(content_type_list.Page.slug, workspace, page, "sub page", do_save=True)
+            transaction.abort()
+            # INFO - folder b fits under folder c, but page would not fit below it
+            with pytest.raises(ContentTreeTooDeep):
+                with new_revision(content=folderb, tm=transaction.manager, session=session):
+                    api.move(item=folderb, new_parent=folderc, new_workspace=workspace)
+                    api.save(folderb)
+        transaction.abort()
+        assert page.ancestors_path == "/{}/{}/".format(foldera.content_id, folderb.content_id)
+
+    def test_unit__get_deleted_parent_id__ok__nearest_deleted_ancestor(
+        self, workspace_api_factory, session, app_config, content_type_list, admin_user
+    ):
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        api = ContentApi(current_user=admin_user, session=session, config=app_config)
+        foldera = api.create(content_type_list.Folder.slug, workspace, None, "folder a", "", True)
+        folderb = api.create(
+            content_type_list.Folder.slug, workspace, foldera, "folder b", "", True
+        )
+        page = api.create(
+            content_type_list.Page.slug, workspace, folderb, "page", do_save=True, do_notify=False
+        )
+        assert api.get_deleted_parent_id(page) == 0
+        with new_revision(content=foldera, tm=transaction.manager, session=session):
+            api.delete(foldera)
+        assert api.get_deleted_parent_id(page) == foldera.content_id
+        with new_revision(content=folderb, tm=transaction.manager, session=session):
+            api.delete(folderb)
+        assert api.get_deleted_parent_id(page) == folderb.content_id
+        assert api.get_archived_parent_id(page) == 0
+
     def test_unit_copy_file_different_label_different_parent_ok(
         self,
         user_api_factory,
@@ -1277,7 +1377,7 @@ class TestContentApi(object):
         assert text_file_copy.content_id != text_file.content_id
         assert text_file_copy.workspace_id == workspace2.workspace_id
         assert text_file_copy.depot_file.file.read() == text_file.depot_file.file.read()
-        assert text_file_copy.depot_file.path != text_file.depot_file.path
+        assert text_file_copy.depot_file.path == text_file.depot_file.path
         assert text_file_copy.label == "test_file_copy"
         assert text_file_copy.type == text_file.type
         assert text_file_copy.parent.content_id == folderb.content_id
@@ -1338,7 +1438,7 @@ class TestContentApi(object):
         assert text_file_copy.content_id != text_file.content_id
         assert text_file_copy.workspace_id == workspace.workspace_id
         assert text_file_copy.depot_file.file.read() == text_file.depot_file.file.read()
-        assert text_file_copy.depot_file.path != text_file.depot_file.path
+        assert text_file_copy.depot_file.path == text_file.depot_file.path
         assert text_file_copy.label == "test_file_copy"
         assert text_file_copy.type == text_file.type
         assert text_file_copy.content_namespace == ContentNamespaces.UPLOAD
@@ -1434,6 +1534,9 @@ class TestContentApi(object):
         # INFO - G.M - 2019-04-30 - check if all supplementary revision are copy one.
         for revision in text_file_copy.get_tree_revisions()[-3:]:
             assert revision.revision_type == ActionDescription.COPY
+        assert text_file_copy.ancestors_path == "/{}/".format(folderb.content_id)
+        for comment in text_file_copy.children:
+            assert comment.ancestor_ids == [folderb.content_id, text_file_copy.content_id]
 
     def test_unit_copy_file_different_label_different_parent__err__allowed_subcontent(
         self,
@@ -1530,7 +1633,7 @@ class TestContentApi(object):
         assert text_file_copy.content_id != text_file.content_id
         assert text_file_copy.workspace_id == workspace2.workspace_id
         assert text_file_copy.depot_file.file.read() == text_file.depot_file.file.read()
-        assert text_file_copy.depot_file.path != text_file.depot_file.path
+        assert text_file_copy.depot_file.path == text_file.depot_file.path
         assert text_file_copy.label == text_file.label
         assert text_file_copy.type == text_file.type
         assert text_file_copy.parent.content_id == folderb.content_id
@@ -1586,7 +1689,7 @@ class TestContentApi(object):
         assert text_file_copy.content_id != text_file.content_id
         assert text_file_copy.workspace_id == workspace.workspace_id
         assert text_file_copy.depot_file.file.read() == text_file.depot_file.file.read()
-        assert text_file_copy.depot_file.path != text_file.depot_file.path
+        assert text_file_copy.depot_file.path == text_file.depot_file.path
         assert text_file_copy.label == "test_file_copy"
         assert text_file_copy.type == text_file.type
         assert text_file_copy.parent.content_id == foldera.content_id
@@ -1863,6 +1966,426 @@ class TestContentApi(object):
         for rev in page_4.revisions:
             eq_(user_b in rev.read_by.keys(), True)
 
+    def test_unit__mark_read__ok__recursive(
+        self,
+        user_api_factory,
+        workspace_api_factory,
+        session,
+        app_config,
+        content_type_list,
+        role_api_factory,
+    ):
+        uapi = user_api_factory.get()
+        user_a = uapi.create_minimal_user(
+            email="this.is@user", profile=Profile.ADMIN, save_now=True
+        )
+        user_b = uapi.create_minimal_user(
+            email="this.is@another.user", profile=Profile.ADMIN, save_now=True
+        )
+        workspace = workspace_api_factory.get(current_user=user_a).create_workspace(
+            "test workspace", save_now=True
+        )
+        role_api_factory.get(current_user=user_a).create_one(
+            user_b, workspace, UserRoleInWorkspace.READER, False
+        )
+        cont_api_a = ContentApi(current_user=user_a, session=session, config=app_config)
+        cont_api_b = ContentApi(current_user=user_b, session=session, config=app_config)
+        folder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, None, "folder", do_save=True
+        )
+        subfolder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, folder, "subfolder", do_save=True
+        )
+        page = cont_api_a.create(
+            content_type_list.Page.slug, workspace, subfolder, "page", do_save=True
+        )
+        other_page = cont_api_a.create(
+            content_type_list.Page.slug, workspace, None, "other page", do_save=True
+        )
+        with new_revision(content=page, tm=transaction.manager, session=session):
+            cont_api_a.update_content(page, new_label="page", new_content="new content")
+        cont_api_a.save(page)
+
+        cont_api_b.mark_read(subfolder, recursive=False)
+        assert not subfolder.has_new_information_for(user_b, recursive=False)
+        assert page.has_new_information_for(user_b)
+
+        cont_api_b.mark_read(folder)
+        for content in (folder, subfolder, page):
+            for rev in content.revisions:
+                assert user_b in rev.read_by.keys()
+        for rev in other_page.revisions:
+            assert user_b not in rev.read_by.keys()
+
+        cont_api_b.mark_unread(folder)
+        for content in (folder, subfolder, page):
+            for rev in content.revisions:
+                assert user_b not in rev.read_by.keys()
+        assert folder.has_new_information_for(user_b)
+        assert not folder.has_new_information_for(user_a)
+
+    def test_unit__get_unread_status__ok__nominal_case(
+        self,
+        user_api_factory,
+        workspace_api_factory,
+        session,
+        app_config,
+        content_type_list,
+        role_api_factory,
+    ):
+        uapi = user_api_factory.get()
+        user_a = uapi.create_minimal_user(
+            email="this.is@user", profile=Profile.ADMIN, save_now=True
+        )
+        user_b = uapi.create_minimal_user(
+            email="this.is@another.user", profile=Profile.ADMIN, save_now=True
+        )
+        workspace = workspace_api_factory.get(current_user=user_a).create_workspace(
+            "test workspace", save_now=True
+        )
+        role_api_factory.get(current_user=user_a).create_one(
+            user_b, workspace, UserRoleInWorkspace.READER, False
+        )
+        cont_api_a = ContentApi(current_user=user_a, session=session, config=app_config)
+        cont_api_b = ContentApi(current_user=user_b, session=session, config=app_config)
+        folder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, None, "folder", do_save=True
+        )
+        subfolder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, folder, "subfolder", do_save=True
+        )
+        page = cont_api_a.create(
+            content_type_list.Page.slug, workspace, subfolder, "page", do_save=True
+        )
+        other_page = cont_api_a.create(
+            content_type_list.Page.slug, workspace, None, "other page", do_save=True
+        )
+        contents = [folder, subfolder, page, other_page]
+        cont_api_b.mark_read(folder)
+        cont_api_b.mark_unread(page)
+
+        unread_statuses = cont_api_b.get_unread_status(contents)
+        assert unread_statuses == {
+            folder.content_id: True,
+            subfolder.content_id: True,
+            page.content_id: True,
+            other_page.content_id: True,
+        }
+        for content in contents:
+            assert unread_statuses[content.content_id] == content.has_new_information_for(user_b)
+        assert cont_api_b.get_unread_status(contents, user=user_a) == {
+            folder.content_id: False,
+            subfolder.content_id: False,
+            page.content_id: False,
+            other_page.content_id: False,
+        }
+
+        cont_api_b.mark_read(page)
+        assert cont_api_b.get_unread_status(contents) == {
+            folder.content_id: False,
+            subfolder.content_id: False,
+            page.content_id: False,
+            other_page.content_id: True,
+        }
+        contents_in_context = cont_api_b.get_contents_in_context(contents)
+        assert [content.read_by_user for content in contents_in_context] == [
+            True,
+            True,
+            True,
+            False,
+        ]
+
+    def test_unit__get_contents_in_context__ok__same_as_content_in_context(
+        self,
+        user_api_factory,
+        workspace_api_factory,
+        session,
+        app_config,
+        content_type_list,
+        role_api_factory,
+    ):
+        uapi = user_api_factory.get()
+        user_a = uapi.create_minimal_user(
+            email="this.is@user", profile=Profile.ADMIN, save_now=True
+        )
+        user_b = uapi.create_minimal_user(
+            email="this.is@another.user", profile=Profile.ADMIN, save_now=True
+        )
+        workspace = workspace_api_factory.get(current_user=user_a).create_workspace(
+            "test workspace", save_now=True
+        )
+        role_api_factory.get(current_user=user_a).create_one(
+            user_b, workspace, UserRoleInWorkspace.CONTENT_MANAGER, False
+        )
+        cont_api_a = ContentApi(
+            current_user=user_a, session=session, config=app_config, show_deleted=True
+        )
+        cont_api_b = ContentApi(current_user=user_b, session=session, config=app_config)
+        folder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, None, "folder", do_save=True
+        )
+        subfolder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, folder, "subfolder", do_save=True
+        )
+        page = cont_api_a.create(
+            content_type_list.Page.slug, workspace, subfolder, "page", do_save=True
+        )
+        other_page = cont_api_a.create(
+            content_type_list.Page.slug, workspace, None, "other page", do_save=True
+        )
+        with new_revision(session=session, tm=transaction.manager, content=page):
+            cont_api_b.update_content(page, new_label="new page", new_content="new content")
+        cont_api_b.save(page)
+        with new_revision(session=session, tm=transaction.manager, content=subfolder):
+            cont_api_a.delete(subfolder)
+        cont_api_a.save(subfolder)
+        contents = [folder, subfolder, page, other_page]
+
+        for prefetched, not_prefetched in zip(
+            cont_api_a.get_contents_in_context(contents),
+            [cont_api_a.get_content_in_context(content) for content in contents],
+        ):
+            assert prefetched.author.user_id == not_prefetched.author.user_id
+            assert prefetched.last_modifier.user_id == not_prefetched.last_modifier.user_id
+            assert prefetched.read_by_user == not_prefetched.read_by_user
+            assert prefetched.actives_shares == not_prefetched.actives_shares == 0
+            assert prefetched.deleted_through_parent_id == not_prefetched.deleted_through_parent_id
+            assert (
+                prefetched.archived_through_parent_id == not_prefetched.archived_through_parent_id
+            )
+            assert [parent.content_id for parent in prefetched.parents] == [
+                parent.content_id for parent in not_prefetched.parents
+            ]
+            assert getattr(prefetched.parent, "content_id", None) == getattr(
+                not_prefetched.parent, "content_id", None
+            )
+        page_in_context = cont_api_a.get_contents_in_context(contents)[2]
+        assert page_in_context.author.user_id == user_a.user_id
+        assert page_in_context.last_modifier.user_id == user_b.user_id
+        assert page_in_context.deleted_through_parent_id == subfolder.content_id
+        assert [parent.content_id for parent in page_in_context.parents] == [
+            subfolder.content_id,
+            folder.content_id,
+        ]
+
+    def test_unit__get_preview_metadata__ok__stored_on_first_call(
+        self, user_api_factory, workspace_api_factory, session, app_config, content_type_list
+    ):
+        user = user_api_factory.get().create_minimal_user(
+            email="this.is@user", profile=Profile.ADMIN, save_now=True
+        )
+        workspace = workspace_api_factory.get(current_user=user).create_workspace(
+            "test workspace", save_now=True
+        )
+        api = ContentApi(current_user=user, session=session, config=app_config)
+        with session.no_autoflush:
+            text_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                parent=None,
+                label="test_file",
+                do_save=False,
+            )
+            api.update_file_data(text_file, "test_file.txt", "text/plain", b"test_content")
+        api.save(text_file, ActionDescription.CREATION)
+        revision_id = text_file.revision_id
+        assert session.query(RevisionPreviewMetadata).get(revision_id) is None
+
+        preview_metadata = api.get_preview_metadata(revision_id, ".txt")
+        assert preview_metadata.mimetype == "text/plain"
+        assert preview_metadata.page_nb == 1
+        assert preview_metadata.has_pdf_preview is True
+        assert preview_metadata.has_jpeg_preview is True
+        session.flush()
+        assert session.query(RevisionPreviewMetadata).get(revision_id) is preview_metadata
+        with patch.object(ContentApi, "_compute_preview_metadata") as compute:
+            assert api.get_preview_metadata(revision_id, ".txt") is preview_metadata
+        assert not compute.called
+
+        with new_revision(session=session, tm=transaction.manager, content=text_file):
+            api.update_file_data(text_file, "test_file.txt", "text/plain", b"new_content")
+        api.save(text_file)
+        previews_metadata = api.get_previews_metadata(text_file.revisions)
+        assert set(previews_metadata.keys()) == {revision_id, text_file.revision_id}
+        assert previews_metadata[revision_id] is preview_metadata
+        assert previews_metadata[text_file.revision_id].page_nb == 1
+        session.flush()
+        assert session.query(RevisionPreviewMetadata).count() == 2
+
+        content_in_context = ContentInContext(text_file, session, app_config, user)
+        with patch.object(
+            ContentApi, "get_preview_metadata", wraps=api.get_preview_metadata
+        ) as get_preview_metadata:
+            assert content_in_context.page_nb == 1
+            assert content_in_context.has_pdf_preview is True
+            assert content_in_context.has_jpeg_preview is True
+        # INFO - preview metadata are loaded once per content in context
+        assert get_preview_metadata.call_count == 1
+
+    def test_unit__get_preview_metadata__ok__read_stored_metadata(
+        self, user_api_factory, workspace_api_factory, session, app_config, content_type_list
+    ):
+        user = user_api_factory.get().create_minimal_user(
+            email="this.is@user", profile=Profile.ADMIN, save_now=True
+        )
+        workspace = workspace_api_factory.get(current_user=user).create_workspace(
+            "test workspace", save_now=True
+        )
+        api = ContentApi(current_user=user, session=session, config=app_config)
+        with session.no_autoflush:
+            text_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                parent=None,
+                label="test_file",
+                do_save=False,
+            )
+            api.update_file_data(text_file, "test_file.txt", "text/plain", b"test_content")
+        api.save(text_file, ActionDescription.CREATION)
+        session.add(
+            RevisionPreviewMetadata(
+                revision_id=text_file.revision_id,
+                mimetype="text/plain",
+                page_nb=42,
+                has_pdf_preview=True,
+                has_jpeg_preview=False,
+            )
+        )
+        session.flush()
+
+        assert api.get_preview_page_nb(text_file.revision_id, ".txt") == 42
+        assert api.has_pdf_preview(text_file.revision_id, ".txt") is True
+        assert api.has_jpeg_preview(text_file.revision_id, ".txt") is False
+        [revision_in_context] = api.get_revisions_in_context(text_file.revisions)
+        assert revision_in_context.page_nb == 42
+        assert revision_in_context.has_pdf_preview is True
+        assert revision_in_context.has_jpeg_preview is False
+
+    def test_unit__update_file_data__ok__file_stored_once(
+        self, user_api_factory, workspace_api_factory, session, app_config, content_type_list
+    ):
+        user = user_api_factory.get().create_minimal_user(
+            email="this.is@user", profile=Profile.ADMIN, save_now=True
+        )
+        workspace = workspace_api_factory.get(current_user=user).create_workspace(
+            "test workspace", save_now=True
+        )
+        api = ContentApi(current_user=user, session=session, config=app_config)
+        files = []
+        for label in ("file", "same file", "other file"):
+            with session.no_autoflush:
+                file_ = api.create(
+                    content_type_slug=content_type_list.File.slug,
+                    workspace=workspace,
+                    parent=None,
+                    label=label,
+                    do_save=False,
+                )
+                api.update_file_data(
+                    file_,
+                    "{}.txt".format(label),
+                    "text/plain",
+                    b"other content" if label == "other file" else b"content",
+                )
+            api.save(file_, ActionDescription.CREATION)
+            files.append(file_)
+        file_, same_file, other_file = files
+        assert session.query(FileBlob).count() == 2
+        assert file_.file_blob is same_file.file_blob
+        assert file_.depot_file.file_id == same_file.depot_file.file_id
+        assert file_.file_blob is not other_file.file_blob
+        assert file_.depot_file.file.read() == b"content"
+
+        with new_revision(session=session, tm=transaction.manager, content=file_):
+            api.update_content(file_, new_label="new label")
+        api.save(file_)
+        copy = api.copy(file_, new_label="copy")
+        assert len(file_.revisions) == 2
+        for revision in file_.revisions + copy.revisions:
+            assert revision.file_blob is same_file.file_blob
+            assert revision.depot_file.file_id == same_file.depot_file.file_id
+        assert session.query(FileBlob).count() == 2
+
+    def test_unit__new_revision__ok__blob_less_file_converted_to_file_blob(
+        self, user_api_factory, workspace_api_factory, session, app_config, content_type_list
+    ):
+        user = user_api_factory.get().create_minimal_user(
+            email="this.is@user", profile=Profile.ADMIN, save_now=True
+        )
+        workspace = workspace_api_factory.get(current_user=user).create_workspace(
+            "test workspace", save_now=True
+        )
+        api = ContentApi(current_user=user, session=session, config=app_config)
+        with session.no_autoflush:
+            legacy_file = api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                parent=None,
+                label="legacy",
+                do_save=False,
+            )
+            # INFO - file stored as before file blobs existed: the revision owns it
+            legacy_file.file_extension = ".txt"
+            legacy_file.file_mimetype = "text/plain"
+            legacy_file.depot_file = FileIntent(b"legacy content", "legacy.txt", "text/plain")
+        api.save(legacy_file, ActionDescription.CREATION)
+        assert legacy_file.file_blob is None
+        assert session.query(FileBlob).count() == 0
+
+        with new_revision(session=session, tm=transaction.manager, content=legacy_file):
+            api.update_content(legacy_file, new_label="new legacy")
+        api.save(legacy_file)
+        copy = api.copy(legacy_file, new_label="copy")
+        assert session.query(FileBlob).count() == 1
+        file_blob = session.query(FileBlob).one()
+        assert legacy_file.file_blob is file_blob
+        assert copy.file_blob is file_blob
+        assert copy.depot_file.file_id == legacy_file.depot_file.file_id
+        assert copy.depot_file.file.read() == b"legacy content"
+        assert legacy_file.revisions[0].file_blob is None
+
+    def test_unit__save__ok__mark_read_only_current_revision(
+        self,
+        user_api_factory,
+        workspace_api_factory,
+        session,
+        app_config,
+        content_type_list,
+        role_api_factory,
+    ):
+        uapi = user_api_factory.get()
+        user_a = uapi.create_minimal_user(
+            email="this.is@user", profile=Profile.ADMIN, save_now=True
+        )
+        user_b = uapi.create_minimal_user(
+            email="this.is@another.user", profile=Profile.ADMIN, save_now=True
+        )
+        workspace = workspace_api_factory.get(current_user=user_a).create_workspace(
+            "test workspace", save_now=True
+        )
+        role_api_factory.get(current_user=user_a).create_one(
+            user_b, workspace, UserRoleInWorkspace.CONTENT_MANAGER, False
+        )
+        cont_api_a = ContentApi(current_user=user_a, session=session, config=app_config)
+        cont_api_b = ContentApi(current_user=user_b, session=session, config=app_config)
+        folder = cont_api_a.create(
+            content_type_list.Folder.slug, workspace, None, "folder", do_save=True
+        )
+        page = cont_api_a.create(
+            content_type_list.Page.slug, workspace, folder, "page", do_save=True
+        )
+        first_revision = folder.current_revision
+
+        with new_revision(content=folder, tm=transaction.manager, session=session):
+            cont_api_b.update_content(folder, new_label="renamed folder")
+        cont_api_b.save(folder)
+
+        assert user_b in folder.current_revision.read_by.keys()
+        assert user_b not in first_revision.read_by.keys()
+        assert not folder.has_new_information_for(user_b, recursive=False)
+        assert page.has_new_information_for(user_b)
+        assert folder.has_new_information_for(user_a)
+
     def test_unit__update__ok__nominal_case(
         self,
         user_api_factory,
@@ -1,15 +1,18 @@
+import typing
 from unittest.mock import MagicMock
 
 import pytest
 import transaction
 
 from tracim_backend.lib.core.plugins import hookimpl
+from tracim_backend.lib.crud_hook.caller import bulk_crud_operation
 from tracim_backend.lib.utils.request import TracimContext
 from tracim_backend.models.auth import User
 from tracim_backend.models.data import ActionDescription
 from tracim_backend.models.data import Content
 from tracim_backend.models.data import UserRoleInWorkspace
 from tracim_backend.models.data import Workspace
+from tracim_backend.models.meta import DeclarativeBase
 from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa: F403,F40
 
@@ -88,6 +91,28 @@ class UserRoleInWorkspaceHookImpl:
         self.mock_hooks("deleted", role=role, context=context)
 
 
+class BulkCrudOperationHookImpl:
+    def __init__(self) -> None:
+        self.mock_hooks = MagicMock()
+
+    @hookimpl
+    def on_bulk_crud_operation(
+        self,
+        created: typing.List[DeclarativeBase],
+        modified: typing.List[DeclarativeBase],
+        deleted: typing.List[DeclarativeBase],
+        changed_attributes: typing.Dict[DeclarativeBase, typing.FrozenSet[str]],
+        context: TracimContext,
+    ) -> None:
+        self.mock_hooks(
+            created=created,
+            modified=modified,
+            deleted=deleted,
+            changed_attributes=changed_attributes,
+            context=context,
+        )
+
+
 @pytest.mark.usefixtures("base_fixture")
 class TestDatabaseCrudHookCaller:
     def test_unit__crud_caller__ok__user(self, session):
@@ -185,3 +210,60 @@ class TestDatabaseCrudHookCaller:
         session.delete(content)
         session.flush()
         hook.mock_hooks.assert_called_with("deleted", content=content, context=session.context)
+
+    def test_unit__crud_caller__ok__unchanged_value_not_notified(self, session):
+        hook = UserHookImpl()
+        session.context.plugin_manager.register(hook)
+        user = User(email="foo@bar", display_name="John doe")
+        session.add(user)
+        session.flush()
+        hook.mock_hooks.reset_mock()
+
+        user.display_name = "John doe"
+        session.flush()
+        hook.mock_hooks.assert_not_called()
+
+    def test_unit__crud_caller__ok__unwatched_attribute_not_notified(self, session):
+        hook = UserHookImpl()
+        session.context.plugin_manager.register(hook)
+        user = User(email="foo@bar")
+        session.add(user)
+        session.flush()
+        hook.mock_hooks.reset_mock()
+
+        user.used_space = 42
+        user.auth_token = "token"
+        session.flush()
+        hook.mock_hooks.assert_not_called()
+
+    def test_unit__crud_caller__ok__bulk_operation(self, session):
+        hook = UserHookImpl()
+        bulk_hook = BulkCrudOperationHookImpl()
+        session.context.plugin_manager.register(hook)
+        session.context.plugin_manager.register(bulk_hook)
+        deleted_user = User(email="deleted@bar")
+        session.add(deleted_user)
+        session.flush()
+        hook.mock_hooks.reset_mock()
+
+        with bulk_crud_operation(session):
+            users = [User(email="user{}@bar".format(num)) for num in range(3)]
+            session.add_all(users)
+            session.flush()
+            users[0].display_name = "John doe"
+            deleted_user.display_name = "Jane doe"
+            session.flush()
+            session.delete(deleted_user)
+
+        hook.mock_hooks.assert_not_called()
+        bulk_hook.mock_hooks.assert_called_once()
+        kwargs = bulk_hook.mock_hooks.call_args[1]
+        assert set(kwargs["created"]) == set(users)
+        assert kwargs["modified"] == [deleted_user]
+        assert kwargs["deleted"] == [deleted_user]
+        assert kwargs["changed_attributes"] == {deleted_user: frozenset(["display_name"])}
+        assert kwargs["context"] is session.context
+
+        users[1].display_name = "John doe"
+        session.flush()
+        hook.mock_hooks.assert_called_once_with("modified", user=users[1], context=session.context)
@@ -1,7 +1,29 @@
+from datetime import datetime
+from datetime import timedelta
+import json
+import pickle
+from unittest.mock import Mock
+from unittest.mock import patch
+
 import pytest
 import transaction
 
+from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.lib.core.event import AsyncLiveMessageBuilder
+from tracim_backend.lib.core.event import EventApi
+from tracim_backend.lib.core.event import EventCoalescer
+from tracim_backend.lib.core.event import EventReceiversCache
+from tracim_backend.lib.core.event import get_event_receivers_cache
+from tracim_backend.lib.core.live_messages import GripTransport
+from tracim_backend.lib.core.userworkspace import RoleApi
+from tracim_backend.lib.crud_hook.caller import bulk_crud_operation
+from tracim_backend.lib.utils.metrics import get_metrics
 from tracim_backend.models.auth import Profile
+from tracim_backend.models.data import UserRoleInWorkspace
+from tracim_backend.models.event import EntityType
+from tracim_backend.models.event import Event
+from tracim_backend.models.event import Message
+from tracim_backend.models.event import OperationType
 from tracim_backend.models.revision_protection import new_revision
 from tracim_backend.tests.fixtures import *  # noqa F403,F401
 
@@ -28,6 +50,27 @@ class TestEventBuilder:
 
         assert undelete_event.event_id == update_while_deleted_event.event_id + 1
 
+    def test_unit__on_bulk_crud_operation__ok__one_event_per_object(
+        self, user_api_factory, session, app_config, event_helper
+    ) -> None:
+        uapi = user_api_factory.get()
+        deleted_user = uapi.create_minimal_user(email="deleted@user", save_now=True)
+        transaction.commit()
+        last_event_id = event_helper.last_event.event_id
+
+        with bulk_crud_operation(session):
+            user = uapi.create_minimal_user(email="this.is@user", save_now=True)
+            uapi.update(user, name="John", do_save=True)
+            uapi.update(deleted_user, name="Jane", do_save=True)
+            uapi.delete(deleted_user, do_save=True)
+        transaction.commit()
+
+        events = [event for event in event_helper.last_events(2) if event.event_id > last_event_id]
+        assert [event.event_type for event in events] == ["user.created", "user.deleted"]
+        assert events[0].user["user_id"] == user.user_id
+        assert events[0].user["public_name"] == "John"
+        assert events[1].user["user_id"] == deleted_user.user_id
+
     def test_unit__on_modified_content__is_deleted(
         self,
         content_api_factory,
@@ -59,3 +102,291 @@ class TestEventBuilder:
         transaction.commit()
         undelete_event = event_helper.last_event
         assert undelete_event.event_type == "content.undeleted.file"
+
+    def test_unit__on_created_content__ok__file_snapshot_without_preview_data(
+        self, content_api_factory, workspace_api_factory, session, event_helper, content_type_list,
+    ) -> None:
+        capi = content_api_factory.get()
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        with patch.object(ContentApi, "get_preview_page_nb") as get_preview_page_nb:
+            content = capi.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                label="this_is_a_file",
+                do_save=False,
+            )
+            capi.update_file_data(content, "test.txt", "text/plain", b"test")
+            capi.save(content)
+            transaction.commit()
+        get_preview_page_nb.assert_not_called()
+        event = event_helper.last_event
+        assert event.event_type == "content.created.file"
+        assert event.content["mimetype"] == "text/plain"
+        assert not {"page_nb", "has_pdf_preview", "has_jpeg_preview"} & set(event.content)
+
+    def test_unit__on_content__ok__lean_snapshot(
+        self,
+        admin_user,
+        content_api_factory,
+        workspace_api_factory,
+        session,
+        event_helper,
+        content_type_list,
+    ) -> None:
+        capi = content_api_factory.get()
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content = capi.create(
+            content_type_slug=content_type_list.Page.slug,
+            workspace=workspace,
+            label="this_is_a_page",
+            do_save=True,
+        )
+        transaction.commit()
+        created_event = event_helper.last_event
+        assert created_event.event_type == "content.created.html-document"
+        assert not {"actives_shares", "sub_content_types"} & set(created_event.content)
+        assert created_event.content["author"]["user_id"] == admin_user.user_id
+        assert created_event.content["last_modifier"] == created_event.content["author"]
+        assert json.loads(created_event.serialized_fields) == created_event.fields
+
+        with new_revision(session=session, tm=transaction.manager, content=content):
+            capi.update_content(content, "this_is_a_page", "new text")
+        transaction.commit()
+        modified_event = event_helper.last_event
+        assert modified_event.event_type == "content.modified.html-document"
+        assert "author" not in modified_event.content
+        assert modified_event.content["last_modifier"]["user_id"] == admin_user.user_id
+
+    def test_unit__publish_messages__ok__one_request_for_all_receivers(
+        self,
+        admin_user,
+        user_api_factory,
+        workspace_api_factory,
+        role_api_factory,
+        session,
+        event_helper,
+    ) -> None:
+        uapi = user_api_factory.get()
+        user = uapi.create_minimal_user(email="this.is@user", profile=Profile.USER, save_now=True)
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        role_api_factory.get().create_one(
+            user, workspace, UserRoleInWorkspace.READER, with_notif=False, flush=True
+        )
+        transaction.commit()
+
+        with patch.object(GripTransport, "_publish_items") as publish_items:
+            workspace_api_factory.get().update_workspace(
+                workspace, label="new label", description="", save_now=True
+            )
+            transaction.commit()
+        event = event_helper.last_event
+        assert event.event_type == "workspace.modified"
+        assert {
+            message.receiver_id
+            for message in session.query(Message).filter(Message.event_id == event.event_id)
+        } == {admin_user.user_id, user.user_id}
+        publish_items.assert_called_once()
+        items = publish_items.call_args[0][0]
+        assert {item["channel"] for item in items} == {
+            "user_{}".format(admin_user.user_id),
+            "user_{}".format(user.user_id),
+        }
+        assert items[0]["http-stream"] == items[1]["http-stream"]
+
+    def test_unit__publish_messages__ok__metrics(
+        self, admin_user, user_api_factory, app_config, event_helper
+    ) -> None:
+        metrics = get_metrics(app_config)
+        metrics.reset()
+        user_api_factory.get().update(admin_user, name="John", do_save=True)
+        transaction.commit()
+        assert event_helper.last_event.event_type == "user.modified"
+        summaries = {summary.name: summary for summary in metrics.get_summaries()}
+        assert summaries["crud_hooks.dispatch"].count >= 1
+        assert summaries["events.per_flush"].total == 1
+        assert summaries["events.receivers"].total == 1
+        for name in ("events.queue_lag", "live_messages.publish", "events.latency"):
+            assert summaries[name].count == 1
+
+    def test_unit__workspace_event_receivers__ok__cached_until_role_changes(
+        self,
+        admin_user,
+        user_api_factory,
+        workspace_api_factory,
+        role_api_factory,
+        session,
+        app_config,
+        event_helper,
+        monkeypatch,
+    ) -> None:
+        # INFO - the cache is disabled by default in sync jobs mode
+        monkeypatch.setattr(get_event_receivers_cache(app_config), "_ttl", 60)
+        user = user_api_factory.get().create_minimal_user(
+            email="this.is@user", profile=Profile.USER, save_now=True
+        )
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        transaction.commit()
+
+        def get_last_event_receiver_ids():
+            event = event_helper.last_event
+            return {
+                message.receiver_id
+                for message in session.query(Message).filter(Message.event_id == event.event_id)
+            }
+
+        with patch.object(
+            RoleApi,
+            "get_workspace_member_ids",
+            autospec=True,
+            side_effect=RoleApi.get_workspace_member_ids,
+        ) as get_workspace_member_ids:
+            workspace_api_factory.get().update_workspace(workspace, label="label 1", save_now=True)
+            transaction.commit()
+            workspace_api_factory.get().update_workspace(workspace, label="label 2", save_now=True)
+            transaction.commit()
+            # INFO - members are cached since the event of the workspace creation
+            assert get_workspace_member_ids.call_count == 0
+            assert get_last_event_receiver_ids() == {admin_user.user_id}
+
+            role_api_factory.get().create_one(
+                user, workspace, UserRoleInWorkspace.READER, with_notif=False, flush=True
+            )
+            transaction.commit()
+            workspace_api_factory.get().update_workspace(workspace, label="label 3", save_now=True)
+            transaction.commit()
+            assert get_last_event_receiver_ids() == {admin_user.user_id, user.user_id}
+
+            role_api_factory.get().delete_one(user.user_id, workspace.workspace_id)
+            transaction.commit()
+            workspace_api_factory.get().update_workspace(workspace, label="label 4", save_now=True)
+            transaction.commit()
+            assert get_last_event_receiver_ids() == {admin_user.user_id}
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestEventApi:
+    def test_unit__delete_read_messages__ok__at_most_batch_size(
+        self, user_api_factory, session, app_config
+    ) -> None:
+        uapi = user_api_factory.get()
+        users = [
+            uapi.create_minimal_user(email="user{}@test".format(index), save_now=True)
+            for index in range(3)
+        ]
+        old_date = datetime.utcnow() - timedelta(days=31)
+        session.query(Message).delete()
+        event = Event(
+            entity_type=EntityType.USER,
+            operation=OperationType.MODIFIED,
+            fields={},
+            created=old_date,
+        )
+        session.add(event)
+        session.flush()
+        session.add_all(
+            [
+                Message(event_id=event.event_id, receiver_id=user.user_id, read=old_date)
+                for user in users
+            ]
+        )
+        session.flush()
+        event_api = EventApi(current_user=None, session=session, config=app_config)
+
+        assert event_api.delete_read_messages(datetime.utcnow(), batch_size=2) == 2
+        assert session.query(Message).count() == 1
+        assert event_api.delete_read_messages(datetime.utcnow(), batch_size=2) == 1
+        assert event_api.delete_read_messages(datetime.utcnow(), batch_size=2) == 0
+
+
+class TestAsyncLiveMessageBuilder:
+    def test_unit__pickle__ok__process_caches_not_pickled(self, app_config) -> None:
+        context = Mock(app_config=app_config)
+        builder = pickle.loads(pickle.dumps(AsyncLiveMessageBuilder(context)))
+        assert builder._config.SQLALCHEMY__URL == app_config.SQLALCHEMY__URL
+        assert builder._receivers_cache is get_event_receivers_cache(builder._config)
+        assert builder._metrics is get_metrics(builder._config)
+
+
+class TestEventReceiversCache:
+    def test_unit__get_workspace_member_ids__ok__cached_until_invalidated(self) -> None:
+        cache = EventReceiversCache(ttl=60)
+        assert cache.get_workspace_member_ids(1, lambda: [1, 2]) == {1, 2}
+        assert cache.get_workspace_member_ids(1, lambda: [3]) == {1, 2}
+        assert cache.get_workspace_member_ids(2, lambda: [3]) == {3}
+        cache.invalidate_workspace(1)
+        assert cache.get_workspace_member_ids(1, lambda: [3]) == {3}
+        assert cache.get_workspace_member_ids(2, lambda: [4]) == {3}
+        cache.clear()
+        assert cache.get_workspace_member_ids(2, lambda: [4]) == {4}
+
+        def load_during_invalidation():
+            cache.invalidate_administrators()
+            return [5]
+
+        # INFO - ids loaded while an invalidation happens may be outdated
+        assert cache.get_administrator_ids(load_during_invalidation) == {5}
+        assert cache.get_administrator_ids(lambda: [6]) == {6}
+        assert cache.get_administrator_ids(lambda: [7]) == {6}
+
+    def test_unit__get_administrator_ids__ok__disabled(self) -> None:
+        cache = EventReceiversCache(ttl=0)
+        assert cache.get_administrator_ids(lambda: [1]) == {1}
+        assert cache.get_administrator_ids(lambda: [2]) == {2}
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestEventCoalescer:
+    def _create_event(
+        self, event_id: int, operation: OperationType, content_id: int, created: datetime
+    ) -> Event:
+        return Event(
+            event_id=event_id,
+            entity_type=EntityType.CONTENT,
+            operation=operation,
+            entity_subtype="file",
+            created=created,
+            fields={"content": {"content_id": content_id}},
+        )
+
+    def test_unit__coalesce__ok__latest_modification_kept(self, app_config) -> None:
+        app_config.LIVE_MESSAGES__COALESCING_WINDOW = 500
+        now = datetime.utcnow()
+        events = [
+            self._create_event(1, OperationType.MODIFIED, 1, now),
+            self._create_event(2, OperationType.MODIFIED, 2, now),
+            self._create_event(3, OperationType.MODIFIED, 1, now + timedelta(milliseconds=100)),
+            self._create_event(4, OperationType.DELETED, 1, now + timedelta(milliseconds=200)),
+            self._create_event(5, OperationType.MODIFIED, 1, now + timedelta(milliseconds=300)),
+            self._create_event(6, OperationType.MODIFIED, 2, now + timedelta(seconds=1)),
+        ]
+        coalescer = EventCoalescer(app_config)
+        merged_events_count = coalescer.metrics.merged_events_count
+
+        assert [event.event_id for event in coalescer.coalesce(events)] == [2, 4, 5, 6]
+        assert coalescer.metrics.merged_events_count == merged_events_count + 2
+        assert coalescer.metrics.as_dict()["window"] == 500
+        assert coalescer.get_publication_date(events[0]) == now + timedelta(milliseconds=500)
+        assert coalescer.get_publication_date(events[3]) is None
+
+        app_config.LIVE_MESSAGES__COALESCING_WINDOW = 0
+        assert EventCoalescer(app_config).coalesce(events) == events
+
+    def test_unit__is_superseded__ok__newer_modification_within_window(
+        self, app_config, session
+    ) -> None:
+        app_config.LIVE_MESSAGES__COALESCING_WINDOW = 500
+        now = datetime.utcnow()
+        events = [
+            self._create_event(1, OperationType.MODIFIED, 1, now),
+            self._create_event(2, OperationType.MODIFIED, 2, now),
+            self._create_event(3, OperationType.MODIFIED, 1, now + timedelta(milliseconds=100)),
+            self._create_event(4, OperationType.MODIFIED, 2, now + timedelta(seconds=1)),
+        ]
+        session.add_all(events)
+        session.flush()
+        coalescer = EventCoalescer(app_config)
+
+        assert coalescer.is_superseded(events[0], session)
+        assert not coalescer.is_superseded(events[1], session)
+        assert not coalescer.is_superseded(events[2], session)
+        assert not coalescer.is_superseded(events[3], session)
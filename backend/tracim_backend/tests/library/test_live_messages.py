@@ -0,0 +1,170 @@
+from datetime import datetime
+import json
+
+import pytest
+import transaction
+
+from tracim_backend.exceptions import TooManyLiveMessagesStreams
+from tracim_backend.lib.core.live_messages import JsonServerSideEvent
+from tracim_backend.lib.core.live_messages import LiveMessagesLib
+from tracim_backend.lib.core.live_messages import LocalBroker
+from tracim_backend.lib.core.live_messages import get_local_broker
+from tracim_backend.lib.core.live_messages import get_streams_counter
+from tracim_backend.models.context_models import PaginatedObject
+from tracim_backend.models.event import EntityType
+from tracim_backend.models.event import Event
+from tracim_backend.models.event import Message
+from tracim_backend.models.event import OperationType
+from tracim_backend.tests.fixtures import *  # noqa F403,F401
+
+
+def parse_server_side_event(chunk: bytes) -> dict:
+    lines = dict(line.split(": ", 1) for line in chunk.decode("utf-8").strip().split("\n"))
+    return {"event": lines.get("event"), "data": json.loads(lines["data"])}
+
+
+class TestLiveMessagesLib:
+    def test_unit__serialize_message__ok__nominal_case(self, app_config) -> None:
+        event = Event(
+            event_id=12,
+            entity_type=EntityType.USER,
+            operation=OperationType.MODIFIED,
+            created=datetime(2020, 6, 16, 10, 30),
+            fields={"user": {"user_id": 1, "public_name": "John"}},
+        )
+        message = Message(event=event, event_id=12, receiver_id=1)
+        assert json.loads(LiveMessagesLib(app_config).serialize_message(message)) == {
+            "fields": {"user": {"user_id": 1, "public_name": "John"}},
+            "event_id": 12,
+            "event_type": "user.modified",
+            "created": "2020-06-16T10:30:00Z",
+            "read": None,
+        }
+
+    def test_unit__serialize_message__ok__stored_fields_text(self) -> None:
+        event = Event(
+            event_id=12,
+            entity_type=EntityType.USER,
+            operation=OperationType.MODIFIED,
+            fields={"user": {"user_id": 1}},
+        )
+        event._serialized_fields = '{"user": {"user_id": 2}}'
+        message = Message(event=event, event_id=12, receiver_id=1)
+        message_dict = json.loads(LiveMessagesLib.serialize_message(message))
+        assert message_dict["fields"] == {"user": {"user_id": 2}}
+
+    def test_unit__serialize_message__ok__fields_text_updated_with_fields(self) -> None:
+        event = Event(
+            event_id=12,
+            entity_type=EntityType.USER,
+            operation=OperationType.MODIFIED,
+            fields={"user": {"user_id": 1}},
+        )
+        event.fields = {"user": {"user_id": 2}}
+        assert json.loads(event.serialized_fields) == {"user": {"user_id": 2}}
+        event._serialized_fields = None
+        assert json.loads(event.serialized_fields) == {"user": {"user_id": 2}}
+
+    def test_unit__serialize_messages_page__ok__nominal_case(self) -> None:
+        messages = [
+            Message(
+                event=Event(
+                    event_id=event_id,
+                    entity_type=EntityType.USER,
+                    operation=OperationType.CREATED,
+                    created=datetime(2020, 6, 16, 10, 30),
+                    fields={"user": {"user_id": event_id}},
+                ),
+                event_id=event_id,
+                receiver_id=1,
+            )
+            for event_id in (1, 2)
+        ]
+        page = PaginatedObject(messages, total=3, has_next=True)
+        assert json.loads(LiveMessagesLib.serialize_messages_page(page)) == {
+            "items": [
+                {
+                    "fields": {"user": {"user_id": event_id}},
+                    "event_id": event_id,
+                    "event_type": "user.created",
+                    "created": "2020-06-16T10:30:00Z",
+                    "read": None,
+                }
+                for event_id in (1, 2)
+            ],
+            "total": 3,
+            "has_next": True,
+        }
+
+    def test_unit__json_server_side_event__ok__serialized_data(self) -> None:
+        assert str(JsonServerSideEvent('{"a": 1}', event="message")) == str(
+            JsonServerSideEvent({"a": 1}, event="message")
+        )
+
+
+class TestLocalBroker:
+    def test_unit__publish__ok__only_subscribers_of_channels(self) -> None:
+        broker = LocalBroker()
+        subscription_1 = broker.subscribe("user_1")
+        subscription_2 = broker.subscribe("user_2")
+        broker.publish(["user_1", "user_3"], "event")
+        assert subscription_1.get_event(0) == "event"
+        assert subscription_1.get_event(0) is None
+        assert subscription_2.get_event(0) is None
+
+    def test_unit__unsubscribe__ok__nominal_case(self) -> None:
+        broker = LocalBroker()
+        subscription = broker.subscribe("user_1")
+        subscription.close()
+        broker.publish(["user_1"], "event")
+        assert subscription.get_event(0) is None
+        assert broker._subscriptions == {}
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "base_test_local_live_messages"}], indirect=True
+)
+class TestLocalTransport:
+    def test_unit__user_stream__ok__publish_dict(self, app_config, admin_user) -> None:
+        live_messages_lib = LiveMessagesLib(app_config)
+        response = live_messages_lib.get_user_stream_response(admin_user.user_id)
+        assert response.headers["Content-Type"] == "text/event-stream"
+        assert response.headers["Cache-Control"] == "no-cache"
+        stream = iter(response.app_iter)
+        assert next(stream) == b":\n\n"
+        live_messages_lib.publish_dict("user_{}".format(admin_user.user_id), {"test": "example"})
+        assert parse_server_side_event(next(stream)) == {
+            "event": "message",
+            "data": {"test": "example"},
+        }
+        response.app_iter.close()
+        assert get_local_broker()._subscriptions == {}
+
+    def test_unit__user_stream__err__too_many_streams(self, app_config, admin_user) -> None:
+        app_config.LIVE_MESSAGES__MAX_STREAMS = 1
+        streams_count = get_streams_counter().count
+        live_messages_lib = LiveMessagesLib(app_config)
+        response = live_messages_lib.get_user_stream_response(admin_user.user_id)
+        with pytest.raises(TooManyLiveMessagesStreams):
+            live_messages_lib.get_user_stream_response(admin_user.user_id)
+        # INFO - the slot is released even if the stream was never iterated
+        response.app_iter.close()
+        assert get_streams_counter().count == streams_count
+        assert get_local_broker()._subscriptions == {}
+        live_messages_lib.get_user_stream_response(admin_user.user_id).app_iter.close()
+
+    @pytest.mark.parametrize("session", [{"mock_event_builder": False}], indirect=True)
+    def test_unit__user_stream__ok__event_of_user_update(
+        self, app_config, admin_user, user_api_factory, session
+    ) -> None:
+        response = LiveMessagesLib(app_config).get_user_stream_response(admin_user.user_id)
+        stream = iter(response.app_iter)
+        next(stream)
+        user_api_factory.get().update(admin_user, name="John", do_save=True)
+        transaction.commit()
+        server_side_event = parse_server_side_event(next(stream))
+        response.app_iter.close()
+        assert server_side_event["event"] == "message"
+        assert server_side_event["data"]["event_type"] == "user.modified"
+        assert server_side_event["data"]["fields"]["user"]["public_name"] == "John"
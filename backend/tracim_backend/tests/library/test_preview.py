@@ -0,0 +1,96 @@
+from unittest import mock
+
+import pytest
+import transaction
+
+from tracim_backend.lib.core.content import ContentApi
+from tracim_backend.lib.core.preview import get_preview_manager
+from tracim_backend.models.data import ActionDescription
+from tracim_backend.models.data import RevisionPreviewMetadata
+from tracim_backend.models.revision_protection import new_revision
+from tracim_backend.tests.fixtures import *  # noqa F403,F401
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestGetPreviewManager(object):
+    def test_unit__get_preview_manager__ok__shared_by_content_apis(
+        self, app_config, content_api_factory
+    ) -> None:
+        preview_manager = get_preview_manager(app_config)
+        assert preview_manager.cache_path.startswith(app_config.PREVIEW_CACHE_DIR)
+        assert get_preview_manager(app_config) is preview_manager
+        assert content_api_factory.get().preview_manager is preview_manager
+        assert content_api_factory.get().preview_manager is preview_manager
+
+    def test_unit__get_preview_manager__ok__one_per_cache_dir(self, app_config, tmp_path) -> None:
+        preview_manager = get_preview_manager(app_config)
+        app_config.PREVIEW_CACHE_DIR = str(tmp_path / "previews")
+        other_preview_manager = get_preview_manager(app_config)
+        assert other_preview_manager is not preview_manager
+        assert other_preview_manager.cache_path.startswith(app_config.PREVIEW_CACHE_DIR)
+        assert (tmp_path / "previews").is_dir()
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestPreviewsGeneration(object):
+    def _create_file(self, content_api, workspace_api_factory, content_type_list):
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        with content_api._session.no_autoflush:
+            text_file = content_api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                parent=None,
+                label="test_file",
+                do_save=False,
+            )
+            content_api.update_file_data(text_file, "test_file.txt", "text/plain", b"content")
+        content_api.save(text_file, ActionDescription.CREATION)
+        return text_file
+
+    def test_unit__update_file_data__ok__previews_generated_on_commit(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        app_config.PREVIEW__PREGENERATION__ENABLED = True
+        content_api = content_api_factory.get()
+        with mock.patch.object(ContentApi, "generate_previews") as generate_previews:
+            text_file = self._create_file(content_api, workspace_api_factory, content_type_list)
+            first_revision_id = text_file.revision_id
+            with new_revision(session=session, tm=transaction.manager, content=text_file):
+                content_api.update_file_data(text_file, "test_file.txt", "text/plain", b"new")
+            content_api.save(text_file)
+            second_revision_id = text_file.revision_id
+            assert not generate_previews.called
+            transaction.commit()
+        assert generate_previews.call_args_list == [
+            mock.call(first_revision_id),
+            mock.call(second_revision_id),
+        ]
+
+    def test_unit__update_file_data__ok__no_previews_generated_on_rollback(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        app_config.PREVIEW__PREGENERATION__ENABLED = True
+        content_api = content_api_factory.get()
+        with mock.patch.object(ContentApi, "generate_previews") as generate_previews:
+            self._create_file(content_api, workspace_api_factory, content_type_list)
+            session.rollback()
+            transaction.abort()
+            workspace_api_factory.get().create_workspace("other workspace", save_now=True)
+            transaction.commit()
+        assert not generate_previews.called
+
+    def test_unit__update_file_data__ok__nothing_computed_on_upload_if_disabled(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        app_config.PREVIEW__PREGENERATION__ENABLED = False
+        content_api = content_api_factory.get()
+        with mock.patch.object(ContentApi, "generate_previews") as generate_previews, mock.patch(
+            "tracim_backend.lib.core.content.schedule_previews_generation"
+        ) as schedule_previews_generation:
+            text_file = self._create_file(content_api, workspace_api_factory, content_type_list)
+            revision_id = text_file.revision_id
+            transaction.commit()
+        assert not generate_previews.called
+        # INFO - in sync jobs mode, preview metadata are computed on first read instead
+        assert not schedule_previews_generation.called
+        assert session.query(RevisionPreviewMetadata).get(revision_id) is None
@@ -1,8 +1,10 @@
+from datetime import timedelta
 import time
 
 import pytest
 
 from tracim_backend.lib.core.user import UserApi
+from tracim_backend.lib.rq import enqueue_in
 from tracim_backend.lib.rq import get_redis_connection
 from tracim_backend.lib.rq import get_rq_queue
 from tracim_backend.lib.rq.worker import worker_context
@@ -39,3 +41,27 @@ class TestRQDatabaseWorker(object):
         user = user_api.get_one(1)
         job_public_name = job.result
         assert user.public_name == job_public_name
+
+    def test_unit__enqueue_in__ok__executed_after_delay(
+        self, app_config, session, rq_database_worker
+    ) -> None:
+        redis = get_redis_connection(app_config)
+        queue = get_rq_queue(redis, queue_name="event")
+        start = time.monotonic()
+        delayed_job = enqueue_in(
+            queue,
+            timedelta(seconds=self.JOB_EXECUTION_TIMEOUT),
+            "tracim_backend.tests.library.test_rq.get_public_name",
+            1,
+        )
+        # INFO - jobs enqueued meanwhile are not delayed
+        job = queue.enqueue("tracim_backend.tests.library.test_rq.get_public_name", 1)
+        while not job.result:
+            time.sleep(0.1)
+        assert delayed_job.get_status() == "deferred"
+        while not delayed_job.result:
+            assert time.monotonic() - start < 3 * self.JOB_EXECUTION_TIMEOUT
+            time.sleep(0.1)
+            delayed_job.refresh()
+        assert time.monotonic() - start >= self.JOB_EXECUTION_TIMEOUT
+        assert delayed_job.result == job.result
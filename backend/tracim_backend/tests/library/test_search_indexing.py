@@ -0,0 +1,501 @@
+import json
+from unittest import mock
+
+import pytest
+import transaction
+
+from tracim_backend.lib.crud_hook.caller import bulk_crud_operation
+from tracim_backend.lib.search.elasticsearch_search.elasticsearch_search import ESSearchApi
+from tracim_backend.lib.search.indexing import enqueue_contents_indexing
+from tracim_backend.lib.search.indexing import index_content_job
+from tracim_backend.lib.search.sql_search.sql_search_api import SQLSearchApi
+from tracim_backend.models.revision_protection import new_revision
+from tracim_backend.models.search import ContentSearchDocument
+from tracim_backend.tests.fixtures import *  # noqa F403,F401
+
+
+def get_indexed_content_ids(index_content: mock.MagicMock) -> list:
+    return [call[0][0].content_id for call in index_content.call_args_list]
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "functional_test_elasticsearch_search"}], indirect=True
+)
+class TestSearchIndexer(object):
+    def test_unit__create_content__ok__indexed_once_on_commit(
+        self, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        with mock.patch.object(ESSearchApi, "index_content") as index_content:
+            document = content_api.create(
+                content_type_slug=content_type_list.Page.slug,
+                workspace=workspace,
+                label="document",
+                do_save=True,
+            )
+            with new_revision(session=session, tm=transaction.manager, content=document):
+                content_api.update_content(document, new_label="new label", new_content="text")
+            content_api.save(document)
+            session.flush()
+            assert not index_content.called
+            transaction.commit()
+        assert get_indexed_content_ids(index_content) == [document.content_id]
+        assert index_content.call_args[0][0].label == "new label"
+
+    def test_unit__create_comment__ok__parent_indexed(
+        self, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        thread = content_api.create(
+            content_type_slug=content_type_list.Thread.slug,
+            workspace=workspace,
+            label="thread",
+            do_save=True,
+        )
+        transaction.commit()
+        with mock.patch.object(ESSearchApi, "index_content") as index_content:
+            content_api.create_comment(workspace, thread, "a comment", do_save=True)
+            transaction.commit()
+        assert get_indexed_content_ids(index_content) == [thread.content_id]
+
+    def test_unit__delete_folder__ok__children_indexed(
+        self, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        folder = content_api.create(
+            content_type_slug=content_type_list.Folder.slug,
+            workspace=workspace,
+            label="folder",
+            do_save=True,
+        )
+        document = content_api.create(
+            content_type_slug=content_type_list.Page.slug,
+            workspace=workspace,
+            parent=folder,
+            label="document",
+            do_save=True,
+        )
+        transaction.commit()
+        with mock.patch.object(ESSearchApi, "index_content") as index_content:
+            with new_revision(session=session, tm=transaction.manager, content=folder):
+                content_api.delete(folder)
+            content_api.save(folder)
+            transaction.commit()
+        assert sorted(get_indexed_content_ids(index_content)) == [
+            folder.content_id,
+            document.content_id,
+        ]
+
+    def test_unit__create_content__ok__not_indexed_on_rollback(
+        self, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        transaction.commit()
+        content_api = content_api_factory.get()
+        with mock.patch.object(ESSearchApi, "index_content") as index_content:
+            content_api.create(
+                content_type_slug=content_type_list.Page.slug,
+                workspace=workspace,
+                label="document",
+                do_save=True,
+            )
+            session.rollback()
+            transaction.abort()
+            workspace_api_factory.get().create_workspace("other workspace", save_now=True)
+            transaction.commit()
+        assert not index_content.called
+
+    def test_unit__bulk_crud_operation__ok__contents_indexed_once_on_commit(
+        self, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        existing_document = content_api.create(
+            content_type_slug=content_type_list.Page.slug,
+            workspace=workspace,
+            label="existing document",
+            do_save=True,
+        )
+        transaction.commit()
+        with mock.patch.object(ESSearchApi, "index_content") as index_content:
+            with bulk_crud_operation(session):
+                document = content_api.create(
+                    content_type_slug=content_type_list.Page.slug,
+                    workspace=workspace,
+                    label="document",
+                    do_save=True,
+                )
+                for content in (document, existing_document):
+                    with new_revision(session=session, tm=transaction.manager, content=content):
+                        content_api.update_content(content, new_label="new label")
+                    content_api.save(content)
+            assert not index_content.called
+            transaction.commit()
+        assert sorted(get_indexed_content_ids(index_content)) == sorted(
+            [document.content_id, existing_document.content_id]
+        )
+
+    def test_unit__index_pending_contents__ok__contents_changed_during_indexing(
+        self, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        document_1, document_2 = [
+            content_api.create(
+                content_type_slug=content_type_list.Page.slug,
+                workspace=workspace,
+                label="document {}".format(num),
+                do_save=True,
+            )
+            for num in range(2)
+        ]
+        transaction.commit()
+
+        def update_document_2(content_in_context):
+            if content_in_context.content_id == document_1.content_id:
+                with new_revision(session=session, tm=transaction.manager, content=document_2):
+                    content_api.update_content(document_2, new_label="new label")
+                content_api.save(document_2)
+
+        with mock.patch.object(
+            ESSearchApi, "index_content", side_effect=update_document_2
+        ) as index_content:
+            with new_revision(session=session, tm=transaction.manager, content=document_1):
+                content_api.update_content(document_1, new_label="new label")
+            content_api.save(document_1)
+            transaction.commit()
+        assert get_indexed_content_ids(index_content) == [
+            document_1.content_id,
+            document_2.content_id,
+        ]
+
+
+class TestEnqueueContentsIndexing(object):
+    def test_unit__enqueue_contents_indexing__ok__one_queued_job_per_content(
+        self, app_config
+    ) -> None:
+        queued_keys = set()
+
+        def set_key(key, value, ex=None, nx=False):
+            if nx and key in queued_keys:
+                return None
+            queued_keys.add(key)
+            return True
+
+        redis_connection = mock.MagicMock()
+        redis_connection.set.side_effect = set_key
+        redis_connection.exists.side_effect = lambda key: key in queued_keys
+        redis_connection.delete.side_effect = queued_keys.discard
+        queue = mock.MagicMock()
+        with mock.patch(
+            "tracim_backend.lib.search.indexing.get_redis_connection",
+            return_value=redis_connection,
+        ), mock.patch("tracim_backend.lib.search.indexing.get_rq_queue", return_value=queue):
+            enqueue_contents_indexing(app_config, {1: False, 2: True})
+            # INFO - jobs are queued: no new job for these contents
+            enqueue_contents_indexing(app_config, {1: False, 2: False})
+            # INFO - children of content 1 are not indexed by its queued job
+            enqueue_contents_indexing(app_config, {1: True})
+            assert queue.enqueue.call_args_list == [
+                mock.call(index_content_job, 1, False),
+                mock.call(index_content_job, 2, True),
+                mock.call(index_content_job, 1, True),
+            ]
+            queue.enqueue.reset_mock()
+            # INFO - a started job deletes its key: changes committed after are enqueued
+            redis_connection.delete("tracim_search_index:queued:1:content")
+            enqueue_contents_indexing(app_config, {1: False})
+            assert not queue.enqueue.called
+            redis_connection.delete("tracim_search_index:queued:1:tree")
+            enqueue_contents_indexing(app_config, {1: False})
+            assert queue.enqueue.call_args_list == [mock.call(index_content_job, 1, False)]
+
+    def test_unit__enqueue_contents_indexing__err__key_deleted_on_enqueue_failure(
+        self, app_config
+    ) -> None:
+        redis_connection = mock.MagicMock()
+        redis_connection.exists.return_value = False
+        redis_connection.set.return_value = True
+        queue = mock.MagicMock()
+        queue.enqueue.side_effect = ConnectionError()
+        with mock.patch(
+            "tracim_backend.lib.search.indexing.get_redis_connection",
+            return_value=redis_connection,
+        ), mock.patch("tracim_backend.lib.search.indexing.get_rq_queue", return_value=queue):
+            with pytest.raises(ConnectionError):
+                enqueue_contents_indexing(app_config, {1: False})
+        redis_connection.delete.assert_called_once_with("tracim_search_index:queued:1:content")
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "functional_test_elasticsearch_search"}], indirect=True
+)
+class TestESSearchApiIndexAllContent(object):
+    def test_unit__index_all_content__ok__bulk_requests_with_per_content_errors(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        app_config.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE = 2
+        app_config.SEARCH__ELASTICSEARCH__INDEXING__BULK_THREAD_COUNT = 2
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        with mock.patch.object(ESSearchApi, "index_content"):
+            contents = [
+                content_api.create(
+                    content_type_slug=content_type_list.Page.slug,
+                    workspace=workspace,
+                    label="document {}".format(num),
+                    do_save=True,
+                )
+                for num in range(5)
+            ]
+            content_api.create_comment(workspace, contents[0], "a comment", do_save=True)
+            transaction.commit()
+        failing_content_id = contents[3].content_id
+        documents = {}
+        bulk_sizes = []
+
+        def bulk(body, **kwargs):
+            lines = [json.loads(line) for line in body.splitlines()]
+            items = []
+            for action, document in zip(lines[::2], lines[1::2]):
+                content_id = int(action["index"]["_id"])
+                documents[content_id] = document
+                status = 400 if content_id == failing_content_id else 201
+                items.append({"index": {"_id": str(content_id), "status": status}})
+            bulk_sizes.append(len(items))
+            return {"items": items}
+
+        search_api = ESSearchApi(session=session, current_user=None, config=app_config)
+        with mock.patch.object(search_api.es, "bulk", side_effect=bulk):
+            results = search_api.index_all_content()
+
+        assert results.get_nb_contents_to_index() == 5
+        assert results.errored_indexed_contents_ids == [failing_content_id]
+        assert sorted(documents) == [content.content_id for content in contents]
+        assert sorted(bulk_sizes) == [1, 2, 2]
+        assert [
+            comment["raw_content"] for comment in documents[contents[0].content_id]["comments"]
+        ] == ["a comment"]
+
+    def test_unit__index_all_content__ok__bulk_requests_bounded_by_size(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        app_config.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE = 10
+        app_config.SEARCH__ELASTICSEARCH__INDEXING__BULK_THREAD_COUNT = 2
+        app_config.SEARCH__ELASTICSEARCH__INDEXING__BULK_MAX_CHUNK_BYTES = 1
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        with mock.patch.object(ESSearchApi, "index_content"):
+            for num in range(3):
+                content_api.create(
+                    content_type_slug=content_type_list.Page.slug,
+                    workspace=workspace,
+                    label="document {}".format(num),
+                    do_save=True,
+                )
+            transaction.commit()
+        bulk_sizes = []
+
+        def bulk(body, **kwargs):
+            action_lines = body.splitlines()[::2]
+            bulk_sizes.append(len(action_lines))
+            return {
+                "items": [
+                    {"index": {"_id": json.loads(line)["index"]["_id"], "status": 201}}
+                    for line in action_lines
+                ]
+            }
+
+        search_api = ESSearchApi(session=session, current_user=None, config=app_config)
+        with mock.patch.object(search_api.es, "bulk", side_effect=bulk):
+            results = search_api.index_all_content()
+
+        assert not results.errored_indexed_contents_ids
+        assert bulk_sizes == [1, 1, 1]
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "functional_test_elasticsearch_search"}], indirect=True
+)
+class TestESSearchApiSyncIndex(object):
+    def test_unit__sync_index__ok__changed_contents_indexed_and_removed_contents_deleted(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        app_config.SEARCH__ELASTICSEARCH__INDEXING__BULK_CHUNK_SIZE = 500
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        with mock.patch.object(ESSearchApi, "index_content"):
+            page = content_api.create(
+                content_type_slug=content_type_list.Page.slug,
+                workspace=workspace,
+                label="page",
+                do_save=True,
+            )
+            folder = content_api.create(
+                content_type_slug=content_type_list.Folder.slug,
+                workspace=workspace,
+                label="folder",
+                do_save=True,
+            )
+            document = content_api.create(
+                content_type_slug=content_type_list.Page.slug,
+                workspace=workspace,
+                parent=folder,
+                label="document",
+                do_save=True,
+            )
+            unchanged_page = content_api.create(
+                content_type_slug=content_type_list.Page.slug,
+                workspace=workspace,
+                label="unchanged",
+                do_save=True,
+            )
+            transaction.commit()
+            checkpoint = unchanged_page.revision_id
+            content_api.create_comment(workspace, page, "a comment", do_save=True)
+            with new_revision(session=session, tm=transaction.manager, content=folder):
+                content_api.delete(folder)
+            content_api.save(folder)
+            transaction.commit()
+        bulk_actions = []
+
+        def bulk(body, **kwargs):
+            lines = [json.loads(line) for line in body.splitlines()]
+            items = []
+            while lines:
+                ((op_type, action),) = lines.pop(0).items()
+                if op_type == "index":
+                    lines.pop(0)
+                bulk_actions.append((op_type, int(action["_id"])))
+                status = 404 if op_type == "delete" else 201
+                items.append({op_type: {"_id": action["_id"], "status": status}})
+            return {"items": items}
+
+        # INFO - documents are counted by ranges of 500 content ids: only the range
+        # having more documents than contents is read
+        documents_counts = {
+            "aggregations": {
+                "ranges": {
+                    "buckets": [
+                        {"key": {"range_start": 0.0}, "doc_count": 1},
+                        {"key": {"range_start": 9500.0}, "doc_count": 1},
+                    ]
+                }
+            }
+        }
+        search_api = ESSearchApi(session=session, current_user=None, config=app_config)
+        mappings = {"index": {"mappings": {"_meta": {"tracim_sync_checkpoint": checkpoint}}}}
+        with mock.patch.object(search_api.es, "bulk", side_effect=bulk), mock.patch.object(
+            search_api.es, "search", return_value=documents_counts
+        ), mock.patch.object(
+            search_api.es.indices, "get_mapping", return_value=mappings
+        ), mock.patch.object(
+            search_api.es.indices, "put_mapping"
+        ) as put_mapping, mock.patch(
+            "tracim_backend.lib.search.elasticsearch_search.elasticsearch_search.scan",
+            return_value=iter([{"_id": "9999"}]),
+        ) as scan:
+            results = search_api.sync_index()
+
+        assert sorted(results.content_ids_to_index) == sorted(
+            [page.content_id, folder.content_id, document.content_id]
+        )
+        assert not results.errored_indexed_contents_ids
+        assert results.deleted_content_ids == [9999]
+        scan.assert_called_once()
+        assert scan.call_args[1]["query"]["query"] == {
+            "range": {"content_id": {"gte": 9500, "lt": 10000}}
+        }
+        assert sorted(bulk_actions) == sorted(
+            [
+                ("index", page.content_id),
+                ("index", folder.content_id),
+                ("index", document.content_id),
+                ("delete", 9999),
+            ]
+        )
+        put_mapping.assert_called_once_with(
+            index=app_config.SEARCH__ELASTICSEARCH__INDEX_ALIAS,
+            body={"_meta": {"tracim_sync_checkpoint": folder.revision_id}},
+        )
+
+    def test_unit__get_changed_content_ids__ok__children_of_archived_then_edited_folder(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get(show_archived=True)
+        with mock.patch.object(ESSearchApi, "index_content"):
+            folder = content_api.create(
+                content_type_slug=content_type_list.Folder.slug,
+                workspace=workspace,
+                label="folder",
+                do_save=True,
+            )
+            document = content_api.create(
+                content_type_slug=content_type_list.Page.slug,
+                workspace=workspace,
+                parent=folder,
+                label="document",
+                do_save=True,
+            )
+            transaction.commit()
+            checkpoint = document.revision_id
+            with new_revision(session=session, tm=transaction.manager, content=folder):
+                content_api.archive(folder)
+            content_api.save(folder)
+            # INFO - the current revision of the folder is not an archiving one anymore
+            with new_revision(session=session, tm=transaction.manager, content=folder):
+                content_api.update_content(folder, new_label="new folder label")
+            content_api.save(folder)
+            transaction.commit()
+
+        search_api = ESSearchApi(session=session, current_user=None, config=app_config)
+        assert search_api._get_changed_content_ids(checkpoint) == {
+            folder.content_id,
+            document.content_id,
+        }
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize("config_section", [{"name": "functional_test_sql_search"}], indirect=True)
+class TestSQLSearchApiIndexAllContent(object):
+    def test_unit__index_all_content__ok__documents_stored(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        with mock.patch.object(SQLSearchApi, "index_content"):
+            contents = [
+                content_api.create(
+                    content_type_slug=content_type_list.Page.slug,
+                    workspace=workspace,
+                    label="document {}".format(num),
+                    do_save=True,
+                )
+                for num in range(3)
+            ]
+            content_api.create_comment(
+                workspace, contents[0], "<p>a <i>comment</i></p>", do_save=True
+            )
+            transaction.commit()
+        assert not session.query(ContentSearchDocument).count()
+
+        search_api = SQLSearchApi(session=session, current_user=None, config=app_config)
+        results = search_api.index_all_content()
+        transaction.commit()
+
+        assert results.content_ids_to_index == [content.content_id for content in contents]
+        assert not results.errored_indexed_contents_ids
+        assert not results.deleted_content_ids
+        documents = session.query(ContentSearchDocument).order_by(ContentSearchDocument.content_id)
+        assert [(document.label, document.comments) for document in documents] == [
+            ("document 0", "a comment"),
+            ("document 1", ""),
+            ("document 2", ""),
+        ]
@@ -0,0 +1,315 @@
+from datetime import datetime
+from datetime import timedelta
+import io
+import os
+import time
+import typing
+from unittest import mock
+import zipfile
+
+import pytest
+
+from tracim_backend.exceptions import ConfigurationError
+from tracim_backend.lib.search.elasticsearch_search.elasticsearch_search import ESSearchApi
+from tracim_backend.lib.search.text_extraction import ExtractedTextCache
+from tracim_backend.lib.search.text_extraction import OfficeDocumentTextExtractor
+from tracim_backend.lib.search.text_extraction import PdfTextExtractor
+from tracim_backend.lib.search.text_extraction import PlainTextExtractor
+from tracim_backend.lib.search.text_extraction import get_revision_text
+from tracim_backend.lib.search.text_extraction import get_text_extractor
+from tracim_backend.lib.search.text_extraction import load_text_extractor
+from tracim_backend.models.context_models import ContentInContext
+from tracim_backend.tests.fixtures import *  # noqa F403,F401
+
+
+class TestPlainTextExtractor(object):
+    def test_unit__extract__ok__truncated_without_reading_whole_file(self) -> None:
+        file_ = io.BytesIO("é".encode("utf-8") * 1024 * 1024)
+        text = PlainTextExtractor().extract(file_, 10)
+        assert text == "é" * 10
+        # INFO - only the first chunk was read
+        assert file_.tell() < 1024 * 1024
+
+    def test_unit__extract__ok__multibyte_character_split_between_chunks(self) -> None:
+        with mock.patch("tracim_backend.lib.search.text_extraction.READ_CHUNK_SIZE", 3):
+            text = PlainTextExtractor().extract(io.BytesIO("aéé€".encode("utf-8")), 100)
+        assert text == "aéé€"
+
+    def test_unit__extract__ok__invalid_utf8_replaced(self) -> None:
+        assert PlainTextExtractor().extract(io.BytesIO(b"a\xffb"), 100) == "a�b"
+
+    def test_unit__get_text_extractor__ok__first_supporting_extractor(self) -> None:
+        extractor = PlainTextExtractor()
+        assert get_text_extractor([extractor], "text/markdown") is extractor
+        assert get_text_extractor([extractor], "application/pdf") is None
+
+
+def build_pdf(pages_text: typing.List[str]) -> io.BytesIO:
+    """
+    Build a minimal PDF file with one line of text per page.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pages = []
+    for text in pages_text:
+        stream = "BT /F1 12 Tf 10 10 Td ({}) Tj ET".format(text).encode("ascii")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 3 0 R >> >> "
+            b"/Contents %d 0 R >>" % len(objects)
+        )
+        pages.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(pages), len(pages))
+    pdf = io.BytesIO()
+    pdf.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(pdf.tell())
+        pdf.write(b"%d 0 obj\n%s\nendobj\n" % (number, obj))
+    xref_offset = pdf.tell()
+    pdf.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        pdf.write(b"%010d 00000 n \n" % offset)
+    pdf.write(
+        b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, xref_offset)
+    )
+    pdf.seek(0)
+    return pdf
+
+
+class TestPdfTextExtractor(object):
+    def test_unit__extract__ok__nominal_case(self) -> None:
+        text = PdfTextExtractor().extract(build_pdf(["first page", "second page"]), 100)
+        assert text == "first page\nsecond page"
+
+    def test_unit__extract__ok__stop_at_size_limit(self) -> None:
+        with mock.patch("PyPDF2.pdf.PageObject.extractText", autospec=True) as extract_text:
+            extract_text.return_value = "a" * 10
+            text = PdfTextExtractor().extract(build_pdf(["1", "2", "3", "4"]), 15)
+        assert text == "a" * 10 + "\n" + "a" * 4
+        # INFO - text of last pages is not extracted
+        assert extract_text.call_count == 2
+
+    def test_unit__can_extract__ok__pdf_only(self) -> None:
+        assert PdfTextExtractor().can_extract("application/pdf")
+        assert not PdfTextExtractor().can_extract("text/plain")
+
+
+class TestOfficeDocumentTextExtractor(object):
+    DOCX_DOCUMENT = (
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        "<w:body>"
+        "<w:p><w:r><w:t>Hello</w:t></w:r><w:r><w:t> world</w:t></w:r></w:p>"
+        "<w:p><w:r><w:t>Second paragraph</w:t></w:r></w:p>"
+        "</w:body>"
+        "</w:document>"
+    )
+
+    def _build_docx(self) -> io.BytesIO:
+        docx = io.BytesIO()
+        with zipfile.ZipFile(docx, "w") as archive:
+            archive.writestr("word/document.xml", self.DOCX_DOCUMENT)
+            archive.writestr("word/styles.xml", "<styles><p>not a paragraph</p></styles>")
+        docx.seek(0)
+        return docx
+
+    def test_unit__extract__ok__nominal_case(self) -> None:
+        text = OfficeDocumentTextExtractor().extract(self._build_docx(), 100)
+        assert text == "Hello world\nSecond paragraph"
+
+    def test_unit__extract__ok__truncated(self) -> None:
+        assert OfficeDocumentTextExtractor().extract(self._build_docx(), 8) == "Hello wo"
+
+    def test_unit__extract__ok__opendocument(self) -> None:
+        odt = io.BytesIO()
+        with zipfile.ZipFile(odt, "w") as archive:
+            archive.writestr(
+                "content.xml",
+                '<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:'
+                'office:1.0" xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">'
+                "<office:body><office:text>"
+                "<text:h>Title</text:h><text:p>Some <text:span>text</text:span></text:p>"
+                "</office:text></office:body></office:document-content>",
+            )
+        odt.seek(0)
+        assert OfficeDocumentTextExtractor().extract(odt, 100) == "Title\nSome text"
+
+    @pytest.mark.parametrize(
+        "mimetype,supported",
+        [
+            ("application/vnd.oasis.opendocument.text", True),
+            ("application/vnd.oasis.opendocument.spreadsheet", True),
+            ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", True),
+            ("application/vnd.openxmlformats-officedocument.presentationml.presentation", True),
+            ("application/msword", False),
+            ("application/pdf", False),
+        ],
+    )
+    def test_unit__can_extract__ok__office_documents(self, mimetype: str, supported: bool) -> None:
+        assert OfficeDocumentTextExtractor().can_extract(mimetype) == supported
+
+
+class TestLoadTextExtractor(object):
+    def test_unit__load_text_extractor__ok__nominal_case(self) -> None:
+        extractor = load_text_extractor(
+            "tracim_backend.lib.search.text_extraction:PlainTextExtractor"
+        )
+        assert isinstance(extractor, PlainTextExtractor)
+
+    @pytest.mark.parametrize(
+        "path",
+        [
+            "tracim_backend.lib.search.text_extraction:UnknownExtractor",
+            "tracim_backend.unknown_module:PlainTextExtractor",
+            "tracim_backend.lib.search.text_extraction:get_text_extractor",
+            "",
+        ],
+    )
+    def test_unit__load_text_extractor__err__invalid_path(self, path: str) -> None:
+        with pytest.raises(ConfigurationError):
+            load_text_extractor(path)
+
+
+@pytest.mark.usefixtures("base_fixture")
+@pytest.mark.parametrize(
+    "config_section", [{"name": "functional_test_elasticsearch_local_ingest_search"}], indirect=True
+)
+class TestESSearchApiLocalIngest(object):
+    def test_unit__get_index_action__ok__extracted_text_without_pipeline(
+        self, app_config, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        with mock.patch.object(ESSearchApi, "index_content"):
+            with session.no_autoflush:
+                text_file = content_api.create(
+                    content_type_slug=content_type_list.File.slug,
+                    workspace=workspace,
+                    label="text",
+                    do_save=False,
+                )
+                content_api.update_file_data(
+                    text_file, "text.txt", "text/plain", b"a" * 20 + b"b" * 1000
+                )
+                content_api.save(text_file)
+            binary_file = content_api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                label="binary",
+                do_save=False,
+            )
+            content_api.update_file_data(
+                binary_file, "binary.bin", "application/octet-stream", b"\x00" * 1000
+            )
+            content_api.save(binary_file)
+        search_api = ESSearchApi(session=session, current_user=None, config=app_config)
+
+        action = search_api._get_index_action(
+            ContentInContext(text_file, dbsession=session, config=app_config)
+        )
+        assert action["_source"]["file_data"] == {"content": "a" * 20 + "b" * 10}
+        assert "b64_file" not in action["_source"]
+        assert "pipeline" not in action
+
+        action = search_api._get_index_action(
+            ContentInContext(binary_file, dbsession=session, config=app_config)
+        )
+        assert "file_data" not in action["_source"]
+        assert "b64_file" not in action["_source"]
+
+
+class TestExtractedTextCache(object):
+    def test_unit__get_key__ok__depends_on_extractor_and_version(self, tmp_path) -> None:
+        class OtherTextExtractor(PlainTextExtractor):
+            pass
+
+        class NewTextExtractor(PlainTextExtractor):
+            VERSION = 2
+
+        cache = ExtractedTextCache(str(tmp_path))
+        revision = mock.Mock(file_blob=None, revision_id=1)
+        keys = {
+            cache.get_key(revision, extractor_class(), 100)
+            for extractor_class in (PlainTextExtractor, OtherTextExtractor, NewTextExtractor)
+        }
+        assert len(keys) == 3
+
+    def test_unit__delete_unused__ok__nominal_case(self, tmp_path) -> None:
+        cache = ExtractedTextCache(str(tmp_path))
+        for key in ("aa01", "aa02", "bb03"):
+            cache.set(key, "text {}".format(key))
+        old_timestamp = time.time() - timedelta(days=10).total_seconds()
+        for key in ("aa01", "aa02"):
+            os.utime(cache._get_path(key), (old_timestamp, old_timestamp))
+        # INFO - a text read is used
+        assert cache.get("aa02") == "text aa02"
+        date_limit = datetime.utcnow() - timedelta(days=5)
+
+        assert cache.delete_unused(date_limit, dry_run=True) == 1
+        assert cache.delete_unused(date_limit) == 1
+        assert cache.get("aa01") is None
+        assert cache.get("aa02") == "text aa02"
+        assert cache.get("bb03") == "text bb03"
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestGetRevisionText(object):
+    def test_unit__get_revision_text__ok__extracted_once_per_file_blob(
+        self, tmp_path, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        files = []
+        for num in range(2):
+            with session.no_autoflush:
+                file_ = content_api.create(
+                    content_type_slug=content_type_list.File.slug,
+                    workspace=workspace,
+                    label="file {}".format(num),
+                    do_save=False,
+                )
+                content_api.update_file_data(
+                    file_, "file {}.txt".format(num), "text/plain", b"same text in both files"
+                )
+                content_api.save(file_)
+            files.append(file_)
+        revisions = [file_.current_revision for file_ in files]
+        assert revisions[0].file_blob_id == revisions[1].file_blob_id
+        extractor = PlainTextExtractor()
+        cache_dir = str(tmp_path)
+
+        with mock.patch.object(PlainTextExtractor, "extract", wraps=extractor.extract) as extract:
+            texts = [
+                get_revision_text(revision, [extractor], 9, cache_dir) for revision in revisions
+            ]
+            # INFO - truncated texts are valid for their size limit only
+            full_text = get_revision_text(revisions[0], [extractor], 100, cache_dir)
+        assert texts == ["same text"] * 2
+        assert full_text == "same text in both files"
+        assert extract.call_count == 2
+        cache = ExtractedTextCache(cache_dir)
+        assert cache.get(cache.get_key(revisions[1], extractor, 100)) == "same text in both files"
+
+    def test_unit__get_revision_text__ok__no_extractor_for_mimetype(
+        self, tmp_path, session, content_api_factory, workspace_api_factory, content_type_list
+    ) -> None:
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        content_api = content_api_factory.get()
+        with session.no_autoflush:
+            file_ = content_api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                label="binary",
+                do_save=False,
+            )
+            content_api.update_file_data(file_, "file.bin", "application/octet-stream", b"\x00\x01")
+            content_api.save(file_)
+        assert (
+            get_revision_text(file_.current_revision, [PlainTextExtractor()], 100, str(tmp_path))
+            is None
+        )
+        assert not list(tmp_path.iterdir())
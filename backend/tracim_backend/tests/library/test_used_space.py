@@ -0,0 +1,143 @@
+import pytest
+import transaction
+
+from tracim_backend.lib.core.used_space import set_missing_file_sizes
+from tracim_backend.lib.core.used_space import update_users_used_space
+from tracim_backend.lib.core.used_space import update_workspaces_used_space
+from tracim_backend.models.auth import Profile
+from tracim_backend.models.data import ActionDescription
+from tracim_backend.models.data import ContentRevisionRO
+from tracim_backend.models.data import Workspace
+from tracim_backend.models.revision_protection import new_revision
+from tracim_backend.tests.fixtures import *  # noqa F403,F401
+
+
+@pytest.mark.usefixtures("base_fixture")
+class TestUsedSpace(object):
+    def _create_file(self, content_api, workspace, content_type_list, label, file_content):
+        with content_api._session.no_autoflush:
+            file_ = content_api.create(
+                content_type_slug=content_type_list.File.slug,
+                workspace=workspace,
+                parent=None,
+                label=label,
+                do_save=False,
+            )
+            content_api.update_file_data(file_, label + ".txt", "text/plain", file_content)
+        content_api.save(file_, ActionDescription.CREATION)
+        return file_
+
+    def test_unit__used_space__ok__updated_on_commit(
+        self, admin_user, session, content_api_factory, workspace_api_factory, content_type_list,
+    ) -> None:
+        content_api = content_api_factory.get()
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        other_workspace = workspace_api_factory.get().create_workspace("other", save_now=True)
+        file_ = self._create_file(content_api, workspace, content_type_list, "file", b"content")
+        self._create_file(content_api, other_workspace, content_type_list, "other", b"other")
+        assert file_.file_size == 7
+        assert workspace.used_space == 0
+        transaction.commit()
+        assert workspace.used_space == 7
+        assert other_workspace.used_space == 5
+        assert admin_user.used_space == 12
+
+        with new_revision(session=session, tm=transaction.manager, content=file_):
+            content_api.update_file_data(file_, "file.txt", "text/plain", b"new content")
+        content_api.save(file_)
+        transaction.commit()
+        # INFO - all revisions of a content are counted
+        assert workspace.used_space == 18
+        assert admin_user.used_space == 23
+
+        with new_revision(session=session, tm=transaction.manager, content=file_):
+            content_api.delete(file_)
+        content_api.save(file_)
+        transaction.commit()
+        assert workspace.used_space == 0
+        assert admin_user.used_space == 5
+
+        other_workspace.is_deleted = True
+        session.flush()
+        transaction.commit()
+        assert other_workspace.used_space == 5
+        assert admin_user.used_space == 0
+
+    def test_unit__used_space__ok__incremented_with_changed_contents_only(
+        self, admin_user, session, content_api_factory, workspace_api_factory, content_type_list,
+    ) -> None:
+        content_api = content_api_factory.get()
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        file_ = self._create_file(content_api, workspace, content_type_list, "file", b"content")
+        self._create_file(content_api, workspace, content_type_list, "other", b"other")
+        transaction.commit()
+        assert workspace.used_space == 12
+        # INFO - an offset which would be lost if used space was computed again from all files
+        session.query(Workspace).update(
+            {Workspace.used_space: Workspace.used_space + 100}, synchronize_session=False
+        )
+        transaction.commit()
+
+        with new_revision(session=session, tm=transaction.manager, content=file_):
+            content_api.archive(file_)
+        content_api.save(file_)
+        transaction.commit()
+        assert workspace.used_space == 105
+        assert admin_user.used_space == 5
+
+        with new_revision(session=session, tm=transaction.manager, content=file_):
+            content_api.unarchive(file_)
+        content_api.save(file_)
+        transaction.commit()
+        assert workspace.used_space == 112
+        assert admin_user.used_space == 12
+
+        update_workspaces_used_space(session, [workspace.workspace_id])
+        transaction.commit()
+        assert workspace.used_space == 12
+
+    def test_unit__used_space__ok__owner_changed(
+        self,
+        admin_user,
+        session,
+        content_api_factory,
+        workspace_api_factory,
+        user_api_factory,
+        content_type_list,
+    ) -> None:
+        user = user_api_factory.get().create_minimal_user(
+            email="this.is@user", profile=Profile.USER, save_now=True
+        )
+        content_api = content_api_factory.get()
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        self._create_file(content_api, workspace, content_type_list, "file", b"content")
+        transaction.commit()
+        assert admin_user.used_space == 7
+        assert user.used_space == 0
+
+        workspace.owner = user
+        session.flush()
+        transaction.commit()
+        assert admin_user.used_space == 0
+        assert user.used_space == 7
+
+    def test_unit__used_space__ok__recompute(
+        self, admin_user, session, content_api_factory, workspace_api_factory, content_type_list,
+    ) -> None:
+        content_api = content_api_factory.get()
+        workspace = workspace_api_factory.get().create_workspace("test workspace", save_now=True)
+        self._create_file(content_api, workspace, content_type_list, "file", b"content")
+        transaction.commit()
+        # INFO - files stored before file sizes were
+        session.query(ContentRevisionRO).update(
+            {ContentRevisionRO.file_size: None}, synchronize_session=False
+        )
+        session.query(Workspace).update({Workspace.used_space: 0}, synchronize_session=False)
+        session.expire_all()
+        assert set_missing_file_sizes(session) == 1
+        assert set_missing_file_sizes(session) == 0
+        assert update_workspaces_used_space(session) == {admin_user.user_id}
+        update_users_used_space(session)
+        transaction.commit()
+        assert workspace.used_space == 7
+        assert admin_user.used_space == 7
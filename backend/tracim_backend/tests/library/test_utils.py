@@ -1,8 +1,14 @@
+import io
+import socket
+
 from tracim_backend.lib.mail_notifier.utils import EmailAddress
+from tracim_backend.lib.utils.metrics import Metrics
 from tracim_backend.lib.utils.utils import ALLOWED_AUTOGEN_PASSWORD_CHAR
 from tracim_backend.lib.utils.utils import DEFAULT_PASSWORD_GEN_CHAR_LENGTH
 from tracim_backend.lib.utils.utils import ExtendedColor
 from tracim_backend.lib.utils.utils import clamp
+from tracim_backend.lib.utils.utils import get_file_hash
+from tracim_backend.lib.utils.utils import get_file_size
 from tracim_backend.lib.utils.utils import password_generator
 from tracim_backend.lib.utils.utils import string_to_list
 
@@ -86,6 +92,27 @@ class TestStringToList(object):
         ]
 
 
+class TestGetFileHash(object):
+    def test_unit__get_file_hash__ok__bytes_and_file_object(self):
+        content = b"a" * 3000000
+        file_hash = get_file_hash(content)
+        assert file_hash == "2a152c894398719c0570f83fac34ac03a0f6e8e474b995c2403aa5434f7b9dd4"
+        file_object = io.BytesIO(b"header" + content)
+        file_object.read(6)
+        assert get_file_hash(file_object) == file_hash
+        assert file_object.tell() == 6
+        assert get_file_hash(b"other content") != file_hash
+
+
+class TestGetFileSize(object):
+    def test_unit__get_file_size__ok__bytes_and_file_object(self):
+        assert get_file_size(b"content") == 7
+        file_object = io.BytesIO(b"header" + b"content")
+        file_object.read(6)
+        assert get_file_size(file_object) == 7
+        assert file_object.tell() == 6
+
+
 class TestEmailAddress(object):
     def test_unit__email_address_address__ok__nominal_case(self):
         john_address = EmailAddress(label="John Doe", email="john.doe@domainame.ndl")
@@ -154,3 +181,41 @@ class TestEmailAddress(object):
         assert john_address.email == "john.doe@domainame.ndl"
         assert john_address.force_angle_bracket is False
         assert john_address.address == "John Doe <john.doe@domainame.ndl>"
+
+
+class TestMetrics(object):
+    def test_unit__get_summaries__ok__nominal_case(self):
+        metrics = Metrics()
+        metrics.timing("publish", 10.0)
+        metrics.timing("publish", 30.0)
+        metrics.value("receivers", 4)
+        with metrics.timer("dispatch"):
+            pass
+        summaries = {summary.name: summary for summary in metrics.get_summaries()}
+        assert [summary.name for summary in metrics.get_summaries()] == [
+            "dispatch",
+            "publish",
+            "receivers",
+        ]
+        assert summaries["dispatch"].count == 1
+        assert summaries["publish"].unit == "ms"
+        assert summaries["publish"].count == 2
+        assert summaries["publish"].mean == 20.0
+        assert summaries["publish"].max == 30.0
+        assert summaries["receivers"].unit == "count"
+        assert summaries["receivers"].total == 4
+        metrics.reset()
+        assert metrics.get_summaries() == []
+
+    def test_unit__value__ok__sent_to_statsd(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        server.bind(("127.0.0.1", 0))
+        server.settimeout(5)
+        try:
+            metrics = Metrics(server.getsockname(), prefix="tracim.")
+            metrics.value("events.receivers", 3)
+            metrics.timing("live_messages.publish", 1.5)
+            assert server.recv(512) == b"tracim.events.receivers:3|h"
+            assert server.recv(512) == b"tracim.live_messages.publish:1.5|ms"
+        finally:
+            server.close()
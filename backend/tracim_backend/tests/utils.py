@@ -10,6 +10,8 @@ from PIL import Image
 import plaster
 import requests
 from requests import Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.session import sessionmaker
 import transaction
@@ -249,6 +251,29 @@ class EventHelper(object):
         return self._session.query(Event).order_by(Event.event_id.desc()).limit(1).one()
 
 
+class SqlQueryCounter(object):
+    """
+    Count sql queries sent to the database by any engine while used as a context manager:
+
+        with SqlQueryCounter() as counter:
+            web_testapp.get(...)
+        assert counter.count == 4
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def _on_cursor_execute(self, *args, **kwargs) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "SqlQueryCounter":
+        event.listen(Engine, "before_cursor_execute", self._on_cursor_execute)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        event.remove(Engine, "before_cursor_execute", self._on_cursor_execute)
+
+
 class DockerCompose:
     command = [
         "docker-compose",
@@ -304,3 +329,6 @@ def create_1000px_png_test_image() -> None:
 
 TEST_CONFIG_FILE_PATH = os.environ.get("TEST_CONFIG_FILE_PATH")
 TEST_PUSHPIN_FILE_PATH = os.environ.get("TEST_PUSHPIN_FILE_PATH")
+# INFO - benchmarks are skipped unless the size of generated data is given,
+# for example: TEST_BENCHMARK_SIZE=50000 pytest tracim_backend/tests/benchmark
+TEST_BENCHMARK_SIZE = int(os.environ.get("TEST_BENCHMARK_SIZE", 0))
@@ -16,6 +16,7 @@ from tracim_backend.app_models.validator import all_content_types_validator
 from tracim_backend.app_models.validator import bool_as_int_validator
 from tracim_backend.app_models.validator import content_global_status_validator
 from tracim_backend.app_models.validator import content_status_validator
+from tracim_backend.app_models.validator import event_types_validator
 from tracim_backend.app_models.validator import not_empty_string_validator
 from tracim_backend.app_models.validator import positive_int_validator
 from tracim_backend.app_models.validator import regex_string_as_list_of_int
@@ -31,6 +32,7 @@ from tracim_backend.app_models.validator import user_role_validator
 from tracim_backend.app_models.validator import user_timezone_validator
 from tracim_backend.app_models.validator import user_username_validator
 from tracim_backend.lib.utils.utils import DATETIME_FORMAT
+from tracim_backend.lib.utils.utils import DEFAULT_NB_ITEMS_PAGINATION
 from tracim_backend.models.auth import AuthType
 from tracim_backend.models.context_models import ActiveContentFilter
 from tracim_backend.models.context_models import CommentCreation
@@ -45,6 +47,7 @@ from tracim_backend.models.context_models import FileQuery
 from tracim_backend.models.context_models import FileRevisionPath
 from tracim_backend.models.context_models import FolderContentUpdate
 from tracim_backend.models.context_models import KnownMemberQuery
+from tracim_backend.models.context_models import LiveMessageQuery
 from tracim_backend.models.context_models import LoginCredentials
 from tracim_backend.models.context_models import MoveParams
 from tracim_backend.models.context_models import PageQuery
@@ -1058,6 +1061,15 @@ class AboutSchema(marshmallow.Schema):
     website = marshmallow.fields.URL()
 
 
+class MetricSchema(marshmallow.Schema):
+    name = marshmallow.fields.String(example="live_messages.publish")
+    unit = marshmallow.fields.String(example="ms", description="ms for timings, count otherwise")
+    count = marshmallow.fields.Int(example=12, description="number of measures")
+    total = marshmallow.fields.Float(example=240.5)
+    mean = marshmallow.fields.Float(example=20.04)
+    max = marshmallow.fields.Float(example=52.2)
+
+
 class ErrorCodeSchema(marshmallow.Schema):
     name = marshmallow.fields.Str()
     code = marshmallow.fields.Int()
@@ -1412,12 +1424,48 @@ class LiveMessageSchema(marshmallow.Schema):
     )
 
 
+class LiveMessagesPageSchema(marshmallow.Schema):
+    """Page of messages for the user."""
+
+    items = marshmallow.fields.Nested(LiveMessageSchema, many=True)
+    total = marshmallow.fields.Int(
+        example=120, description="number of messages matching the query, in all pages"
+    )
+    has_next = marshmallow.fields.Bool(
+        example=True, description="true if there are messages after the ones of this page"
+    )
+
+
 class GetLiveMessageQuerySchema(marshmallow.Schema):
     """Possible query parameters for the GET messages endpoint."""
 
     read_status = marshmallow.fields.String(
-        missing=ReadStatus.ALL.value, validator=OneOf(ReadStatus.values())
+        missing=ReadStatus.ALL.value, validate=OneOf(ReadStatus.values())
+    )
+    after_event_id = marshmallow.fields.Int(
+        example=42,
+        missing=0,
+        description="return only messages of events created after this one, "
+        "messages are sorted by event_id",
+        validate=positive_int_validator,
+    )
+    count = marshmallow.fields.Int(
+        example=25,
+        missing=DEFAULT_NB_ITEMS_PAGINATION,
+        description="maximum number of returned messages",
+        validate=strictly_positive_int_validator,
     )
+    event_types = StrippedString(
+        example="content.modified,workspace_member.created",
+        missing="",
+        description="comma separated list of event types, return all types if not set. "
+        "The subtype is optional: content.modified matches content.modified.file",
+        validate=event_types_validator,
+    )
+
+    @post_load
+    def make_query_object(self, data: typing.Dict[str, typing.Any]) -> object:
+        return LiveMessageQuery(**data)
 
 
 class TracimLiveEventHeaderSchema(marshmallow.Schema):
@@ -9,7 +9,9 @@ from tracim_backend.extensions import hapic
 from tracim_backend.lib.core.application import ApplicationApi
 from tracim_backend.lib.core.system import SystemApi
 from tracim_backend.lib.utils.authorization import check_right
+from tracim_backend.lib.utils.authorization import is_administrator
 from tracim_backend.lib.utils.authorization import is_user
+from tracim_backend.lib.utils.metrics import get_metrics
 from tracim_backend.lib.utils.request import TracimRequest
 from tracim_backend.lib.utils.utils import get_timezones_list
 from tracim_backend.views.controllers import Controller
@@ -19,6 +21,7 @@ from tracim_backend.views.core_api.schemas import ConfigSchema
 from tracim_backend.views.core_api.schemas import ContentTypeSchema
 from tracim_backend.views.core_api.schemas import ErrorCodeSchema
 from tracim_backend.views.core_api.schemas import GetUsernameAvailability
+from tracim_backend.views.core_api.schemas import MetricSchema
 from tracim_backend.views.core_api.schemas import TimezoneSchema
 from tracim_backend.views.core_api.schemas import UsernameAvailability
 
@@ -92,6 +95,19 @@ class SystemController(Controller):
         system_api = SystemApi(app_config, request.dbsession)
         return system_api.get_about()
 
+    @hapic.with_api_doc(tags=[SWAGGER_TAG_SYSTEM_ENDPOINTS])
+    @check_right(is_administrator)
+    @hapic.output_body(MetricSchema(many=True))
+    def metrics(self, context, request: TracimRequest, hapic_data=None):
+        """
+        Get timings and sizes of the live messages pipeline measured by the process
+        serving this request, since it started. Metrics are not shared between
+        processes: those measured by the RQ worker in async jobs mode are only
+        available from a statsd server.
+        """
+        app_config = request.registry.settings["CFG"]  # type: CFG
+        return get_metrics(app_config).get_summaries()
+
     @hapic.with_api_doc(tags=[SWAGGER_TAG_SYSTEM_ENDPOINTS])
     @hapic.output_body(ConfigSchema())
     def config(self, context, request: TracimRequest, hapic_data=None):
@@ -123,6 +139,10 @@ class SystemController(Controller):
         configurator.add_route("about", "/system/about", request_method="GET")
         configurator.add_view(self.about, route_name="about")
 
+        # Metrics
+        configurator.add_route("metrics", "/system/metrics", request_method="GET")
+        configurator.add_view(self.metrics, route_name="metrics")
+
         # Config
         configurator.add_route("config", "/system/config", request_method="GET")
         configurator.add_view(self.config, route_name="config")
@@ -1,5 +1,3 @@
-import typing
-
 from hapic import HapicData
 from pyramid.config import Configurator
 from pyramid.response import Response
@@ -10,6 +8,7 @@ from tracim_backend.exceptions import EmailAlreadyExistInDb
 from tracim_backend.exceptions import ExternalAuthUserEmailModificationDisallowed
 from tracim_backend.exceptions import ExternalAuthUserPasswordModificationDisallowed
 from tracim_backend.exceptions import PasswordDoNotMatch
+from tracim_backend.exceptions import TooManyLiveMessagesStreams
 from tracim_backend.exceptions import TracimValidationFailed
 from tracim_backend.exceptions import UserCantChangeIsOwnProfile
 from tracim_backend.exceptions import UserCantDeleteHimself
@@ -19,6 +18,7 @@ from tracim_backend.exceptions import WrongUserPassword
 from tracim_backend.extensions import hapic
 from tracim_backend.lib.core.content import ContentApi
 from tracim_backend.lib.core.event import EventApi
+from tracim_backend.lib.core.live_messages import LiveMessagesLib
 from tracim_backend.lib.core.user import UserApi
 from tracim_backend.lib.core.workspace import WorkspaceApi
 from tracim_backend.lib.utils.authorization import check_right
@@ -29,15 +29,13 @@ from tracim_backend.lib.utils.utils import generate_documentation_swagger_tag
 from tracim_backend.lib.utils.utils import password_generator
 from tracim_backend.models.auth import AuthType
 from tracim_backend.models.auth import Profile
-from tracim_backend.models.event import Message
-from tracim_backend.models.event import ReadStatus
 from tracim_backend.views.controllers import Controller
 from tracim_backend.views.core_api.schemas import ActiveContentFilterQuerySchema
 from tracim_backend.views.core_api.schemas import ContentDigestSchema
 from tracim_backend.views.core_api.schemas import ContentIdsQuerySchema
 from tracim_backend.views.core_api.schemas import GetLiveMessageQuerySchema
 from tracim_backend.views.core_api.schemas import KnownMemberQuerySchema
-from tracim_backend.views.core_api.schemas import LiveMessageSchema
+from tracim_backend.views.core_api.schemas import LiveMessagesPageSchema
 from tracim_backend.views.core_api.schemas import NoContentSchema
 from tracim_backend.views.core_api.schemas import ReadStatusSchema
 from tracim_backend.views.core_api.schemas import SetEmailSchema
@@ -458,7 +456,7 @@ class UserController(Controller):
         last_actives = api.get_last_active(
             workspace=workspace, limit=content_filter.limit or None, before_content=before_content
         )
-        return [api.get_content_in_context(content) for content in last_actives]
+        return api.get_contents_in_context(last_actives)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__USER_CONTENT_ENDPOINTS])
     @check_right(has_personal_access)
@@ -489,7 +487,7 @@ class UserController(Controller):
             before_content=None,
             content_ids=hapic_data.query.content_ids or None,
         )
-        return [api.get_content_in_context(content) for content in last_actives]
+        return api.get_contents_in_context(last_actives)
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__USER_CONTENT_ENDPOINTS])
     @check_right(has_personal_access)
@@ -590,41 +588,54 @@ class UserController(Controller):
     @check_right(has_personal_access)
     @hapic.input_path(UserIdPathSchema())
     @hapic.input_query(GetLiveMessageQuerySchema())
-    @hapic.output_body(LiveMessageSchema(many=True))
-    def get_user_messages(
-        self, context, request: TracimRequest, hapic_data: HapicData
-    ) -> typing.List[Message]:
+    @hapic.output_body(LiveMessagesPageSchema())
+    def get_user_messages(self, context, request: TracimRequest, hapic_data: HapicData) -> Response:
         """
-        Returns user messages matching the given query
+        Returns user messages matching the given query, sorted by event_id.
+        Use after_event_id with the event_id of the last message of a page to get the next one.
         """
         app_config = request.registry.settings["CFG"]  # type: CFG
         event_api = EventApi(request.current_user, request.dbsession, app_config)
-        return event_api.get_messages_for_user(
-            request.candidate_user.user_id, ReadStatus(hapic_data.query["read_status"])
+        messages_page = event_api.get_paginated_messages_for_user(
+            user_id=request.candidate_user.user_id,
+            read_status=hapic_data.query.read_status,
+            after_event_id=hapic_data.query.after_event_id,
+            count=hapic_data.query.count,
+            event_types=hapic_data.query.event_types,
+        )
+        # INFO - fields of events are returned as the JSON text stored with them,
+        # hapic returns pyramid responses as is
+        return Response(
+            body=LiveMessagesLib.serialize_messages_page(messages_page).encode("utf-8"),
+            content_type="application/json",
+            charset="utf-8",
         )
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__USER_EVENT_ENDPOINTS])
     @check_right(has_personal_access)
     @hapic.input_path(UserIdPathSchema())
+    @hapic.output_body(NoContentSchema(), default_http_code=HTTPStatus.NO_CONTENT)
+    def set_user_messages_as_read(self, context, request: TracimRequest, hapic_data=None):
+        """
+        set all unread messages of the user as read
+        """
+        app_config = request.registry.settings["CFG"]  # type: CFG
+        event_api = EventApi(request.current_user, request.dbsession, app_config)
+        event_api.mark_user_messages_as_read(request.candidate_user.user_id)
+        return
+
+    @hapic.with_api_doc(tags=[SWAGGER_TAG__USER_EVENT_ENDPOINTS])
+    @hapic.handle_exception(TooManyLiveMessagesStreams, HTTPStatus.SERVICE_UNAVAILABLE)
+    @check_right(has_personal_access)
+    @hapic.input_path(UserIdPathSchema())
     @hapic.input_headers(TracimLiveEventHeaderSchema())
     def open_message_stream(self, context, request: TracimRequest, hapic_data=None) -> Response:
         """
         Open the message stream for the given user.
         Tracim Live Message Events as ServerSide Event Stream
         """
-        user_channel_name = "user_{}".format(request.candidate_user.user_id)
-        headers = [
-            # Here we ask push pin to keep the connection open
-            ("Grip-Hold", "stream"),
-            # and register this connection on the given channel
-            # multiple channels subscription is possible
-            ("Grip-Channel", user_channel_name),
-            # content type for SSE
-            ("Content-Type", "text/event-stream"),
-            # do not cache the events
-            ("Cache-Control", "no-cache"),
-        ]
-        return Response(headerlist=headers, charset="utf-8", status_code=200)
+        app_config = request.registry.settings["CFG"]  # type: CFG
+        return LiveMessagesLib(app_config).get_user_stream_response(request.candidate_user.user_id)
 
     def bind(self, configurator: Configurator) -> None:
         """
@@ -797,3 +808,10 @@ class UserController(Controller):
             "messages", "/users/{user_id:\d+}/messages", request_method="GET",  # noqa: W605
         )
         configurator.add_view(self.get_user_messages, route_name="messages")
+
+        configurator.add_route(
+            "read_messages",
+            "/users/{user_id:\d+}/messages/read",  # noqa: W605
+            request_method="PUT",
+        )
+        configurator.add_view(self.set_user_messages_as_read, route_name="read_messages")
@@ -10,6 +10,7 @@ from tracim_backend.exceptions import ConflictingMoveInChild
 from tracim_backend.exceptions import ConflictingMoveInItself
 from tracim_backend.exceptions import ContentFilenameAlreadyUsedInFolder
 from tracim_backend.exceptions import ContentNotFound
+from tracim_backend.exceptions import ContentTreeTooDeep
 from tracim_backend.exceptions import EmailValidationFailed
 from tracim_backend.exceptions import EmptyLabelNotAllowed
 from tracim_backend.exceptions import ParentNotFound
@@ -431,7 +432,7 @@ class WorkspaceController(Controller):
             label=content_filter.label,
             order_by_properties=[Content.label],
         )
-        contents = [api.get_content_in_context(content) for content in contents]
+        contents = api.get_contents_in_context(contents)
         return contents
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_ENDPOINTS])
@@ -439,6 +440,7 @@ class WorkspaceController(Controller):
     @hapic.handle_exception(UnallowedSubContent, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(ContentFilenameAlreadyUsedInFolder, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(ParentNotFound, HTTPStatus.BAD_REQUEST)
+    @hapic.handle_exception(ContentTreeTooDeep, HTTPStatus.BAD_REQUEST)
     @check_right(can_create_content)
     @hapic.input_path(WorkspaceIdPathSchema())
     @hapic.input_body(ContentCreationSchema())
@@ -474,7 +476,6 @@ class WorkspaceController(Controller):
             parent=parent,
         )
         api.save(content, ActionDescription.CREATION)
-        api.execute_created_content_actions(content)
         content = api.get_content_in_context(content)
         return content
 
@@ -531,6 +532,7 @@ class WorkspaceController(Controller):
     @hapic.handle_exception(UnallowedSubContent, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(ConflictingMoveInItself, HTTPStatus.BAD_REQUEST)
     @hapic.handle_exception(ConflictingMoveInChild, HTTPStatus.BAD_REQUEST)
+    @hapic.handle_exception(ContentTreeTooDeep, HTTPStatus.BAD_REQUEST)
     @check_right(can_move_content)
     @hapic.input_path(WorkspaceAndContentIdPathSchema())
     @hapic.input_body(ContentMoveSchema())
@@ -564,7 +566,6 @@ class WorkspaceController(Controller):
                 new_content_namespace=ContentNamespaces.CONTENT,
                 must_stay_in_same_workspace=False,
             )
-            api.execute_update_content_actions(content)
         updated_content = api.get_one(path_data.content_id, content_type=content_type_list.Any_SLUG)
         return api.get_content_in_context(updated_content)
 
@@ -590,7 +591,6 @@ class WorkspaceController(Controller):
         content = api.get_one(path_data.content_id, content_type=content_type_list.Any_SLUG)
         with new_revision(session=request.dbsession, tm=transaction.manager, content=content):
             api.delete(content)
-            api.execute_update_content_actions(content)
         return
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_ALL_TRASH_AND_RESTORE_ENDPOINTS])
@@ -613,7 +613,6 @@ class WorkspaceController(Controller):
         content = api.get_one(path_data.content_id, content_type=content_type_list.Any_SLUG)
         with new_revision(session=request.dbsession, tm=transaction.manager, content=content):
             api.undelete(content)
-            api.execute_update_content_actions(content)
         return
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_ALL_ARCHIVE_AND_RESTORE_ENDPOINTS])
@@ -640,7 +639,6 @@ class WorkspaceController(Controller):
         content = api.get_one(path_data.content_id, content_type=content_type_list.Any_SLUG)
         with new_revision(session=request.dbsession, tm=transaction.manager, content=content):
             api.archive(content)
-            api.execute_update_content_actions(content)
         return
 
     @hapic.with_api_doc(tags=[SWAGGER_TAG__CONTENT_ALL_ARCHIVE_AND_RESTORE_ENDPOINTS])
@@ -663,7 +661,6 @@ class WorkspaceController(Controller):
         content = api.get_one(path_data.content_id, content_type=content_type_list.Any_SLUG)
         with new_revision(session=request.dbsession, tm=transaction.manager, content=content):
             api.unarchive(content)
-            api.execute_update_content_actions(content)
         return
 
     def bind(self, configurator: Configurator) -> None:
@@ -0,0 +1,5 @@
+from tracim_backend.views.search_api.search_controller import SearchController
+
+
+class SQLSearchController(SearchController):
+    pass
@@ -141,26 +141,42 @@ export class File extends React.Component {
     this.loadTimeline()
   }
 
-  handleContentModified = (data) => {
+  handleContentModified = async (data) => {
     const { state, props } = this
     if (data.content.content_id !== state.content.content_id) return
 
     this.sendGlobalFlashMessage(props.t('File has been updated'), 'info')
 
+    // INFO - preview data of files is not sent in live messages as computing it is expensive
+    // for the backend, it is fetched from the API only by the clients displaying the file
+    const previewData = data.content.page_nb === undefined ? await this.loadPreviewData() : {}
+
     const filenameNoExtension = removeExtensionOfFilename(data.content.filename)
     this.setHeadTitle(filenameNoExtension)
     this.setState(prev => ({
       content: {
         ...prev.content,
         ...data.content,
+        ...previewData,
         previewUrl: buildFilePreviewUrl(prev.config.apiUrl, prev.content.workspace_id, data.content.content_id, data.content.current_revision_id, filenameNoExtension, 1, 500, 500),
-        lightboxUrlList: (new Array(data.content.page_nb)).fill(null).map((n, i) => i + 1).map(pageNb => // create an array [1..revision.page_nb]
+        lightboxUrlList: (new Array(previewData.page_nb || data.content.page_nb || prev.content.page_nb)).fill(null).map((n, i) => i + 1).map(pageNb => // create an array [1..revision.page_nb]
           buildFilePreviewUrl(state.config.apiUrl, state.content.workspace_id, data.content.content_id, data.content.current_revision_id, filenameNoExtension, pageNb, 1920, 1080)
         )
       }
     }))
   }
 
+  loadPreviewData = async () => {
+    const { state } = this
+    const response = await handleFetchResult(await getFileContent(state.config.apiUrl, state.content.workspace_id, state.content.content_id))
+    if (response.apiResponse.status !== 200) return {}
+    return {
+      page_nb: response.body.page_nb,
+      has_pdf_preview: response.body.has_pdf_preview,
+      has_jpeg_preview: response.body.has_jpeg_preview
+    }
+  }
+
   handleContentCommentCreated = (data) => {
     if (data.content.parent_id === this.state.content.content_id) {
       const sortedNewTimeLine = sortTimelineByDate([